@@ -10,11 +10,13 @@ from fastapi.templating import Jinja2Templates
 from fastapi import Form
 import random
 from pathlib import Path
+from datetime import timedelta
 import pandas as pd
 from opening_question_analysis import auto_analysis, ModelCallError, LabelingError, EmbeddingError
 import asyncio
 from functools import partial
 from pathlib import Path
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Load .env if present (project root)
@@ -71,7 +73,36 @@ except Exception as e:  # pragma: no cover
 
 __version__ = "0.0.1"
 
-app = FastAPI(title="NPS Report Analyzer", version=__version__)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时预热V3智能体池（词典、停用词、正则与LLM客户端每进程只加载一次）
+    try:
+        from nps_report_v3.config import get_settings
+        from nps_report_v3.agents.pool import get_agent_pool
+        if get_settings().enable_agent_pool and get_settings().preload_agents:
+            get_agent_pool().preload()
+        # CPU密集型步骤（统计、聚类）的工作进程在启动时拉起，避免首个请求承担进程启动开销
+        from nps_report_v3.utils import get_cpu_executor
+        await get_cpu_executor().start()
+    except Exception as e:  # pragma: no cover - V3为可选依赖
+        logger.warning("V3 agent preload skipped: %s", e)
+
+    yield
+    # 停止CPU密集型计算的工作进程池
+    try:
+        from nps_report_v3.utils import get_cpu_executor
+        get_cpu_executor().shutdown(wait=False)
+    except ImportError:
+        pass
+    # 关闭共享的大模型HTTP连接池（v1/v2/v3共用）
+    try:
+        from nps_report_v3.llm.transport import close_http_transport
+        await close_http_transport()
+    except ImportError:
+        pass
+
+
+app = FastAPI(title="NPS Report Analyzer", version=__version__, lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -83,8 +114,15 @@ try:  # pragma: no cover - optional dependency during initialization
 except Exception as exc:  # pragma: no cover
     logger.warning("V3 router not registered: %s", exc)
 
-# 创建一个信号量来限制并发请求数为2
-request_semaphore = asyncio.Semaphore(2)
+# 请求级并发只用于限制内存占用；大模型调用的并发由自适应并发控制器按供应商调节
+# 上限与V3接口共用同一配置项（MAX_CONCURRENT_REQUESTS）
+try:
+    from nps_report_v3.config import get_settings
+    max_concurrent_requests = get_settings().max_concurrent_requests
+except Exception as exc:  # pragma: no cover - V3为可选依赖
+    logger.warning("V3 settings unavailable, using default request concurrency: %s", exc)
+    max_concurrent_requests = 8
+request_semaphore = asyncio.Semaphore(max_concurrent_requests)
 
 # 自定义验证错误类
 class CustomValidationError(Exception):
@@ -443,6 +481,43 @@ async def nps_report_v0(payload: Dict[str, Any] = Body(...)):
 
 # ---------- Web UI routes ----------
 
+def _nps_cube():
+    """Persistent V3 NPS aggregate cube, or None if it is disabled or still empty."""
+    try:
+        from nps_report_v3.config import get_settings
+        from nps_report_v3.cache import get_nps_cube_store
+        if not get_settings().enable_nps_cube:
+            return None
+        cube = get_nps_cube_store().cube()
+    except Exception as e:
+        logger.warning("NPS cube unavailable: %s", e)
+        return None
+    return cube if cube.responses else None
+
+
+def _cube_filters(product_line: Optional[str], channel: Optional[str], customer_segment: Optional[str]) -> Dict[str, str]:
+    filters = {"product_line": product_line, "channel": channel, "customer_segment": customer_segment}
+    return {name: value for name, value in filters.items() if value}
+
+
+def _kpis(days: Optional[int] = None, **filters: str) -> Dict[str, Any]:
+    """Overall KPIs from the aggregate cube (trailing ``days`` if given), demo data until surveys are analysed."""
+    cube = _nps_cube()
+    if cube is None:
+        return _demo_kpis()
+
+    from nps_report_v3.state.nps_cube import summarize
+    summary = summarize(cube.rollup(last_days=days, **filters)[()])
+    return {
+        "overall_nps": summary["nps"],
+        "promoters": summary["promoters_percentage"],
+        "detractors": summary["detractors_percentage"],
+        "passives": summary["passives_percentage"],
+        "responses": summary["count"],
+        "note": f"NPS聚合数据（{summary['count']}条回复）",
+    }
+
+
 def _demo_kpis() -> Dict[str, Any]:
     return {
         "overall_nps": 68.5,
@@ -468,7 +543,7 @@ def _calc_segments_from_distribution(user_distribution: List[Dict[str, Any]]):
 
 @app.get("/")
 async def ui_index(request: Request):
-    kpis = _demo_kpis()
+    kpis = _kpis()
     cards = [
         {"title": "整体NPS得分", "value": kpis["overall_nps"], "desc": "较行业平均高15.3分"},
         {"title": "推荐者比例", "value": f"{kpis['promoters']:.1f}%", "desc": "推荐者占比持续提升"},
@@ -1067,19 +1142,73 @@ async def ui_report_detail(request: Request, report_id: str):
 # ---------- Simple KPI APIs for HTMX/clients ----------
 
 @app.get("/api/kpi/overview")
-async def api_kpi_overview():
-    return _demo_kpis()
+async def api_kpi_overview(
+    days: Optional[int] = None,
+    product_line: Optional[str] = None,
+    channel: Optional[str] = None,
+    customer_segment: Optional[str] = None,
+):
+    """Overall NPS, optionally for the trailing ``days`` and one product line/channel/segment."""
+    return _kpis(days, **_cube_filters(product_line, channel, customer_segment))
 
 @app.get("/api/kpi/brands")
-async def api_kpi_brands():
-    return {
-        "items": [
-            {"brand": "安慕希", "nps": 72, "trend": "up"},
-            {"brand": "金典", "nps": 69, "trend": "up"},
-            {"brand": "舒化", "nps": 64, "trend": "up"},
-            {"brand": "QQ星", "nps": 58, "trend": "down"},
-        ]
-    }
+async def api_kpi_brands(days: int = 30):
+    """NPS per product line; trend compares the last ``days`` with the ``days`` before."""
+    cube = _nps_cube()
+    if cube is None:
+        return {
+            "items": [
+                {"brand": "安慕希", "nps": 72, "trend": "up"},
+                {"brand": "金典", "nps": 69, "trend": "up"},
+                {"brand": "舒化", "nps": 64, "trend": "up"},
+                {"brand": "QQ星", "nps": 58, "trend": "down"},
+            ]
+        }
+
+    from nps_report_v3.state.nps_cube import summarize
+    last_day = cube.days()[1]
+    current = previous = {}
+    if last_day is not None:
+        current = cube.rollup("product_line", last_days=days)
+        previous = cube.rollup("product_line", until=last_day - timedelta(days=days), last_days=days)
+
+    items = []
+    for brand, counts in cube.rollup("product_line").items():
+        if brand is None:
+            continue
+        trend = "flat"
+        if brand in current and brand in previous:
+            change = summarize(current[brand])["nps"] - summarize(previous[brand])["nps"]
+            trend = "up" if change > 0 else "down" if change < 0 else "flat"
+        summary = summarize(counts)
+        items.append({"brand": brand, "nps": summary["nps"], "responses": summary["count"], "trend": trend})
+
+    return {"items": sorted(items, key=lambda item: item["nps"], reverse=True)}
+
+@app.get("/api/kpi/trend")
+async def api_kpi_trend(
+    bucket: str = "week",
+    days: Optional[int] = 90,
+    product_line: Optional[str] = None,
+    channel: Optional[str] = None,
+    customer_segment: Optional[str] = None,
+):
+    """NPS per day/week/month over the trailing ``days`` (all days if omitted)."""
+    if bucket not in ("day", "week", "month"):
+        raise HTTPException(status_code=400, detail="bucket must be day, week or month")
+
+    cube = _nps_cube()
+    if cube is None:
+        return {"bucket": bucket, "items": []}
+
+    from nps_report_v3.state.nps_cube import summarize
+    rollup = cube.rollup(bucket, last_days=days, **_cube_filters(product_line, channel, customer_segment))
+    items = [
+        {"period": period, "nps": summary["nps"], "responses": summary["count"]}
+        for period, summary in ((period, summarize(counts)) for period, counts in rollup.items())
+        if period is not None
+    ]
+    return {"bucket": bucket, "items": items}
 
 @app.get("/api/reports")
 async def api_reports_list():
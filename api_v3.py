@@ -6,7 +6,6 @@ three-pass analysis: Foundation, Analysis, and Consulting passes.
 
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
 import time
@@ -17,7 +16,7 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 
 from fastapi import APIRouter, Body, Query, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 
 # Import agent logger
@@ -115,12 +114,13 @@ class AgentLogsResponse(BaseModel):
     sessions: List[Dict[str, Any]]
 
 logger = logging.getLogger("nps_report_v3.api")
-request_semaphore = asyncio.Semaphore(2)
 
 
 async def execute_workflow_with_logging(workflow, raw_data: List[Dict],
                                         config: Optional[Dict] = None,
-                                        request_id: Optional[str] = None) -> Dict[str, Any]:
+                                        request_id: Optional[str] = None,
+                                        deadline_seconds: Optional[float] = None,
+                                        run_id: Optional[str] = None) -> Dict[str, Any]:
     """Execute workflow with comprehensive agent logging including LLM calls.
 
     Args:
@@ -128,6 +128,8 @@ async def execute_workflow_with_logging(workflow, raw_data: List[Dict],
         raw_data: Raw survey data
         config: Analysis configuration
         request_id: Request identifier for logging
+        deadline_seconds: Request time budget (server default if None)
+        run_id: Workflow run id keying checkpoints and LLM fair share (new if None)
 
     Returns:
         Workflow execution result with comprehensive agent logs
@@ -150,7 +152,7 @@ async def execute_workflow_with_logging(workflow, raw_data: List[Dict],
     try:
         # Execute the workflow with enhanced monitoring
         agent_log.logger.info("🔄 Executing workflow with comprehensive logging...")
-        result = await workflow.execute(raw_data, config)
+        result = await workflow.execute(raw_data, config, deadline_seconds=deadline_seconds, run_id=run_id)
 
         # Post-process to extract and log detailed agent information
         if isinstance(result, dict):
@@ -312,6 +314,14 @@ _v3_monitoring: Optional[Any] = None
 
 try:
     from nps_report_v3.workflow import WorkflowOrchestrator
+    from nps_report_v3.config import get_settings
+    from nps_report_v3.utils import SemaphoreConfig, get_semaphore_manager
+
+    # Request admission only bounds memory; LLM calls are governed per provider
+    get_semaphore_manager().register(SemaphoreConfig(
+        name="v3_requests",
+        max_concurrent=get_settings().max_concurrent_requests
+    ))
     from nps_report_v3.models.request import NPSAnalysisRequest
     from nps_report_v3.models.response import NPSAnalysisResponse
     from nps_report_v3.monitoring.integration import MonitoringIntegration
@@ -577,6 +587,7 @@ async def v3_info():
         ] if V3_AVAILABLE else [],
         "endpoints": [
             "/nps-report-v3 - Complete V3 analysis workflow",
+            "/nps-report-v3/batch - Concurrent multi-survey analysis (NDJSON stream)",
             "/nps-report-v3/demo - Run with demo data",
             "/nps-report-v3/health - Health check",
             "/nps-report-v3/info - System info"
@@ -585,6 +596,13 @@ async def v3_info():
 
     if V3_IMPORT_ERROR:
         info["import_error"] = V3_IMPORT_ERROR
+    else:
+        from nps_report_v3.agents.pool import get_agent_pool
+        from nps_report_v3.agents.steps import get_retry_metrics
+        from nps_report_v3.utils import get_cpu_executor
+        info["agent_pool"] = get_agent_pool().get_metrics()
+        info["agent_retries"] = get_retry_metrics().get_metrics()
+        info["cpu_executor"] = get_cpu_executor().get_metrics()
 
     return info
 
@@ -715,11 +733,14 @@ async def nps_report_v3(payload: Dict[str, Any] = Body(..., example=_load_v3_sam
             },
         )
 
-    async with request_semaphore:
+    async with get_semaphore_manager().acquire("v3_requests"):
         start_time = time.perf_counter()
 
+        run_id = None
         try:
             workflow, monitoring = get_v3_workflow()
+            # The orchestrator is shared; each request runs under its own id
+            run_id = workflow.new_run_id()
 
             # Convert V2 format to V3 format for backward compatibility
             try:
@@ -737,11 +758,13 @@ async def nps_report_v3(payload: Dict[str, Any] = Body(..., example=_load_v3_sam
             with monitoring.monitor.track_workflow("nps_v3_analysis", "complete_workflow"):
                 # Extract raw survey data and config from validated request
                 raw_data = [resp.dict() for resp in validated_request.survey_data.survey_responses]
-                config = validated_request.analysis_config.dict() if validated_request.analysis_config else None
+                config = _analysis_config(payload, validated_request)
 
                 # Execute with comprehensive agent logging
                 result = await execute_workflow_with_logging(
-                    workflow, raw_data, config, validated_request.request_id
+                    workflow, raw_data, config, validated_request.request_id,
+                    deadline_seconds=payload.get("deadline_seconds"),
+                    run_id=run_id
                 )
 
             processing_time = time.perf_counter() - start_time
@@ -778,6 +801,7 @@ async def nps_report_v3(payload: Dict[str, Any] = Body(..., example=_load_v3_sam
                     "model_version": "nps-report-v3-multi-agent",
                     "passes_completed": ["foundation", "analysis", "consulting"],
                     "agents_executed": 17,  # 4 + 9 + 4 agents
+                    "degraded_agents": (result.get("deadline_report") or {}).get("degraded_agents", {}),
                     "timestamp": datetime.now().isoformat()
                 }
 
@@ -798,6 +822,8 @@ async def nps_report_v3(payload: Dict[str, Any] = Body(..., example=_load_v3_sam
                 content={
                     "error": "V3 分析失败",
                     "details": str(exc),
+                    # Run id to resume from its checkpoints via /recover/{workflow_id}
+                    "workflow_id": run_id,
                     "processing_time_seconds": processing_time,
                     "fallback_options": [
                         "/nps-report-v2 - Try V2 workflow",
@@ -807,6 +833,139 @@ async def nps_report_v3(payload: Dict[str, Any] = Body(..., example=_load_v3_sam
             )
 
 
+def _analysis_config(payload: Dict[str, Any], validated_request: NPSAnalysisRequest) -> Optional[Dict[str, Any]]:
+    """Workflow config of a request, carrying its ``survey_id`` when the caller gave one."""
+    config = validated_request.analysis_config.dict() if validated_request.analysis_config else {}
+    if payload.get("survey_id"):
+        # Caller-chosen ids scope the NPS cube's response dedupe across resubmissions;
+        # surveys without one are not folded into the cube
+        config["input_metadata"] = {"survey_id": payload["survey_id"]}
+    return config or None
+
+
+def _prepare_v3_survey(payload: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Convert and validate one batch entry into an ``execute_many`` survey."""
+    v3_payload = _convert_v2_to_v3_format(payload)
+    validated_request = NPSAnalysisRequest(**v3_payload)
+    return {
+        "survey_id": payload.get("survey_id") or validated_request.request_id or f"survey_{index + 1}",
+        "raw_data": [resp.dict() for resp in validated_request.survey_data.survey_responses],
+        "config": _analysis_config(payload, validated_request),
+        "deadline_seconds": payload.get("deadline_seconds")
+    }
+
+
+@router.post("/nps-report-v3/batch")
+async def nps_report_v3_batch(payload: Dict[str, Any] = Body(...)):
+    """
+    Run the V3 workflow for many surveys concurrently and stream results as NDJSON.
+
+    Accepts ``{"surveys": [<V2 or V3 payload, optional "survey_id">, ...]}`` plus
+    optional ``max_concurrency`` and ``deadline_seconds``. Each survey's result is
+    written as one ``{"type": "survey", ...}`` line as soon as it finishes (not in
+    submission order); a final ``{"type": "summary", ...}`` line closes the stream.
+    LLM slots are shared round-robin between surveys, so small surveys are not
+    held up behind large ones.
+    """
+    workflow, _ = get_v3_workflow()
+    settings = get_settings()
+
+    entries = payload.get("surveys")
+    if not isinstance(entries, list) or not entries:
+        raise HTTPException(status_code=400, detail="'surveys' must be a non-empty list")
+    if len(entries) > settings.batch_max_surveys:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(entries)} surveys; the limit is {settings.batch_max_surveys}"
+        )
+
+    surveys = []
+    for index, entry in enumerate(entries):
+        try:
+            surveys.append(_prepare_v3_survey(entry, index))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid survey at index {index}: {e}")
+
+    persist_outputs = payload.get("persist_outputs", True)
+
+    async def result_stream():
+        start_time = time.perf_counter()
+        counts = {"completed": 0, "failed": 0}
+
+        # One admission slot for the whole batch; surveys share it under batch concurrency
+        async with get_semaphore_manager().acquire("v3_requests"):
+            async for outcome in workflow.execute_many(
+                surveys,
+                max_concurrency=payload.get("max_concurrency"),
+                deadline_seconds=payload.get("deadline_seconds")
+            ):
+                counts[outcome["status"]] += 1
+                line = {
+                    "type": "survey",
+                    "survey_id": outcome["survey_id"],
+                    "index": outcome["index"],
+                    "status": outcome["status"],
+                    "duration_seconds": outcome["duration_seconds"]
+                }
+                if outcome["status"] == "completed":
+                    result = outcome["state"]
+                    result["request_id"] = outcome["survey_id"]
+                    result["analysis_status"] = "completed"
+                    result["timestamp"] = datetime.now().isoformat()
+                    if persist_outputs:
+                        _persist_v3_outputs(result)
+                    line["result"] = make_json_serializable(result)
+                else:
+                    line["error"] = outcome["error"]
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+
+        yield json.dumps({
+            "type": "summary",
+            "surveys": len(surveys),
+            "completed": counts["completed"],
+            "failed": counts["failed"],
+            "processing_time_seconds": round(time.perf_counter() - start_time, 3)
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/nps-report-v3/executive-summary/stream")
+async def nps_report_v3_executive_summary_stream(payload: Dict[str, Any] = Body(...)):
+    """Stream the C5 executive summary for a completed V3 analysis as server-sent events.
+
+    Accepts a V3 analysis result (or ``{"state": {...}}``) and forwards summary
+    deltas as ``data: {"delta": ...}`` events, ending with ``data: [DONE]``.
+    """
+    try:
+        from nps_report_v3.agents.consulting.C5_executive_synthesizer_agent import ExecutiveSynthesizerAgent
+        from nps_report_v3.llm.client import create_llm_client
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"NPS V3 system unavailable: {exc}")
+
+    state = payload.get("state", payload)
+    agent = ExecutiveSynthesizerAgent(llm_client=create_llm_client())
+
+    async def event_stream():
+        try:
+            async for delta in agent.stream_executive_summary(state):
+                yield f"data: {json.dumps({'delta': delta}, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as exc:
+            logger.error("Executive summary stream failed: %s", exc, exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'error': str(exc)}, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/nps-report-v3/demo")
 async def nps_report_v3_demo():
     """Run V3 analysis with demo data."""
@@ -2,8 +2,33 @@ import os
 import requests
 import base64
 
+try:
+    import httpx
+    HTTP_ERRORS = (requests.RequestException, httpx.HTTPError)
+except ImportError:
+    HTTP_ERRORS = (requests.RequestException,)
+
+_fallback_session = None
+
+
+def shared_http_session():
+    """
+    共享的HTTP连接池：优先复用V3进程级传输层（长连接、连接数上限），
+    依赖不可用时退化为模块级 requests.Session。
+    """
+    global _fallback_session
+    try:
+        from nps_report_v3.llm.transport import get_http_transport
+        return get_http_transport().get_sync_client()
+    except ImportError:
+        if _fallback_session is None:
+            _fallback_session = requests.Session()
+        return _fallback_session
+
 
 class AzureChat():
+    provider = "azure"
+
     def  __init__(self, 
                   GPT4V_KEY:str="37ae2a35c80c4b42b9d6ff8793ce472b",
                   GPT4V_ENDPOINT:str = "https://gpt4-turbo-sweden.openai.azure.com/openai/deployments/only_for_yili_test_4o_240710/chat/completions?api-version=2024-02-15-preview")-> str:
@@ -32,22 +57,24 @@ class AzureChat():
               "top_p": 0.95,
               "max_tokens": 1800
             }
-            response = requests.post(self.GPT4V_ENDPOINT, headers=headers, json=payload)
+            response = shared_http_session().post(self.GPT4V_ENDPOINT, headers=headers, json=payload)
             response.raise_for_status()  # Will raise an HTTPError if the HTTP request returned an unsuccessful status code
             
-        except requests.RequestException as e:
+        except HTTP_ERRORS as e:
             raise SystemExit(f"Failed to make the request. Error: {e}")
     
         return response.json()['choices'][0]['message']['content']
 
 class AzureChatApp():
+    provider = "yili"
+
     def  __init__(self, 
                   url = 'https://ycsb-gw-pub.xapi.digitalyili.com/restcloud/yili-gpt-prod/v1/getTextToThird',
                   app_key = '649aa4671fa7b91962caa01d'):
         self.url = url
         self.app_key = app_key
-        # 添加 session 对象以重用连接
-        self.session = requests.Session()
+        # 使用共享连接池以重用连接
+        self.session = shared_http_session()
         # 设置超时时间
         self.timeout = 30
         # 设置重试次数
@@ -86,16 +113,12 @@ class AzureChatApp():
                 else:
                     raise Exception(f"API返回错误: {response_json}")
 
-            except requests.RequestException as e:
+            except HTTP_ERRORS as e:
                 if attempt == self.max_retries - 1:  # 最后一次尝试
                     raise SystemExit(f"Failed to make the request after {self.max_retries} attempts. Error: {e}")
                 print(f"请求失败，正在进行第{attempt + 1}次重试: {e}")
                 time.sleep(1)  # 重试前等待1秒
 
-                
-    def __del__(self):
-        # 确保 session 被正确关闭
-        self.session.close()       
 
 import time
 class AzureEmbedding():
@@ -107,20 +130,65 @@ class AzureEmbedding():
                 ):
         from openai import AzureOpenAI
         
+        session = shared_http_session()
         self.client = AzureOpenAI(
             api_key = os.getenv("AZURE_OPENAI_API_KEY",key),  
             api_version = api_version,
-            azure_endpoint =os.getenv("AZURE_OPENAI_API_KEY",endpoint))
+            azure_endpoint =os.getenv("AZURE_OPENAI_API_KEY",endpoint),
+            # SDK只能复用httpx连接池
+            http_client = None if isinstance(session, requests.Session) else session)
         self.model=model
         
-    def embedding(self,texts):
+    def embedding(self,texts,batch_size=256,token_limit=8000,max_workers=4):
+        """
+        批量获取文本向量：相同文本只请求一次，按条数与估算token分批并发请求，
+        已请求过的向量保存在持久化向量库中，重复运行不再调用接口。
+        """
+        from concurrent.futures import ThreadPoolExecutor
         
         start_time=time.time()
         
-        response = self.client.embeddings.create(input = texts,model= self.model)
-        embeddings=[response.data[i].embedding for i in range(len(response.data))]
+        store=self._get_store()
+        unique_texts=list(dict.fromkeys(texts))
+        vectors=store.get_many(self.model,unique_texts) if store else {}
+        missing=[t for t in unique_texts if t not in vectors]
+        
+        # 按条数和token上限分批（每个字符按1个token估算）
+        batches,current,current_tokens=[],[],0
+        for t in missing:
+            tokens=max(len(t),1)
+            if current and (len(current)>=batch_size or current_tokens+tokens>token_limit):
+                batches.append(current)
+                current,current_tokens=[],0
+            current.append(t)
+            current_tokens+=tokens
+        if current:
+            batches.append(current)
+        
+        def embed_batch(batch):
+            response = self.client.embeddings.create(input = batch,model= self.model)
+            data=sorted(response.data,key=lambda d:d.index)
+            return dict(zip(batch,[d.embedding for d in data]))
+        
+        if batches:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for fresh in executor.map(embed_batch,batches):
+                    if store:
+                        store.put_many(self.model,fresh)
+                    vectors.update(fresh)
+        
+        embeddings=[list(vectors[t]) for t in texts]
         
         end_time=time.time()
-        print(f"文本数量（{len(response.data)}）向量维度（{len(response.data[0].embedding)}）调用embedding耗时{end_time-start_time}秒")
+        print(f"文本数量（{len(texts)}，去重后{len(unique_texts)}，新请求{len(missing)}条/{len(batches)}次）向量维度（{len(embeddings[0]) if embeddings else 0}）调用embedding耗时{end_time-start_time}秒")
     
-        return embeddings
\ No newline at end of file
+        return embeddings
+
+    @staticmethod
+    def _get_store():
+        # 复用V3的持久化向量库；依赖不可用时退化为无缓存
+        try:
+            from nps_report_v3.cache.embedding_store import get_embedding_store
+            return get_embedding_store()
+        except ImportError:
+            return None
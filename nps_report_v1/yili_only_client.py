@@ -27,7 +27,7 @@ class YiliOnlyAIClient:
             "https://ycsb-gw-pub.xapi.digitalyili.com/restcloud/yili-gpt-prod/v1/getTextToThird"
         )
         self.yili_app_key = yili_app_key or os.getenv("YILI_APP_KEY")
-        self.session = requests.Session()
+        self.session = self._shared_session()
         self.timeout = timeout
         self.max_retries = max_retries
 
@@ -36,6 +36,15 @@ class YiliOnlyAIClient:
         if not self.yili_gateway_url:
             logger.warning("YILI_GATEWAY_URL 未配置，YiliOnlyAIClient将不可用")
 
+    @staticmethod
+    def _shared_session():
+        """复用V3进程级共享连接池；不可用时退化为独立的 requests.Session。"""
+        try:
+            from nps_report_v3.llm.transport import get_http_transport
+            return get_http_transport().get_sync_client()
+        except ImportError:
+            return requests.Session()
+
     def chat_completion(self,
                         messages: List[Dict[str, str]],
                         temperature: float = 0.1,
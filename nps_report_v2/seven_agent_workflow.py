@@ -398,10 +398,10 @@ class YiliAIClient:
         )
         self.azure_api_key = os.getenv("AZURE_OPENAI_API_KEY", "")
         
-        # Import requests here to avoid issues if not available
+        # Shared pooled HTTP session (imports requests lazily to avoid issues if not available)
         try:
-            import requests
-            self.session = requests.Session()
+            from .v1_legacy_llm import shared_http_session
+            self.session = shared_http_session()
         except ImportError:
             logger.warning("requests库未安装，AI功能将被禁用")
             self.session = None
@@ -9,10 +9,9 @@ import pandas as pd
 import numpy as np
 import time
 import re
-import requests
 
 # 导入V2本地副本，避免与原始V1文件冲突
-from .v1_legacy_llm import AzureEmbedding, AzureChat, AzureChatApp
+from .v1_legacy_llm import AzureEmbedding, AzureChat, AzureChatApp, HTTP_ERRORS
 from .v1_legacy_prompts import prompt_create, create_prompt_title
 from .v1_legacy_cluster import text_cluster
 
@@ -181,7 +180,7 @@ async def text_labelling(model, df, question, theme, emotion):
     try:
         # 直接返回处理后的结果，因为合并操作已经在 sentiment_triplet_extraction 中完成
         return await sentiment_triplet_extraction(model, df, question, theme, emotion)
-    except requests.RequestException as e:
+    except HTTP_ERRORS as e:
         raise ModelCallError(f"调用语言模型时出错: {str(e)}", "labeling")
     except Exception as e:
         raise LabelingError(f"标注过程中出错: {str(e)}")
@@ -7,6 +7,26 @@ import os
 import requests
 import base64
 
+try:
+    import httpx
+    HTTP_ERRORS = (requests.RequestException, httpx.HTTPError)
+except ImportError:
+    HTTP_ERRORS = (requests.RequestException,)
+
+_fallback_session = None
+
+
+def shared_http_session():
+    """共享的HTTP连接池：优先复用V3进程级传输层，依赖不可用时退化为 requests.Session"""
+    global _fallback_session
+    try:
+        from nps_report_v3.llm.transport import get_http_transport
+        return get_http_transport().get_sync_client()
+    except ImportError:
+        if _fallback_session is None:
+            _fallback_session = requests.Session()
+        return _fallback_session
+
 
 class AzureChat():
     def  __init__(self, 
@@ -38,7 +58,7 @@ class AzureChat():
               "max_tokens": 4000
             }
 
-            response = requests.post(self.GPT4V_ENDPOINT, headers=headers, json=payload)
+            response = shared_http_session().post(self.GPT4V_ENDPOINT, headers=headers, json=payload)
             return response.json()['choices'][0]['message']['content']
         except Exception as e:
             print(f"AzureChat error: {e}")
@@ -72,7 +92,7 @@ class AzureChatApp():
               "max_tokens": 4000
             }
 
-            response = requests.post(f"{self.OPENAI_BASE_URL_YL}chat/completions", headers=headers, json=payload, timeout=60)
+            response = shared_http_session().post(f"{self.OPENAI_BASE_URL_YL}chat/completions", headers=headers, json=payload, timeout=60)
             return response.json()['choices'][0]['message']['content']
         except Exception as e:
             print(f"AzureChatApp error: {e}")
@@ -99,7 +119,7 @@ class AzureEmbedding():
                 "input": texts
             }
 
-            response = requests.post(self.ENDPOINT, headers=headers, json=payload)
+            response = shared_http_session().post(self.ENDPOINT, headers=headers, json=payload)
             embeddings = [data['embedding'] for data in response.json()['data']]
             return embeddings
         except Exception as e:
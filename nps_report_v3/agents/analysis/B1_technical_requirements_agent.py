@@ -10,6 +10,7 @@ import re
 from ..base import AnalysisAgent, AgentResult, AgentStatus
 from ...state import TechnicalRequirement
 from ...llm import LLMClient
+from ...llm.tokens import truncate_to_tokens, get_evidence_token_budget
 
 logger = logging.getLogger(__name__)
 
@@ -210,7 +211,7 @@ class TechnicalRequirementsAgent(AnalysisAgent):
 从以下客户反馈中提取技术需求：
 
 反馈内容：
-{text}
+{truncate_to_tokens(text, get_evidence_token_budget())}
 
 请识别并提取：
 1. 产品改进需求（配方、口感、营养等）
@@ -234,7 +235,7 @@ class TechnicalRequirementsAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step(f"extract_requirements_{response_id}", self.llm_client.generate, prompt, temperature=0.3)
 
             # Parse JSON response
             import json
@@ -554,7 +554,7 @@ class PassiveAnalystAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("analyze_barriers", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             barriers_data = json.loads(response)
@@ -608,7 +608,7 @@ class PassiveAnalystAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.5)
+            response = await self.run_step("enhance_opportunities", self.llm_client.generate, prompt, temperature=0.5)
 
             import json
             enhanced_opportunities = []
@@ -732,7 +732,7 @@ class DetractorAnalystAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step(f"generate_personalized_strategy_{hash(prompt)}", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             strategy_data = json.loads(response)
@@ -791,7 +791,7 @@ class DetractorAnalystAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("analyze_pain_points", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             pain_points_data = json.loads(response)
@@ -12,10 +12,70 @@ import math
 
 from ..base import AnalysisAgent, AgentResult, AgentStatus
 from ...llm import LLMClient
+from ...llm.tokens import fit_evidence, get_evidence_token_budget
+from ...utils import cpu_bound, run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
 
+@cpu_bound
+def cooccurrence_topic_clusters(word_lists: List[List[str]]) -> List[Dict[str, int]]:
+    """
+    Cluster words into topics by co-occurrence (runs in a CPU worker).
+
+    Args:
+        word_lists: Segmented words of each text
+
+    Returns:
+        Topic clusters mapping word -> co-occurrence frequency
+    """
+    return identify_topic_clusters(build_cooccurrence_matrix(word_lists))
+
+
+def build_cooccurrence_matrix(word_lists: List[List[str]]) -> Dict[Tuple[str, str], int]:
+    """Build word co-occurrence matrix."""
+    cooccurrence = defaultdict(int)
+
+    for words in word_lists:
+        # Create pairs of words that appear together
+        for i, word1 in enumerate(words):
+            for j, word2 in enumerate(words[i+1:], i+1):
+                if word1 != word2:
+                    pair = tuple(sorted([word1, word2]))
+                    cooccurrence[pair] += 1
+
+    return dict(cooccurrence)
+
+
+def identify_topic_clusters(cooccurrence: Dict[Tuple[str, str], int]) -> List[Dict[str, int]]:
+    """Identify topic clusters from co-occurrence data."""
+    # Simple clustering based on high co-occurrence
+    clusters = []
+    used_words = set()
+
+    # Sort by co-occurrence frequency
+    sorted_pairs = sorted(cooccurrence.items(), key=lambda x: x[1], reverse=True)
+
+    for (word1, word2), freq in sorted_pairs[:20]:  # Top 20 pairs
+        if word1 not in used_words and word2 not in used_words:
+            # Start new cluster
+            cluster = {word1: freq, word2: freq}
+
+            # Add related words
+            for (w1, w2), f in sorted_pairs:
+                if (w1 in cluster or w2 in cluster) and (w1 not in used_words or w2 not in used_words):
+                    if w1 not in cluster: cluster[w1] = f
+                    if w2 not in cluster: cluster[w2] = f
+
+            clusters.append(cluster)
+            used_words.update(cluster.keys())
+
+            if len(clusters) >= 5:  # Limit clusters
+                break
+
+    return clusters
+
+
 class TextClusteringAgent(AnalysisAgent):
     """
     B4 - Text Clustering Agent
@@ -427,11 +487,11 @@ class TextClusteringAgent(AnalysisAgent):
         # Simple topic modeling based on keyword co-occurrence
         topics = []
 
-        # Create term co-occurrence matrix
-        cooccurrence = self._build_cooccurrence_matrix(processed_texts)
-
-        # Identify topic clusters based on co-occurrence
-        topic_clusters = self._identify_topic_clusters(cooccurrence)
+        # Identify topic clusters based on term co-occurrence (off the event loop)
+        topic_clusters = await run_cpu_bound(
+            cooccurrence_topic_clusters,
+            [text_data["words"] for text_data in processed_texts]
+        )
 
         for i, cluster in enumerate(topic_clusters):
             # Get representative terms for topic
@@ -467,49 +527,6 @@ class TextClusteringAgent(AnalysisAgent):
 
         return topics[:10]  # Top 10 topics
 
-    def _build_cooccurrence_matrix(self, processed_texts: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
-        """Build word co-occurrence matrix."""
-        cooccurrence = defaultdict(int)
-
-        for text_data in processed_texts:
-            words = text_data["words"]
-            # Create pairs of words that appear together
-            for i, word1 in enumerate(words):
-                for j, word2 in enumerate(words[i+1:], i+1):
-                    if word1 != word2:
-                        pair = tuple(sorted([word1, word2]))
-                        cooccurrence[pair] += 1
-
-        return dict(cooccurrence)
-
-    def _identify_topic_clusters(self, cooccurrence: Dict[Tuple[str, str], int]) -> List[Dict[str, int]]:
-        """Identify topic clusters from co-occurrence data."""
-        # Simple clustering based on high co-occurrence
-        clusters = []
-        used_words = set()
-
-        # Sort by co-occurrence frequency
-        sorted_pairs = sorted(cooccurrence.items(), key=lambda x: x[1], reverse=True)
-
-        for (word1, word2), freq in sorted_pairs[:20]:  # Top 20 pairs
-            if word1 not in used_words and word2 not in used_words:
-                # Start new cluster
-                cluster = {word1: freq, word2: freq}
-
-                # Add related words
-                for (w1, w2), f in sorted_pairs:
-                    if (w1 in cluster or w2 in cluster) and (w1 not in used_words or w2 not in used_words):
-                        if w1 not in cluster: cluster[w1] = f
-                        if w2 not in cluster: cluster[w2] = f
-
-                clusters.append(cluster)
-                used_words.update(cluster.keys())
-
-                if len(clusters) >= 5:  # Limit clusters
-                    break
-
-        return clusters
-
     def _find_representative_responses(
         self,
         topic_terms: List[str],
@@ -858,9 +875,14 @@ class TextClusteringAgent(AnalysisAgent):
             return {}
 
         try:
-            # Sample responses for LLM analysis
-            sample_texts = [resp.get("original_text", "") for resp in tagged_responses[:10]]
-            combined_text = "\n".join(f"反馈{i+1}: {text}" for i, text in enumerate(sample_texts) if text)
+            # Sample responses for LLM analysis, spread across the survey and fitted to the evidence budget
+            sample_texts = fit_evidence(
+                [resp.get("original_text", "") for resp in tagged_responses],
+                get_evidence_token_budget(),
+                max_items=10,
+                render=lambda i, text: f"反馈{i+1}: {text}"
+            )
+            combined_text = "\n".join(f"反馈{i+1}: {text}" for i, text in enumerate(sample_texts))
 
             prompt = f"""
 对以下乳制品客户反馈进行情感分析，考虑中国文化背景：
@@ -890,7 +912,7 @@ class TextClusteringAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("sentiment_analysis", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             return json.loads(response)
@@ -906,10 +928,12 @@ class TextClusteringAgent(AnalysisAgent):
 
         try:
             # Combine text samples for LLM analysis
-            text_samples = []
-            for text_data in processed_texts[:10]:  # Sample for LLM
-                if text_data["words"]:
-                    text_samples.append(text_data["original"])
+            text_samples = fit_evidence(
+                [text_data["original"] for text_data in processed_texts if text_data["words"]],
+                get_evidence_token_budget(),
+                max_items=10,
+                render=lambda i, text: f"文本{i+1}: {text}"
+            )
 
             combined_samples = "\n".join(f"文本{i+1}: {text}" for i, text in enumerate(text_samples))
 
@@ -937,7 +961,7 @@ class TextClusteringAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.4)
+            response = await self.run_step("topic_modeling", self.llm_client.generate, prompt, temperature=0.4)
 
             import json
             llm_topics_data = json.loads(response)
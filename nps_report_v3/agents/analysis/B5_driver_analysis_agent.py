@@ -10,10 +10,143 @@ from collections import defaultdict
 
 from ..base import AnalysisAgent, AgentResult, AgentStatus
 from ...llm import LLMClient
+from ...utils import cpu_bound, run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
 
+@cpu_bound
+def score_drivers(
+    texts: List[str],
+    nps_scores: List[int],
+    response_ids: List[str],
+    driver_attributes: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Calculate importance and satisfaction scores for each driver (runs in a CPU worker).
+
+    Args:
+        texts: Response texts
+        nps_scores: NPS score of each response
+        response_ids: Response IDs
+        driver_attributes: Driver definitions with indicators and weights
+
+    Returns:
+        Driver scores with importance and satisfaction metrics
+    """
+    driver_scores = {}
+    total_responses = len(texts)
+
+    for driver_id, driver_info in driver_attributes.items():
+        indicators = driver_info["indicators"]
+        mentions = []
+        satisfaction_scores = []
+        importance_indicators = 0
+
+        for text, nps_score, response_id in zip(texts, nps_scores, response_ids):
+            # Check for driver mentions
+            mention_count = 0
+            for indicator in indicators:
+                if indicator in text:
+                    mention_count += 1
+
+            if mention_count > 0:
+                mentions.append({
+                    "response_id": response_id,
+                    "mentions": mention_count,
+                    "nps_score": nps_score,
+                    "sentiment": driver_sentiment(text, indicators)
+                })
+
+                # Calculate satisfaction based on sentiment and NPS
+                satisfaction_scores.append(driver_satisfaction(text, indicators, nps_score))
+
+                # Importance based on mention frequency and context
+                if mention_count >= 2 or is_emphasized(text, indicators):
+                    importance_indicators += 1
+
+        # Calculate final scores
+        mention_frequency = len(mentions) / total_responses if total_responses > 0 else 0
+
+        # Importance score (0-1)
+        importance_score = min(
+            (mention_frequency * 2) + (importance_indicators / total_responses) * driver_info["weight"],
+            1.0
+        )
+
+        # Satisfaction score (0-1)
+        avg_satisfaction = sum(satisfaction_scores) / len(satisfaction_scores) if satisfaction_scores else 0.5
+
+        driver_scores[driver_id] = {
+            "name": driver_info["name"],
+            "category": driver_info["category"],
+            "importance": round(importance_score, 3),
+            "satisfaction": round(avg_satisfaction, 3),
+            "mention_count": len(mentions),
+            "mention_frequency": round(mention_frequency, 3),
+            "response_coverage": round(mention_frequency, 3),
+            "mentions_detail": mentions[:10]  # Top 10 mentions for detail
+        }
+
+    return driver_scores
+
+
+def driver_sentiment(text: str, indicators: List[str]) -> float:
+    """Extract sentiment for specific driver indicators."""
+    positive_words = ["好", "很好", "不错", "满意", "喜欢", "棒", "优秀", "完美"]
+    negative_words = ["差", "不好", "糟糕", "失望", "不满", "讨厌", "烂", "垃圾"]
+
+    sentiment_score = 0.0
+    context_window = 10  # Characters around indicator
+
+    for indicator in indicators:
+        if indicator in text:
+            # Get context around indicator
+            pos = text.find(indicator)
+            start = max(0, pos - context_window)
+            end = min(len(text), pos + len(indicator) + context_window)
+            context = text[start:end]
+
+            # Check sentiment in context
+            for pos_word in positive_words:
+                if pos_word in context:
+                    sentiment_score += 1.0
+
+            for neg_word in negative_words:
+                if neg_word in context:
+                    sentiment_score -= 1.0
+
+    return max(-1.0, min(1.0, sentiment_score / len(indicators)))
+
+
+def driver_satisfaction(text: str, indicators: List[str], nps_score: int) -> float:
+    """Calculate satisfaction score for a driver."""
+    # Base satisfaction from NPS score
+    base_satisfaction = nps_score / 10.0
+
+    # Adjust based on sentiment
+    sentiment = driver_sentiment(text, indicators)
+
+    # Weighted combination
+    final_satisfaction = (base_satisfaction * 0.7) + ((sentiment + 1) / 2 * 0.3)
+
+    return max(0.0, min(1.0, final_satisfaction))
+
+
+def is_emphasized(text: str, indicators: List[str]) -> bool:
+    """Check if driver indicators are emphasized in text."""
+    emphasis_markers = ["特别", "非常", "很", "超级", "极其", "相当", "十分", "最"]
+
+    for indicator in indicators:
+        if indicator in text:
+            # Check for emphasis markers near the indicator
+            pos = text.find(indicator)
+            context = text[max(0, pos-10):pos+len(indicator)+10]
+            if any(marker in context for marker in emphasis_markers):
+                return True
+    return False
+
+
 class DriverAnalysisAgent(AnalysisAgent):
     """
     B5 - Driver Analysis Agent
@@ -124,8 +257,14 @@ class DriverAnalysisAgent(AnalysisAgent):
                     confidence_score=1.0
                 )
 
-            # Calculate driver importance and satisfaction scores
-            driver_scores = self._calculate_driver_scores(tagged_responses)
+            # Calculate driver importance and satisfaction scores (off the event loop)
+            driver_scores = await run_cpu_bound(
+                score_drivers,
+                [r.get("original_text", "") for r in tagged_responses],
+                [r.get("nps_score", 5) for r in tagged_responses],
+                [r.get("response_id", "") for r in tagged_responses],
+                self.driver_attributes
+            )
 
             # Perform correlation analysis with NPS
             correlations = self._analyze_correlations(driver_scores, tagged_responses)
@@ -176,128 +315,6 @@ class DriverAnalysisAgent(AnalysisAgent):
                 confidence_score=0.0
             )
 
-    def _calculate_driver_scores(self, tagged_responses: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
-        """
-        Calculate importance and satisfaction scores for each driver.
-
-        Args:
-            tagged_responses: Tagged responses
-
-        Returns:
-            Driver scores with importance and satisfaction metrics
-        """
-        driver_scores = {}
-
-        for driver_id, driver_info in self.driver_attributes.items():
-            mentions = []
-            satisfaction_scores = []
-            importance_indicators = 0
-
-            for response in tagged_responses:
-                text = response.get("original_text", "")
-                nps_score = response.get("nps_score", 5)
-
-                # Check for driver mentions
-                mention_count = 0
-                for indicator in driver_info["indicators"]:
-                    if indicator in text:
-                        mention_count += 1
-
-                if mention_count > 0:
-                    mentions.append({
-                        "response_id": response.get("response_id", ""),
-                        "mentions": mention_count,
-                        "nps_score": nps_score,
-                        "sentiment": self._extract_sentiment_for_driver(text, driver_info["indicators"])
-                    })
-
-                    # Calculate satisfaction based on sentiment and NPS
-                    driver_satisfaction = self._calculate_satisfaction_score(text, driver_info["indicators"], nps_score)
-                    satisfaction_scores.append(driver_satisfaction)
-
-                    # Importance based on mention frequency and context
-                    if mention_count >= 2 or self._is_emphasized(text, driver_info["indicators"]):
-                        importance_indicators += 1
-
-            # Calculate final scores
-            total_responses = len(tagged_responses)
-            mention_frequency = len(mentions) / total_responses if total_responses > 0 else 0
-
-            # Importance score (0-1)
-            importance_score = min(
-                (mention_frequency * 2) + (importance_indicators / total_responses) * driver_info["weight"],
-                1.0
-            )
-
-            # Satisfaction score (0-1)
-            avg_satisfaction = sum(satisfaction_scores) / len(satisfaction_scores) if satisfaction_scores else 0.5
-
-            driver_scores[driver_id] = {
-                "name": driver_info["name"],
-                "category": driver_info["category"],
-                "importance": round(importance_score, 3),
-                "satisfaction": round(avg_satisfaction, 3),
-                "mention_count": len(mentions),
-                "mention_frequency": round(mention_frequency, 3),
-                "response_coverage": round(mention_frequency, 3),
-                "mentions_detail": mentions[:10]  # Top 10 mentions for detail
-            }
-
-        return driver_scores
-
-    def _extract_sentiment_for_driver(self, text: str, indicators: List[str]) -> float:
-        """Extract sentiment for specific driver indicators."""
-        positive_words = ["好", "很好", "不错", "满意", "喜欢", "棒", "优秀", "完美"]
-        negative_words = ["差", "不好", "糟糕", "失望", "不满", "讨厌", "烂", "垃圾"]
-
-        sentiment_score = 0.0
-        context_window = 10  # Characters around indicator
-
-        for indicator in indicators:
-            if indicator in text:
-                # Get context around indicator
-                pos = text.find(indicator)
-                start = max(0, pos - context_window)
-                end = min(len(text), pos + len(indicator) + context_window)
-                context = text[start:end]
-
-                # Check sentiment in context
-                for pos_word in positive_words:
-                    if pos_word in context:
-                        sentiment_score += 1.0
-
-                for neg_word in negative_words:
-                    if neg_word in context:
-                        sentiment_score -= 1.0
-
-        return max(-1.0, min(1.0, sentiment_score / len(indicators)))
-
-    def _calculate_satisfaction_score(self, text: str, indicators: List[str], nps_score: int) -> float:
-        """Calculate satisfaction score for a driver."""
-        # Base satisfaction from NPS score
-        base_satisfaction = nps_score / 10.0
-
-        # Adjust based on sentiment
-        sentiment = self._extract_sentiment_for_driver(text, indicators)
-
-        # Weighted combination
-        final_satisfaction = (base_satisfaction * 0.7) + ((sentiment + 1) / 2 * 0.3)
-
-        return max(0.0, min(1.0, final_satisfaction))
-
-    def _is_emphasized(self, text: str, indicators: List[str]) -> bool:
-        """Check if driver indicators are emphasized in text."""
-        emphasis_markers = ["特别", "非常", "很", "超级", "极其", "相当", "十分", "最"]
-
-        for indicator in indicators:
-            if indicator in text:
-                # Check for emphasis markers near the indicator
-                pos = text.find(indicator)
-                context = text[max(0, pos-10):pos+len(indicator)+10]
-                if any(marker in context for marker in emphasis_markers):
-                    return True
-        return False
-
     def _analyze_correlations(
         self,
         driver_scores: Dict[str, Dict[str, float]],
@@ -823,7 +840,7 @@ class DriverAnalysisAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.4)
+            response = await self.run_step("enhance_recommendations_with_llm", self.llm_client.generate, prompt, temperature=0.4)
 
             import json
             enhanced_data = json.loads(response)
@@ -946,7 +946,7 @@ class ProductDimensionAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("competitive_analysis", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             return json.loads(response)
@@ -995,7 +995,7 @@ class ProductDimensionAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.4)
+            response = await self.run_step("enhance_product_recommendations", self.llm_client.generate, prompt, temperature=0.4)
 
             import json
             enhanced_data = json.loads(response)
@@ -857,7 +857,7 @@ class GeographicDimensionAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("demographic_analysis", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             return json.loads(response)
@@ -914,7 +914,7 @@ class GeographicDimensionAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.4)
+            response = await self.run_step("enhance_geographic_recommendations", self.llm_client.generate, prompt, temperature=0.4)
 
             import json
             enhanced_data = json.loads(response)
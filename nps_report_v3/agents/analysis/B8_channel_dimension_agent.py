@@ -978,7 +978,7 @@ class ChannelDimensionAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("journey_analysis", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             return json.loads(response)
@@ -1035,7 +1035,7 @@ class ChannelDimensionAgent(AnalysisAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.4)
+            response = await self.run_step("enhance_channel_recommendations", self.llm_client.generate, prompt, temperature=0.4)
 
             import json
             enhanced_data = json.loads(response)
@@ -781,13 +781,7 @@ class AnalysisCoordinatorAgent(AnalysisAgent):
         }
 
         # Confidence assessment
-        avg_quality = sum(i["quality_score"] for i in insights) / len(insights) if insights else 0
-        summary["confidence_assessment"] = {
-            "overall_confidence": "high" if avg_quality > 0.7 else "medium" if avg_quality > 0.5 else "low",
-            "data_completeness": 1.0 - (len(validation_results.get("data_gaps", [])) / len(analysis_results)),
-            "cross_validation_rate": validation_results.get("consistency_score", 0),
-            "recommendation_confidence": avg_quality
-        }
+        summary["confidence_assessment"] = self._assess_confidence(insights, validation_results, analysis_results)
 
         # Enhanced synthesis with LLM
         if self.llm_client:
@@ -797,6 +791,45 @@ class AnalysisCoordinatorAgent(AnalysisAgent):
 
         return summary
 
+    def _assess_confidence(
+        self,
+        insights: List[Dict[str, Any]],
+        validation_results: Dict[str, Any],
+        analysis_results: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Confidence assessment from insight quality and cross-validation."""
+        avg_quality = sum(i["quality_score"] for i in insights) / len(insights) if insights else 0
+        return {
+            "overall_confidence": "high" if avg_quality > 0.7 else "medium" if avg_quality > 0.5 else "low",
+            "data_completeness": 1.0 - (len(validation_results.get("data_gaps", [])) / len(analysis_results)),
+            "cross_validation_rate": validation_results.get("consistency_score", 0),
+            "recommendation_confidence": avg_quality
+        }
+
+    def estimate_confidence_assessment(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fast pre-estimate of the synthesis confidence assessment.
+
+        Runs the deterministic part of the synthesis (extraction, dedup,
+        scoring, cross-validation) without conflict resolution or LLM calls,
+        so the consulting pass can start before this agent finishes.
+
+        Args:
+            state: Workflow state with the B1-B8 outputs
+
+        Returns:
+            Confidence assessment in the shape of ``synthesis_summary["confidence_assessment"]``
+            (empty when no analysis results are available)
+        """
+        analysis_results = self._collect_analysis_results(state)
+        if not analysis_results:
+            return {}
+
+        insights = self._deduplicate_insights(self._extract_all_insights(analysis_results))
+        scored_insights = self._score_and_rank_insights(insights, analysis_results)
+        validation_results = self._perform_cross_validation(scored_insights, analysis_results)
+        return self._assess_confidence(scored_insights, validation_results, analysis_results)
+
     def _generate_meta_insights(
         self,
         insights: List[Dict[str, Any]],
@@ -878,7 +911,7 @@ class AnalysisCoordinatorAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step(f"resolve_conflict_{hash(prompt)}", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             resolution = json.loads(response)
@@ -950,7 +983,7 @@ class AnalysisCoordinatorAgent(AnalysisAgent):
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("enhance_synthesis_with_llm", self.llm_client.generate, prompt, temperature=0.3)
 
             import json
             enhancement = json.loads(response)
@@ -4,14 +4,19 @@ Provides abstract base classes for Foundation, Analysis, and Consulting agents.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import asyncio
 import logging
+import time
 from datetime import datetime
 from enum import Enum
 import inspect
 
+from ..llm.tokens import agent_token_scope
+from ..utils.deadline import Deadline, DeadlineExceeded, get_current_deadline, use_deadline
+from .steps import StepRun, get_current_step_run, get_retry_metrics, use_step_run
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,7 +44,21 @@ class AgentResult:
 
 
 class BaseAgent(ABC):
-    """Abstract base class for all NPS analysis agents"""
+    """
+    Abstract base class for all NPS analysis agents.
+
+    Agents keep no per-run state: everything a run needs comes from the
+    state argument, so one warm instance can serve concurrent workflows.
+    ``status``/``start_time``/``end_time`` only describe the latest run.
+
+    Expensive units of work go through :meth:`run_step`, which retries a
+    failed step on its own and memoizes successful steps for the rest of
+    the run, so a whole-agent retry does not repeat them.
+    """
+
+    # Sub-step retry policy (None: use settings)
+    step_max_retries: Optional[int] = None
+    step_retry_delay: Optional[float] = None
 
     def __init__(self, agent_id: str, agent_name: str, max_retries: int = 3):
         self.agent_id = agent_id
@@ -51,14 +70,102 @@ class BaseAgent(ABC):
 
     async def execute(self, state: Dict[str, Any]) -> AgentResult:
         """Execute agent with retry logic and error handling"""
+        run = StepRun(self.agent_id)
+
+        # Attribute LLM token usage during this run to the agent
+        with agent_token_scope(self.agent_id), use_step_run(run):
+            result = await self._execute_with_retry(state)
+
+        get_retry_metrics().record(run)
+        if result is not None and run.retried:
+            result.metadata = {**(result.metadata or {}), "retries": run.report()}
+        return result
+
+    async def run_step(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a named sub-step of the current agent run.
+
+        A step that already succeeded in this run returns its memoized
+        result. A failing step is retried with exponential backoff (never
+        past the request deadline) before the error propagates. Step names
+        must be unique within one run.
+        """
+        run = get_current_step_run()
+        if run is None or run.agent_id != self.agent_id:
+            # Called outside execute(), e.g. process() invoked directly
+            result = func(*args, **kwargs)
+            return await result if inspect.isawaitable(result) else result
+
+        if run.has(name):
+            logger.debug(f"Agent {self.agent_id} reusing step '{name}'")
+            return run.reuse(name)
+
+        max_retries, delay = self._step_retry_policy()
+        failures = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except DeadlineExceeded:
+                run.record_failure(name, (time.perf_counter() - started) * 1000, retrying=False)
+                raise
+            except Exception as e:
+                failures += 1
+                deadline = get_current_deadline()
+                retrying = failures <= max_retries and (deadline is None or deadline.allows(delay))
+                run.record_failure(name, (time.perf_counter() - started) * 1000, retrying)
+                if not retrying:
+                    raise
+                logger.warning(f"Agent {self.agent_id} step '{name}' failed ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+
+            run.record_success(name, result, (time.perf_counter() - started) * 1000)
+            return result
+
+    def _step_retry_policy(self) -> Tuple[int, float]:
+        """Sub-step retries and initial backoff for this agent"""
+        if self.step_max_retries is not None and self.step_retry_delay is not None:
+            return self.step_max_retries, self.step_retry_delay
+
+        from nps_report_v3.config import get_settings
+        settings = get_settings()
+        return (
+            settings.agent_step_max_retries if self.step_max_retries is None else self.step_max_retries,
+            settings.agent_step_retry_delay_seconds if self.step_retry_delay is None else self.step_retry_delay
+        )
+
+    async def _execute_with_retry(self, state: Dict[str, Any]) -> AgentResult:
+        """
+        Retry loop around validation, processing and output checks.
+
+        Under a request deadline each attempt is bounded by the time left;
+        once it runs out (or a retry backoff would not fit) the agent stops
+        retrying and returns its degraded, LLM-free result instead. Steps
+        that succeeded in an earlier attempt are replayed from the run memo.
+        """
         retry_count = 0
         last_error = None
+        start_time = None
+        deadline = get_current_deadline()
+        run = get_current_step_run()
 
         while retry_count < self.max_retries:
+            if deadline is not None and deadline.expired():
+                return await self._execute_degraded(state, deadline, last_error or "deadline exceeded")
+
+            attempt_started = time.perf_counter()
+            accounted_at_start = run.accounted_ms if run is not None else 0.0
+            if run is not None:
+                run.attempts += 1
+
             try:
                 logger.info(f"Executing agent {self.agent_id}: {self.agent_name} (attempt {retry_count + 1})")
                 self.status = AgentStatus.IN_PROGRESS
-                self.start_time = datetime.utcnow()
+                start_time = self.start_time = datetime.utcnow()
 
                 # Validate input
                 validation_errors = self._validate_input(state)
@@ -67,41 +174,87 @@ class BaseAgent(ABC):
 
                 # Process with agent-specific logic
                 processed = self.process(state)
-                result = await processed if inspect.isawaitable(processed) else processed
+                if inspect.isawaitable(processed):
+                    remaining = deadline.remaining() if deadline is not None else None
+                    result = await (processed if remaining is None else asyncio.wait_for(processed, remaining))
+                else:
+                    result = processed
 
                 # Validate output
                 self._validate_output(result)
 
                 self.status = AgentStatus.COMPLETED
-                self.end_time = datetime.utcnow()
+                end_time = self.end_time = datetime.utcnow()
 
-                execution_time = int((self.end_time - self.start_time).total_seconds() * 1000)
+                execution_time = int((end_time - start_time).total_seconds() * 1000)
                 result.execution_time_ms = execution_time
 
                 logger.info(f"Agent {self.agent_id} completed successfully in {execution_time}ms")
                 return result
 
             except Exception as e:
+                if run is not None:
+                    run.record_failed_attempt((time.perf_counter() - attempt_started) * 1000, accounted_at_start)
                 retry_count += 1
                 last_error = str(e)
                 logger.warning(f"Agent {self.agent_id} failed (attempt {retry_count}): {e}")
 
+                if deadline is not None and isinstance(e, TimeoutError) and deadline.expired():
+                    return await self._execute_degraded(state, deadline, f"time budget exhausted: {e}")
+
                 if retry_count < self.max_retries:
                     # Exponential backoff
                     wait_time = 2 ** retry_count
+                    if deadline is not None and not deadline.allows(wait_time):
+                        return await self._execute_degraded(state, deadline, last_error)
                     logger.info(f"Retrying agent {self.agent_id} after {wait_time} seconds...")
                     await asyncio.sleep(wait_time)
                 else:
                     self.status = AgentStatus.FAILED
-                    self.end_time = datetime.utcnow()
+                    end_time = self.end_time = datetime.utcnow()
 
                     return AgentResult(
                         agent_id=self.agent_id,
                         status=AgentStatus.FAILED,
                         errors=[f"Agent failed after {retry_count} attempts: {last_error}"],
-                        execution_time_ms=int((self.end_time - self.start_time).total_seconds() * 1000) if self.start_time else None
+                        execution_time_ms=int((end_time - start_time).total_seconds() * 1000) if start_time else None
                     )
 
+    async def _execute_degraded(self, state: Dict[str, Any], deadline: Deadline, reason: str) -> AgentResult:
+        """
+        Run once more with LLM calls failing fast, so agents take their
+        rule-based paths, and mark the result as degraded.
+        """
+        logger.warning(f"Agent {self.agent_id} out of time ({reason}); returning degraded result")
+        start_time = datetime.utcnow()
+
+        try:
+            with use_deadline(deadline.exhausted()):
+                processed = self.process(state)
+                result = await processed if inspect.isawaitable(processed) else processed
+            self._validate_output(result)
+        except Exception as e:
+            self.status = AgentStatus.FAILED
+            return AgentResult(
+                agent_id=self.agent_id,
+                status=AgentStatus.FAILED,
+                errors=[f"Agent failed within its time budget: {reason}; degraded run failed: {e}"],
+                execution_time_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            )
+
+        self.status = result.status
+        result.execution_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+        if result.status != AgentStatus.COMPLETED:
+            return result
+
+        deadline.record_degraded(self.agent_id, reason)
+        result.metadata = {**(result.metadata or {}), "degraded": True, "degraded_reason": reason}
+        result.warnings = [
+            *(result.warnings or []),
+            "Time budget exhausted: rule-based result without LLM enhancement"
+        ]
+        return result
+
     @abstractmethod
     async def process(self, state: Dict[str, Any]) -> AgentResult:
         """Agent-specific processing logic to be implemented by subclasses"""
@@ -202,8 +355,9 @@ class ConsultingAgent(BaseAgent):
 class ConfidenceConstrainedAgent(ConsultingAgent):
     """Special base class for C1-C4 agents with confidence constraints"""
 
-    async def execute(self, state: Dict[str, Any]) -> AgentResult:
-        """Override execute to apply confidence constraints"""
+    @staticmethod
+    def confidence_label(state: Dict[str, Any]) -> str:
+        """Confidence label the agent operates under ("low" when none is known)"""
         foundation = state.get("pass1_foundation", {})
         confidence_assessment = foundation.get("confidence_assessment", {})
 
@@ -217,8 +371,11 @@ class ConfidenceConstrainedAgent(ConsultingAgent):
         else:
             confidence_level = None
 
-        if not confidence_level:
-            confidence_level = "low"
+        return confidence_level or "low"
+
+    async def execute(self, state: Dict[str, Any]) -> AgentResult:
+        """Override execute to apply confidence constraints"""
+        confidence_level = self.confidence_label(state)
 
         result = await super().execute(state)
 
@@ -412,7 +412,7 @@ NPS得分：{nps_score:.1f}
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("generate_recommendations", self.llm_client.generate, prompt, temperature=0.3)
 
             # Parse JSON response
             import json
@@ -506,7 +506,7 @@ class ProductConsultantAgent(ConfidenceConstrainedAgent):
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            response = await self.run_step("generate_product_recommendations", self.llm_client.generate, prompt, temperature=0.3)
 
             # Parse JSON response
             import json
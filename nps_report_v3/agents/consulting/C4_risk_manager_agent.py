@@ -600,7 +600,7 @@ NPS得分：{nps_score:.1f}
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.2)
+            response = await self.run_step("identify_risks", self.llm_client.generate, prompt, temperature=0.2)
 
             # Parse JSON response
             import json
@@ -4,7 +4,7 @@ Final Consulting Pass Agent that synthesizes all consulting outputs into executi
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Awaitable
 from collections import Counter
 from datetime import datetime
 
@@ -45,9 +45,12 @@ class ExecutiveSynthesizerAgent(ConsultingAgent):
     """
 
     def __init__(self, agent_id: str = "C5", agent_name: str = "Executive Synthesizer Agent",
-                 llm_client: Optional[LLMClient] = None, **kwargs):
+                 llm_client: Optional[LLMClient] = None,
+                 stream_callback: Optional[Callable[[str], Awaitable[None]]] = None, **kwargs):
         super().__init__(agent_id, agent_name, **kwargs)
         self.llm_client = llm_client
+        # When set, the executive summary is streamed and each delta forwarded here
+        self.stream_callback = stream_callback
         self.min_confidence = 0.2  # Realistic threshold for 100+ sample analysis - Executive synthesis with limited consulting inputs
 
         # Executive priority frameworks
@@ -150,10 +153,19 @@ class ExecutiveSynthesizerAgent(ConsultingAgent):
 
             logger.info(f"Generated {len(prioritized_recommendations)} executive recommendations")
 
+            data = {}
+            if self.stream_callback:
+                parts = []
+                async for delta in self._stream_summary_text(consulting_synthesis, executive_assessment, state):
+                    parts.append(delta)
+                    await self.stream_callback(delta)
+                data["executive_summary"] = "".join(parts)
+
             return AgentResult(
                 agent_id=self.agent_id,
                 status=AgentStatus.COMPLETED,
                 data={
+                    **data,
                     "executive_recommendations": prioritized_recommendations,
                     "executive_assessment": executive_assessment,
                     "executive_dashboard": executive_dashboard,
@@ -175,6 +187,103 @@ class ExecutiveSynthesizerAgent(ConsultingAgent):
                 confidence_score=0.0
             )
 
+    async def stream_executive_summary(self, state: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a board-level executive summary for an analysed state.
+
+        The rule-based synthesis and assessment are computed first (no LLM
+        calls), so the first delta arrives as soon as the LLM starts answering.
+
+        Args:
+            state: Workflow state with analysis and consulting results
+
+        Yields:
+            Summary text deltas
+        """
+        consulting_synthesis = await self._synthesize_consulting_outputs(state)
+        executive_assessment = self._generate_executive_assessment(consulting_synthesis, state)
+
+        async for delta in self._stream_summary_text(consulting_synthesis, executive_assessment, state):
+            yield delta
+
+    async def _stream_summary_text(
+        self,
+        consulting_synthesis: Dict[str, Any],
+        executive_assessment: Dict[str, Any],
+        state: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Stream the summary from the LLM, falling back to a rule-based summary"""
+        if self.llm_client and hasattr(self.llm_client, "generate_stream"):
+            started = False
+            try:
+                prompt = self._build_executive_summary_prompt(
+                    consulting_synthesis, executive_assessment, state
+                )
+                async for delta in self.llm_client.generate_stream(prompt, temperature=0.2):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning(f"Streaming executive summary failed, using rule-based summary: {e}")
+
+        yield self._rule_based_executive_summary(executive_assessment, state)
+
+    def _build_executive_summary_prompt(
+        self,
+        consulting_synthesis: Dict[str, Any],
+        executive_assessment: Dict[str, Any],
+        state: Dict[str, Any]
+    ) -> str:
+        """Prompt for the narrative executive summary"""
+        nps_score = state.get("nps_metrics", {}).get("nps_score", 0)
+
+        return f"""
+作为伊利集团的高级管理顾问，请为董事会撰写一份简明的NPS执行摘要（300-500字）：
+
+综合健康得分：{executive_assessment.get("overall_health_score", 50)}/100
+业务状态：{executive_assessment.get("business_status", "")}
+NPS得分：{nps_score:.1f}
+
+核心优势：
+{chr(10).join([f"• {item}" for item in executive_assessment.get("key_strengths", [])[:3]])}
+
+关键挑战：
+{chr(10).join([f"• {item}" for item in executive_assessment.get("critical_challenges", [])[:3]])}
+
+战略机会：
+{chr(10).join([f"• {item}" for item in consulting_synthesis.get("business_opportunities", [])[:3]])}
+
+主要风险：
+{chr(10).join([f"• {item}" for item in consulting_synthesis.get("major_risks", [])[:3]])}
+
+请按"总体判断、关键发现、优先行动"三段输出纯文本。
+"""
+
+    def _rule_based_executive_summary(
+        self,
+        executive_assessment: Dict[str, Any],
+        state: Dict[str, Any]
+    ) -> str:
+        """Executive summary assembled from the rule-based assessment"""
+        nps_score = state.get("nps_metrics", {}).get("nps_score", 0)
+        lines = [
+            f"总体判断：NPS得分{nps_score:.1f}，综合健康得分"
+            f"{executive_assessment.get('overall_health_score', 50)}/100，"
+            f"{executive_assessment.get('business_status', '')}。"
+        ]
+
+        strengths = executive_assessment.get("key_strengths", [])[:3]
+        if strengths:
+            lines.append("核心优势：" + "；".join(str(item) for item in strengths) + "。")
+
+        challenges = executive_assessment.get("critical_challenges", [])[:3]
+        if challenges:
+            lines.append("关键挑战：" + "；".join(str(item) for item in challenges) + "。")
+
+        return "\n".join(lines)
+
     def _assess_synthesis_confidence(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Assess confidence in executive synthesis based on consulting outputs.
@@ -696,11 +805,11 @@ NPS得分：{nps_score:.1f}
 ]
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.2)
+            response = await self.run_step("generate_executive_recommendations", self.llm_client.generate, prompt, temperature=0.2)
 
             # Parse JSON response
             import json
-            recommendations_data = json.loads(response)
+            recommendations_data = json.loads(getattr(response, "content", response))
 
             recommendations = []
             for idx, rec_data in enumerate(recommendations_data):
@@ -3,16 +3,22 @@ Agent factory pattern for creating and managing NPS V3 agents.
 Provides centralized agent creation with registration mechanism.
 """
 
-from typing import Dict, Type, Optional
-from dataclasses import dataclass
+from typing import Any, Dict, List, Type, Optional
+from dataclasses import asdict, dataclass, field
+import hashlib
+import inspect
+import json
 import logging
+import sys
+import time
 
 from nps_report_v3.agents.base import (
     BaseAgent, FoundationAgent, AnalysisAgent,
     ConsultingAgent, ConfidenceConstrainedAgent
 )
+from nps_report_v3.agents.pool import get_agent_pool
 from nps_report_v3.config.constants import (
-    FOUNDATION_AGENTS, ANALYSIS_AGENTS, CONSULTING_AGENTS
+    FOUNDATION_AGENTS, ANALYSIS_AGENTS, CONSULTING_AGENTS, AGENT_DATA_DEPENDENCIES
 )
 
 logger = logging.getLogger(__name__)
@@ -86,6 +92,8 @@ class AgentConfig:
     timeout_seconds: int = 60
     enable_cache: bool = True
     llm_config: Optional[Dict] = None
+    reads: List[str] = field(default_factory=list)
+    writes: List[str] = field(default_factory=list)
 
 
 class AgentRegistry:
@@ -123,8 +131,20 @@ class AgentRegistry:
 class AgentFactory:
     """Factory for creating NPS V3 agents"""
 
-    def __init__(self):
+    def __init__(self, use_pool: Optional[bool] = None):
+        """
+        Initialize factory.
+
+        Args:
+            use_pool: Reuse warm agents from the process-wide pool (settings default if None)
+        """
+        if use_pool is None:
+            from nps_report_v3.config import get_settings
+            use_pool = get_settings().enable_agent_pool
+
         self.registry = AgentRegistry()
+        self.use_pool = use_pool
+        self._agent_versions: Dict[str, str] = {}
         self._initialize_default_agents()
 
     def _initialize_default_agents(self):
@@ -135,7 +155,8 @@ class AgentFactory:
             config = AgentConfig(
                 agent_id=agent_id,
                 agent_name=agent_name,
-                layer="foundation"
+                layer="foundation",
+                **self._data_dependencies(agent_id)
             )
 
             # Register actual implementation if available
@@ -151,7 +172,8 @@ class AgentFactory:
             config = AgentConfig(
                 agent_id=agent_id,
                 agent_name=agent_name,
-                layer="analysis"
+                layer="analysis",
+                **self._data_dependencies(agent_id)
             )
 
             # Register actual implementation if available
@@ -167,7 +189,8 @@ class AgentFactory:
             config = AgentConfig(
                 agent_id=agent_id,
                 agent_name=agent_name,
-                layer="consulting"
+                layer="consulting",
+                **self._data_dependencies(agent_id)
             )
 
             # Register actual implementation if available
@@ -178,6 +201,96 @@ class AgentFactory:
                 # Placeholder configuration
                 self.registry._configs[agent_id] = config
 
+    @staticmethod
+    def _data_dependencies(agent_id: str) -> Dict[str, List[str]]:
+        """Declared state reads/writes for a built-in agent"""
+        declared = AGENT_DATA_DEPENDENCIES.get(agent_id, {})
+        return {
+            "reads": list(declared.get("reads", [])),
+            "writes": list(declared.get("writes", []))
+        }
+
+    def get_agent_version(self, agent_id: str) -> str:
+        """
+        Code/prompt/config version of an agent, used to invalidate memoized results.
+
+        Prompts live in the agent modules, so the agent is identified by the
+        source of its module, of its base classes and of the package modules
+        they use (scrubber, cube, keyword matcher, ...), plus the package
+        version, the configured LLM model and its construction config.
+        """
+        code = self._agent_versions.get(agent_id)
+        if code is None:
+            agent_class = self.registry.get_agent_class(agent_id)
+            digest = hashlib.sha256()
+
+            for module in self._agent_modules(agent_class) if agent_class else []:
+                try:
+                    source = inspect.getsource(module)
+                except (OSError, TypeError):
+                    source = module.__name__
+                digest.update(f"{module.__name__}\n{source}\n".encode("utf-8"))
+
+            code = self._agent_versions[agent_id] = digest.hexdigest() if agent_class else agent_id
+
+        from nps_report_v3 import __version__
+        from nps_report_v3.config import get_settings
+        try:
+            model = get_settings().get_llm_config().get("model", "")
+        except ValueError:
+            model = ""
+
+        # Not memoized: custom_config overrides update the registered config in place
+        config = json.dumps(self._construction_config(agent_id), sort_keys=True, default=repr)
+
+        return hashlib.sha256(f"{code}\n{__version__}\n{model}\n{config}".encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _agent_modules(agent_class: Type[BaseAgent]) -> List[Any]:
+        """
+        Package modules an agent's output depends on: the modules defining
+        the class and its bases, and the package modules whose classes and
+        functions those modules import.
+        """
+        package = __name__.split(".")[0] + "."
+        defining = [
+            sys.modules[cls.__module__] for cls in agent_class.__mro__
+            if cls.__module__.startswith(package) and cls.__module__ in sys.modules
+        ]
+
+        modules = {module.__name__: module for module in defining}
+        for module in defining:
+            for value in vars(module).values():
+                name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+                if isinstance(name, str) and name.startswith(package) and name in sys.modules:
+                    modules.setdefault(name, sys.modules[name])
+
+        return [modules[name] for name in sorted(modules)]
+
+    def _construction_config(self, agent_id: str) -> Dict[str, Any]:
+        """Registered config plus the constructor defaults the factory builds the agent with"""
+        agent_class = self.registry.get_agent_class(agent_id)
+        agent_config = self.registry.get_agent_config(agent_id)
+
+        defaults = {}
+        if agent_class:
+            for klass in reversed(agent_class.__mro__):
+                if "__init__" not in vars(klass):
+                    continue
+                try:
+                    parameters = inspect.signature(klass.__init__).parameters.values()
+                except (TypeError, ValueError):
+                    continue
+                defaults.update({
+                    parameter.name: parameter.default for parameter in parameters
+                    if parameter.default is not inspect.Parameter.empty and parameter.name != "llm_client"
+                })
+
+        return {
+            "config": asdict(agent_config) if agent_config else None,
+            "defaults": defaults
+        }
+
     def create_agent(self, agent_id: str, custom_config: Optional[Dict] = None) -> BaseAgent:
         """
         Create an agent instance by ID
@@ -192,12 +305,21 @@ class AgentFactory:
         Raises:
             ValueError: If agent_id is not registered
         """
+        started = time.perf_counter()
         agent_class = self.registry.get_agent_class(agent_id)
         agent_config = self.registry.get_agent_config(agent_id)
 
         if not agent_class and not agent_config:
             raise ValueError(f"Agent {agent_id} is not registered")
 
+        # Agents are stateless per run; reuse the warm instance unless overridden
+        pool = get_agent_pool() if self.use_pool and not custom_config else None
+        if pool and agent_class:
+            agent = pool.get(agent_id, agent_class)
+            if agent is not None:
+                pool.record_acquire(agent_id, (time.perf_counter() - started) * 1000, warm=True)
+                return agent
+
         # If we don't have the actual class yet, use appropriate base class
         if not agent_class:
             if agent_config.layer == "foundation":
@@ -231,7 +353,7 @@ class AgentFactory:
                                                            list(CONSULTING_IMPLEMENTATIONS.keys())):
             from nps_report_v3.llm import get_llm_client
             try:
-                llm_client = get_llm_client()
+                llm_client = (pool.get_llm_client() if pool else None) or get_llm_client()
                 kwargs["llm_client"] = llm_client
             except Exception as e:
                 logger.warning(f"Could not initialize LLM client for {agent_id}: {e}")
@@ -242,6 +364,10 @@ class AgentFactory:
         if hasattr(agent, 'max_retries'):
             agent.max_retries = agent_config.max_retries
 
+        if pool:
+            pool.put(agent_id, agent_class, agent)
+            pool.record_acquire(agent_id, (time.perf_counter() - started) * 1000, warm=False)
+
         logger.info(f"Created agent {agent_id}: {agent_config.agent_name}")
         return agent
 
@@ -271,6 +397,7 @@ class AgentFactory:
                 layer=layer
             )
 
+        self._agent_versions.pop(agent_id, None)
         self.registry.register(agent_id, agent_class, config)
 
     def create_foundation_agents(self) -> Dict[str, BaseAgent]:
@@ -3,15 +3,17 @@ A0 - Data Ingestion Agent
 Foundation Pass Agent for data cleaning and PII scrubbing.
 """
 
-import re
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import hashlib
 
 from ..base import FoundationAgent, AgentResult, AgentStatus
-from ...state import CleanedData, SurveyResponse, DataQuality
+from ...config import get_settings
+from ...state import CleanedData, SurveyResponse, DataQuality, ColumnarResponseStore
 from ...schemas import validate_chinese_text, validate_product_line, validate_nps_batch
+from ...utils.text_scrubber import get_text_scrubber
 
 logger = logging.getLogger(__name__)
 
@@ -31,29 +33,25 @@ class DataIngestionAgent(FoundationAgent):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-        # PII patterns for Chinese context
-        self.pii_patterns = {
-            "phone": re.compile(r"1[3-9]\d{9}"),  # Chinese mobile
-            "email": re.compile(r"[\w\.-]+@[\w\.-]+\.\w+"),
-            "id_card": re.compile(r"\d{15}(\d{2}[0-9xX])?"),  # Chinese ID
-            "bank_card": re.compile(r"\d{16,19}"),
-            "name": re.compile(r"[张王李赵刘陈杨黄周吴徐孙马胡郭何高林郑谢罗梁宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯陶贺顾毛郝龚邵万钱严覃武戴莫孔向汤][^\s，。！？]{1,3}")
-        }
+        # PII and cleanup rules are compiled once per process
+        self.scrubber = get_text_scrubber()
 
     async def process(self, state: Dict[str, Any]) -> AgentResult:
         """
         Execute data ingestion and cleaning.
 
         Args:
-            state: Current workflow state with raw_data
+            state: Current workflow state with raw_data or raw_data_source
 
         Returns:
             AgentResult with cleaned data
         """
         try:
             raw_data = state.get("raw_data", [])
+            source = state.get("raw_data_source")
+            language = state.get("language", "zh")
 
-            if not raw_data:
+            if not raw_data and source is None:
                 return AgentResult(
                     agent_id=self.agent_id,
                     status=AgentStatus.FAILED,
@@ -61,38 +59,46 @@ class DataIngestionAgent(FoundationAgent):
                     data={}
                 )
 
-            # Process each response
-            cleaned_responses = []
-            invalid_responses = []
             cleaning_notes = []
 
-            for idx, raw_response in enumerate(raw_data):
-                try:
-                    # Validate and clean response
-                    cleaned = await self._process_response(raw_response, idx, state.get("language", "zh"))
+            if source is not None:
+                # Stream the file chunk by chunk into an on-disk columnar store
+                cleaned_responses = ColumnarResponseStore.create(get_settings().ingestion_spill_dir)
+                total = invalid = 0
 
-                    if cleaned:
+                try:
+                    for chunk in source.iter_chunks():
+                        cleaned, invalid_indexes = await self._process_chunk(chunk, total, language, cleaning_notes)
                         cleaned_responses.append(cleaned)
-                    else:
-                        invalid_responses.append(idx)
+                        total += len(chunk)
+                        invalid += len(invalid_indexes)
 
-                except Exception as e:
-                    logger.error(f"Error processing response {idx}: {e}")
-                    invalid_responses.append(idx)
-                    cleaning_notes.append(f"Response {idx}: {str(e)}")
+                        # Let other workflows run between chunks
+                        await asyncio.sleep(0)
+                except BaseException:
+                    cleaned_responses.close()
+                    raise
+
+                cleaned_responses.seal()
+            else:
+                cleaned_responses, invalid_indexes = await self._process_chunk(raw_data, 0, language, cleaning_notes)
+                total = len(raw_data)
+                invalid = len(invalid_indexes)
+
+            valid = len(cleaned_responses)
 
             # Assess data quality
             data_quality = self._assess_data_quality(
-                total=len(raw_data),
-                valid=len(cleaned_responses),
-                invalid=len(invalid_responses)
+                total=total,
+                valid=valid,
+                invalid=invalid
             )
 
             # Create cleaned data output
             cleaned_data = CleanedData(
-                total_responses=len(raw_data),
-                valid_responses=len(cleaned_responses),
-                invalid_responses=len(invalid_responses),
+                total_responses=total,
+                valid_responses=valid,
+                invalid_responses=invalid,
                 cleaned_responses=cleaned_responses,
                 data_quality=data_quality,
                 cleaning_notes=cleaning_notes,
@@ -100,7 +106,7 @@ class DataIngestionAgent(FoundationAgent):
             )
 
             logger.info(
-                f"Data ingestion complete: {len(cleaned_responses)}/{len(raw_data)} valid responses, "
+                f"Data ingestion complete: {valid}/{total} valid responses, "
                 f"quality: {data_quality}"
             )
 
@@ -110,13 +116,15 @@ class DataIngestionAgent(FoundationAgent):
                 data={
                     "cleaned_data": cleaned_data,
                     "summary": {
-                        "total_processed": len(raw_data),
-                        "valid_count": len(cleaned_responses),
-                        "invalid_count": len(invalid_responses),
+                        "total_processed": total,
+                        "valid_count": valid,
+                        "invalid_count": invalid,
                         "data_quality": data_quality,
                         "pii_removed": True
                     }
-                }
+                },
+                # The spilled store lives only as long as this run
+                metadata={"uncacheable": True} if source is not None else None
             )
 
         except Exception as e:
@@ -128,11 +136,54 @@ class DataIngestionAgent(FoundationAgent):
                 data={}
             )
 
+    async def _process_chunk(
+        self,
+        raw_responses: List[Dict[str, Any]],
+        start_index: int,
+        language: str,
+        cleaning_notes: List[str]
+    ) -> Tuple[List[SurveyResponse], List[int]]:
+        """
+        Clean one chunk of raw responses.
+
+        Args:
+            raw_responses: Raw response data
+            start_index: Index of the first response in the whole survey
+            language: Language of the comments
+            cleaning_notes: Notes list errors are appended to
+
+        Returns:
+            Cleaned responses and indexes of invalid responses
+        """
+        cleaned_responses = []
+        invalid_responses = []
+
+        # Scrub all comments in one pass over the chunk
+        comments = self.scrubber.scrub_many([self._extract_comment(r) for r in raw_responses])
+
+        for idx, (raw_response, comment) in enumerate(zip(raw_responses, comments), start_index):
+            try:
+                # Validate and clean response
+                cleaned = await self._process_response(raw_response, idx, language, comment=comment)
+
+                if cleaned:
+                    cleaned_responses.append(cleaned)
+                else:
+                    invalid_responses.append(idx)
+
+            except Exception as e:
+                logger.error(f"Error processing response {idx}: {e}")
+                invalid_responses.append(idx)
+                cleaning_notes.append(f"Response {idx}: {str(e)}")
+
+        return cleaned_responses, invalid_responses
+
     async def _process_response(
         self,
         raw_response: Dict[str, Any],
         index: int,
-        language: str = "zh"
+        language: str = "zh",
+        comment: Optional[str] = None
     ) -> Optional[SurveyResponse]:
         """
         Process individual survey response.
@@ -140,6 +191,7 @@ class DataIngestionAgent(FoundationAgent):
         Args:
             raw_response: Raw response data
             index: Response index
+            comment: Comment already scrubbed by the batch, if any
 
         Returns:
             Cleaned SurveyResponse or None if invalid
@@ -162,18 +214,10 @@ class DataIngestionAgent(FoundationAgent):
                 logger.warning(f"Response {index}: Non-numeric NPS score")
                 return None
 
-            # Extract and clean comment (support multiple field names)
-            comment = (raw_response.get("comment") or
-                      raw_response.get("feedback") or
-                      raw_response.get("feedback_text") or "")
+            if comment is None:
+                comment = self.scrubber.scrub(self._extract_comment(raw_response))
 
             if comment:
-                # Remove PII
-                comment = self._remove_pii(comment)
-
-                # Clean text
-                comment = self._clean_text(comment)
-
                 # Validate Chinese text if expected
                 if language == "zh":
                     try:
@@ -227,6 +271,17 @@ class DataIngestionAgent(FoundationAgent):
             logger.error(f"Failed to process response {index}: {e}")
             return None
 
+    def _extract_comment(self, raw_response: Dict[str, Any]) -> str:
+        """Raw comment text of a response (supports multiple field names)"""
+        if not isinstance(raw_response, dict):
+            return ""
+
+        comment = (raw_response.get("comment") or
+                   raw_response.get("feedback") or
+                   raw_response.get("feedback_text") or "")
+
+        return comment if isinstance(comment, str) else str(comment)
+
     def _remove_pii(self, text: str) -> str:
         """
         Remove PII from text.
@@ -240,23 +295,7 @@ class DataIngestionAgent(FoundationAgent):
         if not text:
             return text
 
-        # Replace PII patterns
-        for pii_type, pattern in self.pii_patterns.items():
-            if pii_type == "name":
-                # Special handling for Chinese names
-                text = pattern.sub("[姓名]", text)
-            elif pii_type == "phone":
-                text = pattern.sub("[电话]", text)
-            elif pii_type == "email":
-                text = pattern.sub("[邮箱]", text)
-            elif pii_type == "id_card":
-                text = pattern.sub("[身份证]", text)
-            elif pii_type == "bank_card":
-                text = pattern.sub("[银行卡]", text)
-            else:
-                text = pattern.sub(f"[{pii_type}]", text)
-
-        return text
+        return self.scrubber.remove_pii(text)
 
     def _clean_text(self, text: str) -> str:
         """
@@ -271,23 +310,7 @@ class DataIngestionAgent(FoundationAgent):
         if not text:
             return text
 
-        # Remove excessive whitespace
-        text = " ".join(text.split())
-
-        # Remove control characters
-        text = "".join(char for char in text if ord(char) >= 32 or char == '\n')
-
-        # Normalize quotes
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace(''', "'").replace(''', "'")
-
-        # Remove HTML tags if any
-        text = re.sub(r'<[^>]+>', '', text)
-
-        # Limit consecutive punctuation
-        text = re.sub(r'([!?。！？]){3,}', r'\1\1', text)
-
-        return text.strip()
+        return self.scrubber.clean(text)
 
     def _clean_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -311,8 +334,7 @@ class DataIngestionAgent(FoundationAgent):
 
             # Clean string values
             if isinstance(value, str):
-                value = self._remove_pii(value)
-                value = self._clean_text(value)
+                value = self.scrubber.scrub(value)
 
             cleaned[key] = value
 
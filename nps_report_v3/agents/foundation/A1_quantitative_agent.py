@@ -3,17 +3,261 @@ A1 - Quantitative Analysis Agent
 Foundation Pass Agent for NPS score calculation and statistical analysis.
 """
 
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 from scipy import stats
-from collections import Counter
 
 from ..base import FoundationAgent, AgentResult, AgentStatus
-from ...state import NPSMetrics, CleanedData, SurveyResponse
+from ...state import NPSMetrics, CleanedData, SurveyResponse, ColumnarResponseStore, NPSCube
+from ...state.nps_cube import NPS_SCORES
+from ...utils import cpu_bound, run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
+# Cube roll-ups and their keys in segment_analysis
+SEGMENT_ATTRIBUTES = {
+    "product_line": "by_product",
+    "customer_segment": "by_customer",
+    "channel": "by_channel",
+    "month": "by_period"
+}
+
+
+def quick_nps(scores) -> float:
+    """Quick NPS calculation for a sequence of scores."""
+    scores = np.asarray(scores)
+
+    if len(scores) == 0:
+        return 0
+
+    return (np.count_nonzero(scores >= 9) - np.count_nonzero(scores <= 6)) / len(scores) * 100
+
+
+def score_counts(scores: np.ndarray) -> np.ndarray:
+    """Responses per score 0-10."""
+    return np.bincount(np.asarray(scores, dtype=np.int64), minlength=NPS_SCORES)[:NPS_SCORES]
+
+
+def category_counts(counts: np.ndarray) -> np.ndarray:
+    """Detractor, passive and promoter counts from score counts of shape (..., 11)."""
+    return np.stack([counts[..., :7].sum(-1), counts[..., 7:9].sum(-1), counts[..., 9:].sum(-1)], axis=-1)
+
+
+def nps_from_categories(categories: np.ndarray) -> np.ndarray:
+    """NPS for detractor/passive/promoter counts of shape (..., 3); 0 where there are none."""
+    totals = categories.sum(-1)
+    return (categories[..., 2] - categories[..., 0]) / np.maximum(totals, 1) * 100
+
+
+def nps_variance(categories: np.ndarray) -> np.ndarray:
+    """Sampling variance of the NPS estimate (in NPS points squared)."""
+    totals = np.maximum(categories.sum(-1), 1)
+    promoters = categories[..., 2] / totals
+    detractors = categories[..., 0] / totals
+    return (promoters + detractors - (promoters - detractors) ** 2) / totals * 100 ** 2
+
+
+def bootstrap_nps(categories: np.ndarray, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Bootstrap NPS samples for detractor/passive/promoter counts of shape (..., 3).
+
+    A resample of n responses only matters through its three category
+    counts, so each resample is one multinomial draw instead of n draws.
+
+    Returns:
+        Array of shape (resamples, ...)
+    """
+    categories = np.asarray(categories, dtype=np.int64)
+    totals = categories.sum(-1)
+    probabilities = categories / np.maximum(totals, 1)[..., None]
+    draws = rng.multinomial(totals, probabilities, size=(resamples, *totals.shape))
+    return nps_from_categories(draws)
+
+
+@cpu_bound
+def rolling_nps_trend(scores: np.ndarray) -> Dict[str, Any]:
+    """
+    Rolling NPS and linear trend over time-ordered scores (runs in a CPU worker).
+
+    Args:
+        scores: NPS scores sorted by timestamp
+
+    Returns:
+        Temporal analysis results
+    """
+    temporal = {}
+
+    if len(scores) < 10:
+        return temporal
+
+    window_size = max(10, len(scores) // 5)
+
+    # Window sums of +1 (promoter) / -1 (detractor) from one cumulative sum
+    net = (scores >= 9).astype(np.int64) - (scores <= 6)
+    cumulative = np.concatenate(([0], np.cumsum(net)))
+    rolling_nps = (cumulative[window_size:] - cumulative[:-window_size]) / window_size * 100
+
+    temporal["rolling_nps"] = rolling_nps.tolist()
+
+    # Trend analysis
+    if len(rolling_nps) > 1:
+        # Simple linear regression for trend
+        x = np.arange(len(rolling_nps))
+        slope, intercept = np.polyfit(x, rolling_nps, 1)
+
+        temporal["trend"] = {
+            "direction": "improving" if slope > 0 else "declining",
+            "slope": round(slope, 2),
+            "change_per_period": round(slope * len(rolling_nps), 1)
+        }
+
+    return temporal
+
+
+@cpu_bound
+def statistical_tests(scores: np.ndarray, resamples: int = 2000, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Perform statistical tests on NPS data (runs in a CPU worker).
+
+    Args:
+        scores: NPS scores
+        resamples: Bootstrap resamples for the confidence interval
+        seed: Random seed for reproducible resampling
+
+    Returns:
+        Statistical test results
+    """
+    tests = {}
+    rng = np.random.default_rng(seed)
+    categories = category_counts(score_counts(scores))
+
+    # Normality test
+    if len(scores) >= 20:
+        statistic, p_value = stats.shapiro(scores)
+        tests["normality"] = {
+            "test": "Shapiro-Wilk",
+            "statistic": round(statistic, 4),
+            "p_value": round(p_value, 4),
+            "is_normal": p_value > 0.05
+        }
+
+    # Test against industry benchmark
+    industry_benchmark = 30  # Example industry NPS benchmark
+
+    if len(scores) >= 5:
+        # One-sample t-test over 100 bootstrap NPS values
+        nps_values = bootstrap_nps(categories, 100, rng)
+
+        t_stat, p_value = stats.ttest_1samp(nps_values, industry_benchmark)
+
+        tests["benchmark_comparison"] = {
+            "benchmark": industry_benchmark,
+            "mean_nps": round(np.mean(nps_values), 1),
+            "t_statistic": round(t_stat, 2),
+            "p_value": round(p_value, 4),
+            "significantly_different": p_value < 0.05
+        }
+
+        # Percentile bootstrap confidence interval of the NPS
+        lower, upper = np.percentile(bootstrap_nps(categories, resamples, rng), [2.5, 97.5])
+        tests["bootstrap_ci"] = {
+            "level": 0.95,
+            "lower": round(float(lower), 1),
+            "upper": round(float(upper), 1),
+            "resamples": resamples
+        }
+
+    return tests
+
+
+def segment_statistics(
+    histograms: Dict[str, Dict[str, np.ndarray]],
+    resamples: int = 2000,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    NPS, bootstrap CIs and significance tests for every segment of every attribute.
+
+    The score histograms of all segments are stacked into one matrix, so
+    the statistics and the bootstrap of every segment are computed at once.
+
+    Args:
+        histograms: Attribute -> {segment value: score histogram}
+        resamples: Bootstrap resamples per segment
+        seed: Random seed for reproducible resampling
+
+    Returns:
+        Attribute -> {"segments": {value: stats}, "test": chi-square test or None}
+    """
+    attributes = [attribute for attribute, segments in histograms.items() if segments]
+    if not attributes:
+        return {}
+
+    offsets = np.cumsum([0] + [len(histograms[attribute]) for attribute in attributes])
+    counts = np.array(
+        [histogram for attribute in attributes for histogram in histograms[attribute].values()],
+        dtype=np.int64
+    )
+    categories = category_counts(counts)
+    totals = counts.sum(-1)
+    nps = nps_from_categories(categories)
+    means = counts @ np.arange(NPS_SCORES) / np.maximum(totals, 1)
+
+    rng = np.random.default_rng(seed)
+    lower, upper = np.percentile(bootstrap_nps(categories, resamples, rng), [2.5, 97.5], axis=0)
+
+    results = {}
+    for start, end, attribute in zip(offsets[:-1], offsets[1:], attributes):
+        block = categories[start:end]
+
+        # Each segment against the other segments of the same attribute
+        rest = block.sum(0) - block
+        difference = nps[start:end] - nps_from_categories(rest)
+        se = np.sqrt(nps_variance(block) + nps_variance(rest))
+        p_values = 2 * stats.norm.sf(np.abs(difference) / np.where(se > 0, se, np.inf))
+
+        segments = {}
+        for i, value in enumerate(histograms[attribute]):
+            row = start + i
+            if totals[row] == 0:
+                continue
+            segment = {
+                "nps": round(float(nps[row]), 1),
+                "count": int(totals[row]),
+                "promoters": int(categories[row, 2]),
+                "passives": int(categories[row, 1]),
+                "detractors": int(categories[row, 0]),
+                "mean_score": round(float(means[row]), 2),
+                "ci": [round(float(lower[row]), 1), round(float(upper[row]), 1)]
+            }
+            if rest[i].sum() > 0:
+                segment["vs_rest"] = {
+                    "difference": round(float(difference[i]), 1),
+                    "p_value": round(float(p_values[i]), 4),
+                    "significant": bool(p_values[i] < 0.05)
+                }
+            segments[value] = segment
+
+        # Chi-square test of category mix vs. segment (non-empty rows/columns only)
+        table = block[block.sum(1) > 0][:, block.sum(0) > 0]
+        test = None
+        if table.shape[0] >= 2 and table.shape[1] >= 2:
+            statistic, p_value, dof, _ = stats.chi2_contingency(table)
+            test = {
+                "test": "chi-square",
+                "statistic": round(float(statistic), 4),
+                "p_value": round(float(p_value), 4),
+                "dof": int(dof),
+                "significant": bool(p_value < 0.05)
+            }
+
+        results[attribute] = {"segments": segments, "test": test}
+
+    return results
+
 
 class QuantitativeAnalysisAgent(FoundationAgent):
     """
@@ -27,9 +271,13 @@ class QuantitativeAnalysisAgent(FoundationAgent):
     - Generate quantitative insights
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, bootstrap_resamples: int = 2000, bootstrap_seed: Optional[int] = 0, **kwargs):
         super().__init__(**kwargs)
 
+        # Bootstrap confidence intervals (seeded so re-runs give the same result)
+        self.bootstrap_resamples = bootstrap_resamples
+        self.bootstrap_seed = bootstrap_seed
+
         # NPS categories
         self.nps_categories = {
             "promoter": (9, 10),     # 推荐者
@@ -68,10 +316,11 @@ class QuantitativeAnalysisAgent(FoundationAgent):
                     data={}
                 )
 
-            # Extract NPS scores
-            scores = [r.get("nps_score") for r in responses if r.get("nps_score") is not None]
+            # Extract NPS scores, segment codes and timestamps as arrays
+            scores, groups, timestamps = self._response_columns(responses)
+            response_ids = self._response_ids(responses)
 
-            if not scores:
+            if len(scores) == 0:
                 return AgentResult(
                     agent_id=self.agent_id,
                     status=AgentStatus.FAILED,
@@ -79,17 +328,23 @@ class QuantitativeAnalysisAgent(FoundationAgent):
                     data={}
                 )
 
+            # Score histograms per product/channel/segment/day; every
+            # count below is a roll-up of this cube
+            cube = NPSCube.from_columns(scores, groups, timestamps)
+
             # Calculate basic NPS metrics
-            nps_metrics = self._calculate_nps_metrics(scores)
+            nps_metrics = self._calculate_nps_metrics(cube.total)
 
             # Segment analysis
-            segment_analysis = await self._analyze_segments(responses)
+            segment_analysis = await self._analyze_segments(cube, scores)
 
             # Temporal analysis if timestamps available
-            temporal_analysis = self._analyze_temporal_patterns(responses)
+            temporal_analysis = await self._analyze_temporal_patterns(scores, timestamps)
 
-            # Statistical tests
-            statistical_analysis = self._perform_statistical_tests(scores)
+            # Statistical tests (off the event loop)
+            statistical_analysis = await run_cpu_bound(
+                statistical_tests, scores, self.bootstrap_resamples, self.bootstrap_seed
+            )
 
             # Generate insights
             insights = self._generate_quantitative_insights(
@@ -113,6 +368,10 @@ class QuantitativeAnalysisAgent(FoundationAgent):
                     "temporal_analysis": temporal_analysis,
                     "statistical_analysis": statistical_analysis,
                     "quantitative_insights": insights
+                },
+                # Folded into the persistent aggregate cube by the orchestrator
+                metadata={
+                    "nps_cube_responses": (response_ids, scores, groups, timestamps)
                 }
             )
 
@@ -125,22 +384,95 @@ class QuantitativeAnalysisAgent(FoundationAgent):
                 data={}
             )
 
-    def _calculate_nps_metrics(self, scores: List[int]) -> NPSMetrics:
+    def _response_columns(
+        self,
+        responses: List[SurveyResponse]
+    ) -> Tuple[np.ndarray, Dict[str, Tuple[np.ndarray, List[str]]], np.ndarray]:
         """
-        Calculate NPS metrics from scores.
+        Array-backed columns of the responses.
+
+        A spilled response store hands over its columns directly; a list of
+        responses is encoded in one pass.
 
         Args:
-            scores: List of NPS scores (0-10)
+            responses: Survey responses (list or ColumnarResponseStore)
+
+        Returns:
+            Scores, attribute -> (segment codes, segment values), epoch timestamps (NaN if missing)
+        """
+        attributes = [attribute for attribute in SEGMENT_ATTRIBUTES if attribute != "month"]
+
+        if isinstance(responses, ColumnarResponseStore):
+            return (
+                responses.column("nps_score"),
+                {attribute: responses.codes(attribute) for attribute in attributes},
+                responses.column("timestamp")
+            )
+
+        scores = []
+        timestamps = []
+        codes = {attribute: [] for attribute in attributes}
+        index = {attribute: {} for attribute in attributes}
+
+        for response in responses:
+            score = response.get("nps_score")
+
+            if score is None:
+                continue
+
+            scores.append(score)
+            timestamp = response.get("timestamp")
+            timestamps.append(timestamp.timestamp() if isinstance(timestamp, datetime) else np.nan)
+
+            for attribute in attributes:
+                value = response.get(attribute)
+                codes[attribute].append(index[attribute].setdefault(value, len(index[attribute])) if value else -1)
+
+        groups = {
+            attribute: (np.asarray(codes[attribute], dtype=np.int32), list(index[attribute]))
+            for attribute in attributes
+        }
+
+        return np.asarray(scores, dtype=np.int64), groups, np.asarray(timestamps, dtype=np.float64)
+
+    def _response_ids(self, responses: List[SurveyResponse]) -> List[str]:
+        """
+        Id of each scored response, aligned with :meth:`_response_columns`,
+        so the persistent cube counts every response once across runs.
+        Responses without an id get a deterministic one like in A0.
+        """
+        if isinstance(responses, ColumnarResponseStore):
+            return list(responses.column("response_id"))
+
+        response_ids = []
+        for index, response in enumerate(responses):
+            score = response.get("nps_score")
+
+            if score is None:
+                continue
+
+            response_id = response.get("response_id")
+            if not response_id:
+                comment = response.get("comment") or ""
+                response_id = hashlib.md5(f"{index}_{score}_{comment[:50]}".encode()).hexdigest()[:12]
+            response_ids.append(str(response_id))
+
+        return response_ids
+
+    def _calculate_nps_metrics(self, counts: np.ndarray) -> NPSMetrics:
+        """
+        Calculate NPS metrics from the score histogram.
+
+        Args:
+            counts: Responses per NPS score (0-10)
 
         Returns:
             NPSMetrics with calculated values
         """
-        total = len(scores)
+        total = int(counts.sum())
 
         # Categorize scores
-        promoters = sum(1 for s in scores if s >= 9)
-        passives = sum(1 for s in scores if 7 <= s <= 8)
-        detractors = sum(1 for s in scores if s <= 6)
+        detractors, passives, promoters = category_counts(counts).tolist()
 
         # Calculate percentages
         promoters_pct = (promoters / total) * 100
@@ -181,225 +513,76 @@ class QuantitativeAnalysisAgent(FoundationAgent):
             statistical_significance=is_significant
         )
 
-    async def _analyze_segments(self, responses: List[SurveyResponse]) -> Dict[str, Any]:
+    async def _analyze_segments(self, cube: NPSCube, scores: np.ndarray) -> Dict[str, Any]:
         """
         Analyze NPS by different segments.
 
         Args:
-            responses: Survey responses
+            cube: Score histograms of the survey
+            scores: NPS scores (for quartiles)
 
         Returns:
             Segment analysis results
         """
         segments = {}
 
-        # By product line
-        product_segments = self._segment_by_attribute(responses, "product_line")
+        # Product, customer segment, channel and month roll-ups of the cube
+        histograms = {
+            attribute: {value: counts for value, counts in cube.rollup(attribute).items() if value is not None}
+            for attribute in SEGMENT_ATTRIBUTES
+        }
+        results = segment_statistics(histograms, self.bootstrap_resamples, self.bootstrap_seed)
 
-        if product_segments:
-            segments["by_product"] = {
-                product: self._calculate_segment_nps(data)
-                for product, data in product_segments.items()
-            }
+        for attribute, key in SEGMENT_ATTRIBUTES.items():
+            result = results.get(attribute)
 
-        # By customer segment
-        customer_segments = self._segment_by_attribute(responses, "customer_segment")
+            if result and result["segments"]:
+                segments[key] = result["segments"]
 
-        if customer_segments:
-            segments["by_customer"] = {
-                segment: self._calculate_segment_nps(data)
-                for segment, data in customer_segments.items()
-            }
-
-        # By channel
-        channel_segments = self._segment_by_attribute(responses, "channel")
-
-        if channel_segments:
-            segments["by_channel"] = {
-                channel: self._calculate_segment_nps(data)
-                for channel, data in channel_segments.items()
-            }
+                if result["test"]:
+                    segments.setdefault("segment_tests", {})[key] = result["test"]
 
         # Score distribution analysis
-        scores = [r.get("nps_score") for r in responses if r.get("nps_score") is not None]
-        segments["score_distribution"] = dict(Counter(scores))
+        counts = cube.total
+        segments["score_distribution"] = {score: count for score, count in enumerate(counts.tolist()) if count}
 
         # Quartile analysis
-        if scores:
+        if len(scores):
+            mean = counts @ np.arange(NPS_SCORES) / len(scores)
             segments["quartiles"] = {
                 "q1": np.percentile(scores, 25),
                 "median": np.percentile(scores, 50),
                 "q3": np.percentile(scores, 75),
-                "mean": np.mean(scores),
-                "std": np.std(scores)
+                "mean": mean,
+                "std": np.sqrt(counts @ (np.arange(NPS_SCORES) - mean) ** 2 / len(scores))
             }
 
         return segments
 
-    def _segment_by_attribute(
-        self,
-        responses: List[SurveyResponse],
-        attribute: str
-    ) -> Dict[str, List[SurveyResponse]]:
-        """
-        Segment responses by attribute.
-
-        Args:
-            responses: Survey responses
-            attribute: Attribute to segment by
-
-        Returns:
-            Dictionary of segmented responses
-        """
-        segments = {}
-
-        for response in responses:
-            value = response.get(attribute)
-
-            if value:
-                if value not in segments:
-                    segments[value] = []
-                segments[value].append(response)
-
-        return segments
-
-    def _calculate_segment_nps(self, responses: List[SurveyResponse]) -> Dict[str, Any]:
-        """
-        Calculate NPS for a segment.
-
-        Args:
-            responses: Segment responses
-
-        Returns:
-            Segment NPS metrics
-        """
-        scores = [r.get("nps_score") for r in responses if r.get("nps_score") is not None]
-
-        if not scores:
-            return {"nps": None, "count": 0}
-
-        total = len(scores)
-        promoters = sum(1 for s in scores if s >= 9)
-        detractors = sum(1 for s in scores if s <= 6)
-
-        nps = ((promoters - detractors) / total) * 100
-
-        return {
-            "nps": round(nps, 1),
-            "count": total,
-            "promoters": promoters,
-            "detractors": detractors,
-            "mean_score": round(np.mean(scores), 2)
-        }
-
-    def _analyze_temporal_patterns(self, responses: List[SurveyResponse]) -> Dict[str, Any]:
+    async def _analyze_temporal_patterns(self, scores: np.ndarray, timestamps: np.ndarray) -> Dict[str, Any]:
         """
         Analyze temporal patterns in NPS scores.
 
-        Args:
-            responses: Survey responses with timestamps
-
-        Returns:
-            Temporal analysis results
-        """
-        temporal = {}
-
-        # Extract timestamped scores
-        timed_scores = []
-
-        for r in responses:
-            if r.get("timestamp") and r.get("nps_score") is not None:
-                timed_scores.append({
-                    "timestamp": r["timestamp"],
-                    "score": r["nps_score"]
-                })
-
-        if not timed_scores:
-            return temporal
-
-        # Sort by timestamp
-        timed_scores.sort(key=lambda x: x["timestamp"])
-
-        # Calculate rolling NPS (if enough data)
-        if len(timed_scores) >= 10:
-            window_size = max(10, len(timed_scores) // 5)
-            rolling_nps = []
-
-            for i in range(window_size, len(timed_scores) + 1):
-                window_scores = [s["score"] for s in timed_scores[i-window_size:i]]
-                window_nps = self._quick_nps(window_scores)
-                rolling_nps.append(window_nps)
-
-            temporal["rolling_nps"] = rolling_nps
-
-            # Trend analysis
-            if len(rolling_nps) > 1:
-                # Simple linear regression for trend
-                x = np.arange(len(rolling_nps))
-                slope, intercept = np.polyfit(x, rolling_nps, 1)
-
-                temporal["trend"] = {
-                    "direction": "improving" if slope > 0 else "declining",
-                    "slope": round(slope, 2),
-                    "change_per_period": round(slope * len(rolling_nps), 1)
-                }
-
-        return temporal
-
-    def _quick_nps(self, scores: List[int]) -> float:
-        """Quick NPS calculation for a list of scores."""
-        if not scores:
-            return 0
-
-        total = len(scores)
-        promoters = sum(1 for s in scores if s >= 9)
-        detractors = sum(1 for s in scores if s <= 6)
-
-        return ((promoters - detractors) / total) * 100
-
-    def _perform_statistical_tests(self, scores: List[int]) -> Dict[str, Any]:
-        """
-        Perform statistical tests on NPS data.
-
         Args:
             scores: NPS scores
+            timestamps: Epoch timestamps (NaN if missing)
 
         Returns:
-            Statistical test results
+            Temporal analysis results
         """
-        tests = {}
-
-        # Normality test
-        if len(scores) >= 20:
-            statistic, p_value = stats.shapiro(scores)
-            tests["normality"] = {
-                "test": "Shapiro-Wilk",
-                "statistic": round(statistic, 4),
-                "p_value": round(p_value, 4),
-                "is_normal": p_value > 0.05
-            }
+        timed = ~np.isnan(timestamps)
 
-        # Test against industry benchmark
-        industry_benchmark = 30  # Example industry NPS benchmark
+        if not timed.any():
+            return {}
 
-        if len(scores) >= 5:
-            # One-sample t-test
-            nps_values = []
-            for _ in range(100):  # Bootstrap
-                sample = np.random.choice(scores, size=len(scores), replace=True)
-                nps_values.append(self._quick_nps(list(sample)))
+        # Stable sort keeps arrival order for equal timestamps
+        order = np.argsort(timestamps[timed], kind="stable")
 
-            t_stat, p_value = stats.ttest_1samp(nps_values, industry_benchmark)
+        return await run_cpu_bound(rolling_nps_trend, scores[timed][order])
 
-            tests["benchmark_comparison"] = {
-                "benchmark": industry_benchmark,
-                "mean_nps": round(np.mean(nps_values), 1),
-                "t_statistic": round(t_stat, 2),
-                "p_value": round(p_value, 4),
-                "significantly_different": p_value < 0.05
-            }
-
-        return tests
+    def _quick_nps(self, scores: List[int]) -> float:
+        """Quick NPS calculation for a list of scores."""
+        return quick_nps(scores)
 
     def _generate_quantitative_insights(
         self,
@@ -3,6 +3,9 @@ A2 - Qualitative Analysis Agent
 Foundation Pass Agent for text analysis and semantic tagging.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 from typing import Dict, Any, List, Optional, Literal
 import re
@@ -12,9 +15,34 @@ from collections import Counter
 from ..base import FoundationAgent, AgentResult, AgentStatus
 from ...state import TaggedResponse, CleanedData
 from ...llm import LLMClient
+from ...llm.tokens import estimate_tokens, truncate_to_tokens, get_evidence_token_budget
+from ...utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Custom dictionary for dairy terms
+DAIRY_TERMS = (
+    "安慕希", "金典", "舒化", "优酸乳", "味可滋", "QQ星",
+    "益生菌", "乳酸菌", "脱脂", "全脂", "低脂", "无糖",
+    "蒙牛", "光明", "君乐宝", "三元"  # Competitors
+)
+
+# jieba's dictionary is process-global, so custom terms are added once
+_dairy_dictionary_loaded = False
+
+
+def load_dairy_dictionary() -> None:
+    """Add dairy terms to jieba (once per process, including CPU workers)."""
+    global _dairy_dictionary_loaded
+
+    if _dairy_dictionary_loaded:
+        return
+
+    for term in DAIRY_TERMS:
+        jieba.add_word(term)
+
+    _dairy_dictionary_loaded = True
+
 
 class QualitativeAnalysisAgent(FoundationAgent):
     """
@@ -28,10 +56,27 @@ class QualitativeAnalysisAgent(FoundationAgent):
     - Extract key phrases and entities
     """
 
-    def __init__(self, llm_client: Optional[LLMClient] = None, **kwargs):
+    # Comments shorter than this are left to the rule-based path
+    LLM_MIN_COMMENT_LENGTH = 20
+
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient] = None,
+        llm_batch_mode: bool = True,
+        llm_batch_size: int = 20,
+        llm_batch_token_budget: int = 2500,
+        llm_batch_concurrency: int = 4,
+        **kwargs
+    ):
         super().__init__(**kwargs)
         self.llm_client = llm_client
 
+        # Micro-batching of LLM comment analysis
+        self.llm_batch_mode = llm_batch_mode
+        self.llm_batch_size = llm_batch_size
+        self.llm_batch_token_budget = llm_batch_token_budget
+        self.llm_batch_concurrency = llm_batch_concurrency
+
         # Initialize Chinese NLP
         self._init_chinese_nlp()
 
@@ -52,17 +97,38 @@ class QualitativeAnalysisAgent(FoundationAgent):
             "neutral": ["一般", "还行", "普通", "可以", "凑合", "马马虎虎"]
         }
 
-    def _init_chinese_nlp(self):
-        """Initialize Chinese NLP components."""
-        # Load custom dictionary for dairy terms
-        dairy_terms = [
-            "安慕希", "金典", "舒化", "优酸乳", "味可滋", "QQ星",
-            "益生菌", "乳酸菌", "脱脂", "全脂", "低脂", "无糖",
-            "蒙牛", "光明", "君乐宝", "三元"  # Competitors
-        ]
+        # Emotion keywords (Plutchik's eight basic emotions)
+        self.emotion_keywords = {
+            "joy": ["喜欢", "开心", "快乐", "愉快", "满意", "高兴"],
+            "trust": ["信任", "放心", "可靠", "安全", "品质", "保证"],
+            "anticipation": ["期待", "希望", "想要", "盼望", "等待"],
+            "surprise": ["惊喜", "意外", "没想到", "竟然", "居然"],
+            "sadness": ["失望", "难过", "遗憾", "可惜", "伤心"],
+            "disgust": ["恶心", "讨厌", "难喝", "倒胃口", "反感"],
+            "anger": ["生气", "愤怒", "不满", "投诉", "差评"],
+            "fear": ["担心", "害怕", "忧虑", "不安", "恐惧"]
+        }
+
+        # Negation characters (flip the polarity of sentiment words)
+        self.negations = ["不", "没", "无", "非", "别", "莫", "未"]
+
+        # Product and competitor mentions
+        self.products = ["安慕希", "金典", "舒化", "优酸乳", "味可滋", "QQ星"]
+        self.competitors = ["蒙牛", "光明", "君乐宝", "三元"]
 
-        for term in dairy_terms:
-            jieba.add_word(term)
+        # Every lexicon above in one automaton, so a comment is scanned once
+        self.keyword_matcher = KeywordMatcher({
+            "tag": self.product_tags,
+            "sentiment": self.emotion_words,
+            "emotion": self.emotion_keywords,
+            "negation": {"negation": self.negations},
+            "product": {product: [product] for product in self.products},
+            "competitor": {competitor: [competitor] for competitor in self.competitors}
+        })
+
+    def _init_chinese_nlp(self):
+        """Initialize Chinese NLP components (once per process)."""
+        load_dairy_dictionary()
 
     async def process(self, state: Dict[str, Any]) -> AgentResult:
         """
@@ -121,13 +187,16 @@ class QualitativeAnalysisAgent(FoundationAgent):
                 )
 
             # Process each response
-            tagged_responses = []
+            if self.llm_batch_mode:
+                tagged_responses = await self._analyze_responses_batched(responses_with_comments)
+            else:
+                tagged_responses = []
 
-            for response in responses_with_comments:
-                tagged = await self._analyze_response(response)
+                for response in responses_with_comments:
+                    tagged = await self._analyze_response(response)
 
-                if tagged:
-                    tagged_responses.append(tagged)
+                    if tagged:
+                        tagged_responses.append(tagged)
 
             # Aggregate analysis
             summary = self._aggregate_analysis(tagged_responses)
@@ -169,105 +238,321 @@ class QualitativeAnalysisAgent(FoundationAgent):
             TaggedResponse with analysis
         """
         try:
-            # Support both 'comment' and 'feedback_text' field names
-            comment = response.get("comment") or response.get("feedback_text", "")
+            tagged = self._rule_based_analysis(response)
 
-            if not comment:
+            if not tagged:
                 return None
 
-            # Basic text analysis
-            tags = self._extract_tags(comment)
-            sentiment = self._analyze_sentiment(comment)
-            emotion_scores = self._analyze_emotions(comment)
-            key_phrases = self._extract_key_phrases(comment)
+            comment = tagged["original_text"]
 
             # LLM-based deep analysis (if available)
-            if self.llm_client and len(comment) > 20:
+            if self.llm_client and len(comment) > self.LLM_MIN_COMMENT_LENGTH:
                 llm_analysis = await self._llm_analyze(comment, response.get("nps_score"))
 
-                # Merge LLM results
                 if llm_analysis:
-                    tags.extend(llm_analysis.get("tags", []))
-                    tags = list(set(tags))  # Remove duplicates
-
-                    # Refine sentiment with LLM
-                    if llm_analysis.get("sentiment"):
-                        sentiment = llm_analysis["sentiment"]
-
-                    # Add LLM-extracted phrases
-                    if llm_analysis.get("key_points"):
-                        key_phrases.extend(llm_analysis["key_points"])
-
-            return TaggedResponse(
-                response_id=response.get("response_id"),
-                original_text=comment,
-                tags=tags,
-                sentiment=sentiment,
-                emotion_scores=emotion_scores,
-                key_phrases=key_phrases[:5],
-                nps_score=response.get("nps_score"),
-                product_line=response.get("product_line"),
-                customer_segment=response.get("customer_segment"),
-                channel=response.get("channel"),
-                metadata=response.get("metadata", {})
-            )
+                    try:
+                        self._merge_llm_analysis(tagged, llm_analysis)
+                    except Exception as e:
+                        logger.warning(f"Ignoring malformed LLM analysis: {e}")
+
+            tagged["key_phrases"] = tagged["key_phrases"][:5]
+            return tagged
 
         except Exception as e:
             logger.error(f"Failed to analyze response: {e}")
             return None
 
-    def _extract_tags(self, text: str) -> List[str]:
+    def _rule_based_analysis(self, response: Dict[str, Any]) -> Optional[TaggedResponse]:
         """
-        Extract semantic tags from text.
+        Keyword/lexicon analysis of a single response, without any LLM call.
 
         Args:
-            text: Input text
+            response: Survey response with comment
 
         Returns:
-            List of tags
+            TaggedResponse, or None if the response has no text
+        """
+        # Support both 'comment' and 'feedback_text' field names
+        comment = response.get("comment") or response.get("feedback_text", "")
+
+        if not comment:
+            return None
+
+        # One scan for tags, sentiment and emotions
+        matches = self.keyword_matcher.match(comment)
+
+        return TaggedResponse(
+            response_id=response.get("response_id"),
+            original_text=comment,
+            tags=self._extract_tags(comment, matches),
+            sentiment=self._analyze_sentiment(comment, matches),
+            emotion_scores=self._analyze_emotions(comment, matches),
+            key_phrases=self._extract_key_phrases(comment),
+            nps_score=response.get("nps_score"),
+            product_line=response.get("product_line"),
+            customer_segment=response.get("customer_segment"),
+            channel=response.get("channel"),
+            metadata=response.get("metadata", {})
+        )
+
+    def _merge_llm_analysis(self, tagged: TaggedResponse, llm_analysis: Dict[str, Any]) -> None:
         """
-        tags = []
+        Merge LLM results into a rule-based TaggedResponse in place.
 
-        # Check each tag category
-        for category, keywords in self.product_tags.items():
-            for keyword in keywords:
-                if keyword in text:
-                    tags.append(category)
-                    break
+        LLM output is untrusted JSON: tags and key points that are not
+        strings are dropped, and a malformed item leaves ``tagged`` as is.
+        """
+        if not isinstance(llm_analysis, dict):
+            raise ValueError(f"LLM analysis is not an object: {type(llm_analysis).__name__}")
 
-        # Product mentions
-        products = ["安慕希", "金典", "舒化", "优酸乳", "味可滋", "QQ星"]
+        llm_tags = self._string_list(llm_analysis.get("tags"))
+        key_points = self._string_list(llm_analysis.get("key_points"))
+        sentiment = llm_analysis.get("sentiment")
 
-        for product in products:
-            if product in text:
-                tags.append(f"产品_{product}")
+        tags = list(tagged["tags"])
+        tags.extend(llm_tags)
+        tagged["tags"] = list(set(tags))  # Remove duplicates
 
-        # Competitor mentions
-        competitors = ["蒙牛", "光明", "君乐宝", "三元"]
+        # Refine sentiment with LLM
+        if isinstance(sentiment, str) and sentiment in ("positive", "negative", "neutral", "mixed"):
+            tagged["sentiment"] = sentiment
 
-        for competitor in competitors:
-            if competitor in text:
-                tags.append(f"竞品_{competitor}")
+        # Add LLM-extracted phrases
+        if key_points:
+            tagged["key_phrases"] = list(tagged["key_phrases"]) + key_points
 
-        return list(set(tags))
+    @staticmethod
+    def _string_list(value: Any) -> List[str]:
+        """Non-empty strings of an LLM list field ([] if the field is not a list)"""
+        if not isinstance(value, list):
+            return []
+        return [item for item in value if isinstance(item, str) and item]
 
-    def _analyze_sentiment(self, text: str) -> Literal["positive", "negative", "neutral", "mixed"]:
+    async def _analyze_responses_batched(
+        self,
+        responses: List[Dict[str, Any]]
+    ) -> List[TaggedResponse]:
+        """
+        Analyze responses with one LLM call per micro-batch of comments.
+
+        Every response gets the rule-based analysis first; long comments are
+        then packed into token-bounded batches that run with bounded
+        concurrency. Items the LLM drops or returns malformed keep their
+        rule-based result.
+
+        Args:
+            responses: Survey responses with comments
+
+        Returns:
+            List of TaggedResponse in input order
+        """
+        tagged_responses: List[TaggedResponse] = []
+
+        for response in responses:
+            try:
+                tagged = self._rule_based_analysis(response)
+            except Exception as e:
+                logger.error(f"Failed to analyze response: {e}")
+                tagged = None
+
+            if tagged:
+                tagged_responses.append(tagged)
+
+        if self.llm_client:
+            eligible = [
+                t for t in tagged_responses
+                if len(t["original_text"]) > self.LLM_MIN_COMMENT_LENGTH
+            ]
+            batches = self._build_llm_batches(eligible)
+
+            if batches:
+                semaphore = asyncio.Semaphore(self.llm_batch_concurrency)
+
+                async def run_batch(index: int, batch: List[TaggedResponse]) -> None:
+                    async with semaphore:
+                        results = await self._llm_analyze_batch(batch, index)
+
+                    for tagged, llm_analysis in zip(batch, results):
+                        if not llm_analysis:
+                            continue
+                        try:
+                            self._merge_llm_analysis(tagged, llm_analysis)
+                        except Exception as e:
+                            logger.warning(
+                                f"Ignoring malformed LLM analysis for {tagged.get('response_id')}: {e}"
+                            )
+
+                await asyncio.gather(*(run_batch(index, batch) for index, batch in enumerate(batches)))
+
+                logger.info(
+                    f"A2 analyzed {len(eligible)} comments with LLM in {len(batches)} batches"
+                )
+
+        for tagged in tagged_responses:
+            tagged["key_phrases"] = tagged["key_phrases"][:5]
+
+        return tagged_responses
+
+    def _build_llm_batches(self, items: List[TaggedResponse]) -> List[List[TaggedResponse]]:
+        """Pack items into batches bounded by item count and estimated prompt tokens."""
+        batches: List[List[TaggedResponse]] = []
+        current: List[TaggedResponse] = []
+        current_tokens = 0
+
+        for item in items:
+            item_tokens = estimate_tokens(item["original_text"]) + 10
+
+            if current and (
+                len(current) >= self.llm_batch_size
+                or current_tokens + item_tokens > self.llm_batch_token_budget
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(item)
+            current_tokens += item_tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    async def _llm_analyze_batch(
+        self,
+        batch: List[TaggedResponse],
+        index: int = 0
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Use one LLM call to analyze a batch of comments.
+
+        Args:
+            batch: Rule-based results whose comments should be analyzed
+            index: Position of the batch in this run, naming its retry step
+
+        Returns:
+            Per-item LLM analysis aligned with ``batch`` (None where parsing failed)
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+
+        items_text = "\n".join(
+            f"{idx}. [NPS评分：{item.get('nps_score') if item.get('nps_score') is not None else '未知'}] "
+            f"{item['original_text']}"
+            for idx, item in enumerate(batch, start=1)
+        )
+
+        prompt = f"""
+分析以下{len(batch)}条客户反馈，逐条提取关键信息：
+
+{items_text}
+
+对每条反馈提供：
+1. 情感倾向（positive/negative/neutral/mixed）
+2. 主要关注点（不超过3个）
+3. 关键标签（不超过5个）
+4. 改进建议（如果有）
+
+以JSON数组格式返回，每条反馈一个对象，index与编号对应：
+[
+    {{
+        "index": 1,
+        "sentiment": "...",
+        "key_points": ["...", "..."],
+        "tags": ["...", "..."],
+        "improvement": "..."
+    }}
+]
+"""
+
+        try:
+            response = await self.run_step(
+                f"analyze_batch_{index}",
+                self.llm_client.generate,
+                prompt,
+                temperature=0.3
+            )
+            parsed = self._parse_json_array(getattr(response, "content", response))
+        except Exception as e:
+            logger.debug(f"LLM batch analysis failed: {e}")
+            return results
+
+        for position, entry in enumerate(parsed):
+            if not isinstance(entry, dict):
+                continue
+
+            index = entry.get("index", position + 1)
+            try:
+                index = int(index)
+            except (TypeError, ValueError):
+                continue
+
+            if 1 <= index <= len(batch):
+                results[index - 1] = entry
+
+        return results
+
+    @staticmethod
+    def _parse_json_array(text: str) -> List[Any]:
+        """Extract a JSON array from LLM output that may include surrounding prose."""
+        start = text.find("[")
+        end = text.rfind("]")
+
+        if start == -1 or end <= start:
+            return []
+
+        try:
+            parsed = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return []
+
+        return parsed if isinstance(parsed, list) else []
+
+    def _extract_tags(self, text: str, matches: Optional[Dict[str, Dict[str, List[str]]]] = None) -> List[str]:
+        """
+        Extract semantic tags from text.
+
+        Args:
+            text: Input text
+            matches: Keyword matches of the text (scanned if None)
+
+        Returns:
+            List of tags
+        """
+        if matches is None:
+            matches = self.keyword_matcher.match(text)
+
+        # Tag categories, then product and competitor mentions
+        tags = list(matches.get("tag", {}))
+        tags.extend(f"产品_{product}" for product in matches.get("product", {}))
+        tags.extend(f"竞品_{competitor}" for competitor in matches.get("competitor", {}))
+
+        return tags
+
+    def _analyze_sentiment(
+        self,
+        text: str,
+        matches: Optional[Dict[str, Dict[str, List[str]]]] = None
+    ) -> Literal["positive", "negative", "neutral", "mixed"]:
         """
         Analyze sentiment of text.
 
         Args:
             text: Input text
+            matches: Keyword matches of the text (scanned if None)
 
         Returns:
             Sentiment label
         """
-        pos_count = sum(1 for word in self.emotion_words["positive"] if word in text)
-        neg_count = sum(1 for word in self.emotion_words["negative"] if word in text)
-        neu_count = sum(1 for word in self.emotion_words["neutral"] if word in text)
+        if matches is None:
+            matches = self.keyword_matcher.match(text)
+
+        sentiment_words = matches.get("sentiment", {})
+        pos_count = len(sentiment_words.get("positive", []))
+        neg_count = len(sentiment_words.get("negative", []))
+        neu_count = len(sentiment_words.get("neutral", []))
 
         # Negation handling
-        negations = ["不", "没", "无", "非", "别", "莫", "未"]
-        has_negation = any(neg in text for neg in negations)
+        has_negation = "negation" in matches
 
         if has_negation:
             # Swap positive and negative if negation present
@@ -291,52 +576,33 @@ class QualitativeAnalysisAgent(FoundationAgent):
             else:
                 return "neutral"
 
-    def _analyze_emotions(self, text: str) -> Dict[str, float]:
+    def _analyze_emotions(self, text: str, matches: Optional[Dict[str, Dict[str, List[str]]]] = None) -> Dict[str, float]:
         """
         Analyze emotion scores in text.
 
         Args:
             text: Input text
+            matches: Keyword matches of the text (scanned if None)
 
         Returns:
             Dictionary of emotion scores
         """
-        emotions = {
-            "joy": 0.0,
-            "trust": 0.0,
-            "anticipation": 0.0,
-            "surprise": 0.0,
-            "sadness": 0.0,
-            "disgust": 0.0,
-            "anger": 0.0,
-            "fear": 0.0
-        }
-
-        # Simple keyword-based emotion detection
-        emotion_keywords = {
-            "joy": ["喜欢", "开心", "快乐", "愉快", "满意", "高兴"],
-            "trust": ["信任", "放心", "可靠", "安全", "品质", "保证"],
-            "anticipation": ["期待", "希望", "想要", "盼望", "等待"],
-            "surprise": ["惊喜", "意外", "没想到", "竟然", "居然"],
-            "sadness": ["失望", "难过", "遗憾", "可惜", "伤心"],
-            "disgust": ["恶心", "讨厌", "难喝", "倒胃口", "反感"],
-            "anger": ["生气", "愤怒", "不满", "投诉", "差评"],
-            "fear": ["担心", "害怕", "忧虑", "不安", "恐惧"]
-        }
+        if matches is None:
+            matches = self.keyword_matcher.match(text)
 
-        # Count keyword occurrences
-        for emotion, keywords in emotion_keywords.items():
-            count = sum(1 for keyword in keywords if keyword in text)
+        emotions = dict.fromkeys(self.emotion_keywords, 0.0)
 
-            if count > 0:
-                emotions[emotion] = min(1.0, count * 0.3)
+        # Distinct keywords found per emotion
+        scores = {
+            emotion: min(1.0, len(keywords) * 0.3)
+            for emotion, keywords in matches.get("emotion", {}).items()
+        }
 
         # Normalize scores
-        total = sum(emotions.values())
+        total = sum(scores.values())
 
-        if total > 0:
-            for emotion in emotions:
-                emotions[emotion] = round(emotions[emotion] / total, 2)
+        for emotion, score in scores.items():
+            emotions[emotion] = round(score / total, 2)
 
         return emotions
 
@@ -396,7 +662,7 @@ class QualitativeAnalysisAgent(FoundationAgent):
 分析以下客户反馈，提取关键信息：
 
 NPS评分：{nps_score if nps_score is not None else "未知"}
-客户评论：{comment}
+客户评论：{truncate_to_tokens(comment, get_evidence_token_budget())}
 
 请提供：
 1. 情感倾向（positive/negative/neutral/mixed）
@@ -413,11 +679,16 @@ NPS评分：{nps_score if nps_score is not None else "未知"}
 }}
 """
 
-            response = await self.llm_client.generate(prompt, temperature=0.3)
+            # Named by a stable digest so retry reports compare across processes
+            response = await self.run_step(
+                f"analyze_{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}",
+                self.llm_client.generate,
+                prompt,
+                temperature=0.3
+            )
 
             # Parse JSON response
-            import json
-            result = json.loads(response)
+            result = json.loads(getattr(response, "content", response))
 
             return result
 
@@ -13,11 +13,197 @@ from sklearn.metrics import silhouette_score
 import jieba
 
 from ..base import FoundationAgent, AgentResult, AgentStatus
+from .A2_qualitative_agent import load_dairy_dictionary
 from ...state import SemanticCluster, TaggedResponse
 from ...llm import LLMClient
+from ...llm.tokens import fit_evidence, get_evidence_token_budget
+from ...utils import cpu_bound, run_cpu_bound
 
 logger = logging.getLogger(__name__)
 
+# Chinese stop words (built once per process, shared by all instances)
+CHINESE_STOP_WORDS = frozenset({
+    "的", "了", "是", "我", "你", "他", "她", "它", "们",
+    "这", "那", "有", "在", "和", "与", "或", "但", "因为",
+    "所以", "如果", "就", "还", "也", "都", "很", "非常",
+    "可以", "能", "会", "要", "不", "没", "无", "非",
+    "个", "些", "把", "被", "让", "给", "为", "对",
+    "从", "到", "上", "下", "里", "去", "来", "过"
+})
+
+
+@cpu_bound
+def cluster_texts(
+    processed_texts: List[str],
+    texts: List[str],
+    stop_words: List[str],
+    max_clusters: int,
+    random_state: int
+) -> Dict[str, Any]:
+    """
+    Vectorize and cluster texts (runs in a CPU worker).
+
+    Args:
+        processed_texts: Punctuation-stripped texts
+        texts: Original texts (fallback vectorization)
+        stop_words: Chinese stop words
+        max_clusters: Upper bound for the number of K-means clusters
+        random_state: Random seed for K-means
+
+    Returns:
+        K-means labels, DBSCAN outlier indices and, per label, theme terms
+        and member positions ordered by distance to the cluster centroid
+    """
+    # Workers tokenize with the same custom dictionary as the main process
+    load_dairy_dictionary()
+
+    # Vectorize texts
+    vectorizer = TfidfVectorizer(
+        max_features=100,
+        min_df=2,
+        max_df=0.8,
+        tokenizer=jieba.lcut,
+        stop_words=stop_words
+    )
+
+    try:
+        tfidf_matrix = vectorizer.fit_transform(processed_texts)
+    except ValueError as e:
+        logger.warning(f"Vectorization failed: {e}")
+        # Fallback to simple vectorization
+        vectorizer = TfidfVectorizer(max_features=50)
+        tfidf_matrix = vectorizer.fit_transform(texts)
+
+    # Determine optimal number of clusters
+    n_clusters = _optimal_cluster_count(tfidf_matrix, max_clusters, random_state)
+
+    # Perform K-means clustering
+    if n_clusters > 1:
+        kmeans = KMeans(
+            n_clusters=n_clusters,
+            random_state=random_state,
+            n_init=10
+        )
+        cluster_labels = kmeans.fit_predict(tfidf_matrix)
+    else:
+        # All in one cluster
+        cluster_labels = np.zeros(len(texts), dtype=int)
+
+    # Try DBSCAN for outlier detection
+    dbscan = DBSCAN(eps=0.3, min_samples=2)
+    dbscan_labels = dbscan.fit_predict(tfidf_matrix)
+
+    themes = {}
+    representatives = {}
+
+    for label in set(cluster_labels.tolist()):
+        indices = np.flatnonzero(cluster_labels == label)
+        themes[label] = _cluster_theme_terms(
+            [texts[i] for i in indices], vectorizer, stop_words
+        )
+        representatives[label] = _closest_to_centroid(tfidf_matrix[indices])
+
+    return {
+        "labels": cluster_labels,
+        "outliers": np.flatnonzero(dbscan_labels == -1),
+        "themes": themes,
+        "representatives": representatives
+    }
+
+
+def _optimal_cluster_count(tfidf_matrix, max_clusters: int, random_state: int) -> int:
+    """Pick the K-means cluster count with the best silhouette score."""
+    n_samples = tfidf_matrix.shape[0]
+
+    if n_samples < 2:
+        return 1
+
+    # Try different cluster numbers
+    max_k = min(max_clusters, n_samples // 2)
+    min_k = 2
+
+    if max_k < min_k:
+        return 1
+
+    best_k = min_k
+    best_score = -1
+
+    for k in range(min_k, max_k + 1):
+        try:
+            kmeans = KMeans(n_clusters=k, random_state=random_state, n_init=5)
+            labels = kmeans.fit_predict(tfidf_matrix)
+
+            # Calculate silhouette score
+            if len(set(labels)) > 1:
+                score = silhouette_score(tfidf_matrix, labels)
+
+                if score > best_score:
+                    best_score = score
+                    best_k = k
+        except:
+            continue
+
+    # Heuristic: prefer fewer clusters unless significant improvement
+    if best_score < 0.3 and best_k > 5:
+        best_k = max(3, best_k // 2)
+
+    return best_k
+
+
+def _cluster_theme_terms(cluster_texts: List[str], vectorizer, stop_words: List[str]) -> List[str]:
+    """Top TF-IDF terms of a cluster, or its most frequent words."""
+    if not cluster_texts:
+        return []
+
+    try:
+        # Get feature names
+        feature_names = vectorizer.get_feature_names_out()
+
+        # Re-vectorize cluster texts
+        cluster_tfidf = vectorizer.transform([" ".join(cluster_texts)])
+
+        # Get top terms
+        scores = cluster_tfidf.toarray()[0]
+        top_indices = scores.argsort()[-5:][::-1]
+
+        top_terms = [feature_names[i] for i in top_indices if scores[i] > 0]
+
+        if top_terms:
+            return top_terms[:3]
+
+        # Fallback to common words
+        excluded = set(stop_words)
+        word_freq = {}
+
+        for word in jieba.lcut(" ".join(cluster_texts)):
+            if len(word) > 1 and word not in excluded:
+                word_freq[word] = word_freq.get(word, 0) + 1
+
+        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
+        return [w for w, _ in top_words[:3]]
+
+    except Exception as e:
+        logger.debug(f"Theme extraction failed: {e}")
+
+    return []
+
+
+def _closest_to_centroid(cluster_tfidf) -> List[int]:
+    """Positions of the (up to) five members closest to the cluster centroid."""
+    if cluster_tfidf.shape[0] <= 1:
+        return list(range(cluster_tfidf.shape[0]))
+
+    try:
+        centroid = cluster_tfidf.mean(axis=0)
+        distances = [
+            np.linalg.norm(cluster_tfidf[i].toarray() - centroid)
+            for i in range(cluster_tfidf.shape[0])
+        ]
+        return np.argsort(distances)[:5].tolist()
+    except Exception:
+        # Fallback to first few
+        return list(range(min(5, cluster_tfidf.shape[0])))
+
 
 class SemanticClusteringAgent(FoundationAgent):
     """
@@ -43,16 +229,9 @@ class SemanticClusteringAgent(FoundationAgent):
         # Chinese stop words
         self.stop_words = self._load_chinese_stopwords()
 
-    def _load_chinese_stopwords(self) -> set:
+    def _load_chinese_stopwords(self) -> frozenset:
         """Load Chinese stop words."""
-        return {
-            "的", "了", "是", "我", "你", "他", "她", "它", "们",
-            "这", "那", "有", "在", "和", "与", "或", "但", "因为",
-            "所以", "如果", "就", "还", "也", "都", "很", "非常",
-            "可以", "能", "会", "要", "不", "没", "无", "非",
-            "个", "些", "把", "被", "让", "给", "为", "对",
-            "从", "到", "上", "下", "里", "去", "来", "过"
-        }
+        return CHINESE_STOP_WORDS
 
     async def process(self, state: Dict[str, Any]) -> AgentResult:
         """
@@ -161,61 +340,33 @@ class SemanticClusteringAgent(FoundationAgent):
         # Preprocess texts for Chinese
         processed_texts = [self._preprocess_chinese(text) for text in texts]
 
-        # Vectorize texts
-        vectorizer = TfidfVectorizer(
-            max_features=100,
-            min_df=2,
-            max_df=0.8,
-            tokenizer=jieba.lcut,
-            stop_words=list(self.stop_words)
+        # Vectorize and cluster off the event loop
+        result = await run_cpu_bound(
+            cluster_texts,
+            processed_texts,
+            texts,
+            sorted(self.stop_words),
+            self.max_clusters,
+            self.random_state
         )
-
-        try:
-            tfidf_matrix = vectorizer.fit_transform(processed_texts)
-        except ValueError as e:
-            logger.warning(f"Vectorization failed: {e}")
-            # Fallback to simple vectorization
-            vectorizer = TfidfVectorizer(max_features=50)
-            tfidf_matrix = vectorizer.fit_transform(texts)
-
-        # Determine optimal number of clusters
-        n_clusters = self._determine_optimal_clusters(tfidf_matrix)
-
-        # Perform K-means clustering
-        if n_clusters > 1:
-            kmeans = KMeans(
-                n_clusters=n_clusters,
-                random_state=self.random_state,
-                n_init=10
-            )
-            cluster_labels = kmeans.fit_predict(tfidf_matrix)
-        else:
-            # All in one cluster
-            cluster_labels = np.zeros(len(texts), dtype=int)
-
-        # Try DBSCAN for outlier detection
-        dbscan = DBSCAN(eps=0.3, min_samples=2)
-        dbscan_labels = dbscan.fit_predict(tfidf_matrix)
-
-        # Combine results (prefer K-means but mark outliers from DBSCAN)
-        outliers = set(i for i, label in enumerate(dbscan_labels) if label == -1)
+        cluster_labels = result["labels"]
 
         # Build clusters
         clusters = []
-        unique_labels = set(cluster_labels)
+        unique_labels = set(cluster_labels.tolist())
 
         for label in unique_labels:
             if label == -1:  # Skip noise
                 continue
 
             # Get cluster members
-            indices = [i for i, l in enumerate(cluster_labels) if l == label]
+            indices = np.flatnonzero(cluster_labels == label).tolist()
 
             if len(indices) < self.min_cluster_size and len(unique_labels) > 1:
                 continue  # Skip small clusters
 
             # Extract cluster data
-            cluster_texts = [texts[i] for i in indices]
+            member_texts = [texts[i] for i in indices]
             cluster_ids = [response_ids[i] for i in indices if i < len(response_ids)]
 
             # Get sentiment distribution
@@ -224,12 +375,13 @@ class SemanticClusteringAgent(FoundationAgent):
             )
 
             # Extract theme
-            theme = self._extract_cluster_theme(cluster_texts, vectorizer, label)
+            theme_terms = result["themes"].get(label)
+            theme = " / ".join(theme_terms) if theme_terms else f"主题 {label + 1}"
 
             # Get representative quotes
             representative_quotes = self._get_representative_quotes(
-                cluster_texts,
-                tfidf_matrix[indices] if len(indices) > 0 else None
+                [member_texts[i] for i in result["representatives"].get(label, [])]
+                or member_texts
             )
 
             cluster = SemanticCluster(
@@ -268,152 +420,19 @@ class SemanticClusteringAgent(FoundationAgent):
 
         return text
 
-    def _determine_optimal_clusters(self, tfidf_matrix) -> int:
+    def _get_representative_quotes(self, quotes: List[str]) -> List[str]:
         """
-        Determine optimal number of clusters.
+        Clean and truncate representative quotes.
 
         Args:
-            tfidf_matrix: TF-IDF feature matrix
-
-        Returns:
-            Optimal number of clusters
-        """
-        n_samples = tfidf_matrix.shape[0]
-
-        if n_samples < 2:
-            return 1
-
-        # Try different cluster numbers
-        max_k = min(self.max_clusters, n_samples // 2)
-        min_k = 2
-
-        if max_k < min_k:
-            return 1
-
-        best_k = min_k
-        best_score = -1
-
-        for k in range(min_k, max_k + 1):
-            try:
-                kmeans = KMeans(n_clusters=k, random_state=self.random_state, n_init=5)
-                labels = kmeans.fit_predict(tfidf_matrix)
-
-                # Calculate silhouette score
-                if len(set(labels)) > 1:
-                    score = silhouette_score(tfidf_matrix, labels)
-
-                    if score > best_score:
-                        best_score = score
-                        best_k = k
-            except:
-                continue
-
-        # Heuristic: prefer fewer clusters unless significant improvement
-        if best_score < 0.3 and best_k > 5:
-            best_k = max(3, best_k // 2)
-
-        return best_k
-
-    def _extract_cluster_theme(
-        self,
-        cluster_texts: List[str],
-        vectorizer,
-        cluster_label: int
-    ) -> str:
-        """
-        Extract theme for a cluster.
-
-        Args:
-            cluster_texts: Texts in cluster
-            vectorizer: TF-IDF vectorizer
-            cluster_label: Cluster label
-
-        Returns:
-            Cluster theme description
-        """
-        if not cluster_texts:
-            return f"主题 {cluster_label + 1}"
-
-        try:
-            # Get feature names
-            feature_names = vectorizer.get_feature_names_out()
-
-            # Re-vectorize cluster texts
-            cluster_tfidf = vectorizer.transform([" ".join(cluster_texts)])
-
-            # Get top terms
-            scores = cluster_tfidf.toarray()[0]
-            top_indices = scores.argsort()[-5:][::-1]
-
-            top_terms = [feature_names[i] for i in top_indices if scores[i] > 0]
-
-            if top_terms:
-                return " / ".join(top_terms[:3])
-            else:
-                # Fallback to common words
-                all_text = " ".join(cluster_texts)
-                words = jieba.lcut(all_text)
-                word_freq = {}
-
-                for word in words:
-                    if len(word) > 1 and word not in self.stop_words:
-                        word_freq[word] = word_freq.get(word, 0) + 1
-
-                if word_freq:
-                    top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-                    return " / ".join([w for w, _ in top_words[:3]])
-
-        except Exception as e:
-            logger.debug(f"Theme extraction failed: {e}")
-
-        return f"主题 {cluster_label + 1}"
-
-    def _get_representative_quotes(
-        self,
-        cluster_texts: List[str],
-        cluster_tfidf=None
-    ) -> List[str]:
-        """
-        Get representative quotes from cluster.
-
-        Args:
-            cluster_texts: Texts in cluster
-            cluster_tfidf: TF-IDF matrix for cluster
+            quotes: Cluster texts, closest to the centroid first
 
         Returns:
             Representative quotes
         """
-        if not cluster_texts:
-            return []
-
-        # Simple approach: get texts closest to centroid
-        if cluster_tfidf is not None and cluster_tfidf.shape[0] > 1:
-            try:
-                # Calculate centroid
-                centroid = cluster_tfidf.mean(axis=0)
-
-                # Calculate distances
-                distances = []
-
-                for i in range(cluster_tfidf.shape[0]):
-                    dist = np.linalg.norm(cluster_tfidf[i].toarray() - centroid)
-                    distances.append(dist)
-
-                # Get closest texts
-                closest_indices = np.argsort(distances)[:5]
-                quotes = [cluster_texts[i] for i in closest_indices if i < len(cluster_texts)]
-
-            except:
-                # Fallback to first few
-                quotes = cluster_texts[:5]
-        else:
-            # Return first few texts
-            quotes = cluster_texts[:5]
-
-        # Clean and truncate quotes
         cleaned_quotes = []
 
-        for quote in quotes:
+        for quote in quotes[:5]:
             if len(quote) > 100:
                 quote = quote[:97] + "..."
             cleaned_quotes.append(quote)
@@ -474,7 +493,7 @@ class SemanticClusteringAgent(FoundationAgent):
 基于以下客户反馈样本，生成一个简洁的主题描述（不超过20字）：
 
 样本反馈：
-{chr(10).join([f"- {q}" for q in quotes[:3]])}
+{chr(10).join([f"- {q}" for q in fit_evidence(quotes, get_evidence_token_budget(), max_items=3, strategy="truncate")])}
 
 当前主题：{cluster.get("theme", "")}
 
@@ -487,7 +506,7 @@ class SemanticClusteringAgent(FoundationAgent):
 说明：xxx
 """
 
-                response = await self.llm_client.generate(prompt, temperature=0.3, max_tokens=100)
+                response = await self.run_step(f"enhance_cluster_descriptions_{cluster.get('cluster_id')}", self.llm_client.generate, prompt, temperature=0.3, max_tokens=100)
 
                 # Parse response
                 lines = response.strip().split("\n")
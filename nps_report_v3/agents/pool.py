@@ -0,0 +1,156 @@
+"""
+Warm agent pool for NPS V3 agents.
+
+Agents are stateless per run, so one instance per agent id can serve every
+workflow on an event loop. Instances (with their dictionaries, stopword
+sets and LLM client) are built once, typically at application startup,
+instead of 18 times per analysis.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    """
+    Per-event-loop cache of constructed agents plus construction metrics.
+
+    Agents and their LLM clients may hold loop-bound primitives, so each
+    running loop gets its own set of instances; an API process normally
+    runs one loop and therefore keeps exactly one warm instance per agent.
+    """
+
+    def __init__(self):
+        self._agents: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, type], Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._llm_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+        self.warm_hits = 0
+        self.cold_constructions = 0
+        self.construction_ms: Dict[str, float] = {}
+        self.acquire_ms_total = 0.0
+        self.preload_ms: Optional[float] = None
+
+    @staticmethod
+    def _loop() -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def get(self, agent_id: str, agent_class: Type) -> Optional[Any]:
+        """Warm instance for the running loop, or None"""
+        loop = self._loop()
+        if loop is None:
+            return None
+        with self._lock:
+            return self._agents.get(loop, {}).get((agent_id, agent_class))
+
+    def put(self, agent_id: str, agent_class: Type, agent: Any) -> None:
+        """Keep a constructed agent warm for the running loop"""
+        loop = self._loop()
+        if loop is None:
+            return
+        with self._lock:
+            self._agents.setdefault(loop, {})[(agent_id, agent_class)] = agent
+
+    def get_llm_client(self) -> Optional[Any]:
+        """LLM client shared by every pooled agent on the running loop"""
+        loop = self._loop()
+        if loop is None:
+            return None
+
+        with self._lock:
+            client = self._llm_clients.get(loop)
+        if client is None:
+            from nps_report_v3.llm import get_llm_client
+            client = get_llm_client()
+            with self._lock:
+                client = self._llm_clients.setdefault(loop, client)
+        return client
+
+    def record_acquire(self, agent_id: str, elapsed_ms: float, warm: bool) -> None:
+        """Record the time a workflow spent obtaining an agent"""
+        with self._lock:
+            self.acquire_ms_total += elapsed_ms
+            if warm:
+                self.warm_hits += 1
+            else:
+                self.cold_constructions += 1
+                self.construction_ms[agent_id] = round(elapsed_ms, 3)
+
+    def preload(self, factory: Optional[Any] = None, agent_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Construct agents ahead of the first request (call from the serving loop).
+
+        Args:
+            factory: AgentFactory to construct with (a new one if None)
+            agent_ids: Agents to warm (every registered agent if None)
+
+        Returns:
+            Construction time in milliseconds per agent id
+        """
+        if self._loop() is None:
+            raise RuntimeError("AgentPool.preload must run inside the serving event loop")
+
+        if factory is None:
+            from nps_report_v3.agents.factory import AgentFactory
+            factory = AgentFactory()
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        for agent_id in agent_ids or factory.registry.list_agents():
+            agent_started = time.perf_counter()
+            try:
+                factory.create_agent(agent_id)
+            except Exception as e:
+                logger.warning(f"Could not preload agent {agent_id}: {e}")
+                continue
+            timings[agent_id] = round((time.perf_counter() - agent_started) * 1000, 3)
+
+        self.preload_ms = round((time.perf_counter() - started) * 1000, 3)
+        logger.info(f"Preloaded {len(timings)} agents in {self.preload_ms}ms")
+        return timings
+
+    def clear(self) -> None:
+        """Drop all warm agents and clients"""
+        with self._lock:
+            self._agents.clear()
+            self._llm_clients.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Warm/cold acquisition counts and construction times"""
+        with self._lock:
+            acquisitions = self.warm_hits + self.cold_constructions
+            return {
+                "pooled_agents": sum(len(agents) for agents in self._agents.values()),
+                "warm_hits": self.warm_hits,
+                "cold_constructions": self.cold_constructions,
+                "avg_acquire_ms": round(self.acquire_ms_total / acquisitions, 3) if acquisitions else 0.0,
+                "construction_ms": dict(self.construction_ms),
+                "preload_ms": self.preload_ms
+            }
+
+
+# Global agent pool instance
+_agent_pool: Optional[AgentPool] = None
+
+
+def get_agent_pool() -> AgentPool:
+    """Get the process-wide agent pool"""
+    global _agent_pool
+
+    if _agent_pool is None:
+        _agent_pool = AgentPool()
+
+    return _agent_pool
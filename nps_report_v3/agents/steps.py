@@ -0,0 +1,134 @@
+"""
+Named, memoized sub-steps for NPS V3 agents.
+
+An agent run wraps expensive units of work (typically one LLM call plus
+parsing) in :meth:`BaseAgent.run_step`. A failing step is retried on its
+own, and steps that already succeeded are replayed from the run's memo
+when the whole agent is retried, so a single flaky call no longer repeats
+every LLM call the agent made before it.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+class StepRun:
+    """Memoized step results and retry accounting for one agent run"""
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.results: Dict[str, Any] = {}
+        self.step_ms: Dict[str, float] = {}
+        self.attempts = 0
+        self.step_retries: Dict[str, int] = {}
+        self.steps_reused = 0
+        self.reused_ms = 0.0
+        self.wasted_ms = 0.0
+        # Step time (successful or failed) already attributed, for agent-level waste
+        self.accounted_ms = 0.0
+
+    def has(self, name: str) -> bool:
+        return name in self.results
+
+    def reuse(self, name: str) -> Any:
+        """Memoized result of ``name`` (counts the work it saved)"""
+        self.steps_reused += 1
+        self.reused_ms += self.step_ms[name]
+        return self.results[name]
+
+    def record_success(self, name: str, value: Any, elapsed_ms: float) -> None:
+        self.results[name] = value
+        self.step_ms[name] = elapsed_ms
+        self.accounted_ms += elapsed_ms
+
+    def record_failure(self, name: str, elapsed_ms: float, retrying: bool) -> None:
+        self.wasted_ms += elapsed_ms
+        self.accounted_ms += elapsed_ms
+        if retrying:
+            self.step_retries[name] = self.step_retries.get(name, 0) + 1
+
+    def record_failed_attempt(self, elapsed_ms: float, accounted_at_start: float) -> None:
+        """Waste of a failed agent attempt outside its (memoized or failed) steps"""
+        self.wasted_ms += max(elapsed_ms - (self.accounted_ms - accounted_at_start), 0.0)
+
+    @property
+    def retried(self) -> bool:
+        return self.attempts > 1 or bool(self.step_retries)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "step_retries": dict(self.step_retries),
+            "steps": len(self.results),
+            "steps_reused": self.steps_reused,
+            "reused_ms": round(self.reused_ms, 3),
+            "wasted_ms": round(self.wasted_ms, 3)
+        }
+
+
+_current_step_run: ContextVar[Optional[StepRun]] = ContextVar("agent_step_run", default=None)
+
+
+def get_current_step_run() -> Optional[StepRun]:
+    """Step memo of the agent run in the current context, if any"""
+    return _current_step_run.get()
+
+
+@contextmanager
+def use_step_run(run: StepRun) -> Iterator[StepRun]:
+    """Make ``run`` the step memo for this context"""
+    token = _current_step_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_step_run.reset(token)
+
+
+class RetryMetrics:
+    """Process-wide retry counts and wasted work per agent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, run: StepRun) -> None:
+        with self._lock:
+            totals = self._agents.setdefault(run.agent_id, {
+                "runs": 0,
+                "agent_retries": 0,
+                "step_retries": 0,
+                "steps_reused": 0,
+                "reused_ms": 0.0,
+                "wasted_ms": 0.0
+            })
+            totals["runs"] += 1
+            totals["agent_retries"] += max(run.attempts - 1, 0)
+            totals["step_retries"] += sum(run.step_retries.values())
+            totals["steps_reused"] += run.steps_reused
+            totals["reused_ms"] = round(totals["reused_ms"] + run.reused_ms, 3)
+            totals["wasted_ms"] = round(totals["wasted_ms"] + run.wasted_ms, 3)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._agents.clear()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per agent id since process start"""
+        with self._lock:
+            return {agent_id: dict(totals) for agent_id, totals in self._agents.items()}
+
+
+# Global retry metrics instance
+_retry_metrics: Optional[RetryMetrics] = None
+
+
+def get_retry_metrics() -> RetryMetrics:
+    """Get the process-wide agent retry metrics"""
+    global _retry_metrics
+
+    if _retry_metrics is None:
+        _retry_metrics = RetryMetrics()
+
+    return _retry_metrics
@@ -78,7 +78,9 @@ async def analyze_nps(
             config["checkpoint_dir"] = request.checkpoint_dir
 
         # Execute workflow
-        final_state = await orchestrator.execute(raw_data, config)
+        final_state = await orchestrator.execute(
+            raw_data, config, deadline_seconds=request.deadline_seconds, run_id=workflow_id
+        )
 
         # Prepare response
         response = _prepare_response(workflow_id, final_state)
@@ -124,14 +126,8 @@ async def recover_workflow(
             enable_checkpointing=True
         )
 
-        # Execute with recovery
-        config = {
-            "recover_from_checkpoint": True,
-            "checkpoint_id": checkpoint_id
-        }
-
-        # Dummy raw data (will be overridden by checkpoint)
-        final_state = await orchestrator.execute([], config)
+        # Resume from the checkpoint, running only agents whose outputs are missing
+        final_state = await orchestrator.recover_from_checkpoint(checkpoint_id)
 
         # Prepare response
         response = _prepare_response(workflow_id, final_state)
@@ -140,7 +136,7 @@ async def recover_workflow(
 
         return response
 
-    except FileNotFoundError as e:
+    except (FileNotFoundError, ValueError) as e:
         raise HTTPException(status_code=404, detail=f"Checkpoint not found: {str(e)}")
 
     except Exception as e:
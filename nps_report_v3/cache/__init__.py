@@ -11,6 +11,25 @@ from .cache_manager import (
     cached,
     get_cache_manager
 )
+from .llm_response_cache import (
+    LLMResponseCache,
+    make_llm_cache_key,
+    normalize_prompt,
+    get_llm_response_cache
+)
+from .embedding_store import (
+    EmbeddingStore,
+    get_embedding_store
+)
+from .agent_result_cache import (
+    AgentResultCache,
+    make_agent_cache_key,
+    get_agent_result_cache
+)
+from .nps_cube_store import (
+    NPSCubeStore,
+    get_nps_cube_store
+)
 
 __all__ = [
     "CacheStats",
@@ -19,5 +38,16 @@ __all__ = [
     "HybridCache",
     "CacheManager",
     "cached",
-    "get_cache_manager"
+    "get_cache_manager",
+    "LLMResponseCache",
+    "make_llm_cache_key",
+    "normalize_prompt",
+    "get_llm_response_cache",
+    "EmbeddingStore",
+    "get_embedding_store",
+    "AgentResultCache",
+    "make_agent_cache_key",
+    "get_agent_result_cache",
+    "NPSCubeStore",
+    "get_nps_cube_store"
 ]
\ No newline at end of file
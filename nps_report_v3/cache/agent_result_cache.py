@@ -0,0 +1,298 @@
+"""
+Persistent memoization of agent results for incremental re-analysis.
+Each result is stored under a hash of the state slice the agent reads plus
+the agent's code/prompt version, so unchanged agents are skipped on re-runs.
+"""
+
+import json
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+from collections.abc import Mapping
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .cache_manager import CacheStats
+from ..config import get_settings
+from ..state.response_store import ColumnarResponseStore
+
+logger = logging.getLogger(__name__)
+
+
+def make_agent_cache_key(
+    agent_id: str,
+    version: str,
+    state: Dict[str, Any],
+    reads: Iterable[str]
+) -> str:
+    """
+    Build the content address for an agent run from the keys it reads.
+
+    A dotted read (``"pass1_foundation.confidence_assessment"``) covers one
+    field of a state value rather than the whole value.
+
+    Raises:
+        TypeError: If a read value has no stable encoding
+    """
+    payload = json.dumps(
+        {
+            "agent_id": agent_id,
+            "version": version,
+            "inputs": {key: _read_path(state, key) for key in sorted(set(reads))}
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=_encode_default
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _read_path(state: Dict[str, Any], key: str) -> Any:
+    """Value of a state key or of a dotted path into nested mappings (None if missing)"""
+    value: Any = state
+    for part in key.split("."):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _encode_default(value: Any) -> Any:
+    """
+    Encode state values JSON cannot represent so equal inputs share a key.
+
+    Arrays and spilled response stores are encoded by a digest of their
+    contents, sets in sorted order. Anything else raises TypeError rather
+    than falling back to a lossy or process-dependent ``str()``.
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            value,
+            key=lambda item: json.dumps(item, ensure_ascii=False, sort_keys=True, default=_encode_default)
+        )
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        if array.dtype.hasobject:
+            return {"dtype": "object", "shape": list(array.shape), "items": array.ravel().tolist()}
+        return {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "sha256": hashlib.sha256(array.tobytes()).hexdigest()
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, ColumnarResponseStore):
+        return {"response_store": value.digest}
+    raise TypeError(f"Cannot build agent cache key from {type(value).__name__}")
+
+
+class AgentResultCache:
+    """
+    SQLite-backed store of pickled agent results with TTL, byte budget and
+    LRU eviction. Passing ``path=None`` keeps the store in memory.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS agent_results (
+            cache_key TEXT PRIMARY KEY,
+            agent_id TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: int = 604800,
+        max_bytes: int = 536870912
+    ):
+        """
+        Initialize result cache.
+
+        Args:
+            path: SQLite database file, or None for an in-memory cache
+            ttl_seconds: Time to live for entries
+            max_bytes: Byte budget for stored results before eviction
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily so importing the module has no side effects."""
+        if self._conn is None:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(self._SCHEMA)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_agent_last_accessed ON agent_results (last_accessed)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored result for ``key`` or None on miss/expiry."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM agent_results WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.stats.misses += 1
+                    return None
+
+                payload, expires_at = row
+                if expires_at <= now:
+                    conn.execute("DELETE FROM agent_results WHERE cache_key = ?", (key,))
+                    conn.commit()
+                    self.stats.evictions += 1
+                    self.stats.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE agent_results SET last_accessed = ? WHERE cache_key = ?",
+                    (now, key)
+                )
+                conn.commit()
+
+            self.stats.hits += 1
+            return pickle.loads(payload)
+
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, EOFError) as e:
+            # Results pickled by an older code version may no longer load
+            logger.error(f"Agent result cache read error: {e}")
+            self.stats.errors += 1
+            return None
+
+    def set(self, key: str, agent_id: str, result: Any) -> None:
+        """Store ``result`` under ``key`` and enforce the byte budget."""
+        now = time.time()
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f"Result of agent {agent_id} is not cacheable: {e}")
+            self.stats.errors += 1
+            return
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO agent_results "
+                    "(cache_key, agent_id, payload, size_bytes, created_at, expires_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, agent_id, payload, len(payload), now, now + self.ttl_seconds, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+
+            logger.debug(f"Cached result of agent {agent_id} under key {key[:8]}...")
+
+        except sqlite3.Error as e:
+            logger.error(f"Agent result cache write error: {e}")
+            self.stats.errors += 1
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within budget."""
+        expired = conn.execute(
+            "DELETE FROM agent_results WHERE expires_at <= ?", (now,)
+        ).rowcount
+        self.stats.evictions += max(expired, 0)
+
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM agent_results"
+        ).fetchone()[0]
+
+        if total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT cache_key, size_bytes FROM agent_results ORDER BY last_accessed ASC"
+            ).fetchall()
+            victims = []
+            for cache_key, size_bytes in rows:
+                if total <= self.max_bytes:
+                    break
+                victims.append((cache_key,))
+                total -= size_bytes
+
+            conn.executemany("DELETE FROM agent_results WHERE cache_key = ?", victims)
+            self.stats.evictions += len(victims)
+
+        self.stats.total_size_bytes = total
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM agent_results").rowcount
+            conn.commit()
+        self.stats.evictions += max(removed, 0)
+        self.stats.total_size_bytes = 0
+
+    def size(self) -> int:
+        """Number of stored results"""
+        with self._lock:
+            conn = self._connect()
+            return conn.execute("SELECT COUNT(*) FROM agent_results").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics plus storage details"""
+        stats = self.stats.to_dict()
+        stats["path"] = self.path or ":memory:"
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+# Global agent result cache instance
+_agent_result_cache: Optional[AgentResultCache] = None
+
+
+def get_agent_result_cache() -> AgentResultCache:
+    """Get the process-wide agent result cache"""
+    global _agent_result_cache
+
+    if _agent_result_cache is None:
+        settings = get_settings()
+        _agent_result_cache = AgentResultCache(
+            path=settings.agent_result_cache_path,
+            ttl_seconds=settings.agent_result_cache_ttl,
+            max_bytes=settings.agent_result_cache_max_bytes
+        )
+
+    return _agent_result_cache
@@ -0,0 +1,179 @@
+"""
+Persistent embedding store for NPS V3 API.
+Keeps one vector per (model, text hash) in SQLite as compact float16/float32 blobs,
+so a verbatim that has been embedded once is never sent to the provider again.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .cache_manager import CacheStats
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash used as the embedding key"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    SQLite-backed vector store keyed by model and text hash.
+
+    Vectors are stored in ``dtype`` (float16 halves the footprint and is ample
+    for clustering/similarity) and always returned as float32.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            dtype TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        )
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _LOOKUP_CHUNK = 500
+
+    def __init__(self, path: Optional[str] = None, dtype: str = "float16"):
+        """
+        Initialize embedding store.
+
+        Args:
+            path: SQLite database file, or None for an in-memory store
+            dtype: Storage precision, "float16" or "float32"
+        """
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+        self.path = path
+        self.dtype = dtype
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily"""
+        if self._conn is None:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(self._SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up stored vectors.
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up
+
+        Returns:
+            Mapping of text to float32 vector for every text that is stored
+        """
+        hashes = {text_hash(text): text for text in texts}
+        found: Dict[str, np.ndarray] = {}
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                keys = list(hashes.keys())
+
+                for start in range(0, len(keys), self._LOOKUP_CHUNK):
+                    chunk = keys[start:start + self._LOOKUP_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT text_hash, dtype, vector FROM embeddings "
+                        f"WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model, *chunk]
+                    ).fetchall()
+
+                    for key, dtype, blob in rows:
+                        found[hashes[key]] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+        except sqlite3.Error as e:
+            logger.error(f"Embedding store read error: {e}")
+            self.stats.errors += 1
+            return {}
+
+        self.stats.hits += len(found)
+        self.stats.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """
+        Store vectors.
+
+        Args:
+            model: Embedding model name
+            vectors: Mapping of text to embedding vector
+        """
+        rows = []
+        for text, vector in vectors.items():
+            array = np.asarray(vector, dtype=self.dtype)
+            rows.append((model, text_hash(text), int(array.shape[0]), self.dtype, array.tobytes()))
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, dtype, vector) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+
+            self.stats.total_size_bytes += sum(len(row[4]) for row in rows)
+
+        except sqlite3.Error as e:
+            logger.error(f"Embedding store write error: {e}")
+            self.stats.errors += 1
+
+    def size(self) -> int:
+        """Number of stored vectors"""
+        with self._lock:
+            conn = self._connect()
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global embedding store instance
+_embedding_store: Optional[EmbeddingStore] = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Get the process-wide persistent embedding store"""
+    global _embedding_store
+
+    if _embedding_store is None:
+        settings = get_settings()
+        _embedding_store = EmbeddingStore(
+            path=settings.embedding_store_path,
+            dtype=settings.embedding_store_dtype
+        )
+
+    return _embedding_store
@@ -0,0 +1,259 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+Backed by SQLite so entries survive restarts and are shared across uvicorn workers.
+"""
+
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .cache_manager import CacheStats
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so that formatting noise does not defeat the cache.
+
+    Line endings are unified, trailing whitespace is stripped from every line
+    and leading/trailing blank space is removed. Inner content is untouched.
+    """
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def make_llm_cache_key(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    prompt: str
+) -> str:
+    """Build the content address for an LLM request."""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "temperature": round(float(temperature), 4),
+            "max_tokens": int(max_tokens),
+            "prompt": normalize_prompt(prompt)
+        },
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed LLM response cache with TTL, byte budget and LRU eviction.
+
+    Passing ``path=None`` keeps the cache in memory, which is what standalone
+    clients use when no shared cache is configured.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS llm_responses (
+            cache_key TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: int = 604800,
+        max_bytes: int = 268435456
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            path: SQLite database file, or None for an in-memory cache
+            ttl_seconds: Default time to live for entries
+            max_bytes: Byte budget for stored payloads before eviction
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily so importing the module has no side effects."""
+        if self._conn is None:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                # WAL lets several worker processes read while one writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(self._SCHEMA)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_last_accessed ON llm_responses (last_accessed)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for ``key`` or None on miss/expiry."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT payload, expires_at FROM llm_responses WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.stats.misses += 1
+                    return None
+
+                payload, expires_at = row
+                if expires_at <= now:
+                    conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+                    conn.commit()
+                    self.stats.evictions += 1
+                    self.stats.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_responses SET last_accessed = ? WHERE cache_key = ?",
+                    (now, key)
+                )
+                conn.commit()
+
+            self.stats.hits += 1
+            logger.debug(f"LLM cache hit for key {key[:8]}...")
+            return json.loads(payload)
+
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache read error: {e}")
+            self.stats.errors += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Store ``value`` under ``key`` and enforce the byte budget."""
+        ttl = self.ttl_seconds if ttl is None else ttl
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        size_bytes = len(payload.encode("utf-8"))
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses "
+                    "(cache_key, payload, size_bytes, created_at, expires_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, payload, size_bytes, now, now + ttl, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+
+            logger.debug(f"Cached LLM response for key {key[:8]}...")
+
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache write error: {e}")
+            self.stats.errors += 1
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within budget."""
+        expired = conn.execute(
+            "DELETE FROM llm_responses WHERE expires_at <= ?", (now,)
+        ).rowcount
+        self.stats.evictions += max(expired, 0)
+
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+        ).fetchone()[0]
+
+        if total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT cache_key, size_bytes FROM llm_responses ORDER BY last_accessed ASC"
+            ).fetchall()
+            victims = []
+            for cache_key, size_bytes in rows:
+                if total <= self.max_bytes:
+                    break
+                victims.append((cache_key,))
+                total -= size_bytes
+
+            conn.executemany("DELETE FROM llm_responses WHERE cache_key = ?", victims)
+            self.stats.evictions += len(victims)
+
+        self.stats.total_size_bytes = total
+
+    def delete(self, key: str) -> bool:
+        """Delete an entry"""
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key = ?", (key,)
+            ).rowcount
+            conn.commit()
+        return deleted > 0
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM llm_responses").rowcount
+            conn.commit()
+        self.stats.evictions += max(removed, 0)
+        self.stats.total_size_bytes = 0
+
+    def size(self) -> int:
+        """Number of stored entries"""
+        with self._lock:
+            conn = self._connect()
+            return conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics plus storage details"""
+        stats = self.stats.to_dict()
+        stats["path"] = self.path or ":memory:"
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+# Global response cache instance
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the process-wide persistent LLM response cache"""
+    global _llm_response_cache
+
+    if _llm_response_cache is None:
+        settings = get_settings()
+        _llm_response_cache = LLMResponseCache(
+            path=settings.llm_cache_path,
+            ttl_seconds=settings.llm_cache_ttl,
+            max_bytes=settings.llm_cache_max_bytes
+        )
+
+    return _llm_response_cache
@@ -0,0 +1,265 @@
+"""
+Persistent NPS aggregate cube for NPS V3 API.
+Every analysed survey is folded into one SQLite table of score histograms,
+so dashboards read KPIs from aggregates instead of re-analysing responses.
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache_manager import CacheStats
+from ..config import get_settings
+from ..state.nps_cube import CUBE_DIMENSIONS, NPS_SCORES, NPSCube
+
+logger = logging.getLogger(__name__)
+
+_SCORE_COLUMNS = [f"s{score}" for score in range(NPS_SCORES)]
+
+
+class NPSCubeStore:
+    """
+    SQLite-backed :class:`NPSCube` shared by every worker.
+
+    Folding adds histograms in the database (``s0 = s0 + excluded.s0``), so
+    concurrent writers never lose counts. Every folded response id is
+    recorded under its survey scope and a response is only counted once
+    per scope, so a survey resubmitted under the same scope with appended
+    responses adds just the new ones. Response ids are often positional
+    (``resp_1``, ``r_0``), so they are never compared across scopes.
+    Readers keep an in-memory copy that is reloaded when another connection
+    has committed since the last read.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nps_cube (
+            product_line TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            customer_segment TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            {scores},
+            PRIMARY KEY (product_line, channel, customer_segment, day)
+        )
+    """.format(scores=", ".join(f"{column} INTEGER NOT NULL" for column in _SCORE_COLUMNS))
+
+    _RESPONSE_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nps_cube_responses (
+            scope TEXT NOT NULL,
+            response_id TEXT NOT NULL,
+            folded_at REAL NOT NULL,
+            PRIMARY KEY (scope, response_id)
+        ) WITHOUT ROWID
+    """
+
+    # Response ids looked up per query (below SQLite's bound parameter limit)
+    _LOOKUP_CHUNK = 500
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize cube store.
+
+        Args:
+            path: SQLite database file, or None for an in-memory store
+        """
+        self.path = path
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._cube: Optional[NPSCube] = None
+        self._data_version: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily"""
+        if self._conn is None:
+            if self.path:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.execute(self._SCHEMA)
+            conn.execute(self._RESPONSE_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def fold(
+        self,
+        scope: str,
+        response_ids: Sequence[str],
+        scores: np.ndarray,
+        groups: Dict[str, Tuple[np.ndarray, List[str]]],
+        timestamps: np.ndarray
+    ) -> int:
+        """
+        Add the responses not folded before to the store.
+
+        Args:
+            scope: Survey the response ids are unique within
+            response_ids: Id of each response; responses already folded
+                under ``scope`` (or repeated within the call) are skipped
+            scores: NPS scores (0-10)
+            groups: Dimension -> (code per response, -1 if missing; values the codes index)
+            timestamps: Epoch timestamps (NaN if missing)
+
+        Returns:
+            Number of responses folded in (0 if every response was folded before or the write failed)
+        """
+        scope = str(scope)
+        response_ids = [str(response_id) for response_id in response_ids]
+        if len(response_ids) != len(scores):
+            raise ValueError(f"Expected {len(scores)} response ids, got {len(response_ids)}")
+
+        # First occurrence of each id within the batch
+        positions: Dict[str, int] = {}
+        for position, response_id in enumerate(response_ids):
+            positions.setdefault(response_id, position)
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                # Take the write lock before reading, so two workers folding
+                # the same survey cannot both see its responses as new
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    distinct = list(positions)
+                    for start in range(0, len(distinct), self._LOOKUP_CHUNK):
+                        chunk = distinct[start:start + self._LOOKUP_CHUNK]
+                        for (response_id,) in conn.execute(
+                            f"SELECT response_id FROM nps_cube_responses "
+                            f"WHERE scope = ? AND response_id IN ({', '.join('?' * len(chunk))})",
+                            [scope, *chunk]
+                        ):
+                            del positions[response_id]
+
+                    if not positions:
+                        conn.rollback()
+                        self.stats.hits += 1
+                        return 0
+
+                    folded_at = time.time()
+                    conn.executemany(
+                        "INSERT INTO nps_cube_responses (scope, response_id, folded_at) VALUES (?, ?, ?)",
+                        [(scope, response_id, folded_at) for response_id in positions]
+                    )
+
+                    mask = np.sort(np.fromiter(positions.values(), dtype=np.int64, count=len(positions)))
+                    cube = NPSCube.from_columns(
+                        np.asarray(scores)[mask],
+                        {name: (np.asarray(codes)[mask], values) for name, (codes, values) in groups.items()},
+                        np.asarray(timestamps)[mask]
+                    )
+                    self._upsert(conn, cube)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+
+                # Our own commit does not bump data_version, so fold into the copy too
+                if self._cube is not None:
+                    self._cube.merge(cube)
+
+            self.stats.misses += 1
+            logger.info(
+                f"Folded {cube.responses} of {len(response_ids)} responses into NPS cube ({len(cube)} cells)"
+            )
+            return cube.responses
+
+        except sqlite3.Error as e:
+            logger.error(f"NPS cube write error: {e}")
+            self.stats.errors += 1
+            return 0
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, cube: NPSCube) -> None:
+        """Add the cell histograms of ``cube`` to the table"""
+        rows = [
+            (*(value or "" for value in key[:-1]), key[-1], *counts)
+            for key, counts in zip(cube.keys(), cube.counts.tolist())
+        ]
+        columns = [*CUBE_DIMENSIONS, "day", *_SCORE_COLUMNS]
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in _SCORE_COLUMNS)
+
+        conn.executemany(
+            f"INSERT INTO nps_cube ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(columns[:4])}) DO UPDATE SET {updates}",
+            rows
+        )
+
+    def cube(self) -> NPSCube:
+        """
+        Current aggregates of every folded batch.
+
+        The returned cube is shared; treat it as read-only.
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+                if self._cube is None or data_version != self._data_version:
+                    rows = conn.execute(
+                        f"SELECT {', '.join([*CUBE_DIMENSIONS, 'day', *_SCORE_COLUMNS])} FROM nps_cube"
+                    ).fetchall()
+                    cube = NPSCube()
+                    cube.add_cells(
+                        [(*(value or None for value in row[:3]), row[3]) for row in rows],
+                        np.array([row[4:] for row in rows], dtype=np.int64)
+                    )
+                    self._cube = cube
+                    self._data_version = data_version
+
+                return self._cube
+
+        except sqlite3.Error as e:
+            logger.error(f"NPS cube read error: {e}")
+            self.stats.errors += 1
+            return self._cube or NPSCube()
+
+    def has_response(self, scope: str, response_id: str) -> bool:
+        """Whether ``response_id`` has been folded under ``scope``"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT 1 FROM nps_cube_responses WHERE scope = ? AND response_id = ?",
+                (str(scope), str(response_id))
+            ).fetchone()
+            return row is not None
+
+    def clear(self) -> None:
+        """Drop every cell and folded response id"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM nps_cube")
+                conn.execute("DELETE FROM nps_cube_responses")
+            self._cube = None
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cube = None
+
+
+# Global cube store instance
+_nps_cube_store: Optional[NPSCubeStore] = None
+
+
+def get_nps_cube_store() -> NPSCubeStore:
+    """Get the process-wide persistent NPS cube"""
+    global _nps_cube_store
+
+    if _nps_cube_store is None:
+        _nps_cube_store = NPSCubeStore(path=get_settings().nps_cube_path)
+
+    return _nps_cube_store
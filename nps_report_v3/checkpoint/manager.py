@@ -7,9 +7,10 @@ import json
 import pickle
 import gzip
 import hashlib
+import uuid
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from pathlib import Path
 import aiofiles
@@ -60,10 +61,6 @@ class CheckpointManager:
         for dir_path in [self.active_dir, self.archive_dir, self.metadata_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
-        # Cache for recent checkpoints
-        self._cache: Dict[str, Any] = {}
-        self._cache_size = 10
-
     def _get_checkpoint_path(
         self,
         workflow_id: str,
@@ -91,15 +88,38 @@ class CheckpointManager:
         phase: WorkflowPhase
     ) -> str:
         """Generate unique checkpoint ID."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         phase_str = phase.value if isinstance(phase, WorkflowPhase) else phase
 
-        # Create hash for uniqueness
-        content = f"{workflow_id}_{phase_str}_{timestamp}"
+        # Create hash for uniqueness (agent-level checkpoints can share a second)
+        content = f"{workflow_id}_{phase_str}_{timestamp}_{uuid.uuid4().hex}"
         hash_suffix = hashlib.md5(content.encode()).hexdigest()[:8]
 
         return f"ckpt_{timestamp}_{phase_str}_{hash_suffix}"
 
+    def _write_checkpoint_file(self, path: Path, checkpoint_data: Dict[str, Any]) -> Tuple[int, int]:
+        """Serialize, optionally compress and write a checkpoint; returns (raw, stored) sizes."""
+        serialized = pickle.dumps(checkpoint_data, protocol=pickle.HIGHEST_PROTOCOL)
+        original_size = len(serialized)
+
+        if self.enable_compression:
+            serialized = gzip.compress(serialized, compresslevel=6)
+
+        with open(path, "wb") as f:
+            f.write(serialized)
+
+        return original_size, len(serialized)
+
+    def _read_checkpoint_file(self, path: Path) -> Dict[str, Any]:
+        """Read, optionally decompress and deserialize a checkpoint."""
+        with open(path, "rb") as f:
+            serialized = f.read()
+
+        if self.enable_compression:
+            serialized = gzip.decompress(serialized)
+
+        return pickle.loads(serialized)
+
     async def save_checkpoint(
         self,
         workflow_id: str,
@@ -133,20 +153,13 @@ class CheckpointManager:
                 "metadata": metadata or {}
             }
 
-            # Serialize state
-            serialized = pickle.dumps(checkpoint_data, protocol=pickle.HIGHEST_PROTOCOL)
-
-            # Compress if enabled
-            if self.enable_compression:
-                serialized = gzip.compress(serialized, compresslevel=6)
-
-            # Save to file
-            async with aiofiles.open(checkpoint_path, "wb") as f:
-                await f.write(serialized)
+            # Serialize, compress and write off the event loop; a checkpoint
+            # is taken after every agent and must not stall other requests
+            original_size, size_bytes = await asyncio.to_thread(
+                self._write_checkpoint_file, checkpoint_path, checkpoint_data
+            )
 
-            # Calculate size and compression ratio
-            size_bytes = len(serialized)
-            original_size = len(pickle.dumps(checkpoint_data))
+            # Calculate compression ratio
             compression_ratio = 1 - (size_bytes / original_size) if self.enable_compression else None
 
             # Update metadata
@@ -156,22 +169,19 @@ class CheckpointManager:
                 timestamp=datetime.now(),
                 state_size_bytes=size_bytes,
                 compression_ratio=compression_ratio,
-                agents_completed=list(state.get("agent_outputs", {}).keys()),
+                agents_completed=list(state.get("agent_sequence") or state.get("agent_outputs", {}).keys()),
                 next_agent=state.get("current_agent")
             )
 
             await self._update_metadata(workflow_id, checkpoint_meta)
 
-            # Update cache
-            cache_key = f"{workflow_id}_{checkpoint_id}"
-            self._cache[cache_key] = checkpoint_data
-
             # Cleanup old checkpoints
             await self._cleanup_old_checkpoints(workflow_id)
 
+            compression = f"{compression_ratio:.2f}" if compression_ratio is not None else "N/A"
             logger.info(
                 f"Saved checkpoint {checkpoint_id} for workflow {workflow_id} "
-                f"(size: {size_bytes / 1024:.2f} KB, compression: {compression_ratio:.2f if compression_ratio else 'N/A'})"
+                f"(size: {size_bytes / 1024:.2f} KB, compression: {compression})"
             )
 
             return checkpoint_id
@@ -195,13 +205,6 @@ class CheckpointManager:
         Returns:
             Checkpoint data including state
         """
-        # Check cache first
-        if checkpoint_id:
-            cache_key = f"{workflow_id}_{checkpoint_id}"
-            if cache_key in self._cache:
-                logger.debug(f"Loading checkpoint {checkpoint_id} from cache")
-                return self._cache[cache_key]
-
         # Get checkpoint ID if not provided
         if not checkpoint_id:
             checkpoint_id = await self._get_latest_checkpoint_id(workflow_id)
@@ -218,27 +221,8 @@ class CheckpointManager:
                 raise FileNotFoundError(f"Checkpoint {checkpoint_id} not found")
 
         try:
-            # Load from file
-            async with aiofiles.open(checkpoint_path, "rb") as f:
-                serialized = await f.read()
-
-            # Decompress if needed
-            if self.enable_compression:
-                serialized = gzip.decompress(serialized)
-
-            # Deserialize
-            checkpoint_data = pickle.loads(serialized)
-
-            # Update cache
-            cache_key = f"{workflow_id}_{checkpoint_id}"
-            self._cache[cache_key] = checkpoint_data
-
-            # Manage cache size
-            if len(self._cache) > self._cache_size:
-                # Remove oldest entries
-                oldest_keys = list(self._cache.keys())[:-self._cache_size]
-                for key in oldest_keys:
-                    del self._cache[key]
+            # Read, decompress and deserialize off the event loop
+            checkpoint_data = await asyncio.to_thread(self._read_checkpoint_file, checkpoint_path)
 
             logger.info(f"Loaded checkpoint {checkpoint_id} for workflow {workflow_id}")
 
@@ -308,11 +292,6 @@ class CheckpointManager:
             try:
                 await aiofiles.os.remove(checkpoint_path)
 
-                # Remove from cache
-                cache_key = f"{workflow_id}_{checkpoint_id}"
-                if cache_key in self._cache:
-                    del self._cache[cache_key]
-
                 # Update metadata
                 metadata = await self._load_metadata(workflow_id)
                 if metadata:
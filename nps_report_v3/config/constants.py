@@ -31,6 +31,70 @@ CONSULTING_AGENTS = {
     "C5": "Executive Synthesizer"
 }
 
+# Foundation snapshot fields C1-C4 take their confidence label from; a dotted
+# read names one field of a state key instead of the whole value
+CONFIDENCE_READS = ["pass1_foundation.confidence_assessment", "pass1_foundation.confidence_level"]
+
+# State keys each agent reads and writes; the workflow scheduler derives the
+# agent dependency graph from these declarations, and agent results are
+# memoized under a hash of the declared reads
+AGENT_DATA_DEPENDENCIES = {
+    "A0": {"reads": ["raw_data", "raw_data_source", "language"], "writes": ["cleaned_data"]},
+    "A1": {"reads": ["cleaned_data"], "writes": ["nps_metrics", "statistical_analysis", "segment_analysis"]},
+    "A2": {"reads": ["cleaned_data"], "writes": ["tagged_responses", "qualitative_insights"]},
+    "A3": {"reads": ["tagged_responses"], "writes": ["semantic_clusters", "clustering_summary"]},
+    "B1": {
+        "reads": ["tagged_responses"],
+        "writes": ["technical_requirements", "requirements_summary", "technical_insights"]
+    },
+    "B2": {"reads": ["nps_results", "tagged_responses"], "writes": ["passive_analysis"]},
+    "B3": {"reads": ["nps_results", "tagged_responses"], "writes": ["detractor_analysis"]},
+    "B4": {"reads": ["tagged_responses"], "writes": ["text_clustering"]},
+    "B5": {"reads": ["nps_results", "tagged_responses"], "writes": ["driver_analysis"]},
+    "B6": {"reads": ["nps_results", "tagged_responses"], "writes": ["product_dimension"]},
+    "B7": {"reads": ["nps_results", "tagged_responses"], "writes": ["geographic_dimension"]},
+    "B8": {"reads": ["nps_results", "tagged_responses"], "writes": ["channel_dimension"]},
+    "B9": {
+        "reads": [
+            "technical_requirements", "passive_analysis", "detractor_analysis", "text_clustering",
+            "driver_analysis", "product_dimension", "geographic_dimension", "channel_dimension"
+        ],
+        "writes": ["analysis_coordination"]
+    },
+    "C1": {
+        "reads": [
+            "cleaned_data", "nps_metrics", "tagged_responses", "qualitative_insights", "semantic_clusters",
+            "technical_requirements", *CONFIDENCE_READS
+        ],
+        "writes": ["strategic_recommendations"]
+    },
+    "C2": {
+        "reads": ["tagged_responses", "semantic_clusters", "technical_requirements", *CONFIDENCE_READS],
+        "writes": ["product_recommendations"]
+    },
+    "C3": {
+        "reads": [
+            "nps_metrics", "tagged_responses", "semantic_clusters", "technical_requirements",
+            "geographic_dimension_analysis", "channel_dimension_analysis", *CONFIDENCE_READS
+        ],
+        "writes": ["marketing_recommendations"]
+    },
+    "C4": {
+        "reads": [
+            "nps_metrics", "tagged_responses", "semantic_clusters", "technical_requirements",
+            "detractor_analysis", *CONFIDENCE_READS
+        ],
+        "writes": ["risk_assessments"]
+    },
+    "C5": {
+        "reads": [
+            "nps_metrics", "strategic_recommendations", "product_recommendations",
+            "marketing_recommendations", "risk_assessments"
+        ],
+        "writes": ["executive_recommendations", "executive_dashboard"]
+    }
+}
+
 # NPS Score Boundaries
 NPS_BOUNDARIES = {
     "PROMOTER_MIN": 9,
@@ -30,6 +30,13 @@ class LLMProvider(str, Enum):
     OPENAI = "openai"
 
 
+class LLMMode(str, Enum):
+    """LLM client modes"""
+    LIVE = "live"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
 class LogLevel(str, Enum):
     """Log level options"""
     DEBUG = "DEBUG"
@@ -135,6 +142,219 @@ class Settings(BaseSettings):
         le=10,
         description="Maximum retries for LLM calls"
     )
+    llm_concurrency_initial: int = Field(
+        default=4,
+        ge=1,
+        description="Starting per-provider LLM concurrency for the adaptive governor"
+    )
+    llm_concurrency_min: int = Field(
+        default=1,
+        ge=1,
+        description="Lower bound for adaptive per-provider LLM concurrency"
+    )
+    llm_concurrency_max: int = Field(
+        default=32,
+        ge=1,
+        description="Upper bound for adaptive per-provider LLM concurrency"
+    )
+    llm_concurrency_decrease_factor: float = Field(
+        default=0.5,
+        gt=0.0,
+        lt=1.0,
+        description="Multiplicative cut applied on 429/5xx/timeouts"
+    )
+    llm_latency_target_ms: float = Field(
+        default=30000.0,
+        description="Calls slower than this do not grow the concurrency limit"
+    )
+    llm_requests_per_second: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="Optional per-provider request rate cap (0 disables)"
+    )
+    llm_enable_hedging: bool = Field(
+        default=False,
+        description="Send slow LLM calls to the backup provider after the rolling p95 latency"
+    )
+    llm_latency_routing: bool = Field(
+        default=False,
+        description="Order providers by rolling latency/error score instead of primary/backup"
+    )
+    llm_hedge_delay_ms: float = Field(
+        default=8000.0,
+        description="Hedge delay used until a provider has enough latency samples"
+    )
+    llm_hedge_min_samples: int = Field(
+        default=10,
+        ge=1,
+        description="Latency samples required before hedging on the rolling p95"
+    )
+    llm_max_prompt_tokens: int = Field(
+        default=12000,
+        ge=1,
+        description="Prompts estimated above this size are fitted before sending"
+    )
+    llm_evidence_token_budget: int = Field(
+        default=1500,
+        ge=1,
+        description="Token budget for survey evidence (verbatims) inside one prompt"
+    )
+    token_budget_per_workflow: Optional[int] = Field(
+        default=None,
+        description="Total LLM token budget per workflow run (None for unlimited)"
+    )
+    token_budget_per_agent: Dict[str, int] = Field(
+        default_factory=dict,
+        description="LLM token budget per agent id, e.g. {\"C5\": 20000}"
+    )
+    token_budget_default_agent: Optional[int] = Field(
+        default=None,
+        description="LLM token budget for agents without an explicit entry (None for unlimited)"
+    )
+    llm_mode: LLMMode = Field(
+        default=LLMMode.LIVE,
+        description="live calls providers, record also saves fixtures, replay serves fixtures offline"
+    )
+    llm_fixture_path: str = Field(
+        default="./fixtures/llm_fixtures.jsonl",
+        description="JSONL fixture store used by record and replay modes"
+    )
+    llm_replay_latency_model: str = Field(
+        default="recorded",
+        description="Simulated latency in replay mode: recorded, fixed, lognormal or none"
+    )
+    llm_replay_latency_ms: float = Field(
+        default=1000.0,
+        ge=0,
+        description="Fixed latency, or lognormal median, for replayed calls"
+    )
+    llm_replay_latency_sigma: float = Field(
+        default=0.5,
+        ge=0,
+        description="Log-space spread of the lognormal replay latency"
+    )
+    llm_replay_latency_scale: float = Field(
+        default=1.0,
+        ge=0,
+        description="Multiplier applied to recorded/fixed replay latency"
+    )
+    llm_replay_failure_rate: float = Field(
+        default=0.0,
+        ge=0,
+        le=1,
+        description="Probability that a replayed call fails with an injected error"
+    )
+    llm_replay_failure_status_codes: List[int] = Field(
+        default=[429, 503],
+        description="HTTP status codes carried by injected replay failures"
+    )
+    llm_replay_miss_policy: str = Field(
+        default="error",
+        description="Replay behaviour for unrecorded prompts: error or default"
+    )
+    llm_replay_seed: Optional[int] = Field(
+        default=None,
+        description="Random seed for replay latency and failure injection"
+    )
+    enable_agent_pool: bool = Field(
+        default=True,
+        description="Reuse warm agent instances across workflows instead of constructing them per request"
+    )
+    preload_agents: bool = Field(
+        default=True,
+        description="Construct all agents at application startup"
+    )
+    enable_cpu_process_pool: bool = Field(
+        default=True,
+        description="Run CPU-heavy agent steps in a process pool instead of on the event loop"
+    )
+    cpu_pool_workers: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Worker processes for CPU-heavy steps (None for one per core)"
+    )
+    cpu_pool_start_method: str = Field(
+        default="spawn",
+        description="Multiprocessing start method for CPU workers: spawn, forkserver or fork"
+    )
+    workflow_deadline_seconds: Optional[float] = Field(
+        default=300.0,
+        gt=0,
+        description="Overall time budget for one analysis request (None for unbounded)"
+    )
+    workflow_stage_shares: Dict[str, float] = Field(
+        default={"foundation": 0.3, "analysis": 0.4, "consulting": 0.25, "reports": 0.05},
+        description="Relative share of the remaining request time given to each workflow pass"
+    )
+    agent_step_max_retries: int = Field(
+        default=1,
+        ge=0,
+        description="Retries of a failed agent sub-step (e.g. one LLM call) before the step gives up"
+    )
+    agent_step_retry_delay_seconds: float = Field(
+        default=0.5,
+        ge=0,
+        description="Initial backoff between sub-step retries (doubles per retry)"
+    )
+    enable_speculative_consulting: bool = Field(
+        default=False,
+        description="Start C1-C4 on an estimated confidence once B1-B8 finish, instead of waiting for B9"
+    )
+    agent_max_concurrency: int = Field(
+        default=9,
+        ge=1,
+        description="Maximum agents running at once within a workflow pass"
+    )
+    max_concurrent_requests: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum concurrent API analysis requests"
+    )
+    batch_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum surveys running at once within one batch"
+    )
+    batch_max_surveys: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum surveys accepted in one batch request"
+    )
+    ingestion_chunk_size: int = Field(
+        default=5000,
+        ge=1,
+        description="Responses read, cleaned and spilled per chunk in streaming ingestion"
+    )
+    ingestion_spill_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for spilled columnar response stores (None for the system temp dir)"
+    )
+
+    # HTTP Transport Configuration
+    http_max_connections: int = Field(
+        default=100,
+        ge=1,
+        description="Maximum open connections in the shared HTTP pool"
+    )
+    http_max_keepalive_connections: int = Field(
+        default=20,
+        ge=0,
+        description="Idle keep-alive connections retained in the shared HTTP pool"
+    )
+    http_keepalive_expiry: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds an idle pooled connection is kept open"
+    )
+    http_enable_http2: bool = Field(
+        default=True,
+        description="Use HTTP/2 for LLM endpoints when the h2 package is installed"
+    )
+    http_connect_timeout: float = Field(
+        default=10.0,
+        gt=0,
+        description="Connection establishment timeout in seconds"
+    )
 
     # Cache Configuration
     enable_cache: bool = Field(default=True, description="Enable caching")
@@ -146,6 +366,62 @@ class Settings(BaseSettings):
         default=None,
         description="Redis URL for distributed caching"
     )
+    llm_cache_path: Optional[str] = Field(
+        default="./cache/llm_responses.sqlite3",
+        description="SQLite file for the persistent LLM response cache (None for in-memory)"
+    )
+    llm_cache_ttl: int = Field(
+        default=604800,
+        description="LLM response cache TTL in seconds"
+    )
+    llm_cache_max_bytes: int = Field(
+        default=268435456,  # 256MB
+        description="Byte budget for the LLM response cache before LRU eviction"
+    )
+    enable_agent_result_cache: bool = Field(
+        default=True,
+        description="Reuse agent results when the state an agent reads is unchanged"
+    )
+    agent_result_cache_path: Optional[str] = Field(
+        default="./cache/agent_results.sqlite3",
+        description="SQLite file for memoized agent results (None for in-memory)"
+    )
+    agent_result_cache_ttl: int = Field(
+        default=604800,
+        description="Agent result cache TTL in seconds"
+    )
+    agent_result_cache_max_bytes: int = Field(
+        default=536870912,  # 512MB
+        description="Byte budget for the agent result cache before LRU eviction"
+    )
+    embedding_store_path: Optional[str] = Field(
+        default="./cache/embeddings.sqlite3",
+        description="SQLite file for the persistent embedding store (None for in-memory)"
+    )
+    embedding_store_dtype: str = Field(
+        default="float16",
+        description="Storage precision for embeddings (float16 or float32)"
+    )
+    embedding_batch_size: int = Field(
+        default=256,
+        description="Maximum texts per embedding request"
+    )
+    embedding_batch_token_limit: int = Field(
+        default=8000,
+        description="Maximum estimated tokens per embedding request"
+    )
+    embedding_max_concurrency: int = Field(
+        default=4,
+        description="Maximum concurrent embedding requests per embed_many call"
+    )
+    enable_nps_cube: bool = Field(
+        default=True,
+        description="Fold every analysed survey into the persistent NPS aggregate cube"
+    )
+    nps_cube_path: Optional[str] = Field(
+        default="./cache/nps_cube.sqlite3",
+        description="SQLite file for the persistent NPS aggregate cube (None for in-memory)"
+    )
 
     # Database Configuration
     database_url: Optional[str] = Field(
@@ -3,9 +3,34 @@ LLM client abstraction for NPS V3 API.
 """
 
 from .client import LLMClient, LLMClientWithFailover, get_llm_client
+from .transport import HTTPTransport, get_http_transport, close_http_transport
+from .replay import LLMFixtureStore, RecordingLLMClient, ReplayLLMClient, ReplayMiss
+from .tokens import (
+    TokenBudget,
+    TokenBudgetExceeded,
+    estimate_tokens,
+    fit_evidence,
+    fit_prompt,
+    truncate_to_tokens,
+    get_evidence_token_budget
+)
 
 __all__ = [
     "LLMClient",
     "LLMClientWithFailover",
-    "get_llm_client"
+    "get_llm_client",
+    "HTTPTransport",
+    "get_http_transport",
+    "close_http_transport",
+    "LLMFixtureStore",
+    "RecordingLLMClient",
+    "ReplayLLMClient",
+    "ReplayMiss",
+    "TokenBudget",
+    "TokenBudgetExceeded",
+    "estimate_tokens",
+    "fit_evidence",
+    "fit_prompt",
+    "truncate_to_tokens",
+    "get_evidence_token_budget"
 ]
\ No newline at end of file
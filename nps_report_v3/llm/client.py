@@ -4,14 +4,33 @@ Provides unified interface for Azure OpenAI and Yili Gateway with automatic fail
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from dataclasses import dataclass
 import asyncio
 import logging
 import time
-import hashlib
 import json
-from datetime import datetime, timedelta
+from collections import deque
+from contextlib import AsyncExitStack
+
+import numpy as np
+
+from ..config import get_settings
+from ..cache.llm_response_cache import (
+    LLMResponseCache, make_llm_cache_key, get_llm_response_cache
+)
+from ..cache.embedding_store import EmbeddingStore, get_embedding_store
+from ..utils.async_helpers import get_single_flight, get_llm_governor
+from ..utils.deadline import DeadlineExceeded, get_current_deadline
+from .tokens import (
+    estimate_tokens, fit_prompt, get_current_budget, get_current_agent, TokenBudgetExceeded
+)
+from .transport import get_http_transport
+
+try:
+    from openai import AsyncAzureOpenAI
+except ImportError:  # Azure support is optional
+    AsyncAzureOpenAI = None
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +46,7 @@ class LLMConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: int = 2
+    embedding_model: str = "text-embedding-ada-002"
 
 
 @dataclass
@@ -40,14 +60,125 @@ class LLMResponse:
     metadata: Optional[Dict] = None
 
 
+class ProviderLatencyStats:
+    """
+    Rolling latency and error statistics for one provider.
+
+    Failures are folded into the latency EWMA as a penalty (the request
+    timeout), so ``score`` ranks a slow provider and a flaky one alike.
+    The penalty halves every ``penalty_half_life`` seconds without new
+    samples, so a provider that stopped getting traffic after an outage
+    drifts back to its last good latency and is probed again.
+    """
+
+    def __init__(self, window: int = 100, alpha: float = 0.2, penalty_half_life: float = 60.0):
+        self.alpha = alpha
+        self.penalty_half_life = penalty_half_life
+        self.latencies: deque = deque(maxlen=window)
+        self.first_token_latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.ewma_ms: Optional[float] = None
+        self.success_ewma_ms: Optional[float] = None
+        self.updated_at: Optional[float] = None
+
+    def _update_ewma(self, value_ms: float) -> None:
+        if self.ewma_ms is None:
+            self.ewma_ms = value_ms
+        else:
+            self.ewma_ms = self.alpha * value_ms + (1 - self.alpha) * self.ewma_ms
+        self.updated_at = time.monotonic()
+
+    def record_success(self, latency_ms: float) -> None:
+        self.latencies.append(latency_ms)
+        self.outcomes.append(True)
+        self._update_ewma(latency_ms)
+        if self.success_ewma_ms is None:
+            self.success_ewma_ms = latency_ms
+        else:
+            self.success_ewma_ms = self.alpha * latency_ms + (1 - self.alpha) * self.success_ewma_ms
+
+    def record_failure(self, penalty_ms: float) -> None:
+        self.outcomes.append(False)
+        self._update_ewma(penalty_ms)
+
+    def record_first_token(self, latency_ms: float) -> None:
+        """Time until a stream produced its first delta (kept apart from full-call latency)"""
+        self.first_token_latencies.append(latency_ms)
+
+    @property
+    def samples(self) -> int:
+        return len(self.latencies)
+
+    @staticmethod
+    def _p95(values: deque) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent successful latencies"""
+        return self._p95(self.latencies)
+
+    def first_token_p95(self) -> Optional[float]:
+        """95th percentile of recent stream time-to-first-token"""
+        return self._p95(self.first_token_latencies)
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def score(self) -> float:
+        """
+        Lower is better.
+
+        A provider without history scores 0, so it is tried once (before
+        any provider with history) and then ranked by its own samples.
+        Failure penalties decay towards the provider's success-only EWMA,
+        or towards 0 if it never succeeded.
+        """
+        if self.ewma_ms is None:
+            return 0.0
+        baseline = self.success_ewma_ms or 0.0
+        if self.ewma_ms <= baseline:
+            return self.ewma_ms
+        idle = time.monotonic() - self.updated_at
+        return baseline + (self.ewma_ms - baseline) * 0.5 ** (idle / self.penalty_half_life)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "p95_ms": self.p95(),
+            "first_token_p95_ms": self.first_token_p95(),
+            "error_rate": round(self.error_rate(), 4)
+        }
+
+
 class LLMClient(ABC):
     """Abstract base class for LLM clients"""
 
-    def __init__(self, config: LLMConfig):
+    provider_name = "generic"
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        response_cache: Optional[LLMResponseCache] = None,
+        embedding_store: Optional[EmbeddingStore] = None
+    ):
         self.config = config
         self.call_count = 0
         self.total_tokens = 0
-        self.cache = {}  # Simple in-memory cache
+        self.embedding_requests = 0
+        # Shared persistent cache when provided, otherwise a private in-memory one
+        self.cache = response_cache or LLMResponseCache(ttl_seconds=3600)
+        self.embedding_store = embedding_store or EmbeddingStore()
+        # Process-wide so that concurrent agents coalesce identical prompts
+        self.single_flight = get_single_flight()
+        # Adaptive per-provider concurrency shared by every client in the process
+        self.governor = get_llm_governor()
+        self.latency_stats = ProviderLatencyStats()
 
     @abstractmethod
     async def generate(self, prompt: str, **kwargs) -> LLMResponse:
@@ -59,43 +190,356 @@ class LLMClient(ABC):
         """Generate embedding for text"""
         pass
 
-    def _get_cache_key(self, prompt: str) -> str:
-        """Generate cache key for prompt"""
-        return hashlib.md5(prompt.encode()).hexdigest()
-
-    def _get_from_cache(self, prompt: str) -> Optional[LLMResponse]:
-        """Get response from cache if available"""
-        key = self._get_cache_key(prompt)
-        if key in self.cache:
-            cached_item = self.cache[key]
-            if cached_item['expires_at'] > datetime.utcnow():
-                logger.debug(f"Cache hit for prompt hash: {key[:8]}...")
-                response = cached_item['response']
-                response.cached = True
-                return response
-        return None
-
-    def _save_to_cache(self, prompt: str, response: LLMResponse, ttl_seconds: int = 3600):
-        """Save response to cache"""
-        key = self._get_cache_key(prompt)
-        self.cache[key] = {
-            'response': response,
-            'expires_at': datetime.utcnow() + timedelta(seconds=ttl_seconds)
+    async def _call_governed(self, func, *args, **kwargs):
+        """
+        Run one provider call under this provider's adaptive concurrency limit.
+
+        Waiting for a slot and the call itself never outlast the request deadline.
+        """
+        deadline = get_current_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is None:
+            async with self.governor.slot(self.provider_name):
+                return await func(*args, **kwargs)
+
+        if remaining <= 0:
+            raise DeadlineExceeded(f"No time left for {self.provider_name} call")
+
+        async def governed():
+            async with self.governor.slot(self.provider_name):
+                return await func(*args, **kwargs)
+
+        try:
+            return await asyncio.wait_for(governed(), remaining)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded(f"{self.provider_name} call cut off by the request deadline") from e
+
+    async def _stream(self, prompt: str, usage: Dict[str, int], **kwargs) -> AsyncIterator[str]:
+        """
+        Yield completion deltas from the provider (providers override).
+
+        Providers fill ``usage`` when the stream reports it. The default falls
+        back to a single non-streaming call.
+        """
+        response = await self.generate(prompt, **kwargs)
+        usage.update(response.usage or {})
+        yield response.content
+
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a completion as text deltas.
+
+        Cache hits are replayed as a single delta. Once the stream completes the
+        full response is cached and counted like a regular call.
+        """
+        prompt = self._preflight(prompt)
+
+        cached_response = await self._get_from_cache(prompt, **kwargs)
+        if cached_response:
+            self._record_usage(cached_response)
+            yield cached_response.content
+            return
+
+        async for delta in self._stream_and_record(self, prompt, **kwargs):
+            yield delta
+
+    @staticmethod
+    async def _before_deadline(client: "LLMClient", make_awaitable) -> Any:
+        """Await ``make_awaitable()`` for at most the time left on the request deadline"""
+        deadline = get_current_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"No time left for {client.provider_name} stream")
+
+        try:
+            return await asyncio.wait_for(make_awaitable(), remaining)
+        except asyncio.TimeoutError as e:
+            if isinstance(e, DeadlineExceeded) or remaining is None or deadline.remaining() > 0:
+                raise
+            raise DeadlineExceeded(f"{client.provider_name} stream cut off by the request deadline") from e
+
+    async def _stream_and_record(self, client: "LLMClient", prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream from ``client`` and, on completion, account usage and cache the response.
+
+        Waiting for a slot and for each delta never outlasts the request
+        deadline. Time to first delta and provider failures feed the
+        provider's rolling statistics.
+        """
+        start_time = time.monotonic()
+        first_token_ms: Optional[int] = None
+        usage: Dict[str, int] = {}
+        parts: List[str] = []
+
+        try:
+            async with AsyncExitStack() as stack:
+                await self._before_deadline(
+                    client, lambda: stack.enter_async_context(client.governor.slot(client.provider_name))
+                )
+                stream = client._stream(prompt, usage, **kwargs)
+                stack.push_async_callback(stream.aclose)
+
+                while True:
+                    try:
+                        delta = await self._before_deadline(client, stream.__anext__)
+                    except StopAsyncIteration:
+                        break
+                    if delta:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.monotonic() - start_time) * 1000)
+                            client.latency_stats.record_first_token(first_token_ms)
+                        parts.append(delta)
+                        yield delta
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # Running out of request time says nothing about the provider
+            raise
+        except Exception:
+            client.latency_stats.record_failure(client.config.timeout * 1000)
+            raise
+
+        content = "".join(parts)
+        if not usage:
+            prompt_tokens = estimate_tokens(prompt)
+            completion_tokens = estimate_tokens(content)
+            usage = {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+
+        latency_ms = int((time.monotonic() - start_time) * 1000)
+        client.latency_stats.record_success(latency_ms)
+        client.call_count += 1
+        client.total_tokens += usage.get('total_tokens', 0)
+
+        response = LLMResponse(
+            content=content,
+            model=client.config.model_name,
+            usage=usage,
+            latency_ms=latency_ms,
+            metadata={'streamed': True, 'first_token_ms': first_token_ms}
+        )
+        await asyncio.to_thread(
+            self.cache.set, client._get_cache_key(prompt, **kwargs), self._response_to_cache_payload(response)
+        )
+        self._record_usage(response)
+
+    def _preflight(self, prompt: str) -> str:
+        """
+        Estimate prompt tokens before sending and enforce the active budget.
+
+        Prompts larger than ``llm_max_prompt_tokens`` or the remaining
+        workflow/agent budget are fitted by dropping their middle.
+        """
+        budget = get_current_budget()
+        agent_id = get_current_agent() or "unattributed"
+
+        deadline = get_current_deadline()
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"Request deadline reached before LLM call for agent {agent_id}")
+
+        estimated = estimate_tokens(prompt)
+        limit = get_settings().llm_max_prompt_tokens
+
+        if budget is not None:
+            remaining = budget.remaining(agent_id)
+            if remaining is not None:
+                if remaining <= 0:
+                    raise TokenBudgetExceeded(f"Token budget exhausted for agent {agent_id}")
+                limit = min(limit, remaining)
+
+        fitted = estimated > limit
+        if fitted:
+            logger.warning(f"Prompt of ~{estimated} tokens fitted to {limit} for agent {agent_id}")
+            prompt = fit_prompt(prompt, limit)
+            estimated = estimate_tokens(prompt)
+
+        if budget is not None:
+            budget.record_estimate(agent_id, estimated, fitted)
+
+        return prompt
+
+    def _record_usage(self, response: LLMResponse, cached: bool = False) -> None:
+        """
+        Report actual usage of a completed call to the active budget.
+
+        Cache hits and calls coalesced onto another caller's request
+        (``cached=True``) count as cached calls without tokens.
+        """
+        budget = get_current_budget()
+        if budget is not None:
+            budget.record_actual(
+                get_current_agent() or "unattributed",
+                response.usage or {},
+                cached=cached or response.cached
+            )
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a chunk of texts in one provider request (providers override)"""
+        return [await self.embed(text) for text in texts]
+
+    async def embed_many(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        token_limit: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Embed many texts with deduplication, batching and a persistent store.
+
+        Args:
+            texts: Texts to embed; duplicates are only sent once
+            batch_size: Maximum texts per provider request
+            token_limit: Maximum estimated tokens per provider request
+            max_concurrency: Maximum provider requests in flight
+
+        Returns:
+            float32 matrix with one row per input text, in input order
+        """
+        settings = get_settings()
+        batch_size = batch_size or settings.embedding_batch_size
+        token_limit = token_limit or settings.embedding_batch_token_limit
+        max_concurrency = max_concurrency or settings.embedding_max_concurrency
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        model = self.config.embedding_model
+        unique_texts = list(dict.fromkeys(texts))
+        vectors = self.embedding_store.get_many(model, unique_texts)
+        missing = [text for text in unique_texts if text not in vectors]
+
+        if missing:
+            batches = self._build_embedding_batches(missing, batch_size, token_limit)
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def run_batch(batch: List[str]) -> None:
+                async with semaphore:
+                    embeddings = await self._call_governed(self._embed_batch, batch)
+                    self.embedding_requests += 1
+                fresh = dict(zip(batch, embeddings))
+                self.embedding_store.put_many(model, fresh)
+                vectors.update(
+                    (text, np.asarray(vector, dtype=np.float32)) for text, vector in fresh.items()
+                )
+
+            await asyncio.gather(*(run_batch(batch) for batch in batches))
+
+            logger.info(
+                f"Embedded {len(missing)} new texts in {len(batches)} requests "
+                f"({len(unique_texts) - len(missing)} served from store, "
+                f"{len(texts) - len(unique_texts)} duplicates)"
+            )
+
+        return np.vstack([vectors[text] for text in texts]).astype(np.float32, copy=False)
+
+    @staticmethod
+    def _build_embedding_batches(
+        texts: List[str],
+        batch_size: int,
+        token_limit: int
+    ) -> List[List[str]]:
+        """Split texts into requests bounded by item count and estimated tokens"""
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        for text in texts:
+            # One token per character is a safe upper bound for Chinese and English
+            tokens = max(len(text), 1)
+            if current and (len(current) >= batch_size or current_tokens + tokens > token_limit):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _get_cache_key(self, prompt: str, **kwargs) -> str:
+        """Generate content-addressed cache key for a request"""
+        return make_llm_cache_key(
+            provider=self.provider_name,
+            model=self.config.model_name,
+            temperature=kwargs.get('temperature', self.config.temperature),
+            max_tokens=kwargs.get('max_tokens', self.config.max_tokens),
+            prompt=prompt
+        )
+
+    async def _get_from_cache(self, prompt: str, **kwargs) -> Optional[LLMResponse]:
+        """Get response from cache if available (the SQLite read runs off the event loop)"""
+        payload = await asyncio.to_thread(self.cache.get, self._get_cache_key(prompt, **kwargs))
+        if payload is None:
+            return None
+        return self._response_from_cache_payload(payload)
+
+    async def _save_to_cache(
+        self,
+        prompt: str,
+        response: LLMResponse,
+        ttl_seconds: Optional[int] = None,
+        **kwargs
+    ):
+        """Save response to cache (the SQLite write runs off the event loop)"""
+        await asyncio.to_thread(
+            self.cache.set,
+            self._get_cache_key(prompt, **kwargs),
+            self._response_to_cache_payload(response),
+            ttl=ttl_seconds
+        )
+
+    @staticmethod
+    def _response_to_cache_payload(response: LLMResponse) -> Dict[str, Any]:
+        """Serialize a response for the cache store"""
+        return {
+            'content': response.content,
+            'model': response.model,
+            'usage': response.usage,
+            'latency_ms': response.latency_ms,
+            'metadata': response.metadata
         }
-        logger.debug(f"Cached response for prompt hash: {key[:8]}...")
+
+    @staticmethod
+    def _response_from_cache_payload(payload: Dict[str, Any]) -> LLMResponse:
+        """Rebuild a response served from the cache store"""
+        return LLMResponse(
+            content=payload['content'],
+            model=payload['model'],
+            usage=payload.get('usage', {}),
+            latency_ms=payload.get('latency_ms', 0),
+            cached=True,
+            metadata=payload.get('metadata')
+        )
 
     async def generate_with_retry(self, prompt: str, **kwargs) -> LLMResponse:
         """Generate response with retry logic"""
+        prompt = self._preflight(prompt)
+
         # Check cache first
-        cached_response = self._get_from_cache(prompt)
+        cached_response = await self._get_from_cache(prompt, **kwargs)
         if cached_response:
+            self._record_usage(cached_response)
             return cached_response
 
+        # Identical prompts already in flight share one gateway call
+        response, leader = await self.single_flight.do(
+            f"llm:{self._get_cache_key(prompt, **kwargs)}",
+            lambda: self._generate_with_retry_uncached(prompt, **kwargs)
+        )
+        # Only the caller whose request reached the gateway is charged for it
+        self._record_usage(response, cached=not leader)
+        return response
+
+    async def _generate_with_retry_uncached(self, prompt: str, **kwargs) -> LLMResponse:
+        """Retry loop for a cache miss"""
         last_error = None
         for attempt in range(self.config.max_retries):
             try:
                 start_time = time.time()
-                response = await self.generate(prompt, **kwargs)
+                response = await self._call_governed(self.generate, prompt, **kwargs)
                 response.latency_ms = int((time.time() - start_time) * 1000)
 
                 # Update statistics
@@ -103,16 +547,22 @@ class LLMClient(ABC):
                 self.total_tokens += response.usage.get('total_tokens', 0)
 
                 # Cache the response
-                self._save_to_cache(prompt, response)
+                await self._save_to_cache(prompt, response, **kwargs)
 
                 return response
 
+            except DeadlineExceeded:
+                raise
+
             except Exception as e:
                 last_error = e
                 logger.warning(f"LLM call failed (attempt {attempt + 1}): {e}")
 
                 if attempt < self.config.max_retries - 1:
                     delay = self.config.retry_delay * (2 ** attempt)
+                    deadline = get_current_deadline()
+                    if deadline is not None and not deadline.allows(delay):
+                        raise DeadlineExceeded(f"No time left to retry LLM call: {e}") from e
                     logger.info(f"Retrying after {delay} seconds...")
                     await asyncio.sleep(delay)
 
@@ -122,15 +572,33 @@ class LLMClient(ABC):
 class AzureOpenAIClient(LLMClient):
     """Azure OpenAI client implementation"""
 
-    def __init__(self, config: LLMConfig):
-        super().__init__(config)
-        # Lazy import to avoid dependency if not used
-        from openai import AsyncAzureOpenAI
-        self.client = AsyncAzureOpenAI(
-            api_key=config.api_key,
-            api_version="2024-02-01",
-            azure_endpoint=config.api_base
-        )
+    provider_name = "azure"
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        response_cache: Optional[LLMResponseCache] = None,
+        embedding_store: Optional[EmbeddingStore] = None
+    ):
+        super().__init__(config, response_cache, embedding_store)
+        if AsyncAzureOpenAI is None:
+            raise ImportError("openai package is required for AzureOpenAIClient")
+        self._client = None
+        self._http_client = None
+
+    @property
+    def client(self):
+        """SDK client bound to the shared connection pool of the running loop"""
+        http_client = get_http_transport().get_async_client()
+        if self._client is None or self._http_client is not http_client:
+            self._http_client = http_client
+            self._client = AsyncAzureOpenAI(
+                api_key=self.config.api_key,
+                api_version="2024-02-01",
+                azure_endpoint=self.config.api_base,
+                http_client=http_client
+            )
+        return self._client
 
     async def generate(self, prompt: str, **kwargs) -> LLMResponse:
         """Generate response using Azure OpenAI"""
@@ -158,11 +626,37 @@ class AzureOpenAIClient(LLMClient):
             logger.error(f"Azure OpenAI generation error: {e}")
             raise
 
+    async def _stream(self, prompt: str, usage: Dict[str, int], **kwargs) -> AsyncIterator[str]:
+        """Stream completion deltas from Azure OpenAI"""
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.config.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=kwargs.get('temperature', self.config.temperature),
+                max_tokens=kwargs.get('max_tokens', self.config.max_tokens),
+                timeout=self.config.timeout,
+                stream=True
+            )
+
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage.update({
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'total_tokens': chunk.usage.total_tokens
+                    })
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            logger.error(f"Azure OpenAI streaming error: {e}")
+            raise
+
     async def embed(self, text: str) -> List[float]:
         """Generate embedding using Azure OpenAI"""
         try:
             response = await self.client.embeddings.create(
-                model="text-embedding-ada-002",
+                model=self.config.embedding_model,
                 input=text,
                 timeout=self.config.timeout
             )
@@ -172,21 +666,50 @@ class AzureOpenAIClient(LLMClient):
             logger.error(f"Azure OpenAI embedding error: {e}")
             raise
 
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a chunk of texts in a single Azure OpenAI request"""
+        try:
+            response = await self.client.embeddings.create(
+                model=self.config.embedding_model,
+                input=texts,
+                timeout=self.config.timeout
+            )
+            data = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in data]
+
+        except Exception as e:
+            logger.error(f"Azure OpenAI batch embedding error: {e}")
+            raise
+
 
 class YiliGatewayClient(LLMClient):
     """Yili corporate gateway client implementation"""
 
-    def __init__(self, config: LLMConfig):
-        super().__init__(config)
-        # Use httpx for async HTTP requests
-        import httpx
-        self.client = httpx.AsyncClient(
-            base_url=config.api_base,
-            headers={
-                "Authorization": f"Bearer {config.api_key}",
-                "Content-Type": "application/json"
-            },
-            timeout=config.timeout
+    provider_name = "yili"
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        response_cache: Optional[LLMResponseCache] = None,
+        embedding_store: Optional[EmbeddingStore] = None
+    ):
+        super().__init__(config, response_cache, embedding_store)
+        self.headers = {
+            "Authorization": f"Bearer {config.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @property
+    def client(self):
+        """Shared pooled HTTP client of the running loop"""
+        return get_http_transport().get_async_client()
+
+    def _url(self, path: str) -> str:
+        return self.config.api_base.rstrip("/") + path
+
+    async def _post(self, path: str, payload: Dict[str, Any]):
+        return await self.client.post(
+            self._url(path), json=payload, headers=self.headers, timeout=self.config.timeout
         )
 
     async def generate(self, prompt: str, **kwargs) -> LLMResponse:
@@ -199,7 +722,7 @@ class YiliGatewayClient(LLMClient):
                 "max_tokens": kwargs.get('max_tokens', self.config.max_tokens)
             }
 
-            response = await self.client.post("/chat/completions", json=payload)
+            response = await self._post("/chat/completions", payload)
             response.raise_for_status()
 
             data = response.json()
@@ -219,15 +742,51 @@ class YiliGatewayClient(LLMClient):
             logger.error(f"Yili Gateway generation error: {e}")
             raise
 
+    async def _stream(self, prompt: str, usage: Dict[str, int], **kwargs) -> AsyncIterator[str]:
+        """Stream completion deltas from Yili Gateway (server-sent events)"""
+        try:
+            payload = {
+                "model": self.config.model_name,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": kwargs.get('temperature', self.config.temperature),
+                "max_tokens": kwargs.get('max_tokens', self.config.max_tokens),
+                "stream": True
+            }
+
+            async with self.client.stream(
+                "POST", self._url("/chat/completions"),
+                json=payload, headers=self.headers, timeout=self.config.timeout
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    chunk = json.loads(data)
+                    if chunk.get('usage'):
+                        usage.update(chunk['usage'])
+                    choices = chunk.get('choices') or []
+                    delta = choices[0].get('delta', {}).get('content') if choices else None
+                    if delta:
+                        yield delta
+
+        except Exception as e:
+            logger.error(f"Yili Gateway streaming error: {e}")
+            raise
+
     async def embed(self, text: str) -> List[float]:
         """Generate embedding using Yili Gateway"""
         try:
             payload = {
-                "model": "text-embedding-ada-002",
+                "model": self.config.embedding_model,
                 "input": text
             }
 
-            response = await self.client.post("/embeddings", json=payload)
+            response = await self._post("/embeddings", payload)
             response.raise_for_status()
 
             data = response.json()
@@ -237,24 +796,251 @@ class YiliGatewayClient(LLMClient):
             logger.error(f"Yili Gateway embedding error: {e}")
             raise
 
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a chunk of texts in a single Yili Gateway request"""
+        try:
+            payload = {
+                "model": self.config.embedding_model,
+                "input": texts
+            }
+
+            response = await self._post("/embeddings", payload)
+            response.raise_for_status()
+
+            data = sorted(response.json()['data'], key=lambda item: item.get('index', 0))
+            return [item['embedding'] for item in data]
+
+        except Exception as e:
+            logger.error(f"Yili Gateway batch embedding error: {e}")
+            raise
+
 
 class LLMClientWithFailover(LLMClient):
-    """LLM client with automatic failover between primary and backup"""
+    """
+    LLM client with automatic failover between primary and backup.
+
+    Optional modes:
+    - ``enable_hedging``: if the first provider has not answered within its
+      rolling p95 latency, the same prompt is sent to the other provider and
+      the first successful answer wins; the loser is cancelled.
+    - ``latency_routing``: providers are tried in order of their rolling
+      latency/error score instead of the fixed primary/backup order.
+    """
 
-    def __init__(self, primary_client: LLMClient, backup_client: Optional[LLMClient] = None):
-        # Use primary client's config
-        super().__init__(primary_client.config)
+    def __init__(
+        self,
+        primary_client: LLMClient,
+        backup_client: Optional[LLMClient] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        embedding_store: Optional[EmbeddingStore] = None,
+        enable_hedging: bool = False,
+        latency_routing: bool = False,
+        hedge_delay_ms: float = 8000.0,
+        hedge_min_samples: int = 10
+    ):
+        # Use primary client's config and share its caches unless given
+        super().__init__(
+            primary_client.config,
+            response_cache or primary_client.cache,
+            embedding_store or primary_client.embedding_store
+        )
         self.primary_client = primary_client
         self.backup_client = backup_client
         self.use_primary = True
+        self.enable_hedging = enable_hedging
+        self.latency_routing = latency_routing
+        self.hedge_delay_ms = hedge_delay_ms
+        self.hedge_min_samples = hedge_min_samples
+        self.routing_metrics: Dict[str, int] = {
+            "hedges_fired": 0,
+            "hedges_won": 0
+        }
+
+    @property
+    def provider_name(self) -> str:
+        return self.primary_client.provider_name
+
+    async def _get_from_cache(self, prompt: str, **kwargs) -> Optional[LLMResponse]:
+        """Look up a response produced by either the primary or the backup provider"""
+        keys = [
+            client._get_cache_key(prompt, **kwargs)
+            for client in (self.primary_client, self.backup_client) if client is not None
+        ]
+
+        def lookup() -> Optional[Dict[str, Any]]:
+            for key in keys:
+                payload = self.cache.get(key)
+                if payload is not None:
+                    return payload
+            return None
+
+        payload = await asyncio.to_thread(lookup)
+        if payload is None:
+            return None
+        return self._response_from_cache_payload(payload)
 
     async def generate(self, prompt: str, **kwargs) -> LLMResponse:
-        """Generate with automatic failover"""
+        """Generate with automatic failover, serving repeated prompts from cache"""
+        prompt = self._preflight(prompt)
+
+        cached_response = await self._get_from_cache(prompt, **kwargs)
+        if cached_response:
+            self._record_usage(cached_response)
+            return cached_response
+
+        response, leader = await self.single_flight.do(
+            f"llm:{self._get_cache_key(prompt, **kwargs)}",
+            lambda: self._generate_uncached(prompt, **kwargs)
+        )
+        # Only the caller whose request reached the gateway is charged for it
+        self._record_usage(response, cached=not leader)
+        return response
+
+    async def _generate_uncached(self, prompt: str, **kwargs) -> LLMResponse:
+        """Failover call for a cache miss"""
+        response, client = await self._generate_with_failover(prompt, **kwargs)
+
+        # Key the entry by the provider that actually produced it
+        await asyncio.to_thread(
+            self.cache.set,
+            client._get_cache_key(prompt, **kwargs),
+            self._response_to_cache_payload(response)
+        )
+
+        return response
+
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream with failover.
+
+        A provider that fails before its first delta is skipped for the next
+        one; a failure mid-stream is raised since output was already forwarded.
+        """
+        prompt = self._preflight(prompt)
+
+        cached_response = await self._get_from_cache(prompt, **kwargs)
+        if cached_response:
+            self._record_usage(cached_response)
+            yield cached_response.content
+            return
+
+        last_error: Optional[Exception] = None
+        for client in self._routing_order():
+            started = False
+            try:
+                async for delta in self._stream_and_record(client, prompt, **kwargs):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                last_error = e
+                logger.warning(f"{client.provider_name} stream failed before first delta: {e}")
+
+        raise Exception(f"All LLM clients failed to stream: {last_error}") from last_error
+
+    async def _timed_generate(self, client: LLMClient, prompt: str, **kwargs) -> LLMResponse:
+        """Call one provider and feed the outcome into its rolling statistics"""
+        start_time = time.monotonic()
+        try:
+            response = await client._call_governed(client.generate, prompt, **kwargs)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # Running out of request time says nothing about the provider
+            raise
+        except Exception:
+            client.latency_stats.record_failure(client.config.timeout * 1000)
+            raise
+
+        client.latency_stats.record_success((time.monotonic() - start_time) * 1000)
+        return response
+
+    def _routing_order(self) -> List[LLMClient]:
+        """Providers in the order they should be tried"""
+        clients = [c for c in (self.primary_client, self.backup_client) if c is not None]
+        if self.latency_routing:
+            # Stable sort keeps the configured primary first on ties
+            return sorted(clients, key=lambda c: c.latency_stats.score())
+        if not self.use_primary:
+            clients.reverse()
+        return clients
+
+    def _hedge_delay(self, client: LLMClient) -> float:
+        """Seconds to wait on ``client`` before hedging to the next provider"""
+        p95 = client.latency_stats.p95()
+        if p95 is None or client.latency_stats.samples < self.hedge_min_samples:
+            return self.hedge_delay_ms / 1000
+        return p95 / 1000
+
+    async def _generate_hedged(self, first: LLMClient, second: LLMClient, prompt: str, **kwargs):
+        """Race ``second`` against a slow ``first``; returns (response, client used)"""
+        tasks = {asyncio.ensure_future(self._timed_generate(first, prompt, **kwargs)): first}
+
+        try:
+            done, _ = await asyncio.wait(set(tasks), timeout=self._hedge_delay(first))
+
+            if not done:
+                logger.info(f"Hedging slow {first.provider_name} call to {second.provider_name}")
+                self.routing_metrics["hedges_fired"] += 1
+                tasks[asyncio.ensure_future(self._timed_generate(second, prompt, **kwargs))] = second
+            elif isinstance(next(iter(done)).exception(), DeadlineExceeded):
+                raise next(iter(done)).exception()
+            elif next(iter(done)).exception() is not None:
+                # First provider failed outright: plain failover, no race needed
+                logger.warning(f"{first.provider_name} client failed: {next(iter(done)).exception()}")
+                return await self._timed_generate(second, prompt, **kwargs), second
+
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] is second:
+                            self.routing_metrics["hedges_won"] += 1
+                        return task.result(), tasks[task]
+                    last_error = task.exception()
+                    logger.warning(f"{tasks[task].provider_name} client failed: {last_error}")
+
+            raise Exception(f"All hedged LLM calls failed: {last_error}") from last_error
+
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _generate_routed(self, prompt: str, **kwargs):
+        """Hedged and/or latency-ordered call; returns (response, client used)"""
+        clients = self._routing_order()
+
+        if self.enable_hedging and len(clients) > 1:
+            return await self._generate_hedged(clients[0], clients[1], prompt, **kwargs)
+
+        last_error: Optional[Exception] = None
+        for client in clients:
+            try:
+                return await self._timed_generate(client, prompt, **kwargs), client
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                logger.warning(f"{client.provider_name} client failed: {e}")
+
+        raise Exception(f"All LLM clients failed: {last_error}") from last_error
+
+    async def _generate_with_failover(self, prompt: str, **kwargs):
+        """Route the call to primary or backup; returns (response, client used)"""
+        if self.enable_hedging or self.latency_routing:
+            return await self._generate_routed(prompt, **kwargs)
+
         # Try primary client first
         if self.use_primary:
             try:
                 logger.debug("Using primary LLM client")
-                return await self.primary_client.generate(prompt, **kwargs)
+                response = await self._timed_generate(self.primary_client, prompt, **kwargs)
+                return response, self.primary_client
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.warning(f"Primary client failed: {e}")
                 if self.backup_client:
@@ -267,18 +1053,24 @@ class LLMClientWithFailover(LLMClient):
         if self.backup_client and not self.use_primary:
             try:
                 logger.debug("Using backup LLM client")
-                response = await self.backup_client.generate(prompt, **kwargs)
+                response = await self._timed_generate(self.backup_client, prompt, **kwargs)
 
                 # Try to restore primary after successful backup call
                 asyncio.create_task(self._try_restore_primary())
 
-                return response
+                return response, self.backup_client
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.error(f"Backup client also failed: {e}")
                 raise
 
         raise Exception("No available LLM client")
 
+    async def _call_governed(self, func, *args, **kwargs):
+        """Routing happens inside; each underlying client applies its own limit"""
+        return await func(*args, **kwargs)
+
     async def embed(self, text: str) -> List[float]:
         """Generate embedding with automatic failover"""
         if self.use_primary:
@@ -296,6 +1088,27 @@ class LLMClientWithFailover(LLMClient):
 
         raise Exception("No available LLM client for embedding")
 
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Batch embedding with automatic failover"""
+        if self.use_primary:
+            try:
+                return await self.primary_client._call_governed(
+                    self.primary_client._embed_batch, texts
+                )
+            except Exception as e:
+                logger.warning(f"Primary client batch embedding failed: {e}")
+                if self.backup_client:
+                    self.use_primary = False
+                else:
+                    raise
+
+        if self.backup_client and not self.use_primary:
+            return await self.backup_client._call_governed(
+                self.backup_client._embed_batch, texts
+            )
+
+        raise Exception("No available LLM client for embedding")
+
     async def _try_restore_primary(self):
         """Try to restore primary client after delay"""
         await asyncio.sleep(60)  # Wait 1 minute before trying
@@ -308,28 +1121,32 @@ class LLMClientWithFailover(LLMClient):
             pass  # Keep using backup
 
     async def generate_with_retry(self, prompt: str, **kwargs) -> LLMResponse:
-        """Override to use failover logic"""
-        # Check cache first
-        cached_response = self._get_from_cache(prompt)
-        if cached_response:
-            return cached_response
-
-        # Use failover generation
-        response = await self.generate(prompt, **kwargs)
-
-        # Cache the response
-        self._save_to_cache(prompt, response)
-
-        return response
-
-
-def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> LLMClient:
+        """Override to use failover logic (caching is handled by generate)"""
+        return await self.generate(prompt, **kwargs)
+
+    def get_routing_metrics(self) -> Dict[str, Any]:
+        """Hedging counters and rolling per-provider statistics"""
+        providers = {}
+        for role, client in (("primary", self.primary_client), ("backup", self.backup_client)):
+            if client is not None:
+                providers[role] = dict(client.latency_stats.to_dict(), provider=client.provider_name)
+        return dict(self.routing_metrics, providers=providers)
+
+
+def create_llm_client(
+    primary: str = "azure",
+    enable_failover: bool = True,
+    response_cache: Optional[LLMResponseCache] = None,
+    embedding_store: Optional[EmbeddingStore] = None
+) -> LLMClient:
     """
     Factory function to create LLM client
 
     Args:
         primary: Primary client type ('azure' or 'yili')
         enable_failover: Whether to enable automatic failover
+        response_cache: Response cache to use (process-wide persistent cache if None)
+        embedding_store: Embedding store to use (process-wide persistent store if None)
 
     Returns:
         Configured LLM client
@@ -339,6 +1156,17 @@ def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> L
 
     load_dotenv()
 
+    settings = get_settings()
+    if settings.enable_cache:
+        if response_cache is None:
+            response_cache = get_llm_response_cache()
+        if embedding_store is None:
+            embedding_store = get_embedding_store()
+
+    llm_mode = getattr(settings.llm_mode, "value", settings.llm_mode)
+    if llm_mode == "replay":
+        return _create_replay_client(settings, response_cache, embedding_store)
+
     # Create primary client
     if primary == "azure":
         azure_config = LLMConfig(
@@ -348,7 +1176,7 @@ def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> L
             temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.1")),
             max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000"))
         )
-        primary_client = AzureOpenAIClient(azure_config)
+        primary_client = AzureOpenAIClient(azure_config, response_cache, embedding_store)
     else:
         yili_config = LLMConfig(
             model_name=os.getenv("YILI_MODEL", "gpt-4-turbo"),
@@ -357,7 +1185,10 @@ def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> L
             temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.1")),
             max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000"))
         )
-        primary_client = YiliGatewayClient(yili_config)
+        primary_client = YiliGatewayClient(yili_config, response_cache, embedding_store)
+
+    if llm_mode == "record":
+        primary_client = _with_recorder(primary_client, settings)
 
     if not enable_failover:
         return primary_client
@@ -371,7 +1202,7 @@ def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> L
             temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.1")),
             max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000"))
         )
-        backup_client = YiliGatewayClient(yili_config)
+        backup_client = YiliGatewayClient(yili_config, response_cache, embedding_store)
     else:
         azure_config = LLMConfig(
             model_name=os.getenv("AZURE_OPENAI_MODEL", "gpt-4-turbo"),
@@ -380,9 +1211,55 @@ def create_llm_client(primary: str = "azure", enable_failover: bool = True) -> L
             temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.1")),
             max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "4000"))
         )
-        backup_client = AzureOpenAIClient(azure_config)
-
-    return LLMClientWithFailover(primary_client, backup_client)
+        backup_client = AzureOpenAIClient(azure_config, response_cache, embedding_store)
+
+    if llm_mode == "record":
+        backup_client = _with_recorder(backup_client, settings)
+
+    return LLMClientWithFailover(
+        primary_client,
+        backup_client,
+        response_cache,
+        embedding_store,
+        enable_hedging=settings.llm_enable_hedging,
+        latency_routing=settings.llm_latency_routing,
+        hedge_delay_ms=settings.llm_hedge_delay_ms,
+        hedge_min_samples=settings.llm_hedge_min_samples
+    )
+
+
+def _with_recorder(client: LLMClient, settings) -> LLMClient:
+    """Wrap a live provider client so its real interactions are saved as fixtures"""
+    from .replay import LLMFixtureStore, RecordingLLMClient
+
+    return RecordingLLMClient(client, LLMFixtureStore(settings.llm_fixture_path))
+
+
+def _create_replay_client(
+    settings,
+    response_cache: Optional[LLMResponseCache],
+    embedding_store: Optional[EmbeddingStore]
+) -> LLMClient:
+    """Offline client serving recorded fixtures behind the usual failover wrapper"""
+    from .replay import LLMFixtureStore, ReplayLLMClient
+
+    replay_client = ReplayLLMClient(
+        LLMFixtureStore(settings.llm_fixture_path),
+        latency_model=settings.llm_replay_latency_model,
+        latency_ms=settings.llm_replay_latency_ms,
+        latency_sigma=settings.llm_replay_latency_sigma,
+        latency_scale=settings.llm_replay_latency_scale,
+        failure_rate=settings.llm_replay_failure_rate,
+        failure_status_codes=settings.llm_replay_failure_status_codes,
+        miss_policy=settings.llm_replay_miss_policy,
+        seed=settings.llm_replay_seed,
+        response_cache=response_cache,
+        embedding_store=embedding_store
+    )
+
+    # Same wrapper as live mode so caching, single-flight, governance and
+    # token budgets behave as in production
+    return LLMClientWithFailover(replay_client, None, response_cache, embedding_store)
 
 
 # Alias for backward compatibility
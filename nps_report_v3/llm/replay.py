@@ -0,0 +1,310 @@
+"""
+Record/replay LLM clients for deterministic offline benchmarking.
+
+Record mode wraps a live provider client and appends every real
+prompt→response pair (with latency and usage) to a JSONL fixture store.
+Replay mode serves those pairs by prompt hash with simulated latency and
+optional failure injection, so full workflows run without network access.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+from .client import LLMClient, LLMConfig, LLMResponse
+from ..cache.embedding_store import text_hash
+from ..cache.llm_response_cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_hash(prompt: str) -> str:
+    """Hash used to match a prompt against recorded fixtures"""
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+class ReplayMiss(KeyError):
+    """Raised in replay mode when no fixture matches the request"""
+    pass
+
+
+class InjectedLLMError(Exception):
+    """Simulated provider failure; carries a status code like a transport error"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Injected LLM failure (HTTP {status_code})")
+        self.status_code = status_code
+
+
+class LLMFixtureStore:
+    """
+    Append-only JSONL store of recorded LLM interactions.
+
+    Each line is one completion (``kind="completion"``) or one embedding
+    (``kind="embedding"``). Several recordings of the same prompt are served
+    round-robin on replay.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._completions: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._embeddings: Dict[str, List[float]] = {}
+        self._cursor: Dict[str, int] = {}
+
+    def _load(self) -> None:
+        """Read the fixture file once"""
+        if self._completions is not None:
+            return
+
+        self._completions = {}
+        if not self.path.exists():
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("kind") == "embedding":
+                    self._embeddings[record["text_hash"]] = record["embedding"]
+                else:
+                    self._completions.setdefault(record["prompt_hash"], []).append(record)
+
+        logger.info(
+            f"Loaded {sum(len(r) for r in self._completions.values())} completion and "
+            f"{len(self._embeddings)} embedding fixtures from {self.path}"
+        )
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def record_completion(self, prompt: str, response: LLMResponse, provider: str) -> None:
+        """Append a real completion"""
+        record = {
+            "kind": "completion",
+            "prompt_hash": prompt_hash(prompt),
+            "prompt_preview": prompt.strip()[:200],
+            "provider": provider,
+            "model": response.model,
+            "content": response.content,
+            "usage": response.usage,
+            "latency_ms": response.latency_ms,
+            "recorded_at": datetime.utcnow().isoformat()
+        }
+        self._append(record)
+        if self._completions is not None:
+            self._completions.setdefault(record["prompt_hash"], []).append(record)
+
+    def record_embedding(self, text: str, embedding: List[float]) -> None:
+        """Append a real embedding"""
+        record = {
+            "kind": "embedding",
+            "text_hash": text_hash(text),
+            "embedding": list(embedding)
+        }
+        self._append(record)
+        self._embeddings[record["text_hash"]] = record["embedding"]
+
+    def get_completion(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Next recorded completion for ``prompt`` (round-robin), or None"""
+        self._load()
+        key = prompt_hash(prompt)
+        records = self._completions.get(key)
+        if not records:
+            return None
+        cursor = self._cursor.get(key, 0)
+        self._cursor[key] = cursor + 1
+        return records[cursor % len(records)]
+
+    def get_embedding(self, text: str) -> Optional[List[float]]:
+        """Recorded embedding for ``text``, or None"""
+        self._load()
+        return self._embeddings.get(text_hash(text))
+
+    def __len__(self) -> int:
+        self._load()
+        return sum(len(records) for records in self._completions.values())
+
+
+class RecordingLLMClient(LLMClient):
+    """
+    Pass-through client that records real interactions of a live client.
+
+    It reports the wrapped client's ``provider_name`` so cache keys and
+    concurrency limits are unchanged while recording.
+    """
+
+    def __init__(self, inner: LLMClient, store: LLMFixtureStore):
+        super().__init__(inner.config, inner.cache, inner.embedding_store)
+        self.inner = inner
+        self.store = store
+
+    @property
+    def provider_name(self) -> str:
+        return self.inner.provider_name
+
+    async def generate(self, prompt: str, **kwargs) -> LLMResponse:
+        start_time = time.time()
+        response = await self.inner.generate(prompt, **kwargs)
+        if not response.latency_ms:
+            response.latency_ms = int((time.time() - start_time) * 1000)
+        self.store.record_completion(prompt, response, self.inner.provider_name)
+        return response
+
+    async def _stream(self, prompt: str, usage: Dict[str, int], **kwargs) -> AsyncIterator[str]:
+        start_time = time.time()
+        parts: List[str] = []
+        async for delta in self.inner._stream(prompt, usage, **kwargs):
+            parts.append(delta)
+            yield delta
+
+        self.store.record_completion(
+            prompt,
+            LLMResponse(
+                content="".join(parts),
+                model=self.inner.config.model_name,
+                usage=dict(usage),
+                latency_ms=int((time.time() - start_time) * 1000)
+            ),
+            self.inner.provider_name
+        )
+
+    async def embed(self, text: str) -> List[float]:
+        embedding = await self.inner.embed(text)
+        self.store.record_embedding(text, embedding)
+        return embedding
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        embeddings = await self.inner._embed_batch(texts)
+        for text, embedding in zip(texts, embeddings):
+            self.store.record_embedding(text, embedding)
+        return embeddings
+
+
+class ReplayLLMClient(LLMClient):
+    """
+    Offline client serving recorded fixtures.
+
+    Latency models:
+    - ``recorded``: sleep for the recorded latency times ``latency_scale``
+    - ``fixed``: sleep ``latency_ms``
+    - ``lognormal``: median ``latency_ms`` with log-space spread ``latency_sigma``
+    - ``none``: answer immediately
+
+    Misses raise :class:`ReplayMiss` unless ``miss_policy="default"``, which
+    answers with ``default_content`` and a deterministic pseudo-embedding.
+    """
+
+    provider_name = "replay"
+
+    LATENCY_MODELS = ("recorded", "fixed", "lognormal", "none")
+
+    def __init__(
+        self,
+        store: LLMFixtureStore,
+        config: Optional[LLMConfig] = None,
+        latency_model: str = "recorded",
+        latency_ms: float = 1000.0,
+        latency_sigma: float = 0.5,
+        latency_scale: float = 1.0,
+        failure_rate: float = 0.0,
+        failure_status_codes: Optional[List[int]] = None,
+        miss_policy: str = "error",
+        default_content: str = "{}",
+        embedding_dim: int = 1536,
+        seed: Optional[int] = None,
+        **kwargs
+    ):
+        if latency_model not in self.LATENCY_MODELS:
+            raise ValueError(f"Unknown latency model: {latency_model}")
+        if miss_policy not in ("error", "default"):
+            raise ValueError(f"Unknown miss policy: {miss_policy}")
+
+        super().__init__(config or LLMConfig(model_name="replay", api_key="", api_base=""), **kwargs)
+        self.store = store
+        self.latency_model = latency_model
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.latency_scale = latency_scale
+        self.failure_rate = failure_rate
+        self.failure_status_codes = failure_status_codes or [429, 503]
+        self.miss_policy = miss_policy
+        self.default_content = default_content
+        self.embedding_dim = embedding_dim
+        self._random = random.Random(seed)
+        self.replay_stats: Dict[str, int] = {"hits": 0, "misses": 0, "injected_failures": 0}
+
+    def _simulated_latency(self, recorded_ms: Optional[float]) -> float:
+        """Seconds to wait for one simulated call"""
+        if self.latency_model == "none":
+            return 0.0
+        if self.latency_model == "recorded" and recorded_ms is not None:
+            return recorded_ms * self.latency_scale / 1000
+        if self.latency_model == "lognormal":
+            return self._random.lognormvariate(np.log(self.latency_ms), self.latency_sigma) / 1000
+        return self.latency_ms * self.latency_scale / 1000
+
+    async def _simulate_call(self, recorded_ms: Optional[float] = None) -> None:
+        """Apply simulated latency and failure injection"""
+        await asyncio.sleep(self._simulated_latency(recorded_ms))
+
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.replay_stats["injected_failures"] += 1
+            raise InjectedLLMError(self._random.choice(self.failure_status_codes))
+
+    async def generate(self, prompt: str, **kwargs) -> LLMResponse:
+        record = self.store.get_completion(prompt)
+
+        if record is None:
+            self.replay_stats["misses"] += 1
+            if self.miss_policy == "error":
+                raise ReplayMiss(f"No recorded completion for prompt {prompt_hash(prompt)[:12]}")
+            await self._simulate_call()
+            return LLMResponse(
+                content=self.default_content,
+                model=self.config.model_name,
+                usage={'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+                latency_ms=0,
+                metadata={'replayed': False}
+            )
+
+        self.replay_stats["hits"] += 1
+        await self._simulate_call(record.get("latency_ms"))
+        return LLMResponse(
+            content=record["content"],
+            model=record.get("model", self.config.model_name),
+            usage=record.get("usage", {}),
+            latency_ms=0,
+            metadata={'replayed': True, 'provider': record.get("provider")}
+        )
+
+    async def embed(self, text: str) -> List[float]:
+        embedding = self.store.get_embedding(text)
+        if embedding is not None:
+            return embedding
+
+        if self.miss_policy == "error":
+            raise ReplayMiss(f"No recorded embedding for text {text_hash(text)[:12]}")
+
+        # Deterministic unit vector so clustering stays stable across runs
+        rng = np.random.default_rng(int(text_hash(text)[:16], 16))
+        vector = rng.standard_normal(self.embedding_dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        await self._simulate_call()
+        return [await self.embed(text) for text in texts]
@@ -0,0 +1,267 @@
+"""
+Token accounting for NPS V3 API.
+Pre-flight token estimation, per-workflow/per-agent budgets and prompt fitting.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+
+def _char_tokens(ch: str) -> float:
+    """Heuristic cost of one character: CJK is ~1 token, other text ~4 chars per token"""
+    return 1.0 if '\u4e00' <= ch <= '\u9fff' else 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of ``text`` locally.
+
+    Uses tiktoken's cl100k_base encoding when installed, otherwise a
+    character heuristic tuned for mixed Chinese/English survey text.
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return int(sum(_char_tokens(ch) for ch in text) + 0.5)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "…") -> str:
+    """Cut ``text`` so that it fits in ``max_tokens``"""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text)[:max_tokens]) + marker
+
+    cost = 0.0
+    for idx, ch in enumerate(text):
+        cost += _char_tokens(ch)
+        if cost > max_tokens:
+            return text[:idx] + marker
+    return text
+
+
+def fit_prompt(prompt: str, max_tokens: int) -> str:
+    """
+    Fit a whole prompt by dropping its middle.
+
+    Prompts open with the task and close with the output format, with the
+    evidence in between, so the head and tail are kept.
+    """
+    if estimate_tokens(prompt) <= max_tokens:
+        return prompt
+
+    marker = "\n……（内容过长，已省略部分证据）……\n"
+    half = max((max_tokens - estimate_tokens(marker)) // 2, 1)
+    head = truncate_to_tokens(prompt, half, marker="")
+    tail = truncate_to_tokens(prompt[::-1], half, marker="")[::-1]
+    return head + marker + tail
+
+
+def fit_evidence(
+    items: List[str],
+    max_tokens: int,
+    max_items: Optional[int] = None,
+    strategy: str = "sample",
+    render: Callable[[int, str], str] = lambda idx, item: item
+) -> List[str]:
+    """
+    Select evidence items that fit into a token budget.
+
+    Args:
+        items: Candidate evidence (e.g. verbatim comments)
+        max_tokens: Token budget for the rendered evidence block
+        max_items: Optional cap on the number of items
+        strategy: "truncate" keeps the leading items, "sample" keeps evenly
+            spaced items so the selection stays representative of the list
+        render: How an item will appear in the prompt (used for costing)
+
+    Returns:
+        Selected items in their original order; a single over-long item is
+        truncated rather than dropped
+    """
+    if strategy not in ("truncate", "sample"):
+        raise ValueError(f"Unknown evidence fitting strategy: {strategy}")
+
+    items = [item for item in items if item]
+    if not items or max_tokens <= 0:
+        return []
+
+    limit = min(len(items), max_items or len(items))
+
+    def pick(count: int) -> List[str]:
+        if strategy == "truncate" or count >= len(items):
+            return items[:count]
+        step = len(items) / count
+        return [items[int(i * step)] for i in range(count)]
+
+    def cost(selection: List[str]) -> int:
+        # +1 per item for the separating newline
+        return sum(estimate_tokens(render(i, item)) + 1 for i, item in enumerate(selection))
+
+    for count in range(limit, 0, -1):
+        selection = pick(count)
+        if cost(selection) <= max_tokens:
+            return selection
+
+    return [truncate_to_tokens(items[0], max_tokens - 1)]
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a workflow or agent has no token budget left for an LLM call"""
+    pass
+
+
+class TokenBudget:
+    """
+    Token budget for one workflow run, with optional per-agent limits.
+
+    Records estimated prompt tokens before each call and actual usage after
+    it so the workflow result can report both.
+    """
+
+    def __init__(
+        self,
+        workflow_budget: Optional[int] = None,
+        agent_budgets: Optional[Dict[str, int]] = None,
+        default_agent_budget: Optional[int] = None
+    ):
+        self.workflow_budget = workflow_budget
+        self.agent_budgets = dict(agent_budgets or {})
+        self.default_agent_budget = default_agent_budget
+        self._usage: Dict[str, Dict[str, int]] = {}
+
+    def _agent_usage(self, agent_id: str) -> Dict[str, int]:
+        return self._usage.setdefault(agent_id, {
+            "calls": 0,
+            "cached_calls": 0,
+            "fitted_prompts": 0,
+            "estimated_prompt_tokens": 0,
+            "actual_prompt_tokens": 0,
+            "actual_total_tokens": 0
+        })
+
+    def _spent(self, agent_id: Optional[str] = None) -> int:
+        usages = [self._usage.get(agent_id, {})] if agent_id else list(self._usage.values())
+        # Count what was actually used once known, otherwise the estimate
+        return sum(
+            u.get("actual_total_tokens", 0) or u.get("estimated_prompt_tokens", 0)
+            for u in usages
+        )
+
+    def remaining(self, agent_id: Optional[str] = None) -> Optional[int]:
+        """Tokens left for ``agent_id`` (None means unlimited)"""
+        limits = []
+        if self.workflow_budget is not None:
+            limits.append(self.workflow_budget - self._spent())
+
+        agent_budget = self.agent_budgets.get(agent_id, self.default_agent_budget) if agent_id else None
+        if agent_budget is not None:
+            limits.append(agent_budget - self._spent(agent_id))
+
+        return min(limits) if limits else None
+
+    def record_estimate(self, agent_id: str, estimated_tokens: int, fitted: bool = False) -> None:
+        usage = self._agent_usage(agent_id)
+        usage["calls"] += 1
+        usage["estimated_prompt_tokens"] += estimated_tokens
+        if fitted:
+            usage["fitted_prompts"] += 1
+
+    def record_actual(self, agent_id: str, usage_tokens: Dict[str, int], cached: bool = False) -> None:
+        usage = self._agent_usage(agent_id)
+        if cached:
+            usage["cached_calls"] += 1
+            return
+        usage["actual_prompt_tokens"] += usage_tokens.get("prompt_tokens", 0)
+        usage["actual_total_tokens"] += usage_tokens.get("total_tokens", 0)
+
+    def report(self) -> Dict[str, Any]:
+        """Estimated vs. actual usage per agent and for the whole workflow"""
+        totals = {
+            key: sum(u[key] for u in self._usage.values())
+            for key in (
+                "calls", "cached_calls", "fitted_prompts",
+                "estimated_prompt_tokens", "actual_prompt_tokens", "actual_total_tokens"
+            )
+        }
+        estimated = totals["estimated_prompt_tokens"]
+        totals["estimate_accuracy"] = (
+            round(totals["actual_prompt_tokens"] / estimated, 3) if estimated else None
+        )
+        totals["workflow_budget"] = self.workflow_budget
+        totals["remaining"] = self.remaining()
+
+        return {
+            "estimator": "tiktoken" if TIKTOKEN_AVAILABLE else "heuristic",
+            "workflow": totals,
+            "agents": {agent_id: dict(u) for agent_id, u in sorted(self._usage.items())}
+        }
+
+
+_current_budget: ContextVar[Optional[TokenBudget]] = ContextVar("token_budget", default=None)
+_current_agent: ContextVar[Optional[str]] = ContextVar("token_agent", default=None)
+
+
+def get_current_budget() -> Optional[TokenBudget]:
+    """Budget of the workflow running in the current context, if any"""
+    return _current_budget.get()
+
+
+def get_current_agent() -> Optional[str]:
+    """Agent running in the current context, if any"""
+    return _current_agent.get()
+
+
+@contextmanager
+def use_token_budget(budget: TokenBudget) -> Iterator[TokenBudget]:
+    """Make ``budget`` the active workflow budget for LLM calls in this context"""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+@contextmanager
+def agent_token_scope(agent_id: str) -> Iterator[None]:
+    """Attribute LLM calls in this context to ``agent_id``"""
+    token = _current_agent.set(agent_id)
+    try:
+        yield
+    finally:
+        _current_agent.reset(token)
+
+
+def get_evidence_token_budget() -> int:
+    """Token budget for survey evidence inside a single prompt"""
+    from ..config import get_settings
+
+    return get_settings().llm_evidence_token_budget
+
+
+def create_token_budget() -> TokenBudget:
+    """Build a workflow budget from settings"""
+    from ..config import get_settings
+
+    settings = get_settings()
+    return TokenBudget(
+        workflow_budget=settings.token_budget_per_workflow,
+        agent_budgets=settings.token_budget_per_agent,
+        default_agent_budget=settings.token_budget_default_agent
+    )
@@ -0,0 +1,180 @@
+"""
+Shared HTTP transport for NPS V3 API.
+One process-wide set of pooled connections for every LLM call site, so
+agents and legacy v1/v2 clients reuse keep-alive (and HTTP/2) connections
+instead of paying fresh TCP+TLS handshakes per client instance.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+H2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class HTTPTransport:
+    """
+    Pooled httpx clients shared across the process.
+
+    Async clients are bound to the event loop they were created on, so one
+    is kept per running loop; blocking call sites share a single thread-safe
+    sync client with the same limits.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        connect_timeout: float = 10.0,
+        timeout: float = 60.0
+    ):
+        """
+        Initialize transport.
+
+        Args:
+            max_connections: Maximum open connections per client
+            max_keepalive_connections: Idle connections kept for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Negotiate HTTP/2 where the server and h2 package allow it
+            connect_timeout: Connection establishment timeout in seconds
+            timeout: Default read/write/pool timeout in seconds
+        """
+        if http2 and not H2_AVAILABLE:
+            logger.info("h2 package not installed, shared HTTP transport uses HTTP/1.1")
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and H2_AVAILABLE
+
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._detached_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """Pooled async client for the running event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._lock:
+            if loop is None:
+                if self._detached_client is None or self._detached_client.is_closed:
+                    self._detached_client = self._new_async_client()
+                return self._detached_client
+
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._new_async_client()
+                self._async_clients[loop] = client
+            return client
+
+    def get_sync_client(self) -> httpx.Client:
+        """Pooled blocking client shared by thread-based call sites"""
+        with self._lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                self._sync_client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2
+                )
+            return self._sync_client
+
+    def _new_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=self.http2
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled connections (call on application shutdown)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._lock:
+            current = self._async_clients.pop(loop, None) if loop is not None else None
+            # Clients of other loops cannot be awaited from here; dropping them
+            # lets their connections close with the loop that owns them
+            self._async_clients.clear()
+            detached, self._detached_client = self._detached_client, None
+            sync_client, self._sync_client = self._sync_client, None
+
+        for client in (current, detached):
+            if client is not None and not client.is_closed:
+                await client.aclose()
+
+        if sync_client is not None:
+            sync_client.close()
+
+        logger.info("Shared HTTP transport closed")
+
+    def close(self) -> None:
+        """Close the blocking client (for processes without an event loop)"""
+        with self._lock:
+            sync_client, self._sync_client = self._sync_client, None
+        if sync_client is not None:
+            sync_client.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Pool configuration and open clients"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "async_clients": len(self._async_clients) + (1 if self._detached_client else 0),
+            "sync_client_open": self._sync_client is not None and not self._sync_client.is_closed
+        }
+
+
+# Global transport instance
+_http_transport: Optional[HTTPTransport] = None
+
+
+def get_http_transport() -> HTTPTransport:
+    """Get the process-wide HTTP transport"""
+    global _http_transport
+
+    if _http_transport is None:
+        settings = get_settings()
+        _http_transport = HTTPTransport(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+            http2=settings.http_enable_http2,
+            connect_timeout=settings.http_connect_timeout,
+            timeout=settings.llm_timeout
+        )
+
+    return _http_transport
+
+
+async def close_http_transport() -> None:
+    """Close the process-wide transport if it was ever opened"""
+    global _http_transport
+
+    if _http_transport is not None:
+        await _http_transport.aclose()
+        _http_transport = None
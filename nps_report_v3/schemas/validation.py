@@ -179,6 +179,11 @@ class NPSAnalysisRequest(BaseModel):
         None,
         description="Custom checkpoint directory"
     )
+    deadline_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Time budget for the whole analysis (server default if omitted)"
+    )
 
     @validator("survey_responses")
     def validate_responses(cls, v):
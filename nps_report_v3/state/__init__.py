@@ -34,6 +34,9 @@ from .state_definition import (
     merge_states,
     get_phase_agents
 )
+from .layered_state import LayeredState, StateView
+from .response_store import ColumnarResponseStore
+from .nps_cube import NPSCube
 
 __all__ = [
     # Enums
@@ -65,5 +68,15 @@ __all__ = [
     "create_initial_state",
     "validate_state",
     "merge_states",
-    "get_phase_agents"
+    "get_phase_agents",
+
+    # Layered state
+    "LayeredState",
+    "StateView",
+
+    # Spilled responses
+    "ColumnarResponseStore",
+
+    # Aggregates
+    "NPSCube"
 ]
\ No newline at end of file
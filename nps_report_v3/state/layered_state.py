@@ -0,0 +1,154 @@
+"""
+Copy-free layered workflow state for NPS V3 API.
+
+Agent results are committed as namespaces instead of being merged into a
+fresh copy of the whole state after every agent. Agents and pass snapshots
+(``pass1_foundation``/``pass2_analysis``) receive read-only views that
+resolve keys against the layers that existed when the view was taken.
+"""
+
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+class StateView(Mapping):
+    """
+    Read-only snapshot of a :class:`LayeredState`.
+
+    Only the key -> owning layer index is copied; values are shared with the
+    state. Layers are never mutated after commit, so a view keeps returning
+    the values it was taken with.
+    """
+
+    __slots__ = ("_owners",)
+
+    def __init__(self, owners: Dict[str, Mapping]):
+        self._owners = owners
+
+    def __getitem__(self, key: str) -> Any:
+        return self._owners[key][key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._owners)
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._owners
+
+    def __repr__(self) -> str:
+        return f"StateView({sorted(self._owners)})"
+
+    def extend(self, **items: Any) -> "StateView":
+        """New view with ``items`` layered on top (this view is unchanged)"""
+        owners = dict(self._owners)
+        owners.update(dict.fromkeys(items, items))
+        return StateView(owners)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow plain-dict copy, e.g. for serialization"""
+        return {key: owner[key] for key, owner in self._owners.items()}
+
+
+class LayeredState(MutableMapping):
+    """
+    Namespaced, append-only workflow state.
+
+    ``commit(agent_id, data)`` adopts an agent's output dict as that agent's
+    namespace (no copy); later namespaces shadow earlier ones key by key,
+    exactly like the former ``{**state, **result.data}`` merge. Orchestrator
+    writes go to a base layer that is copied on write while views share it.
+    Keys in ``protected`` that already exist are never overwritten by agents.
+    """
+
+    def __init__(self, initial: Optional[Mapping] = None, protected: Iterable[str] = ()):
+        self._base: Dict[str, Any] = dict(initial or {})
+        self._base_shared = False
+        self._namespaces: Dict[str, Mapping] = {}
+        self._owners: Dict[str, Mapping] = dict.fromkeys(self._base, self._base)
+        self.protected = frozenset(protected)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._owners[key][key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._base_shared:
+            self._unshare_base()
+        self._base[key] = value
+        self._owners[key] = self._base
+
+    def __delitem__(self, key: str) -> None:
+        del self._owners[key]
+        if key in self._base:
+            if self._base_shared:
+                self._unshare_base()
+            del self._base[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._owners)
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._owners
+
+    def __repr__(self) -> str:
+        return f"LayeredState(namespaces={list(self._namespaces)}, keys={len(self._owners)})"
+
+    def _unshare_base(self) -> None:
+        """Give the base layer a private copy before writing (views keep the old one)"""
+        old_base = self._base
+        self._base = dict(old_base)
+        for key, owner in self._owners.items():
+            if owner is old_base:
+                self._owners[key] = self._base
+        self._base_shared = False
+
+    @property
+    def namespaces(self) -> Dict[str, Mapping]:
+        """Committed agent outputs by agent id (read-only use)"""
+        return self._namespaces
+
+    def commit(self, namespace: str, data: Mapping) -> None:
+        """
+        Add an agent's output as its namespace.
+
+        Re-committing a namespace (e.g. after a retry) replaces it; keys the
+        new output no longer contains fall back to earlier layers.
+        """
+        if namespace in self._namespaces:
+            self._namespaces.pop(namespace)
+            self._reindex()
+
+        self._namespaces[namespace] = data
+        for key in data:
+            if key in self.protected and key in self._owners:
+                continue
+            self._owners[key] = data
+
+    def _reindex(self) -> None:
+        """Rebuild the key index from base and namespaces in commit order"""
+        owners: Dict[str, Mapping] = {}
+        for data in self._namespaces.values():
+            for key in data:
+                owners[key] = data
+        for key in self._base:
+            # Base values win where they already did (protected or written after a commit)
+            if key not in owners or key in self.protected or self._owners.get(key) is self._base:
+                owners[key] = self._base
+        self._owners = owners
+
+    def view(self, exclude: Iterable[str] = ()) -> StateView:
+        """Read-only snapshot of the current state without ``exclude`` keys"""
+        excluded = set(exclude)
+        self._base_shared = True
+        return StateView({key: owner for key, owner in self._owners.items() if key not in excluded})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flatten into a plain dict (views are flattened too)"""
+        return {
+            key: value.to_dict() if isinstance(value, StateView) else value
+            for key, value in ((key, owner[key]) for key, owner in self._owners.items())
+        }
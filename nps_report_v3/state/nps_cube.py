@@ -0,0 +1,331 @@
+"""
+Mergeable NPS aggregate cube for NPS V3 API.
+
+An :class:`NPSCube` keeps one histogram of the eleven NPS scores per
+(product line, channel, customer segment, day) cell. Histograms add, so
+surveys are folded in incrementally and cubes built by different runs or
+workers merge by summing. Any roll-up (by product, by week, trailing 90
+days) is answered from the cells alone, without touching responses.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Number of distinct NPS scores (0-10)
+NPS_SCORES = 11
+
+# Categorical dimensions of a cell, in key order; the fourth key is the day
+CUBE_DIMENSIONS = ("product_line", "channel", "customer_segment")
+
+# Time buckets a roll-up can group days by
+TIME_BUCKETS = ("day", "week", "month")
+
+# Day of responses without a timestamp
+NO_DAY = -1
+
+CellKey = Tuple[Optional[str], Optional[str], Optional[str], int]
+
+
+def day_numbers(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Local calendar day (``date.toordinal()``) of each epoch timestamp, NO_DAY if NaN.
+
+    Only distinct 15-minute buckets are converted in Python, so this stays
+    cheap for large surveys while honouring the local UTC offset.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    days = np.full(len(timestamps), NO_DAY, dtype=np.int32)
+    timed = ~np.isnan(timestamps)
+    if not timed.any():
+        return days
+
+    buckets, inverse = np.unique(timestamps[timed] // 900, return_inverse=True)
+    ordinals = [datetime.fromtimestamp(bucket * 900).toordinal() for bucket in buckets.tolist()]
+    days[timed] = np.asarray(ordinals, dtype=np.int32)[inverse.reshape(-1)]
+    return days
+
+
+def bucket_start(day: int, bucket: str) -> int:
+    """First day (ordinal) of the day/week/month containing ``day``"""
+    if day == NO_DAY or bucket == "day":
+        return day
+    value = date.fromordinal(day)
+    if bucket == "week":
+        return (value - timedelta(days=value.weekday())).toordinal()
+    return value.replace(day=1).toordinal()
+
+
+def bucket_label(day: int, bucket: str) -> Optional[str]:
+    """ISO label of a bucket start: "2024-01-15" for days and weeks, "2024-01" for months"""
+    if day == NO_DAY:
+        return None
+    value = date.fromordinal(day)
+    return value.strftime("%Y-%m") if bucket == "month" else value.isoformat()
+
+
+def summarize(counts: np.ndarray) -> Dict[str, Any]:
+    """NPS, response count and category counts/percentages of one score histogram"""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    promoters = int(counts[9:].sum())
+    passives = int(counts[7:9].sum())
+    detractors = int(counts[:7].sum())
+    share = 100 / total if total else 0
+
+    return {
+        "nps": round((promoters - detractors) * share, 1),
+        "count": total,
+        "promoters": promoters,
+        "passives": passives,
+        "detractors": detractors,
+        "promoters_percentage": round(promoters * share, 1),
+        "passives_percentage": round(passives * share, 1),
+        "detractors_percentage": round(detractors * share, 1)
+    }
+
+
+def _ordinal(value: Union[date, str, int]) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+
+class NPSCube:
+    """
+    Score histograms per (product_line, channel, customer_segment, day).
+
+    Dimension values are dictionary-encoded like the columns of a
+    :class:`ColumnarResponseStore`; missing values and missing days are
+    cells of their own, so totals always cover every response.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, List[str]] = {name: [] for name in CUBE_DIMENSIONS}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in CUBE_DIMENSIONS}
+        self._cells: Dict[Tuple[int, int, int, int], int] = {}
+        self._keys = np.empty((0, len(CUBE_DIMENSIONS) + 1), dtype=np.int32)
+        self._counts = np.empty((0, NPS_SCORES), dtype=np.int64)
+
+    @classmethod
+    def from_columns(
+        cls,
+        scores: np.ndarray,
+        groups: Dict[str, Tuple[np.ndarray, List[str]]],
+        timestamps: np.ndarray
+    ) -> "NPSCube":
+        """Cube of one survey given as score, segment code and timestamp columns"""
+        cube = cls()
+        cube.add_columns(scores, groups, timestamps)
+        return cube
+
+    # Folding in
+
+    def add_columns(
+        self,
+        scores: np.ndarray,
+        groups: Dict[str, Tuple[np.ndarray, List[str]]],
+        timestamps: np.ndarray
+    ) -> None:
+        """
+        Fold responses into the cube.
+
+        Args:
+            scores: NPS scores (0-10)
+            groups: Dimension -> (code per response, -1 if missing; values the codes index).
+                Dimensions that are absent count as missing.
+            timestamps: Epoch timestamps (NaN if missing)
+        """
+        scores = np.asarray(scores, dtype=np.int64)
+        if len(scores) == 0:
+            return
+
+        # Response codes translated into this cube's dictionaries (+1, so missing is 0)
+        columns = []
+        for name in CUBE_DIMENSIONS:
+            codes, values = groups.get(name) or (np.full(len(scores), -1, dtype=np.int32), [])
+            translation = np.array([0] + [self._encode(name, value) + 1 for value in values], dtype=np.int64)
+            columns.append(translation[np.asarray(codes, dtype=np.int64) + 1])
+
+        days = day_numbers(timestamps).astype(np.int64)
+        first_day = int(days.min())
+        columns.append(days - first_day)
+
+        # One mixed-radix key per cell, then one bincount over key * 11 + score
+        radices = [len(self._values[name]) + 1 for name in CUBE_DIMENSIONS] + [int(columns[-1].max()) + 1]
+        packed = np.zeros(len(scores), dtype=np.int64)
+        for column, radix in zip(columns, radices):
+            packed = packed * radix + column
+
+        cells, inverse = np.unique(packed, return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1) * NPS_SCORES + scores, minlength=len(cells) * NPS_SCORES)
+
+        keys = np.empty((len(cells), len(radices)), dtype=np.int64)
+        for position in range(len(radices) - 1, -1, -1):
+            cells, keys[:, position] = np.divmod(cells, radices[position])
+        keys[:, :-1] -= 1
+        keys[:, -1] += first_day
+
+        self._fold(keys, counts.reshape(-1, NPS_SCORES))
+
+    def add_cells(self, keys: Sequence[CellKey], counts: np.ndarray) -> None:
+        """Fold histograms of cells given by (product_line, channel, customer_segment, day) keys"""
+        if not len(keys):
+            return
+        encoded = np.array(
+            [
+                [self._encode(name, value) for name, value in zip(CUBE_DIMENSIONS, key[:-1])] + [key[-1]]
+                for key in keys
+            ],
+            dtype=np.int64
+        )
+        self._fold(encoded, np.asarray(counts, dtype=np.int64).reshape(-1, NPS_SCORES))
+
+    def merge(self, other: "NPSCube") -> "NPSCube":
+        """Add the histograms of ``other`` to this cube"""
+        self.add_cells(other.keys(), other.counts)
+        return self
+
+    def _encode(self, name: str, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[name])
+            self._values[name].append(value)
+        return code
+
+    def _fold(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        rows = np.empty(len(keys), dtype=np.int64)
+        new_keys = []
+
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            row = self._cells.get(key)
+            if row is None:
+                row = self._cells[key] = len(self._cells)
+                new_keys.append(key)
+            rows[i] = row
+
+        if new_keys:
+            self._keys = np.concatenate([self._keys, np.array(new_keys, dtype=np.int32)])
+            self._counts = np.concatenate([self._counts, np.zeros((len(new_keys), NPS_SCORES), dtype=np.int64)])
+
+        np.add.at(self._counts, rows, counts)
+
+    # Reading
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Score histograms of shape (cells, 11), in the order of :meth:`keys`"""
+        return self._counts
+
+    @property
+    def total(self) -> np.ndarray:
+        """Score histogram over every response"""
+        return self._counts.sum(0)
+
+    @property
+    def responses(self) -> int:
+        """Number of responses folded in"""
+        return int(self._counts.sum())
+
+    def keys(self) -> List[CellKey]:
+        """(product_line, channel, customer_segment, day ordinal) of every cell"""
+        return [
+            tuple(self._decode(name, code) for name, code in zip(CUBE_DIMENSIONS, key[:-1])) + (key[-1],)
+            for key in self._keys.tolist()
+        ]
+
+    def days(self) -> Tuple[Optional[date], Optional[date]]:
+        """First and last day with responses (None if no response has a timestamp)"""
+        days = self._keys[:, -1][self._keys[:, -1] != NO_DAY]
+        if len(days) == 0:
+            return None, None
+        return date.fromordinal(int(days.min())), date.fromordinal(int(days.max()))
+
+    def rollup(
+        self,
+        by: Union[str, Sequence[str]] = (),
+        since: Optional[Union[date, str]] = None,
+        until: Optional[Union[date, str]] = None,
+        last_days: Optional[int] = None,
+        **filters: Any
+    ) -> Dict[Any, np.ndarray]:
+        """
+        Sum cell histograms into groups.
+
+        Args:
+            by: Dimensions and/or one time bucket ("day", "week", "month") to group by
+            since: First day to include (inclusive)
+            until: Last day to include (inclusive)
+            last_days: Trailing window ending at ``until`` (or at the latest day in the cube)
+            **filters: Dimension -> value or collection of values to keep (None keeps missing)
+
+        Returns:
+            Group label (a tuple when grouping by several keys, () when not
+            grouping) -> score histogram. Missing values and days label as None.
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        for name in [*by, *filters]:
+            if name not in CUBE_DIMENSIONS and (name not in TIME_BUCKETS or name in filters):
+                raise ValueError(f"Unknown cube dimension: {name}")
+
+        mask = np.ones(len(self._keys), dtype=bool)
+        for name, wanted in filters.items():
+            wanted = [wanted] if wanted is None or isinstance(wanted, str) else list(wanted)
+            codes = [self._codes[name].get(value, -2) if value else -1 for value in wanted]
+            mask &= np.isin(self._keys[:, CUBE_DIMENSIONS.index(name)], codes)
+
+        days = self._keys[:, -1]
+        if since is not None:
+            mask &= days >= _ordinal(since)
+        if until is not None:
+            mask &= (days != NO_DAY) & (days <= _ordinal(until))
+        if last_days is not None:
+            timed = days[mask & (days != NO_DAY)]
+            end = _ordinal(until) if until is not None else (int(timed.max()) if len(timed) else 0)
+            mask &= (days != NO_DAY) & (days > end - last_days) & (days <= end)
+
+        keys = self._keys[mask]
+        counts = self._counts[mask]
+        if not by:
+            return {(): counts.sum(0)}
+        if len(keys) == 0:
+            return {}
+
+        columns = []
+        for name in by:
+            if name in CUBE_DIMENSIONS:
+                columns.append(keys[:, CUBE_DIMENSIONS.index(name)])
+            else:
+                distinct, inverse = np.unique(keys[:, -1], return_inverse=True)
+                starts = np.array([bucket_start(day, name) for day in distinct.tolist()], dtype=np.int32)
+                columns.append(starts[inverse.reshape(-1)])
+
+        groups, inverse = np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)
+        sums = np.zeros((len(groups), NPS_SCORES), dtype=np.int64)
+        np.add.at(sums, inverse.reshape(-1), counts)
+
+        result = {}
+        for group, histogram in zip(groups.tolist(), sums):
+            label = tuple(
+                self._decode(name, code) if name in CUBE_DIMENSIONS else bucket_label(code, name)
+                for name, code in zip(by, group)
+            )
+            result[label if len(by) > 1 else label[0]] = histogram
+        return result
+
+    def _decode(self, name: str, code: int) -> Optional[str]:
+        return self._values[name][code] if code >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __repr__(self) -> str:
+        return f"NPSCube(cells={len(self)}, responses={self.responses})"
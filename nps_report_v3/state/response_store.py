@@ -0,0 +1,319 @@
+"""
+On-disk columnar store of cleaned survey responses for NPS V3 API.
+
+Streaming ingestion spills each cleaned chunk to one file per column
+instead of keeping a list of response dicts in the workflow state.
+Downstream agents iterate the store chunk by chunk or read single columns
+(``nps_score`` as an int8 array, segments as dictionary codes), so memory
+stays flat as surveys grow.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Fixed-width columns and their dtypes; a timestamp is epoch seconds (NaN if missing)
+NUMERIC_COLUMNS = {"nps_score": np.int8, "timestamp": np.float64}
+
+# Low-cardinality strings stored as int32 codes into a dictionary (-1 if missing)
+CATEGORY_COLUMNS = ("product_line", "customer_segment", "channel")
+
+# Free text stored as one UTF-8 blob plus int64 end offsets per row
+TEXT_COLUMNS = ("response_id", "comment", "metadata")
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ColumnarResponseStore:
+    """
+    Append-only columnar file of :class:`SurveyResponse` rows.
+
+    Rows are appended chunk by chunk, then :meth:`seal` makes the store
+    readable. A sealed store behaves like a read-only sequence of response
+    dicts and also exposes whole columns. The directory is removed when the
+    store that created it is closed or garbage collected; copies unpickled
+    from checkpoints only reference it.
+    """
+
+    def __init__(self, directory: Union[str, Path], owner: bool = False):
+        self.directory = Path(directory)
+        self._rows = 0
+        self._sealed = False
+        self._categories: Dict[str, List[str]] = {name: [] for name in CATEGORY_COLUMNS}
+        self._category_codes: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORY_COLUMNS}
+        self._text_sizes: Dict[str, int] = dict.fromkeys(TEXT_COLUMNS, 0)
+        self._hasher = hashlib.sha256()
+        self._digest: Optional[str] = None
+        self._files: Dict[str, Any] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.directory), True) if owner else None
+
+    @classmethod
+    def create(cls, spill_dir: Optional[str] = None) -> "ColumnarResponseStore":
+        """New empty store in a fresh directory under ``spill_dir`` (system temp dir if None)"""
+        if spill_dir:
+            Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        return cls(tempfile.mkdtemp(prefix="nps_responses_", dir=spill_dir), owner=True)
+
+    @classmethod
+    def open(cls, directory: Union[str, Path]) -> "ColumnarResponseStore":
+        """Reference a sealed store written earlier (the directory is not removed)"""
+        store = cls(directory)
+        store._load_manifest()
+        return store
+
+    # Writing
+
+    def append(self, responses: Sequence[Dict[str, Any]]) -> None:
+        """Append one chunk of cleaned responses"""
+        if self._sealed:
+            raise RuntimeError("Cannot append to a sealed response store")
+        if not responses:
+            return
+
+        columns = {
+            "nps_score": np.array([r["nps_score"] for r in responses], dtype=np.int8),
+            "timestamp": np.array([_epoch(r.get("timestamp")) for r in responses], dtype=np.float64)
+        }
+        for name in CATEGORY_COLUMNS:
+            columns[name] = np.array([self._encode_category(name, r.get(name)) for r in responses], dtype=np.int32)
+
+        for name, array in columns.items():
+            self._write(f"{name}.bin", array.tobytes())
+
+        for name in TEXT_COLUMNS:
+            encoded = [_encode_text(name, r.get(name)) for r in responses]
+            ends = np.cumsum([len(value) for value in encoded], dtype=np.int64) + self._text_sizes[name]
+            blob = b"".join(encoded)
+            self._write(f"{name}.txt", blob)
+            self._write(f"{name}.off", ends.tobytes())
+            self._text_sizes[name] += len(blob)
+
+        self._rows += len(responses)
+
+    def seal(self) -> "ColumnarResponseStore":
+        """Finish writing and make the store readable"""
+        if self._sealed:
+            return self
+
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+
+        # Columns of an empty store still exist, so readers need no special case
+        for name in [*NUMERIC_COLUMNS, *CATEGORY_COLUMNS]:
+            (self.directory / f"{name}.bin").touch()
+        for name in TEXT_COLUMNS:
+            (self.directory / f"{name}.txt").touch()
+            (self.directory / f"{name}.off").touch()
+
+        manifest = {
+            "rows": self._rows,
+            "categories": self._categories,
+            "digest": self.digest
+        }
+        with open(self.directory / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        self._digest = self._hasher.hexdigest()
+        self._sealed = True
+        return self
+
+    def close(self) -> None:
+        """Release the store; an owning store also deletes its directory"""
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        self._columns.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def _write(self, filename: str, data: bytes) -> None:
+        handle = self._files.get(filename)
+        if handle is None:
+            handle = self._files[filename] = open(self.directory / filename, "ab")
+        handle.write(data)
+        self._hasher.update(filename.encode("utf-8"))
+        self._hasher.update(data)
+
+    def _encode_category(self, name: str, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        codes = self._category_codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._categories[name])
+            self._categories[name].append(value)
+        return code
+
+    def _load_manifest(self) -> None:
+        with open(self.directory / MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._rows = manifest["rows"]
+        self._categories = manifest["categories"]
+        self._category_codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self._categories.items()
+        }
+        self._digest = manifest["digest"]
+        self._sealed = True
+
+    # Reading
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 over the stored bytes, stable for identical content"""
+        return self._digest or self._hasher.hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the column files on disk"""
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+    def column(self, name: str) -> Union[np.ndarray, List[Any]]:
+        """
+        Whole column: an array for ``nps_score``/``timestamp``, values
+        for category and text columns (text columns load every row).
+        """
+        if name in NUMERIC_COLUMNS or name in CATEGORY_COLUMNS:
+            array = self._array(f"{name}.bin", NUMERIC_COLUMNS.get(name, np.int32))
+            if name in NUMERIC_COLUMNS:
+                return array
+            return self._decode_categories(name, array)
+        if name in TEXT_COLUMNS:
+            return self._read_text(name, 0, self._rows)
+        raise KeyError(name)
+
+    def codes(self, name: str) -> Tuple[np.ndarray, List[str]]:
+        """Dictionary codes (-1 if missing) and the values they index for a category column"""
+        if name not in CATEGORY_COLUMNS:
+            raise KeyError(name)
+        return self._array(f"{name}.bin", np.int32), list(self._categories[name])
+
+    def iter_chunks(self, chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """Response dicts in chunks of ``chunk_size`` rows"""
+        for start in range(0, self._rows, chunk_size):
+            yield self._read_rows(start, min(start + chunk_size, self._rows))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._rows)
+            rows = self._read_rows(start, stop) if stop > start else []
+            return rows[::step] if step != 1 else rows
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("response store index out of range")
+        return self._read_rows(index, index + 1)[0]
+
+    def __repr__(self) -> str:
+        # Also the agent result cache key of the state slice holding the store
+        return f"ColumnarResponseStore(rows={self._rows}, digest={self.digest})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if not self._sealed:
+            raise TypeError("Cannot pickle a response store that is still being written")
+        return {"directory": str(self.directory)}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["directory"])
+        self._load_manifest()
+
+    def _require_sealed(self) -> None:
+        if not self._sealed:
+            raise RuntimeError("Response store must be sealed before reading")
+
+    def _array(self, filename: str, dtype: Any) -> np.ndarray:
+        self._require_sealed()
+        array = self._columns.get(filename)
+        if array is None:
+            if self._rows:
+                # Plain read-only view of the mapping (pickles as a regular array)
+                array = np.asarray(np.memmap(self.directory / filename, dtype=dtype, mode="r"))
+            else:
+                array = np.empty(0, dtype=dtype)
+            self._columns[filename] = array
+        return array
+
+    def _decode_categories(self, name: str, codes: np.ndarray) -> List[Optional[str]]:
+        values = self._categories[name]
+        return [values[code] if code >= 0 else None for code in codes.tolist()]
+
+    def _read_text(self, name: str, start: int, stop: int) -> List[Any]:
+        ends = self._array(f"{name}.off", np.int64)[start:stop].tolist()
+        if not ends:
+            return []
+        begin = int(self._array(f"{name}.off", np.int64)[start - 1]) if start else 0
+
+        with open(self.directory / f"{name}.txt", "rb") as f:
+            f.seek(begin)
+            blob = f.read(ends[-1] - begin)
+
+        values = []
+        offset = 0
+        for end in ends:
+            values.append(_decode_text(name, blob[offset:end - begin]))
+            offset = end - begin
+        return values
+
+    def _read_rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        scores = self._array("nps_score.bin", np.int8)[start:stop].tolist()
+        timestamps = self._array("timestamp.bin", np.float64)[start:stop].tolist()
+        categories = {
+            name: self._decode_categories(name, self._array(f"{name}.bin", np.int32)[start:stop])
+            for name in CATEGORY_COLUMNS
+        }
+        texts = {name: self._read_text(name, start, stop) for name in TEXT_COLUMNS}
+
+        return [
+            {
+                "response_id": texts["response_id"][i],
+                "timestamp": datetime.fromtimestamp(timestamps[i]) if timestamps[i] == timestamps[i] else None,
+                "nps_score": scores[i],
+                "comment": texts["comment"][i],
+                "product_line": categories["product_line"][i],
+                "customer_segment": categories["customer_segment"][i],
+                "channel": categories["channel"][i],
+                "metadata": texts["metadata"][i]
+            }
+            for i in range(stop - start)
+        ]
+
+
+def _epoch(value: Any) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float("nan")
+
+
+def _encode_text(name: str, value: Any) -> bytes:
+    if name == "metadata":
+        return json.dumps(value or {}, ensure_ascii=False, default=str).encode("utf-8")
+    return str(value).encode("utf-8") if value else b""
+
+
+def _decode_text(name: str, data: bytes) -> Any:
+    if name == "metadata":
+        return json.loads(data)
+    # Cleaned comments are never empty strings, so empty reads back as missing
+    return data.decode("utf-8") if data else None
+
+
+def response_column(responses: Union[ColumnarResponseStore, Sequence[Dict[str, Any]]], name: str) -> Any:
+    """Column ``name`` of a response store or of a list of response dicts"""
+    if isinstance(responses, ColumnarResponseStore):
+        return responses.column(name)
+    return [response.get(name) for response in responses]
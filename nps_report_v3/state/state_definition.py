@@ -62,7 +62,7 @@ class CleanedData(TypedDict):
     total_responses: int
     valid_responses: int
     invalid_responses: int
-    cleaned_responses: List[SurveyResponse]
+    cleaned_responses: List[SurveyResponse]  # or a ColumnarResponseStore when streamed
     data_quality: DataQuality
     cleaning_notes: List[str]
     pii_scrubbed: bool
@@ -229,6 +229,7 @@ class NPSAnalysisState(TypedDict, total=False):
 
     # Input data
     raw_data: List[Dict[str, Any]]
+    raw_data_source: Optional[Any]  # SurveySource read in chunks instead of raw_data
     input_metadata: Dict[str, Any]
 
     # Foundation Pass outputs (A0-A3)
@@ -275,6 +276,13 @@ class NPSAnalysisState(TypedDict, total=False):
     # Performance metrics
     total_tokens_used: int
     total_llm_calls: int
+    token_usage: Optional[Dict[str, Any]]  # Estimated vs. actual LLM tokens per agent
+    schedule_timings: Optional[Dict[str, Any]]  # Per-pass agent timings and critical path
+    agent_cache_report: Optional[Dict[str, Any]]  # Per-agent memoization hit/miss and saved time
+    agent_construction: Optional[Dict[str, Any]]  # Per-agent instance acquisition time in this run
+    deadline_report: Optional[Dict[str, Any]]  # Request time budget, per-pass budgets and degraded agents
+    agent_retry_report: Optional[Dict[str, Any]]  # Per-agent attempts, step retries, reused and wasted work
+    speculation_report: Optional[Dict[str, Any]]  # C1-C4 started ahead of B9: reused vs rerun agents
     total_processing_time_ms: int
     memory_peak_mb: float
 
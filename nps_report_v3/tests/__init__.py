@@ -67,10 +67,11 @@ CI/CD Integration:
 import sys
 from pathlib import Path
 
-# Add project root to path for imports
+# Add project root to path for imports (appended, so nps_report_v3/logging
+# cannot shadow the stdlib module in spawned CPU worker processes)
 project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
-    sys.path.insert(0, str(project_root))
+    sys.path.append(str(project_root))
 
 # Test suite metadata
 __version__ = "3.0.0"
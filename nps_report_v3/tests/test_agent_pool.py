@@ -0,0 +1,104 @@
+"""Unit tests for the warm agent pool"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus, BaseAgent
+from nps_report_v3.agents.factory import AgentFactory
+from nps_report_v3.agents.pool import AgentPool
+
+
+class EchoAgent(BaseAgent):
+    """Agent counting constructions"""
+
+    constructed = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        EchoAgent.constructed += 1
+
+    async def process(self, state):
+        await asyncio.sleep(0.01)
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data={"echo": state["value"]})
+
+
+@pytest.fixture
+def pool():
+    pool = AgentPool()
+    with patch("nps_report_v3.agents.factory.get_agent_pool", return_value=pool):
+        yield pool
+
+
+def make_factory():
+    factory = AgentFactory(use_pool=True)
+    factory.register_custom_agent("X1", EchoAgent)
+    return factory
+
+
+class TestAgentPool:
+    """Test warm reuse, isolation and metrics"""
+
+    @pytest.mark.asyncio
+    async def test_agents_are_reused_across_factories(self, pool):
+        EchoAgent.constructed = 0
+
+        first = make_factory().create_agent("X1")
+        second = make_factory().create_agent("X1")
+
+        assert first is second
+        assert EchoAgent.constructed == 1
+        metrics = pool.get_metrics()
+        assert metrics["warm_hits"] == 1
+        assert metrics["cold_constructions"] == 1
+        assert "X1" in metrics["construction_ms"]
+
+    @pytest.mark.asyncio
+    async def test_custom_config_and_disabled_pool_construct_fresh(self, pool):
+        factory = make_factory()
+        warm = factory.create_agent("X1")
+
+        assert factory.create_agent("X1", {"max_retries": 1}) is not warm
+        assert AgentFactory(use_pool=False).create_agent("A1") is not AgentFactory(use_pool=False).create_agent("A1")
+
+    def test_each_event_loop_gets_its_own_instances(self, pool):
+        async def create():
+            return make_factory().create_agent("X1")
+
+        assert asyncio.run(create()) is not asyncio.run(create())
+        # Outside a loop nothing is pooled
+        assert make_factory().create_agent("X1") is not make_factory().create_agent("X1")
+
+    @pytest.mark.asyncio
+    async def test_shared_instance_serves_concurrent_runs(self, pool):
+        agent = make_factory().create_agent("X1")
+
+        results = await asyncio.gather(*(agent.execute({"input_data": {}, "value": i}) for i in range(5)))
+
+        assert [r.data["echo"] for r in results] == list(range(5))
+        assert all(r.execution_time_ms >= 10 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_preload_warms_agents(self, pool):
+        factory = AgentFactory(use_pool=True)
+
+        timings = pool.preload(factory, ["A0", "A1", "A3"])
+        agent = factory.create_agent("A1")
+
+        assert set(timings) == {"A0", "A1", "A3"}
+        assert pool.get_metrics()["warm_hits"] == 1
+        assert agent is AgentFactory(use_pool=True).create_agent("A1")
+
+    def test_preload_requires_running_loop(self, pool):
+        with pytest.raises(RuntimeError):
+            pool.preload(AgentFactory(use_pool=True), ["A1"])
+
+    def test_jieba_dictionary_loaded_once_per_process(self):
+        from nps_report_v3.agents.foundation.A2_qualitative_agent import QualitativeAnalysisAgent
+
+        QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative")
+        with patch("nps_report_v3.agents.foundation.A2_qualitative_agent.jieba.add_word") as add_word:
+            QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative")
+
+        add_word.assert_not_called()
@@ -0,0 +1,286 @@
+"""Tests for input-hash memoization of agent results"""
+
+import ast
+import asyncio
+import inspect
+import pickle
+import textwrap
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus
+from nps_report_v3.agents.factory import AgentFactory
+from nps_report_v3.agents.foundation.A2_qualitative_agent import QualitativeAnalysisAgent
+from nps_report_v3.cache.agent_result_cache import AgentResultCache, make_agent_cache_key
+from nps_report_v3.config.constants import AGENT_DATA_DEPENDENCIES
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+RAW_DATA = [{"response_id": str(i), "nps_score": i % 11, "comment": "好喝"} for i in range(20)]
+
+
+class TestAgentResultCache:
+    """Test keying and storage of agent results"""
+
+    def test_key_depends_only_on_declared_reads(self):
+        state = {"tagged_responses": [1, 2], "analysis_config": {"depth": 1}}
+        changed_other = {**state, "analysis_config": {"depth": 2}}
+        changed_read = {**state, "tagged_responses": [1, 2, 3]}
+
+        key = make_agent_cache_key("B4", "v1", state, ["tagged_responses"])
+
+        assert make_agent_cache_key("B4", "v1", changed_other, ["tagged_responses"]) == key
+        assert make_agent_cache_key("B4", "v1", changed_read, ["tagged_responses"]) != key
+        assert make_agent_cache_key("B4", "v2", state, ["tagged_responses"]) != key
+
+    def test_key_encodes_values_by_content(self):
+        large = np.arange(5000)
+        edited = large.copy()
+        edited[2500] = -1
+        key = make_agent_cache_key("B4", "v1", {"scores": large}, ["scores"])
+
+        # str() of both arrays is identical ("[0 1 2 ... 4997 4998 4999]")
+        assert make_agent_cache_key("B4", "v1", {"scores": edited}, ["scores"]) != key
+        assert make_agent_cache_key("B4", "v1", {"scores": large.astype(np.int32)}, ["scores"]) != key
+        assert make_agent_cache_key("B4", "v1", {"scores": large.copy()}, ["scores"]) == key
+
+        words = [f"词{i}" for i in range(50)]
+        assert (
+            make_agent_cache_key("B4", "v1", {"tags": set(words)}, ["tags"])
+            == make_agent_cache_key("B4", "v1", {"tags": set(reversed(words))}, ["tags"])
+        )
+
+        with pytest.raises(TypeError):
+            make_agent_cache_key("B4", "v1", {"tags": object()}, ["tags"])
+
+    def test_round_trip_and_eviction(self, tmp_path):
+        result = AgentResult(agent_id="A1", status=AgentStatus.COMPLETED, data={"nps_metrics": {"nps": 12}})
+        budget = int(len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)) * 1.5)
+        cache = AgentResultCache(path=str(tmp_path / "agents.sqlite3"), max_bytes=budget)
+
+        cache.set("k1", "A1", result)
+        restored = cache.get("k1")
+
+        assert restored == result and restored is not result
+        assert cache.get("missing") is None
+
+        # Over budget: the least recently used result is evicted
+        cache.set("k2", "A1", AgentResult(agent_id="A1", status=AgentStatus.COMPLETED, data={"nps_metrics": {"nps": 13}}))
+        assert cache.size() == 1
+        assert cache.get("k1") is None
+        assert cache.get("k2").data == {"nps_metrics": {"nps": 13}}
+
+
+def state_keys_read(agent_class):
+    """Literal keys an agent class (with its base classes) reads via ``state.get(...)``/``state[...]``"""
+    keys = set()
+    for cls in agent_class.__mro__:
+        if not cls.__module__.startswith("nps_report_v3.agents"):
+            continue
+        tree = ast.parse(textwrap.dedent(inspect.getsource(cls)))
+        # Input validation only checks that keys exist
+        tree.body[0].body = [
+            node for node in tree.body[0].body
+            if not (isinstance(node, ast.FunctionDef) and node.name == "_validate_input")
+        ]
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                target, args = node.func.value, node.args
+                if node.func.attr != "get" or not args:
+                    continue
+                key = args[0]
+            elif isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Load):
+                target, key = node.value, node.slice
+            else:
+                continue
+            if isinstance(target, ast.Name) and target.id == "state" and isinstance(key, ast.Constant):
+                keys.add(key.value)
+    return keys
+
+
+class TestDeclaredReads:
+    """Test that memoization keys cover everything an agent reads"""
+
+    @pytest.mark.parametrize("agent_id", sorted(AGENT_DATA_DEPENDENCIES))
+    def test_every_state_read_is_declared(self, agent_id):
+        factory = AgentFactory(use_pool=False)
+        declared = {key.split(".")[0] for key in factory.get_agent_config(agent_id).reads}
+
+        assert state_keys_read(factory.registry.get_agent_class(agent_id)) <= declared
+
+    def test_dotted_read_covers_only_that_field(self):
+        state = {"pass1_foundation": {"confidence_assessment": {"level": "high"}, "nps_metrics": {"nps": 1}}}
+        reads = ["pass1_foundation.confidence_assessment"]
+        key = make_agent_cache_key("C1", "v1", state, reads)
+
+        other_field = {"pass1_foundation": {**state["pass1_foundation"], "nps_metrics": {"nps": 2}}}
+        assert make_agent_cache_key("C1", "v1", other_field, reads) == key
+
+        lowered = {"pass1_foundation": {**state["pass1_foundation"], "confidence_assessment": {"level": "low"}}}
+        assert make_agent_cache_key("C1", "v1", lowered, reads) != key
+
+
+class TestAgentVersion:
+    """Test that agent versions follow everything that shapes an agent's output"""
+
+    @pytest.mark.parametrize("agent_id, helper", [
+        ("A0", "nps_report_v3.utils.text_scrubber"),
+        ("A1", "nps_report_v3.state.nps_cube"),
+        ("A2", "nps_report_v3.utils.keyword_matcher"),
+        ("A2", "nps_report_v3.agents.base"),
+        ("A3", "nps_report_v3.agents.foundation.A2_qualitative_agent"),
+    ])
+    def test_helper_module_changes_bump_version(self, agent_id, helper):
+        before = AgentFactory(use_pool=False).get_agent_version(agent_id)
+        getsource = inspect.getsource
+
+        def edited(module):
+            return getsource(module) + ("\n# edited" if module.__name__ == helper else "")
+
+        with patch.object(inspect, "getsource", edited):
+            after = AgentFactory(use_pool=False).get_agent_version(agent_id)
+
+        assert after != before
+
+    def test_construction_config_changes_bump_version(self):
+        factory = AgentFactory(use_pool=False)
+        before = factory.get_agent_version("A2")
+
+        factory.get_agent_config("A2").timeout_seconds += 1
+        assert factory.get_agent_version("A2") != before
+
+        class SmallBatches(QualitativeAnalysisAgent):
+            def __init__(self, llm_batch_size: int = 5, **kwargs):
+                super().__init__(llm_batch_size=llm_batch_size, **kwargs)
+
+        factory.register_custom_agent("A2", QualitativeAnalysisAgent)
+        default = factory.get_agent_version("A2")
+        factory.register_custom_agent("A2", SmallBatches)
+        assert factory.get_agent_version("A2") != default
+
+
+class CountingAgent:
+    """Agent stub counting executions and echoing a digest of its reads"""
+
+    def __init__(self, agent_id, reads, writes, calls):
+        self.agent_id = agent_id
+        self.reads = reads
+        self.writes = writes
+        self.calls = calls
+
+    async def execute(self, state):
+        self.calls.append(self.agent_id)
+        await asyncio.sleep(0.005)
+        digest = len(str([state.get(key) for key in self.reads]))
+        data = {key: {"from": self.agent_id, "digest": digest} for key in self.writes}
+        # A0 output follows the survey, so appended responses change what B/C agents read
+        if self.agent_id == "A0":
+            data["cleaned_data"] = {"responses": state["raw_data"], "data_quality": "high"}
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data=data)
+
+
+def make_orchestrator(cache, calls):
+    orchestrator = WorkflowOrchestrator(enable_checkpointing=False, enable_caching=False)
+    orchestrator.agent_result_cache = cache
+
+    def create_agent(agent_id, **kwargs):
+        config = orchestrator.factory.get_agent_config(agent_id)
+        return CountingAgent(agent_id, config.reads, config.writes, calls)
+
+    orchestrator.factory.create_agent = create_agent
+    return orchestrator
+
+
+async def run(cache, raw_data, **config):
+    calls = []
+    orchestrator = make_orchestrator(cache, calls)
+
+    async def no_reports(state):
+        return state
+
+    with patch.object(orchestrator, "_generate_html_reports", no_reports):
+        state = await orchestrator.execute(raw_data, config)
+    return state, calls
+
+
+class TestOrchestratorMemoization:
+    """Test that re-runs only execute agents whose inputs changed"""
+
+    @pytest.mark.asyncio
+    async def test_identical_rerun_reuses_every_agent(self):
+        cache = AgentResultCache()
+
+        first, first_calls = await run(cache, RAW_DATA)
+        second, second_calls = await run(cache, RAW_DATA)
+
+        assert len(first_calls) == 18
+        assert second_calls == []
+        assert second["agent_cache_report"]["hits"] == 18
+        assert second["agent_cache_report"]["saved_ms"] > 0
+        assert second["analysis_coordination"] == first["analysis_coordination"]
+
+    @pytest.mark.asyncio
+    async def test_untouched_inputs_are_not_rerun(self):
+        cache = AgentResultCache()
+        await run(cache, RAW_DATA)
+
+        # Language is read by every agent, an unread option by none
+        _, calls = await run(cache, RAW_DATA, excluded_topics=["价格"])
+        assert calls == []
+
+        state, calls = await run(cache, RAW_DATA, language="en")
+        assert len(calls) == 18
+        assert state["agent_cache_report"]["agents"]["C5"]["cache"] == "miss"
+        assert state["agent_cache_report"]["agents"]["C5"]["saved_ms"] == 0
+
+    @pytest.mark.asyncio
+    async def test_appended_responses_rerun_pipeline(self):
+        cache = AgentResultCache()
+        await run(cache, RAW_DATA)
+
+        appended = RAW_DATA + [{"response_id": "new", "nps_score": 3, "comment": "太甜"}]
+        state, calls = await run(cache, appended)
+
+        assert "A0" in calls
+        assert state["agent_cache_report"]["misses"] == len(calls)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_report_their_own_hits(self):
+        cache = AgentResultCache()
+        await run(cache, RAW_DATA)
+
+        calls = []
+        orchestrator = make_orchestrator(cache, calls)
+
+        async def no_reports(state):
+            return state
+
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            warm, cold = await asyncio.gather(
+                orchestrator.execute(RAW_DATA), orchestrator.execute(RAW_DATA, {"language": "en"})
+            )
+
+        assert warm["agent_cache_report"]["hits"] == 18
+        assert warm["agent_cache_report"]["misses"] == 0
+        assert cold["agent_cache_report"]["hits"] == 0
+        assert cold["agent_cache_report"]["misses"] == 18
+
+    @pytest.mark.asyncio
+    async def test_failed_results_are_not_cached(self):
+        cache = AgentResultCache()
+        calls = []
+        orchestrator = make_orchestrator(cache, calls)
+
+        async def failing(state):
+            return AgentResult(agent_id="C5", status=AgentStatus.FAILED, errors=["timeout"])
+
+        result = await orchestrator._execute_agent("A1", {"cleaned_data": [1]})
+        assert result.status == AgentStatus.COMPLETED
+
+        orchestrator.factory.create_agent = lambda agent_id, **kwargs: type(
+            "Failing", (), {"execute": staticmethod(failing)}
+        )()
+        await orchestrator._execute_agent("C5", {"nps_metrics": {}})
+
+        assert cache.size() == 1
@@ -2,6 +2,7 @@
 
 import pytest
 import asyncio
+import os
 import time
 from unittest.mock import AsyncMock, MagicMock
 
@@ -10,10 +11,34 @@ from nps_report_v3.utils.async_helpers import (
     AsyncBatchProcessor, ParallelExecutor,
     RetryWithBackoff, AsyncCircuitBreaker,
     AsyncRateLimiter, async_timeout,
-    run_in_thread_pool
+    run_in_thread_pool, SingleFlight,
+    AdaptiveConcurrencyLimiter, LLMConcurrencyGovernor, is_overload_error,
+    CPUExecutor, cpu_bound, fair_share_scope
 )
 
 
+@cpu_bound
+def worker_pid(_=None):
+    return os.getpid()
+
+
+@cpu_bound
+def exit_unless_in(pid):
+    # Kills a worker process but returns normally on the fallback thread
+    if os.getpid() != pid:
+        os._exit(1)
+    return "recovered"
+
+
+@cpu_bound
+def spin(seconds):
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
 class TestSemaphoreManager:
     """Test SemaphoreManager class"""
 
@@ -424,6 +449,257 @@ class TestRunInThreadPool:
         result = await run_in_thread_pool(cpu_bound_task, 1000)
         assert result == sum(range(1000))
 
+    @pytest.mark.asyncio
+    async def test_keyword_arguments(self):
+        result = await run_in_thread_pool(sorted, [3, 1, 2], reverse=True)
+        assert result == [3, 2, 1]
+
+
+class TestCPUExecutor:
+    """Test process offload of CPU-bound steps"""
+
+    @pytest.mark.asyncio
+    async def test_marked_functions_run_in_worker_process(self):
+        executor = CPUExecutor(max_workers=1)
+        try:
+            assert await executor.run(worker_pid) != os.getpid()
+            assert await executor.run(os.getpid) == os.getpid()
+
+            metrics = executor.get_metrics()
+            assert metrics["process_tasks"] == 1
+            assert metrics["thread_tasks"] == 1
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_disabled_executor_uses_threads(self):
+        executor = CPUExecutor(enabled=False)
+
+        assert await executor.run(worker_pid) == os.getpid()
+        assert executor.get_metrics()["process_tasks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_broken_pool_falls_back_and_restarts(self):
+        executor = CPUExecutor(max_workers=1)
+        try:
+            assert await executor.run(exit_unless_in, os.getpid()) == "recovered"
+            assert executor.get_metrics()["pool_restarts"] == 1
+
+            # The next call gets a fresh pool
+            assert await executor.run(worker_pid) != os.getpid()
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    async def test_event_loop_stays_responsive_during_cpu_work(self):
+        executor = CPUExecutor(max_workers=1)
+        await executor.start()  # spawn the worker outside the measurement
+        lags = []
+
+        async def ticker():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - started - 0.005)
+
+        tick = asyncio.create_task(ticker())
+        try:
+            await executor.run(spin, 1.0)
+        finally:
+            tick.cancel()
+            executor.shutdown()
+
+        lags.sort()
+        p99 = lags[int(len(lags) * 0.99) - 1]
+        assert len(lags) > 50
+        assert p99 < 0.05
+
+
+
+class TestSingleFlight:
+    """Test SingleFlight request coalescing"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        group = SingleFlight()
+        calls = {"count": 0}
+
+        async def work():
+            calls["count"] += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*[group.do("key", work) for _ in range(5)])
+
+        assert [result for result, _ in results] == ["result"] * 5
+        assert [leader for _, leader in results] == [True, False, False, False, False]
+        assert calls["count"] == 1
+        assert group.get_metrics()["coalesced"] == 4
+        assert group.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        group = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[group.do("key", failing) for _ in range(3)],
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_shared_call(self):
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(group.do("key", work))
+        second = asyncio.create_task(group.do("key", work))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        assert await second == ("done", False)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancellation_cancels_call(self):
+        group = SingleFlight()
+        finished = {"value": False}
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished["value"] = True
+
+        waiter = asyncio.create_task(group.do("key", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.06)
+
+        assert finished["value"] is False
+        assert group.in_flight() == 0
+
+
+class HTTPStatusError(Exception):
+    """Stand-in for a transport error carrying a response status"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = MagicMock(status_code=status_code)
+
+
+class TestAdaptiveConcurrency:
+    """Test AIMD concurrency limiter and per-provider governor"""
+
+    def test_overload_classification(self):
+        assert is_overload_error(HTTPStatusError(429))
+        assert is_overload_error(HTTPStatusError(503))
+        assert is_overload_error(asyncio.TimeoutError())
+        assert not is_overload_error(HTTPStatusError(400))
+        assert not is_overload_error(ValueError("bad json"))
+
+        try:
+            try:
+                raise HTTPStatusError(502)
+            except HTTPStatusError as e:
+                raise Exception("LLM call failed") from e
+        except Exception as wrapped:
+            assert is_overload_error(wrapped)
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, cooldown_seconds=0)
+
+        # About one full window of healthy calls adds one slot
+        for _ in range(5):
+            limiter.record_success(latency_ms=100)
+        assert limiter.limit == 5
+
+        for _ in range(100):
+            limiter.record_success(latency_ms=100)
+        assert limiter.limit == 8
+
+        limiter.record_overload()
+        assert limiter.limit == 4
+        limiter.record_overload()
+        limiter.record_overload()
+        limiter.record_overload()
+        assert limiter.limit == 1
+
+    def test_slow_calls_do_not_increase_and_cooldown_limits_cuts(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_target_ms=1000, cooldown_seconds=60)
+
+        for _ in range(20):
+            limiter.record_success(latency_ms=5000)
+        assert limiter.limit == 8
+
+        limiter.record_overload()
+        limiter.record_overload()
+        assert limiter.limit == 4
+        assert limiter.get_metrics()["overloads"] == 2
+
+    @pytest.mark.asyncio
+    async def test_limit_bounds_concurrency(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        active = 0
+        peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with limiter.slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*[call() for _ in range(10)])
+
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_round_robin_across_tenants(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        order = []
+
+        async def call(tenant, i):
+            with fair_share_scope(tenant):
+                async with limiter.slot():
+                    order.append(tenant)
+                    await asyncio.sleep(0.001)
+
+        # The large tenant queues 20 calls before the small one queues 2
+        calls = [call("large", i) for i in range(20)] + [call("small", i) for i in range(2)]
+        await asyncio.gather(*calls)
+
+        assert len(order) == 22
+        # Without fair sharing the small tenant would finish last (positions 20 and 21)
+        assert [i for i, tenant in enumerate(order) if tenant == "small"] == [2, 4]
+        assert limiter.get_metrics()["waiting_tenants"] == 0
+
+    @pytest.mark.asyncio
+    async def test_governor_isolates_providers(self):
+        governor = LLMConcurrencyGovernor({"initial_limit": 4, "cooldown_seconds": 0})
+
+        with pytest.raises(HTTPStatusError):
+            async with governor.slot("yili"):
+                raise HTTPStatusError(429)
+
+        async with governor.slot("azure"):
+            pass
+
+        metrics = governor.get_metrics()
+        assert metrics["yili"]["limit"] == 2
+        assert metrics["azure"]["limit"] == 4
+        assert metrics["yili"]["in_flight"] == 0
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
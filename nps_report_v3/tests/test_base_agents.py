@@ -2,6 +2,7 @@
 
 import pytest
 import asyncio
+import time
 from unittest.mock import MagicMock, patch
 from datetime import datetime
 
@@ -9,6 +10,7 @@ from nps_report_v3.agents.base import (
     BaseAgent, FoundationAgent, AnalysisAgent, ConsultingAgent,
     ConfidenceConstrainedAgent, AgentStatus, AgentResult
 )
+from nps_report_v3.agents.steps import get_retry_metrics
 
 
 class TestableAgent(BaseAgent):
@@ -132,6 +134,83 @@ class TestBaseAgent:
         assert agent.process.call_count == 3
 
 
+class SteppedAgent(BaseAgent):
+    """Agent made of two LLM-like sub-steps"""
+
+    step_max_retries = 2
+    step_retry_delay = 0.0
+
+    def __init__(self, failures=None, crash_after_first=0):
+        super().__init__("STEP1", "Stepped Agent", max_retries=3)
+        self.calls = {"first": 0, "second": 0}
+        self.failures = dict(failures or {})
+        self.crash_after_first = crash_after_first
+
+    async def call(self, name):
+        self.calls[name] += 1
+        time.sleep(0.005)
+        if self.failures.get(name, 0) > 0:
+            self.failures[name] -= 1
+            raise ConnectionError(f"{name} flaked")
+        return f"{name} done"
+
+    async def process(self, state):
+        first = await self.run_step("first", self.call, "first")
+        if self.crash_after_first > 0:
+            self.crash_after_first -= 1
+            raise RuntimeError("post-processing bug")
+        second = await self.run_step("second", self.call, "second")
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data={"steps": [first, second]})
+
+
+class TestAgentSteps:
+    """Test sub-step retry and memoization"""
+
+    @pytest.mark.asyncio
+    async def test_failed_step_is_retried_alone(self):
+        agent = SteppedAgent(failures={"second": 1})
+
+        result = await agent.execute({"input_data": {}})
+
+        assert result.status == AgentStatus.COMPLETED
+        assert agent.calls == {"first": 1, "second": 2}
+        retries = result.metadata["retries"]
+        assert retries["attempts"] == 1
+        assert retries["step_retries"] == {"second": 1}
+        assert retries["wasted_ms"] >= 5
+
+    @pytest.mark.asyncio
+    async def test_agent_retry_replays_completed_steps(self):
+        get_retry_metrics().reset()
+        agent = SteppedAgent(crash_after_first=1)
+
+        # Skip the 2s whole-agent backoff
+        with patch("asyncio.sleep"):
+            result = await agent.execute({"input_data": {}})
+
+        assert result.status == AgentStatus.COMPLETED
+        assert result.data == {"steps": ["first done", "second done"]}
+        # The whole agent ran twice, the first step only once
+        assert agent.calls == {"first": 1, "second": 1}
+        assert result.metadata["retries"]["attempts"] == 2
+        assert result.metadata["retries"]["steps_reused"] == 1
+        metrics = get_retry_metrics().get_metrics()["STEP1"]
+        assert metrics["agent_retries"] == 1
+        assert metrics["reused_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_step_gives_up_after_its_retries(self):
+        agent = SteppedAgent(failures={"second": 5})
+        agent.max_retries = 1
+
+        result = await agent.execute({"input_data": {}})
+
+        assert result.status == AgentStatus.FAILED
+        assert agent.calls["second"] == 3
+        assert "second flaked" in result.errors[0]
+        assert await agent.run_step("outside", agent.call, "first") == "first done"
+
+
 class TestFoundationAgent:
     """Test FoundationAgent class"""
 
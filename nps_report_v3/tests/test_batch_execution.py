@@ -0,0 +1,116 @@
+"""Tests for concurrent multi-survey execution"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus, BaseAgent
+from nps_report_v3.utils.async_helpers import get_current_tenant
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+
+class SizedAgent(BaseAgent):
+    """Agent whose run time grows with the survey size"""
+
+    tenants = set()
+
+    def __init__(self, agent_id="X1", **kwargs):
+        super().__init__(agent_id=agent_id, agent_name="Sized", **kwargs)
+
+    def _validate_input(self, state):
+        return None
+
+    async def process(self, state):
+        responses = state["input_data"]["survey_responses"]
+        if responses[0].get("fail"):
+            raise ValueError("bad survey")
+        SizedAgent.tenants.add(get_current_tenant())
+        await asyncio.sleep(len(responses) * 0.0005)
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data={})
+
+
+def make_orchestrator():
+    orchestrator = WorkflowOrchestrator(workflow_id="batch", enable_checkpointing=False, enable_caching=False)
+    orchestrator.factory.create_agent = lambda agent_id, **kwargs: SizedAgent(agent_id, max_retries=1)
+    return orchestrator
+
+
+def survey(survey_id, size, **extra):
+    return {"survey_id": survey_id, "raw_data": [dict(extra, response_id=str(i), nps_score=9) for i in range(size)]}
+
+
+async def no_reports(state):
+    return state
+
+
+class TestExecuteMany:
+    """Test streaming, isolation and cancellation of batch runs"""
+
+    @pytest.mark.asyncio
+    async def test_small_surveys_stream_back_before_large_one(self):
+        orchestrator = make_orchestrator()
+        surveys = [survey("large", 200)] + [survey(f"small-{i}", 2) for i in range(3)] + [survey("broken", 1, fail=True)]
+        SizedAgent.tenants = set()
+
+        with patch.object(WorkflowOrchestrator, "_generate_html_reports", staticmethod(no_reports)):
+            outcomes = [outcome async for outcome in orchestrator.execute_many(surveys, max_concurrency=5)]
+
+        order = [outcome["survey_id"] for outcome in outcomes]
+        by_id = {outcome["survey_id"]: outcome for outcome in outcomes}
+        assert order[-1] == "large"
+        run_ids = {survey_id: outcome["state"]["workflow_id"] for survey_id, outcome in by_id.items() if "state" in outcome}
+        assert run_ids["large"].startswith("batch_") and run_ids["large"].endswith("_1_large")
+        assert by_id["small-0"]["status"] == "completed"
+        assert by_id["broken"]["status"] == "failed"
+        assert by_id["broken"]["index"] == 4
+        # Every survey queued for shared resources under its own tenant
+        assert SizedAgent.tenants == set(run_ids.values())
+        assert len(SizedAgent.tenants) == 4
+
+    @pytest.mark.asyncio
+    async def test_batches_with_default_survey_ids_get_distinct_runs(self):
+        orchestrator = make_orchestrator()
+        surveys = [{"raw_data": [{"response_id": "1", "nps_score": 9}]}]
+        SizedAgent.tenants = set()
+
+        with patch.object(WorkflowOrchestrator, "_generate_html_reports", staticmethod(no_reports)):
+            first, second = await asyncio.gather(
+                *[self._collect(orchestrator.execute_many(surveys)) for _ in range(2)]
+            )
+
+        assert first[0]["survey_id"] == second[0]["survey_id"] == "survey_1"
+        assert first[0]["state"]["workflow_id"] != second[0]["state"]["workflow_id"]
+        assert len(SizedAgent.tenants) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_single_runs_are_separate_tenants(self):
+        orchestrator = make_orchestrator()
+        SizedAgent.tenants = set()
+
+        with patch.object(WorkflowOrchestrator, "_generate_html_reports", staticmethod(no_reports)):
+            states = await asyncio.gather(
+                *[orchestrator.execute([{"response_id": "1", "nps_score": 9}]) for _ in range(3)]
+            )
+
+        assert SizedAgent.tenants == {state["workflow_id"] for state in states}
+        assert len(SizedAgent.tenants) == 3
+
+    @staticmethod
+    async def _collect(stream):
+        return [outcome async for outcome in stream]
+
+    @pytest.mark.asyncio
+    async def test_closing_the_stream_cancels_remaining_surveys(self):
+        orchestrator = make_orchestrator()
+        surveys = [survey("small", 1)] + [survey(f"large-{i}", 2000) for i in range(3)]
+
+        with patch.object(WorkflowOrchestrator, "_generate_html_reports", staticmethod(no_reports)):
+            started = time.perf_counter()
+            stream = orchestrator.execute_many(surveys, max_concurrency=4)
+            first = await stream.__anext__()
+            await stream.aclose()
+
+        assert first["survey_id"] == "small"
+        assert time.perf_counter() - started < 1.0
@@ -0,0 +1,173 @@
+"""Tests for agent-level checkpointing and resume in the workflow orchestrator"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus
+from nps_report_v3.checkpoint.manager import CheckpointManager
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+ALL_AGENTS = [
+    "A0", "A1", "A2", "A3",
+    "B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B9",
+    "C1", "C2", "C3", "C4", "C5"
+]
+
+RAW_DATA = [{"response_id": str(i), "nps_score": i % 11, "comment": "好喝"} for i in range(20)]
+
+
+class StubAgent:
+    """Agent writing placeholder values for its declared outputs"""
+
+    def __init__(self, agent_id, writes, calls, delay, fail):
+        self.agent_id = agent_id
+        self.writes = writes
+        self.calls = calls
+        self.delay = delay
+        self.fail = fail
+
+    async def execute(self, state):
+        self.calls.append(self.agent_id)
+        await asyncio.sleep(self.delay)
+        if self.agent_id in self.fail:
+            return AgentResult(agent_id=self.agent_id, status=AgentStatus.FAILED, errors=["gateway timeout"])
+        return AgentResult(
+            agent_id=self.agent_id,
+            status=AgentStatus.COMPLETED,
+            data={key: {"from": self.agent_id} for key in self.writes}
+        )
+
+
+def make_orchestrator(checkpoint_manager, calls, delay=0.0, fail=()):
+    orchestrator = WorkflowOrchestrator(workflow_id="wf-resume", enable_checkpointing=True, enable_caching=False)
+    orchestrator.checkpoint_manager = checkpoint_manager
+
+    def create_agent(agent_id, **kwargs):
+        writes = orchestrator.factory.get_agent_config(agent_id).writes
+        return StubAgent(agent_id, writes, calls, delay, set(fail))
+
+    orchestrator.factory.create_agent = create_agent
+    return orchestrator
+
+
+@pytest.fixture
+def checkpoint_manager(tmp_path):
+    return CheckpointManager(checkpoint_dir=str(tmp_path / "checkpoints"))
+
+
+async def no_reports(state):
+    return state
+
+
+class TestCheckpointResume:
+    """Test checkpoint saving after each agent and resuming only missing agents"""
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_saved_after_every_agent(self, checkpoint_manager):
+        calls = []
+        orchestrator = make_orchestrator(checkpoint_manager, calls)
+
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            state = await orchestrator.execute(RAW_DATA, run_id="wf-resume")
+
+        assert sorted(state["agent_sequence"]) == sorted(ALL_AGENTS)
+        latest = (await checkpoint_manager.list_checkpoints("wf-resume"))[0]
+        assert latest["checkpoint_id"] == state["last_checkpoint"]
+        assert sorted(latest["agents_completed"]) == sorted(ALL_AGENTS)
+
+    @pytest.mark.asyncio
+    async def test_resume_runs_only_missing_agents(self, checkpoint_manager):
+        calls = []
+        orchestrator = make_orchestrator(checkpoint_manager, calls, fail={"C5"})
+
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            with pytest.raises(RuntimeError):
+                await orchestrator.execute(RAW_DATA, run_id="wf-resume")
+
+        assert calls.count("A0") == 1
+
+        resume_calls = []
+        resumed = make_orchestrator(checkpoint_manager, resume_calls)
+        with patch.object(resumed, "_generate_html_reports", no_reports):
+            state = await resumed.recover_from_checkpoint()
+
+        assert resume_calls == ["C5"]
+        assert state["workflow_phase"] == "completed"
+        assert state["executive_dashboard"] == {"from": "C5"}
+        assert state["analysis_coordination"] == {"from": "B9"}
+
+    @pytest.mark.asyncio
+    async def test_resume_mid_analysis_pass(self, checkpoint_manager):
+        calls = []
+        orchestrator = make_orchestrator(checkpoint_manager, calls, fail={"B9"})
+
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            with pytest.raises(RuntimeError):
+                await orchestrator.execute(RAW_DATA, run_id="wf-resume")
+
+        resume_calls = []
+        resumed = make_orchestrator(checkpoint_manager, resume_calls)
+        with patch.object(resumed, "_generate_html_reports", no_reports):
+            state = await resumed.recover_from_checkpoint()
+
+        assert sorted(resume_calls) == ["B9", "C1", "C2", "C3", "C4", "C5"]
+        assert state["pass2_analysis"]["analysis_coordination"] == {"from": "B9"}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_checkpoint_separately(self, checkpoint_manager):
+        orchestrator = make_orchestrator(checkpoint_manager, [], delay=0.005)
+
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            first, second = await asyncio.gather(orchestrator.execute(RAW_DATA), orchestrator.execute(RAW_DATA))
+
+        assert first["workflow_id"] != second["workflow_id"]
+        for state in (first, second):
+            checkpoints = await checkpoint_manager.list_checkpoints(state["workflow_id"])
+            assert checkpoints[0]["checkpoint_id"] == state["last_checkpoint"]
+            assert sorted(checkpoints[0]["agents_completed"]) == sorted(ALL_AGENTS)
+
+        resume_calls = []
+        resumed = make_orchestrator(checkpoint_manager, resume_calls)
+        with patch.object(resumed, "_generate_html_reports", no_reports):
+            state = await resumed.recover_from_checkpoint(run_id=second["workflow_id"])
+
+        assert resume_calls == []
+        assert state["workflow_id"] == second["workflow_id"]
+
+    @pytest.mark.asyncio
+    async def test_recover_without_checkpoints_raises(self, checkpoint_manager):
+        orchestrator = make_orchestrator(checkpoint_manager, [])
+
+        with pytest.raises(ValueError):
+            await orchestrator.recover_from_checkpoint()
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    async def test_resume_is_faster_than_cold_run(self, checkpoint_manager):
+        """Resuming after a C4 failure only pays for the missing agent"""
+        delay = 0.02
+
+        cold = make_orchestrator(checkpoint_manager, [], delay=delay)
+        with patch.object(cold, "_generate_html_reports", no_reports):
+            start = time.perf_counter()
+            await cold.execute(RAW_DATA, run_id="wf-resume")
+            cold_seconds = time.perf_counter() - start
+
+        resume_manager = CheckpointManager(checkpoint_dir=str(checkpoint_manager.checkpoint_dir / "resume"))
+        failing = make_orchestrator(resume_manager, [], delay=delay, fail={"C4"})
+        with patch.object(failing, "_generate_html_reports", no_reports):
+            await failing.execute(RAW_DATA, run_id="wf-resume")
+
+        # C1-C4 tolerate failures, so C4 is the only agent missing from the last checkpoint
+        resumed = make_orchestrator(resume_manager, [], delay=delay)
+        with patch.object(resumed, "_generate_html_reports", no_reports):
+            start = time.perf_counter()
+            state = await resumed.recover_from_checkpoint()
+            resume_seconds = time.perf_counter() - start
+
+        assert "C4" in state["agent_sequence"]
+        print(f"\ncold run: {cold_seconds * 1000:.1f} ms, resume: {resume_seconds * 1000:.1f} ms")
+        assert resume_seconds < cold_seconds / 2
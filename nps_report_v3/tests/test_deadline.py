@@ -0,0 +1,138 @@
+"""Tests for request deadlines, stage budgets and degraded agent results"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus, BaseAgent
+from nps_report_v3.llm.client import LLMClient, LLMClientWithFailover, LLMConfig, LLMResponse
+from nps_report_v3.utils.deadline import Deadline, DeadlineExceeded, get_current_deadline, use_deadline
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+
+async def slow_llm(seconds=1.0):
+    """Stand-in for an LLM call that honours the active deadline"""
+    deadline = get_current_deadline()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded("no time left")
+    await asyncio.sleep(seconds)
+    return "llm"
+
+
+class EnhancingAgent(BaseAgent):
+    """Agent with an LLM enhancement and a rule-based fallback"""
+
+    def __init__(self, agent_id="X1", **kwargs):
+        super().__init__(agent_id=agent_id, agent_name="Enhancing", **kwargs)
+
+    def _validate_input(self, state):
+        return None
+
+    async def process(self, state):
+        try:
+            source = await slow_llm()
+        except DeadlineExceeded:
+            source = "rules"
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data={"source": source})
+
+
+class FailingAgent(EnhancingAgent):
+    """Agent whose every attempt fails"""
+
+    async def process(self, state):
+        raise RuntimeError("gateway error")
+
+
+class SlowClient(LLMClient):
+    """Provider answering after one second"""
+
+    provider_name = "slow"
+
+    async def generate(self, prompt, **kwargs):
+        await asyncio.sleep(1.0)
+        return LLMResponse(content="ok", model="m", usage={}, latency_ms=0)
+
+    async def embed(self, text):
+        return [0.0]
+
+
+def make_client():
+    return SlowClient(LLMConfig(model_name="m", api_key="k", api_base="http://localhost"))
+
+
+class TestDeadline:
+    """Test stage budgets and degraded fallbacks"""
+
+    def test_stage_budgets_roll_over_unused_time(self):
+        deadline = Deadline(10.0, stage_shares={"foundation": 1, "analysis": 1, "consulting": 2})
+
+        foundation = deadline.stage("foundation")
+        analysis = deadline.stage("analysis")
+        consulting = deadline.stage("consulting")
+
+        assert foundation.remaining() == pytest.approx(2.5, abs=0.05)
+        # Foundation used (almost) nothing, so analysis gets a third of ~10s
+        assert analysis.remaining() == pytest.approx(10 / 3, abs=0.05)
+        # The last stage gets whatever is left
+        assert consulting.expires_at == pytest.approx(deadline.expires_at)
+        assert Deadline().stage("foundation").remaining() is None
+
+    @pytest.mark.asyncio
+    async def test_agent_returns_degraded_result_when_budget_runs_out(self):
+        deadline = Deadline(0.1)
+        started = time.perf_counter()
+
+        with use_deadline(deadline):
+            result = await EnhancingAgent().execute({})
+
+        assert time.perf_counter() - started < 0.5
+        assert result.status == AgentStatus.COMPLETED
+        assert result.data == {"source": "rules"}
+        assert result.metadata["degraded"] is True
+        assert "X1" in deadline.report()["degraded_agents"]
+
+    @pytest.mark.asyncio
+    async def test_no_retry_backoff_past_the_deadline(self):
+        started = time.perf_counter()
+
+        with use_deadline(Deadline(1.0)):
+            result = await FailingAgent().execute({})
+
+        # Without a deadline the agent would back off for 2s + 4s
+        assert time.perf_counter() - started < 0.5
+        assert result.status == AgentStatus.FAILED
+        assert "gateway error" in result.errors[0]
+
+    @pytest.mark.asyncio
+    async def test_llm_call_is_cut_off_without_failover(self):
+        primary, backup = make_client(), make_client()
+        client = LLMClientWithFailover(primary, backup)
+
+        with use_deadline(Deadline(0.1)):
+            with pytest.raises(DeadlineExceeded):
+                await client.generate("hello")
+            with pytest.raises(DeadlineExceeded):
+                await client.generate("hello again")
+
+        assert client.use_primary
+        assert primary.latency_stats.error_rate() == 0.0
+
+    @pytest.mark.asyncio
+    async def test_workflow_latency_is_bounded(self):
+        orchestrator = WorkflowOrchestrator(workflow_id="wf-deadline", enable_checkpointing=False, enable_caching=False)
+        orchestrator.factory.create_agent = lambda agent_id, **kwargs: EnhancingAgent(agent_id)
+
+        async def no_reports(state):
+            return state
+
+        started = time.perf_counter()
+        with patch.object(orchestrator, "_generate_html_reports", no_reports):
+            state = await orchestrator.execute([{"response_id": "1", "nps_score": 9}], deadline_seconds=0.3)
+
+        report = state["deadline_report"]
+        assert time.perf_counter() - started < 1.0
+        assert state["workflow_phase"] == "completed"
+        assert set(report["stages"]) == {"foundation", "analysis", "consulting", "reports"}
+        assert len(report["degraded_agents"]) == 18
@@ -0,0 +1,355 @@
+"""Unit tests for Foundation Pass agent implementations"""
+
+import pytest
+import json
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from nps_report_v3.agents.foundation.A0_ingestion_agent import DataIngestionAgent
+from nps_report_v3.agents.foundation.A1_quantitative_agent import (
+    QuantitativeAnalysisAgent, segment_statistics, statistical_tests
+)
+from nps_report_v3.agents.foundation.A2_qualitative_agent import QualitativeAnalysisAgent
+from nps_report_v3.state import NPSCube
+from nps_report_v3.utils.keyword_matcher import KeywordHit, KeywordMatcher
+from nps_report_v3.utils.text_scrubber import TextScrubber
+
+
+class BatchEchoLLM:
+    """Fake LLM that answers numbered batch prompts with a JSON array"""
+
+    def __init__(self, drop_indexes=(), overrides=None):
+        self.prompts = []
+        self.drop_indexes = set(drop_indexes)
+        self.overrides = overrides or {}
+
+    async def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        indexes = [int(i) for i in re.findall(r"^(\d+)\. \[NPS", prompt, flags=re.MULTILINE)]
+        items = [
+            {"index": idx, "sentiment": "mixed", "key_points": ["LLM要点"], "tags": ["LLM标签"], **self.overrides.get(idx, {})}
+            for idx in indexes
+            if idx not in self.drop_indexes
+        ]
+        return "结果如下：" + json.dumps(items, ensure_ascii=False)
+
+
+def make_responses(count):
+    return [
+        {
+            "response_id": f"r_{i}",
+            "nps_score": 9,
+            "comment": f"第{i}条反馈：安慕希口感很好，包装设计也很不错，会继续购买"
+        }
+        for i in range(count)
+    ]
+
+
+class TestQualitativeAgentBatching:
+    """Test micro-batched LLM comment analysis in A2"""
+
+    @pytest.mark.asyncio
+    async def test_one_llm_call_per_batch(self):
+        llm = BatchEchoLLM()
+        agent = QualitativeAnalysisAgent(
+            agent_id="A2", agent_name="Qualitative", llm_client=llm, llm_batch_size=10
+        )
+
+        tagged = await agent._analyze_responses_batched(make_responses(25))
+
+        assert len(llm.prompts) == 3
+        assert len(tagged) == 25
+        assert all("LLM标签" in t["tags"] for t in tagged)
+        assert all(t["sentiment"] == "mixed" for t in tagged)
+        assert all(len(t["key_phrases"]) <= 5 for t in tagged)
+
+    @pytest.mark.asyncio
+    async def test_missing_items_fall_back_to_rule_based(self):
+        llm = BatchEchoLLM(drop_indexes={2})
+        agent = QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative", llm_client=llm)
+
+        tagged = await agent._analyze_responses_batched(make_responses(3))
+
+        assert "LLM标签" not in tagged[1]["tags"]
+        assert tagged[1]["sentiment"] == agent._analyze_sentiment(tagged[1]["original_text"])
+        assert "LLM标签" in tagged[0]["tags"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_items_fall_back_to_rule_based(self):
+        llm = BatchEchoLLM(overrides={
+            1: {"tags": [{"x": 1}, "LLM标签"], "key_points": [["嵌套"]]},
+            2: {"tags": "LLM标签", "sentiment": ["negative"], "key_points": {"a": 1}},
+        })
+        agent = QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative", llm_client=llm)
+
+        tagged = await agent._analyze_responses_batched(make_responses(3))
+
+        assert len(tagged) == 3
+        assert "LLM标签" in tagged[0]["tags"]
+        assert all(isinstance(tag, str) for t in tagged for tag in t["tags"])
+        assert "LLM标签" not in tagged[1]["tags"]
+        assert tagged[1]["sentiment"] == agent._analyze_sentiment(tagged[1]["original_text"])
+        assert "LLM要点" not in tagged[1]["key_phrases"]
+        assert "LLM标签" in tagged[2]["tags"]
+
+        # A merge that still fails keeps the rule-based result of that item only
+        agent._merge_llm_analysis = lambda tagged, analysis: 1 / 0
+        tagged = await agent._analyze_responses_batched(make_responses(2))
+        assert [t["response_id"] for t in tagged] == ["r_0", "r_1"]
+        assert all("LLM标签" not in t["tags"] for t in tagged)
+
+    def test_batches_respect_token_budget(self):
+        agent = QualitativeAnalysisAgent(
+            agent_id="A2", agent_name="Qualitative", llm_batch_size=100, llm_batch_token_budget=100
+        )
+        items = [{"original_text": "很" * 40} for _ in range(5)]
+
+        batches = agent._build_llm_batches(items)
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+
+class TestIngestionScrubbing:
+    """Test single-pass PII scrubbing and cleanup in A0"""
+
+    def test_pii_is_replaced_by_type(self):
+        scrubber = TextScrubber()
+
+        assert scrubber.scrub("我叫张伟，电话13812345678，邮箱 zw@example.com") == "我叫[姓名]，电话[电话]，邮箱 [邮箱]"
+        assert scrubber.scrub("联系人：李娜 138-1234-5678") == "联系人：[姓名] [电话]"
+        assert scrubber.scrub("王先生推荐的") == "[姓名]先生推荐的"
+        # Whole digit runs: an ID card is not partially read as a phone number
+        assert scrubber.scrub("身份证11010119900307123X，卡号6222020200112233445") == "身份证[身份证]，卡号[银行卡]"
+        # Surname characters in ordinary words are left alone
+        assert scrubber.scrub("高兴的是口感很好，方便携带") == "高兴的是口感很好，方便携带"
+
+    def test_names_do_not_swallow_feedback_text(self):
+        scrubber = TextScrubber()
+
+        # Bare roles followed by ordinary words starting with a surname character
+        assert scrubber.scrub("客服方面很好") == "客服方面很好"
+        assert scrubber.scrub("客服高效率") == "客服高效率"
+        assert scrubber.scrub("店员高度负责") == "店员高度负责"
+        # Roles introduce a name only after a colon or 叫
+        assert scrubber.scrub("客服：张伟，店员叫王芳") == "客服：[姓名]，店员叫[姓名]"
+        # A name stops before a form of address
+        assert scrubber.scrub("联系人：李娜女士") == "联系人：[姓名]女士"
+        assert scrubber.scrub("我叫张先生") == "我叫[姓名]先生"
+
+    def test_cleanup_matches_text_rules(self):
+        scrubber = TextScrubber()
+
+        text = "  <b>很好喝</b>\t\n 还会买\u201c安慕希\u201d\x01！！！！  "
+        assert scrubber.scrub(text) == '很好喝 还会买"安慕希"！！'
+        assert scrubber.clean("a  b?!?!") == "a b!!"
+        assert scrubber.remove_pii("张伟女士  好") == "[姓名]女士  好"
+
+    def test_batch_matches_per_text_scrubbing(self):
+        scrubber = TextScrubber()
+        texts = ["王先生：13812345678", None, "", "<p>好</p>", "a\ue000b  c", "一般 。。。。"]
+
+        assert scrubber.scrub_many(texts) == [scrubber.scrub(t) if t else t for t in texts]
+        assert scrubber.scrub_many(texts[:4]) == [scrubber.scrub(t) if t else t for t in texts[:4]]
+
+    @pytest.mark.asyncio
+    async def test_ingestion_scrubs_comments_and_metadata(self):
+        agent = DataIngestionAgent(agent_id="A0", agent_name="Ingestion")
+        raw = [
+            {"response_id": "r1", "nps_score": 9, "comment": "我叫张伟，牛奶很好喝！！！！",
+             "metadata": {"note": "电话 13812345678", "api_key": "x"}},
+            {"response_id": "r2", "nps_score": 3, "feedback": "  包装 漏了，  客服：李娜，没回复 "},
+            {"response_id": "r3", "score": "bad"}
+        ]
+
+        result = await agent.process({"raw_data": raw})
+
+        responses = result.data["cleaned_data"]["cleaned_responses"]
+        assert [r["comment"] for r in responses] == ["我叫[姓名]，牛奶很好喝！！", "包装 漏了， 客服：[姓名]，没回复"]
+        assert responses[0]["metadata"] == {"note": "电话 [电话]"}
+        assert result.data["summary"]["invalid_count"] == 1
+
+    @pytest.mark.performance
+    def test_scrubbing_throughput(self):
+        scrubber = TextScrubber()
+        comments = [
+            f"第{i}条：安慕希口感很好，包装也不错，王先生推荐的，电话13812345{i % 1000:03d}，会继续购买！！！！"
+            for i in range(20000)
+        ]
+
+        started = time.perf_counter()
+        scrubbed = scrubber.scrub_many(comments)
+        per_second = len(comments) / (time.perf_counter() - started)
+
+        print(f"PII scrubbing: {per_second:,.0f} comments/sec")
+        assert "[电话]" in scrubbed[0] and "[姓名]先生" in scrubbed[0]
+        # 100k comments in a few seconds even on a slow CI runner
+        assert per_second > 20000
+
+
+def survey_responses(count, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 11, count)
+    return [
+        {
+            "response_id": f"r{i}",
+            "nps_score": int(scores[i]),
+            "product_line": ["安慕希", "金典", "舒化"][i % 3],
+            "customer_segment": "会员" if i % 2 else None,
+            "channel": "线上",
+            "timestamp": datetime(2024, 1 + i % 3, 1 + i % 28, 10)
+        }
+        for i in range(count)
+    ]
+
+
+class TestQuantitativeEngine:
+    """Test the vectorized NPS statistics in A1"""
+
+    def test_metrics_and_segments_match_naive_counts(self):
+        agent = QuantitativeAnalysisAgent(agent_id="A1", agent_name="Quantitative")
+        responses = survey_responses(300)
+        scores, groups, timestamps = agent._response_columns(responses)
+        cube = NPSCube.from_columns(scores, groups, timestamps)
+
+        metrics = agent._calculate_nps_metrics(cube.total)
+        promoters = sum(1 for r in responses if r["nps_score"] >= 9)
+        detractors = sum(1 for r in responses if r["nps_score"] <= 6)
+        assert metrics["promoters_count"] == promoters
+        assert metrics["detractors_count"] == detractors
+        assert metrics["nps_score"] == pytest.approx((promoters - detractors) / 3)
+
+        histograms = {attribute: cube.rollup(attribute) for attribute in ("product_line", "channel")}
+        histograms["customer_segment"] = {"会员": cube.rollup(customer_segment="会员")[()]}
+        results = segment_statistics(histograms, resamples=500, seed=1)
+        product = results["product_line"]["segments"]["金典"]
+        subset = [r["nps_score"] for r in responses if r["product_line"] == "金典"]
+        assert product["count"] == len(subset)
+        assert product["promoters"] == sum(1 for s in subset if s >= 9)
+        assert product["ci"][0] <= product["nps"] <= product["ci"][1]
+        assert set(product["vs_rest"]) == {"difference", "p_value", "significant"}
+        assert results["product_line"]["test"]["test"] == "chi-square"
+        # A single segment has nothing to be compared with
+        assert "vs_rest" not in results["customer_segment"]["segments"]["会员"]
+        assert results["channel"]["test"] is None
+
+    @pytest.mark.asyncio
+    async def test_segment_analysis_includes_periods_and_tests(self):
+        agent = QuantitativeAnalysisAgent(agent_id="A1", agent_name="Quantitative", bootstrap_resamples=200)
+        scores, groups, timestamps = agent._response_columns(survey_responses(90))
+        segments = await agent._analyze_segments(NPSCube.from_columns(scores, groups, timestamps), scores)
+
+        assert list(segments["by_period"]) == ["2024-01", "2024-02", "2024-03"]
+        assert segments["by_period"]["2024-02"]["count"] == 30
+        assert set(segments["segment_tests"]) == {"by_product", "by_period"}
+        assert sum(segments["score_distribution"].values()) == 90
+
+    def test_bootstrap_is_reproducible_with_a_seed(self):
+        scores = np.array([r["nps_score"] for r in survey_responses(200)])
+
+        first = statistical_tests(scores, resamples=1000, seed=7)
+        second = statistical_tests(scores, resamples=1000, seed=7)
+
+        assert first == second
+        ci = first["bootstrap_ci"]
+        nps = (np.count_nonzero(scores >= 9) - np.count_nonzero(scores <= 6)) / 2
+        assert ci["lower"] < nps < ci["upper"]
+        assert ci["resamples"] == 1000
+
+    @pytest.mark.performance
+    def test_segment_statistics_throughput(self):
+        count = 200000
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 11, count)
+        groups = {
+            "product_line": (rng.integers(-1, 20, count).astype(np.int32), [f"p{i}" for i in range(20)]),
+            "channel": (rng.integers(0, 5, count).astype(np.int32), [f"c{i}" for i in range(5)])
+        }
+        timestamps = rng.uniform(1.7e9, 1.71e9, count)
+
+        started = time.perf_counter()
+        cube = NPSCube.from_columns(scores, groups, timestamps)
+        histograms = {
+            attribute: {value: counts for value, counts in cube.rollup(attribute).items() if value}
+            for attribute in groups
+        }
+        results = segment_statistics(histograms, resamples=2000, seed=0)
+        seconds = time.perf_counter() - started
+
+        print(f"Segment statistics: {count:,} responses, 25 segments in {seconds:.3f}s")
+        assert len(results["product_line"]["segments"]) == 20
+        assert seconds < 2
+
+
+def naive_rule_analysis(agent, text):
+    """Tags, sentiment counts and emotion counts with one substring test per keyword"""
+    tags = {category for category, keywords in agent.product_tags.items() if any(k in text for k in keywords)}
+    tags |= {f"产品_{p}" for p in agent.products if p in text}
+    tags |= {f"竞品_{c}" for c in agent.competitors if c in text}
+    polarity = {label: sum(1 for w in words if w in text) for label, words in agent.emotion_words.items()}
+    negated = any(n in text for n in agent.negations)
+    emotions = {emotion: sum(1 for k in keywords if k in text) for emotion, keywords in agent.emotion_keywords.items()}
+    return tags, polarity, negated, emotions
+
+
+def make_comments(count, seed=0):
+    rng = np.random.default_rng(seed)
+    fragments = [
+        "安慕希口感很好", "包装也不错", "物流太慢了", "价格有点贵", "孩子很喜欢", "质量一般", "客服态度差",
+        "会继续购买", "比蒙牛好喝", "有点失望", "没想到这么难喝", "担心不安全？", "QQ星期待新口味", "君乐宝更划算！"
+    ]
+    return ["，".join(rng.choice(fragments, rng.integers(1, 7))) for _ in range(count)]
+
+
+class TestKeywordMatcher:
+    """Test the Aho-Corasick keyword engine shared by A2's tagging and sentiment"""
+
+    def test_finds_overlapping_hits_with_positions(self):
+        matcher = KeywordMatcher({"words": {"a": ["不", "不满", "满意", "QQ星"], "b": ["满意"]}})
+
+        assert matcher.find_all("很不满意QQ星") == [
+            KeywordHit(1, 2, "不"), KeywordHit(1, 3, "不满"), KeywordHit(2, 4, "满意"), KeywordHit(4, 7, "QQ星")
+        ]
+        assert matcher.keywords("不满意") == ["不", "不满", "满意"]
+        assert matcher.match("满意") == {"words": {"a": ["满意"], "b": ["满意"]}}
+        assert matcher.match("没有") == {}
+
+    def test_agent_lexicons_match_substring_tests(self):
+        agent = QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative")
+
+        for text in make_comments(500):
+            tags, polarity, negated, emotions = naive_rule_analysis(agent, text)
+            matches = agent.keyword_matcher.match(text)
+
+            assert set(agent._extract_tags(text, matches)) == tags
+            assert {label: len(words) for label, words in matches.get("sentiment", {}).items()} == \
+                {label: count for label, count in polarity.items() if count}
+            assert ("negation" in matches) == negated
+            assert {emotion: len(words) for emotion, words in matches.get("emotion", {}).items()} == \
+                {emotion: count for emotion, count in emotions.items() if count}
+
+    @pytest.mark.performance
+    def test_single_scan_throughput(self):
+        agent = QualitativeAnalysisAgent(agent_id="A2", agent_name="Qualitative")
+        comments = make_comments(50000)
+
+        started = time.perf_counter()
+        for text in comments:
+            naive_rule_analysis(agent, text)
+        naive_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for text in comments:
+            matches = agent.keyword_matcher.match(text)
+            agent._extract_tags(text, matches)
+            agent._analyze_sentiment(text, matches)
+            agent._analyze_emotions(text, matches)
+        seconds = time.perf_counter() - started
+
+        print(
+            f"Keyword analysis of {len(comments):,} comments: "
+            f"{naive_seconds:.2f}s per-keyword scans, {seconds:.2f}s single scan"
+        )
+        assert seconds < naive_seconds
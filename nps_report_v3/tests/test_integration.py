@@ -316,7 +316,7 @@ class TestEndToEndWorkflow:
 
                     # Validate workflow completion
                     assert final_state["workflow_phase"] == "completed"
-                    assert final_state["workflow_id"] == "integration_test_001"
+                    assert final_state["workflow_id"].startswith("integration_test_001_")
                     assert "completion_time" in final_state
 
                     # Validate foundation pass results
@@ -0,0 +1,88 @@
+"""Unit tests for the copy-free layered workflow state"""
+
+import pickle
+import tracemalloc
+
+import pytest
+
+from nps_report_v3.state import LayeredState, StateView
+
+
+def make_state():
+    return LayeredState(
+        {"workflow_id": "wf-1", "raw_data": [1, 2, 3], "language": "zh"},
+        protected=["workflow_id", "raw_data"]
+    )
+
+
+class TestLayeredState:
+    """Test commit semantics, views and copy-on-write"""
+
+    def test_commit_matches_whole_dict_merge(self):
+        state = make_state()
+        first = {"nps_metrics": {"nps": 10}, "language": "en"}
+        second = {"nps_metrics": {"nps": 20}, "workflow_id": "hijacked", "tagged_responses": []}
+
+        state.commit("A1", first)
+        state.commit("A2", second)
+
+        expected = {"workflow_id": "wf-1", "raw_data": [1, 2, 3], "language": "zh"}
+        expected = {**expected, **first}
+        expected = {**expected, **second, "workflow_id": "wf-1", "raw_data": [1, 2, 3]}
+        assert state.to_dict() == expected
+        assert state.namespaces["A2"] is second
+
+    def test_view_is_a_read_only_snapshot(self):
+        state = make_state()
+        state.commit("A0", {"cleaned_data": {"rows": 3}})
+        view = state.view(exclude=["raw_data"])
+
+        state.commit("A1", {"cleaned_data": {"rows": 4}})
+        state["language"] = "en"
+
+        assert view["cleaned_data"] == {"rows": 3}
+        assert view["language"] == "zh"
+        assert "raw_data" not in view
+        assert state["language"] == "en"
+        with pytest.raises(TypeError):
+            view["cleaned_data"] = None
+
+    def test_recommit_replaces_namespace(self):
+        state = make_state()
+        state.commit("A1", {"nps_metrics": 1})
+        state.commit("A2", {"tagged_responses": []})
+        state.commit("A1", {"statistical_analysis": 2})
+
+        assert "nps_metrics" not in state
+        assert state["statistical_analysis"] == 2
+        assert state["tagged_responses"] == []
+
+    def test_extend_and_flatten_nested_views(self):
+        state = make_state()
+        state.commit("A1", {"nps_metrics": 1})
+        state["pass1_foundation"] = state.view(exclude=["raw_data"])
+
+        extended = state["pass1_foundation"].extend(confidence_assessment={"score": 0.8})
+        flat = state.to_dict()
+
+        assert isinstance(extended, StateView)
+        assert "confidence_assessment" not in state["pass1_foundation"]
+        assert extended["confidence_assessment"] == {"score": 0.8}
+        assert type(flat["pass1_foundation"]) is dict
+        assert pickle.loads(pickle.dumps(flat)) == flat
+
+    @pytest.mark.performance
+    def test_commits_and_snapshots_do_not_copy_responses(self):
+        responses = [{"response_id": str(i), "comment": "很好喝" * 10} for i in range(50000)]
+        outputs = {f"A{i}": {f"key_{i}": responses} for i in range(18)}
+        state = make_state()
+
+        tracemalloc.start()
+        for agent_id, data in outputs.items():
+            state.commit(agent_id, data)
+            state.view()
+        state["pass1_foundation"] = state.view(exclude=["raw_data"])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert peak < 64 * 1024
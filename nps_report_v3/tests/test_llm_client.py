@@ -2,6 +2,8 @@
 
 import pytest
 import asyncio
+import time
+import numpy as np
 from unittest.mock import MagicMock, AsyncMock, patch
 from datetime import datetime, timedelta
 
@@ -10,6 +12,9 @@ from nps_report_v3.llm.client import (
     AzureOpenAIClient, YiliGatewayClient,
     LLMClientWithFailover, create_llm_client
 )
+from nps_report_v3.cache.llm_response_cache import LLMResponseCache, normalize_prompt
+from nps_report_v3.cache.embedding_store import EmbeddingStore
+from nps_report_v3.utils.deadline import Deadline, DeadlineExceeded, use_deadline
 
 
 class MockLLMClient(LLMClient):
@@ -95,7 +100,8 @@ class TestLLMClient:
         assert key1 == key2  # Same prompt should generate same key
         assert key1 != key3  # Different prompts should have different keys
 
-    def test_cache_save_and_retrieve(self):
+    @pytest.mark.asyncio
+    async def test_cache_save_and_retrieve(self):
         config = LLMConfig("test", "key", "base")
         client = MockLLMClient(config)
 
@@ -108,16 +114,17 @@ class TestLLMClient:
         )
 
         # Save to cache
-        client._save_to_cache(prompt, response, ttl_seconds=3600)
+        await client._save_to_cache(prompt, response, ttl_seconds=3600)
 
         # Retrieve from cache
-        cached = client._get_from_cache(prompt)
+        cached = await client._get_from_cache(prompt)
 
         assert cached is not None
         assert cached.content == "Test response"
         assert cached.cached is True
 
-    def test_cache_expiration(self):
+    @pytest.mark.asyncio
+    async def test_cache_expiration(self):
         config = LLMConfig("test", "key", "base")
         client = MockLLMClient(config)
 
@@ -130,10 +137,10 @@ class TestLLMClient:
         )
 
         # Save with immediate expiration
-        client._save_to_cache(prompt, response, ttl_seconds=0)
+        await client._save_to_cache(prompt, response, ttl_seconds=0)
 
         # Should not retrieve expired item
-        cached = client._get_from_cache(prompt)
+        cached = await client._get_from_cache(prompt)
         assert cached is None
 
     @pytest.mark.asyncio
@@ -172,6 +179,148 @@ class TestLLMClient:
         assert client.call_count == 2
 
 
+class TestLLMResponseCache:
+    """Test persistent, content-addressed response cache"""
+
+    def test_key_includes_generation_parameters(self):
+        client = MockLLMClient(LLMConfig("model-a", "key", "base"))
+
+        base_key = client._get_cache_key("Hello")
+        assert client._get_cache_key("Hello", temperature=0.7) != base_key
+        assert client._get_cache_key("Hello", max_tokens=10) != base_key
+
+        other_model = MockLLMClient(LLMConfig("model-b", "key", "base"))
+        assert other_model._get_cache_key("Hello") != base_key
+
+    def test_prompt_normalization(self):
+        client = MockLLMClient(LLMConfig("test", "key", "base"))
+
+        assert normalize_prompt("  a  \r\nb \n") == "a\nb"
+        assert client._get_cache_key("\nHello  \n") == client._get_cache_key("Hello")
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path):
+        db_path = str(tmp_path / "llm.sqlite3")
+        config = LLMConfig("test", "key", "base")
+
+        first = MockLLMClient(config)
+        first.cache = LLMResponseCache(path=db_path)
+        await first.generate_with_retry("Persist me")
+        first.cache.close()
+
+        second = MockLLMClient(config)
+        second.cache = LLMResponseCache(path=db_path)
+        response = await second.generate_with_retry("Persist me")
+
+        assert second.call_count == 0
+        assert response.cached is True
+        assert second.cache.get_stats()["hits"] == 1
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = LLMResponseCache(max_bytes=200)
+
+        cache.set("old", {"content": "x" * 80})
+        cache.set("new", {"content": "y" * 80})
+        cache.get("old")  # touch so "new" becomes the LRU entry
+        cache.set("newest", {"content": "z" * 80})
+
+        assert cache.get("new") is None
+        assert cache.get("old") is not None
+        assert cache.stats.evictions >= 1
+
+    @pytest.mark.asyncio
+    async def test_failover_shares_cache(self):
+        shared = LLMResponseCache()
+        primary = MockLLMClient(LLMConfig("primary", "key", "base"), should_fail=True)
+        backup = MockLLMClient(LLMConfig("backup", "key", "base"))
+
+        client = LLMClientWithFailover(primary, backup, response_cache=shared)
+        await client.generate("Shared prompt")
+        response = await client.generate("Shared prompt")
+
+        assert response.cached is True
+        assert backup.call_count == 1
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_prompts_coalesce(self):
+        primary = MockLLMClient(LLMConfig("coalesce", "key", "base"))
+        client = LLMClientWithFailover(primary, None, response_cache=LLMResponseCache())
+
+        responses = await asyncio.gather(*[client.generate("Burst prompt") for _ in range(5)])
+
+        assert primary.call_count == 1
+        assert all(r.content == "Mock response to: Burst prompt" for r in responses)
+
+
+class BatchEmbedClient(MockLLMClient):
+    """Mock client that records batched embedding requests"""
+
+    def __init__(self, config: LLMConfig, embedding_store=None):
+        super().__init__(config)
+        if embedding_store is not None:
+            self.embedding_store = embedding_store
+        self.batches = []
+
+    async def _embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+
+class TestEmbedMany:
+    """Test batched, deduplicated and persisted embeddings"""
+
+    @pytest.mark.asyncio
+    async def test_deduplicates_and_preserves_order(self):
+        client = BatchEmbedClient(LLMConfig("embed", "key", "base"))
+
+        vectors = await client.embed_many(["a", "bbb", "a", "cc", "bbb"])
+
+        assert vectors.shape == (5, 3)
+        assert vectors.dtype == np.float32
+        assert vectors[:, 0].tolist() == [1.0, 3.0, 1.0, 2.0, 3.0]
+        assert sum(len(b) for b in client.batches) == 3
+
+    @pytest.mark.asyncio
+    async def test_chunks_by_batch_size_and_tokens(self):
+        client = BatchEmbedClient(LLMConfig("embed", "key", "base"))
+        texts = [f"{i:02d}" + "很" * 8 for i in range(10)]
+
+        await client.embed_many(texts, batch_size=4, token_limit=1000)
+        assert [len(b) for b in client.batches] == [4, 4, 2]
+
+        client = BatchEmbedClient(LLMConfig("embed", "key", "base"))
+        await client.embed_many(texts, batch_size=100, token_limit=25)
+        assert [len(b) for b in client.batches] == [2, 2, 2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_store_persists_across_clients(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite3")
+        texts = ["口感很好", "价格太贵", "包装不错"]
+
+        first = BatchEmbedClient(LLMConfig("embed", "key", "base"), EmbeddingStore(path, "float16"))
+        expected = await first.embed_many(texts)
+        first.embedding_store.close()
+
+        second = BatchEmbedClient(LLMConfig("embed", "key", "base"), EmbeddingStore(path, "float16"))
+        vectors = await second.embed_many(texts + ["新的评论"])
+
+        assert second.batches == [["新的评论"]]
+        assert np.allclose(vectors[:3], expected)
+
+    @pytest.mark.asyncio
+    async def test_store_is_keyed_by_model(self):
+        store = EmbeddingStore()
+        first = BatchEmbedClient(LLMConfig("embed", "key", "base"), store)
+        await first.embed_many(["same text"])
+
+        other_config = LLMConfig("embed", "key", "base", embedding_model="text-embedding-3-large")
+        second = BatchEmbedClient(other_config, store)
+        await second.embed_many(["same text"])
+
+        assert second.batches == [["same text"]]
+
+
 class TestAzureOpenAIClient:
     """Test Azure OpenAI client"""
 
@@ -298,7 +447,7 @@ class TestLLMClientWithFailover:
 
         client = LLMClientWithFailover(primary, backup)
 
-        with pytest.raises(Exception, match="Backup client also failed"):
+        with pytest.raises(Exception, match="Mock generation failure"):
             await client.generate("Test prompt")
 
     @pytest.mark.asyncio
@@ -317,6 +466,221 @@ class TestLLMClientWithFailover:
         assert embedding[0] == 0.1
 
 
+class DelayedMockClient(MockLLMClient):
+    """Mock client answering after a fixed delay"""
+
+    def __init__(self, config: LLMConfig, delay: float, should_fail: bool = False):
+        super().__init__(config, should_fail)
+        self.delay = delay
+        self.cancelled = 0
+
+    async def generate(self, prompt: str, **kwargs) -> LLMResponse:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return await super().generate(prompt, **kwargs)
+
+
+class TestHedgingAndRouting:
+    """Test hedged requests and latency-aware routing"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_fires_after_delay_and_cancels_loser(self):
+        primary = DelayedMockClient(LLMConfig("slow", "key", "base"), delay=5)
+        backup = DelayedMockClient(LLMConfig("fast", "key", "base"), delay=0.01)
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(),
+            enable_hedging=True, hedge_delay_ms=50
+        )
+
+        started = time.monotonic()
+        response = await client.generate("Hedge me")
+
+        assert time.monotonic() - started < 1
+        assert response.model == "fast"
+        assert primary.cancelled == 1
+        assert client.routing_metrics == {"hedges_fired": 1, "hedges_won": 1}
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_first_answers_in_time(self):
+        primary = DelayedMockClient(LLMConfig("primary", "key", "base"), delay=0.01)
+        backup = DelayedMockClient(LLMConfig("backup", "key", "base"), delay=0.01)
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(),
+            enable_hedging=True, hedge_delay_ms=1000
+        )
+
+        response = await client.generate("Quick")
+
+        assert response.model == "primary"
+        assert backup.call_count == 0
+        assert client.routing_metrics["hedges_fired"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_uses_rolling_p95(self):
+        primary = DelayedMockClient(LLMConfig("primary", "key", "base"), delay=0.2)
+        backup = DelayedMockClient(LLMConfig("backup", "key", "base"), delay=0.01)
+        for _ in range(10):
+            primary.latency_stats.record_success(20)
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(),
+            enable_hedging=True, hedge_delay_ms=60000
+        )
+
+        response = await client.generate("Use p95")
+
+        assert response.model == "backup"
+
+    @pytest.mark.asyncio
+    async def test_latency_routing_prefers_faster_provider(self):
+        primary = MockLLMClient(LLMConfig("primary", "key", "base"))
+        backup = MockLLMClient(LLMConfig("backup", "key", "base"))
+        primary.latency_stats.record_success(4000)
+        backup.latency_stats.record_success(500)
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(), latency_routing=True
+        )
+
+        response = await client.generate("Route me")
+
+        assert response.model == "backup"
+        assert primary.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_latency_routing_falls_through_on_error(self):
+        primary = MockLLMClient(LLMConfig("primary", "key", "base"), should_fail=True)
+        backup = MockLLMClient(LLMConfig("backup", "key", "base"))
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(), latency_routing=True
+        )
+
+        response = await client.generate("Fall through")
+
+        assert response.model == "backup"
+        assert primary.latency_stats.error_rate() == 1.0
+        assert client.get_routing_metrics()["providers"]["backup"]["samples"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_penalty_decays_so_provider_is_reprobed(self):
+        primary = MockLLMClient(LLMConfig("primary", "key", "base"))
+        backup = MockLLMClient(LLMConfig("backup", "key", "base"))
+        primary.latency_stats.record_success(200)
+        primary.latency_stats.record_failure(30000)
+        backup.latency_stats.record_success(500)
+        client = LLMClientWithFailover(
+            primary, backup, response_cache=LLMResponseCache(), latency_routing=True
+        )
+
+        assert (await client.generate("Right after the outage")).model == "backup"
+
+        # Several idle half-lives later the penalty has worn off
+        primary.latency_stats.updated_at -= 10 * primary.latency_stats.penalty_half_life
+        assert primary.latency_stats.score() < backup.latency_stats.score()
+        assert (await client.generate("Later")).model == "primary"
+
+
+class StreamingMockClient(MockLLMClient):
+    """Mock client streaming its answer in fixed pieces"""
+
+    def __init__(self, config: LLMConfig, pieces, fail_after=None):
+        super().__init__(config)
+        self.pieces = pieces
+        self.fail_after = fail_after
+        self.streams = 0
+
+    async def _stream(self, prompt, usage, **kwargs):
+        self.streams += 1
+        for i, piece in enumerate(self.pieces):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise Exception("Mock stream failure")
+            yield piece
+
+
+class TestGenerateStream:
+    """Test streaming generation with caching and usage accounting"""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_deltas_then_caches(self):
+        client = StreamingMockClient(LLMConfig("stream", "key", "base"), ["总体", "判断：", "良好"])
+
+        deltas = [d async for d in client.generate_stream("Summarize")]
+        assert deltas == ["总体", "判断：", "良好"]
+        assert client.call_count == 1
+        assert client.total_tokens > 0
+
+        replay = [d async for d in client.generate_stream("Summarize")]
+        assert replay == ["总体判断：良好"]
+        assert client.streams == 1
+
+        cached = await client.generate_with_retry("Summarize")
+        assert cached.cached is True
+        assert cached.content == "总体判断：良好"
+
+    @pytest.mark.asyncio
+    async def test_failover_stream_skips_provider_failing_before_first_delta(self):
+        primary = StreamingMockClient(LLMConfig("primary", "key", "base"), ["a"], fail_after=0)
+        backup = StreamingMockClient(LLMConfig("backup", "key", "base"), ["b", "c"])
+        client = LLMClientWithFailover(primary, backup, response_cache=LLMResponseCache())
+
+        deltas = [d async for d in client.generate_stream("Stream")]
+
+        assert deltas == ["b", "c"]
+        assert backup.call_count == 1
+        assert (await client.generate("Stream")).content == "bc"
+
+    @pytest.mark.asyncio
+    async def test_failover_stream_raises_mid_stream_failure(self):
+        primary = StreamingMockClient(LLMConfig("primary", "key", "base"), ["a", "b"], fail_after=1)
+        backup = StreamingMockClient(LLMConfig("backup", "key", "base"), ["c"])
+        client = LLMClientWithFailover(primary, backup, response_cache=LLMResponseCache())
+
+        deltas = []
+        with pytest.raises(Exception, match="Mock stream failure"):
+            async for delta in client.generate_stream("Broken"):
+                deltas.append(delta)
+
+        assert deltas == ["a"]
+        assert backup.streams == 0
+        assert primary.latency_stats.error_rate() == 1.0
+        assert primary.latency_stats.first_token_p95() is not None
+
+    @pytest.mark.asyncio
+    async def test_stream_records_time_to_first_token(self):
+        client = StreamingMockClient(LLMConfig("stream", "key", "base"), ["a", "b"])
+
+        deltas = [d async for d in client.generate_stream("Time me")]
+
+        assert deltas == ["a", "b"]
+        stats = client.latency_stats.to_dict()
+        assert stats["first_token_p95_ms"] is not None
+        assert stats["first_token_p95_ms"] <= stats["p95_ms"]
+        assert stats["error_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_stalled_stream_is_cut_off_by_deadline(self):
+        class StalledStreamClient(StreamingMockClient):
+            async def _stream(self, prompt, usage, **kwargs):
+                yield "a"
+                await asyncio.sleep(5)
+                yield "b"
+
+        client = StalledStreamClient(LLMConfig("stall", "key", "base"), [])
+        started = time.perf_counter()
+
+        deltas = []
+        with use_deadline(Deadline(0.1)):
+            with pytest.raises(DeadlineExceeded):
+                async for delta in client.generate_stream("Stall"):
+                    deltas.append(delta)
+
+        assert deltas == ["a"]
+        assert time.perf_counter() - started < 1.0
+        assert client.latency_stats.error_rate() == 0.0
+        assert client.governor.get_limiter(client.provider_name).in_flight == 0
+
+
 class TestCreateLLMClient:
     """Test factory function"""
 
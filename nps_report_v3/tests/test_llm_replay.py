@@ -0,0 +1,113 @@
+"""Unit tests for record/replay LLM clients"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.config.settings import Settings
+from nps_report_v3.llm.client import LLMConfig, LLMClientWithFailover, create_llm_client
+from nps_report_v3.llm.replay import (
+    LLMFixtureStore, RecordingLLMClient, ReplayLLMClient,
+    ReplayMiss, InjectedLLMError
+)
+from nps_report_v3.utils.async_helpers import is_overload_error
+from nps_report_v3.tests.test_llm_client import MockLLMClient
+
+
+@pytest.fixture
+def fixture_path(tmp_path):
+    return str(tmp_path / "fixtures" / "llm.jsonl")
+
+
+async def record(fixture_path, prompts):
+    """Record mock completions for ``prompts`` into a fresh store"""
+    inner = MockLLMClient(LLMConfig("mock-model", "key", "base"))
+    recorder = RecordingLLMClient(inner, LLMFixtureStore(fixture_path))
+    for prompt in prompts:
+        await recorder.generate(prompt)
+    await recorder.embed("好喝")
+    return inner
+
+
+class TestRecordReplay:
+    """Test round-tripping interactions through the fixture store"""
+
+    @pytest.mark.asyncio
+    async def test_replay_serves_recorded_response(self, fixture_path):
+        inner = await record(fixture_path, ["分析评论：好喝", "分析评论：太贵"])
+        assert inner.call_count == 2
+
+        replay = ReplayLLMClient(LLMFixtureStore(fixture_path), latency_model="none")
+        response = await replay.generate("  分析评论：太贵\n")
+
+        assert response.content == "Mock response to: 分析评论：太贵"
+        assert response.usage["total_tokens"] == 30
+        assert response.metadata["replayed"] is True
+        assert await replay.embed("好喝") == [0.1] * 1536
+        assert replay.replay_stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_policies(self, fixture_path):
+        await record(fixture_path, ["已录制"])
+
+        strict = ReplayLLMClient(LLMFixtureStore(fixture_path), latency_model="none")
+        with pytest.raises(ReplayMiss):
+            await strict.generate("未录制")
+
+        lenient = ReplayLLMClient(
+            LLMFixtureStore(fixture_path), latency_model="none",
+            miss_policy="default", default_content="[]", embedding_dim=8
+        )
+        response = await lenient.generate("未录制")
+        vector = await lenient.embed("未录制文本")
+
+        assert response.content == "[]"
+        assert len(vector) == 8
+        assert vector == await lenient.embed("未录制文本")
+
+    @pytest.mark.asyncio
+    async def test_fixed_latency_is_simulated(self, fixture_path):
+        await record(fixture_path, ["延迟"])
+        replay = ReplayLLMClient(LLMFixtureStore(fixture_path), latency_model="fixed", latency_ms=50)
+
+        start = time.time()
+        await replay.generate("延迟")
+
+        assert time.time() - start >= 0.045
+
+    @pytest.mark.asyncio
+    async def test_injected_failures_look_like_overload(self, fixture_path):
+        await record(fixture_path, ["失败"])
+        replay = ReplayLLMClient(
+            LLMFixtureStore(fixture_path), latency_model="none",
+            failure_rate=1.0, failure_status_codes=[429], seed=7
+        )
+
+        with pytest.raises(InjectedLLMError) as exc_info:
+            await replay.generate("失败")
+
+        assert exc_info.value.status_code == 429
+        assert is_overload_error(exc_info.value)
+        assert replay.replay_stats["injected_failures"] == 1
+
+
+class TestReplayFactory:
+    """Test selecting replay mode through settings"""
+
+    @pytest.mark.asyncio
+    async def test_create_llm_client_in_replay_mode(self, fixture_path):
+        await record(fixture_path, ["工厂"])
+        settings = Settings(
+            llm_mode="replay",
+            llm_fixture_path=fixture_path,
+            llm_replay_latency_model="none",
+            enable_cache=False
+        )
+
+        with patch("nps_report_v3.llm.client.get_settings", return_value=settings):
+            client = create_llm_client()
+
+        assert isinstance(client, LLMClientWithFailover)
+        assert isinstance(client.primary_client, ReplayLLMClient)
+        assert (await client.generate("工厂")).content == "Mock response to: 工厂"
@@ -0,0 +1,231 @@
+"""Tests for the mergeable NPS aggregate cube and its SQLite store"""
+
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus
+from nps_report_v3.agents.foundation.A1_quantitative_agent import QuantitativeAnalysisAgent
+from nps_report_v3.cache import NPSCubeStore
+from nps_report_v3.state import NPSCube
+from nps_report_v3.state.nps_cube import summarize
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+
+def survey_columns(count, seed=0, products=("安慕希", "金典", "舒化")):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 11, count)
+    timestamps = np.array([datetime(2024, 1 + i % 3, 1 + i % 28, 12).timestamp() for i in range(count)])
+    timestamps[::10] = np.nan
+    groups = {
+        "product_line": (rng.integers(-1, len(products), count).astype(np.int32), list(products)),
+        "channel": (rng.integers(0, 2, count).astype(np.int32), ["线上", "线下"])
+    }
+    return scores, groups, timestamps
+
+
+def histogram(scores):
+    return np.bincount(scores, minlength=11)
+
+
+class TestNPSCube:
+    """Test folding, merging and roll-ups"""
+
+    def test_rollups_match_raw_counts(self):
+        scores, groups, timestamps = survey_columns(2000)
+        cube = NPSCube.from_columns(scores, groups, timestamps)
+        products = groups["product_line"][0]
+
+        assert cube.responses == 2000
+        assert np.array_equal(cube.total, histogram(scores))
+        by_product = cube.rollup("product_line")
+        assert np.array_equal(by_product["金典"], histogram(scores[products == 1]))
+        assert np.array_equal(by_product[None], histogram(scores[products == -1]))
+
+        by_month = cube.rollup("month")
+        assert list(by_month) == [None, "2024-01", "2024-02", "2024-03"]
+        assert by_month[None].sum() == 200
+
+        online = cube.rollup(["product_line", "week"], channel="线上")
+        assert sum(counts.sum() for counts in online.values()) == np.count_nonzero(groups["channel"][0] == 0)
+        assert ("安慕希", "2024-01-01") in online
+
+    def test_time_windows(self):
+        scores, groups, timestamps = survey_columns(900)
+        cube = NPSCube.from_columns(scores, groups, timestamps)
+        days = np.array([datetime.fromtimestamp(t).date() if t == t else None for t in timestamps])
+
+        assert cube.days() == (date(2024, 1, 1), date(2024, 3, 28))
+        in_february = np.array([d is not None and d.month == 2 for d in days])
+        assert np.array_equal(
+            cube.rollup(since="2024-02-01", until=date(2024, 2, 29))[()],
+            histogram(scores[in_february])
+        )
+        trailing = np.array([d is not None and d > date(2024, 3, 18) for d in days])
+        assert np.array_equal(cube.rollup(last_days=10)[()], histogram(scores[trailing]))
+
+        with pytest.raises(ValueError, match="Unknown cube dimension"):
+            cube.rollup("region")
+
+    def test_merged_cubes_equal_one_cube(self):
+        scores, groups, timestamps = survey_columns(1000)
+        whole = NPSCube.from_columns(scores, groups, timestamps)
+
+        # Second half lists its products in another order
+        first = NPSCube.from_columns(scores[:600], {k: (c[:600], v) for k, (c, v) in groups.items()}, timestamps[:600])
+        codes, values = groups["product_line"]
+        reorder = np.array([2, 1, 0])
+        second_groups = {
+            "product_line": (np.where(codes[600:] >= 0, reorder[codes[600:]], -1).astype(np.int32), values[::-1]),
+            "channel": (groups["channel"][0][600:], groups["channel"][1])
+        }
+        first.merge(NPSCube.from_columns(scores[600:], second_groups, timestamps[600:]))
+
+        for by in ("product_line", ["channel", "day"]):
+            merged, expected = first.rollup(by), whole.rollup(by)
+            assert merged.keys() == expected.keys()
+            assert all(np.array_equal(merged[key], expected[key]) for key in expected)
+
+    def test_summarize(self):
+        summary = summarize(histogram(np.array([10, 9, 8, 3])))
+
+        assert summary == {
+            "nps": 25.0, "count": 4, "promoters": 2, "passives": 1, "detractors": 1,
+            "promoters_percentage": 50.0, "passives_percentage": 25.0, "detractors_percentage": 25.0
+        }
+
+    @pytest.mark.performance
+    def test_rollups_are_independent_of_response_count(self):
+        count = 1_000_000
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 11, count)
+        groups = {
+            "product_line": (rng.integers(0, 20, count).astype(np.int32), [f"p{i}" for i in range(20)]),
+            "channel": (rng.integers(0, 4, count).astype(np.int32), [f"c{i}" for i in range(4)])
+        }
+        timestamps = rng.uniform(1.70e9, 1.70e9 + 365 * 86400, count)
+
+        started = time.perf_counter()
+        cube = NPSCube.from_columns(scores, groups, timestamps)
+        built = time.perf_counter() - started
+
+        started = time.perf_counter()
+        weekly = cube.rollup(["product_line", "week"], last_days=90)
+        by_product = cube.rollup("product_line", channel="c1")
+        queried = time.perf_counter() - started
+
+        print(f"NPS cube: {count:,} responses -> {len(cube):,} cells in {built:.3f}s, roll-ups in {queried * 1000:.1f}ms")
+        assert len(by_product) == 20 and len(weekly) >= 20 * 13
+        assert queried < 0.5
+
+
+def response_ids(count, prefix="r"):
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def a1_responses(count):
+    return [
+        {"response_id": f"r{i}", "nps_score": 1 + i % 10, "product_line": "金典", "timestamp": datetime(2024, 5, 1 + i % 5)}
+        for i in range(count)
+    ]
+
+
+class TestNPSCubeStore:
+    """Test persistence, per-response deduplication and cross-worker reads"""
+
+    def test_fold_is_idempotent_per_response(self, tmp_path):
+        store = NPSCubeStore(str(tmp_path / "cube.sqlite3"))
+        scores, groups, timestamps = survey_columns(600)
+        first = {name: (codes[:500], values) for name, (codes, values) in groups.items()}
+
+        assert store.fold("s1", response_ids(500), scores[:500], first, timestamps[:500]) == 500
+        assert store.fold("s1", response_ids(500), scores[:500], first, timestamps[:500]) == 0
+
+        # Resubmitted with appended responses: only the new ones are added
+        assert store.fold("s1", response_ids(600), scores, groups, timestamps) == 100
+        assert store.has_response("s1", "r599")
+        assert not store.has_response("s2", "r599")
+
+        whole = NPSCube.from_columns(scores, groups, timestamps)
+        assert np.array_equal(store.cube().total, whole.total)
+        assert store.cube().rollup("product_line").keys() == whole.rollup("product_line").keys()
+        store.close()
+
+        reopened = NPSCubeStore(str(tmp_path / "cube.sqlite3"))
+        assert reopened.cube().responses == 600
+        assert np.array_equal(reopened.cube().rollup("month")["2024-02"], whole.rollup("month")["2024-02"])
+
+    def test_repeated_ids_within_a_fold_count_once(self):
+        store = NPSCubeStore()
+        scores, groups, timestamps = survey_columns(4)
+
+        assert store.fold("s", ["a", "b", "a", "c"], scores, groups, timestamps) == 3
+        assert np.array_equal(store.cube().total, histogram(scores[[0, 1, 3]]))
+
+        with pytest.raises(ValueError, match="response ids"):
+            store.fold("s", ["a"], scores, groups, timestamps)
+
+    def test_overlapping_positional_ids_of_distinct_surveys_all_count(self):
+        store = NPSCubeStore()
+        first = survey_columns(100, seed=1)
+        second = survey_columns(100, seed=2, products=("QQ星",))
+
+        assert store.fold("s1", response_ids(100, "resp_"), *first) == 100
+        assert store.fold("s2", response_ids(100, "resp_"), *second) == 100
+        assert store.cube().responses == 200
+        assert store.cube().rollup("product_line")["QQ星"].sum() == NPSCube.from_columns(*second).rollup(
+            "product_line"
+        )["QQ星"].sum()
+
+    def test_readers_see_folds_of_other_workers(self, tmp_path):
+        path = str(tmp_path / "cube.sqlite3")
+        reader, writer = NPSCubeStore(path), NPSCubeStore(path)
+        first = survey_columns(300, seed=1)
+        second = survey_columns(300, seed=2, products=("QQ星",))
+
+        writer.fold("a", response_ids(300, "a"), *first)
+        assert reader.cube().responses == 300
+
+        writer.fold("b", response_ids(300, "b"), *second)
+        cube = reader.cube()
+        assert cube.responses == 600
+        assert np.array_equal(
+            cube.rollup("product_line")["QQ星"],
+            NPSCube.from_columns(*second).rollup("product_line")["QQ星"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_folds_each_a1_response_once(self):
+        agent = QuantitativeAnalysisAgent(agent_id="A1", agent_name="Quantitative", bootstrap_resamples=200)
+        survey = await agent.process({"cleaned_data": {"cleaned_responses": a1_responses(40)}})
+        resubmitted = await agent.process({"cleaned_data": {"cleaned_responses": a1_responses(55)}})
+        assert survey.status == resubmitted.status == AgentStatus.COMPLETED
+
+        orchestrator = WorkflowOrchestrator(workflow_id="cube", enable_checkpointing=False, enable_caching=False)
+        orchestrator.nps_cube_store = NPSCubeStore()
+        state = {"input_metadata": {"survey_id": "2024-05"}}
+        await orchestrator._fold_nps_cube(state, survey)
+        await orchestrator._fold_nps_cube(state, survey)
+        await orchestrator._fold_nps_cube(state, resubmitted)
+        await orchestrator._fold_nps_cube(state, AgentResult(agent_id="A2", status=AgentStatus.COMPLETED, data={}))
+
+        cube = orchestrator.nps_cube_store.cube()
+        assert cube.responses == 55
+        assert summarize(cube.rollup(product_line="金典")[()])["nps"] == round(resubmitted.data["nps_metrics"]["nps_score"], 1)
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_skips_surveys_without_id(self):
+        agent = QuantitativeAnalysisAgent(agent_id="A1", agent_name="Quantitative", bootstrap_resamples=200)
+        survey = await agent.process({"cleaned_data": {"cleaned_responses": a1_responses(40)}})
+
+        orchestrator = WorkflowOrchestrator(workflow_id="cube", enable_checkpointing=False, enable_caching=False)
+        orchestrator.nps_cube_store = NPSCubeStore()
+        await orchestrator._fold_nps_cube({}, survey)
+        await orchestrator._fold_nps_cube({"input_metadata": {}}, survey)
+
+        assert orchestrator.nps_cube_store.cube().responses == 0
+
+        await orchestrator._fold_nps_cube({"input_metadata": {"survey_id": "2024-06"}}, survey)
+        assert orchestrator.nps_cube_store.cube().responses == 40
@@ -0,0 +1,106 @@
+"""Unit tests for the dependency-driven agent scheduler"""
+
+import asyncio
+import time
+
+import pytest
+
+from nps_report_v3.agents.factory import AgentFactory
+from nps_report_v3.workflow.scheduler import DAGScheduler
+
+
+def merge(state, result):
+    return {**state, **result}
+
+
+def make_runner(durations, log=None, fail=None):
+    """Agent stub sleeping for its duration and writing ``<id>_out``"""
+    async def run_agent(agent_id, state):
+        if log is not None:
+            log.append((agent_id, sorted(k for k in state if k.endswith("_out"))))
+        await asyncio.sleep(durations[agent_id])
+        if agent_id == fail:
+            raise RuntimeError(f"{agent_id} failed")
+        return {f"{agent_id}_out": True}
+    return run_agent
+
+
+class TestDAGScheduler:
+    """Test ordering, concurrency and timing reports"""
+
+    def test_dependencies_come_from_reads_and_writes(self):
+        scheduler = DAGScheduler(
+            reads={"B1": ["tagged"], "B2": ["tagged"], "B9": ["B1_out", "B2_out"]},
+            writes={"B1": ["B1_out"], "B2": ["B2_out"], "B9": ["B9_out"]}
+        )
+
+        assert scheduler.dependencies == {"B1": set(), "B2": set(), "B9": {"B1", "B2"}}
+        assert scheduler.order == ["B1", "B2", "B9"]
+
+    def test_cycle_is_rejected(self):
+        with pytest.raises(ValueError):
+            DAGScheduler(reads={"X": ["y"], "Y": ["x"]}, writes={"X": ["x"], "Y": ["y"]})
+
+    @pytest.mark.asyncio
+    async def test_agent_starts_when_its_inputs_exist(self):
+        # C only needs A, so it must not wait for the slow B
+        scheduler = DAGScheduler(
+            reads={"A": [], "B": [], "C": ["A_out"], "D": ["B_out", "C_out"]},
+            writes={"A": ["A_out"], "B": ["B_out"], "C": ["C_out"], "D": ["D_out"]}
+        )
+        log = []
+
+        start = time.perf_counter()
+        state, timings = await scheduler.run(
+            {}, make_runner({"A": 0.01, "B": 0.1, "C": 0.05, "D": 0.01}, log), merge
+        )
+        elapsed = time.perf_counter() - start
+
+        assert state == {"A_out": True, "B_out": True, "C_out": True, "D_out": True}
+        assert ("C", ["A_out"]) in log
+        assert timings["agents"]["C"]["end_ms"] < timings["agents"]["B"]["end_ms"]
+        assert timings["critical_path"] == ["B", "D"]
+        assert elapsed < 0.15
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_is_respected(self):
+        scheduler = DAGScheduler(
+            reads={agent_id: [] for agent_id in "ABCD"},
+            writes={agent_id: [f"{agent_id}_out"] for agent_id in "ABCD"},
+            max_concurrency=2
+        )
+
+        _, timings = await scheduler.run({}, make_runner(dict.fromkeys("ABCD", 0.03)), merge)
+
+        assert timings["wall_time_ms"] >= 55
+        assert timings["agents"]["C"]["start_ms"] > timings["agents"]["C"]["ready_ms"]
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_running_agents(self):
+        scheduler = DAGScheduler(
+            reads={"A": [], "B": [], "C": ["A_out"]},
+            writes={"A": ["A_out"], "B": ["B_out"], "C": ["C_out"]}
+        )
+        log = []
+
+        with pytest.raises(RuntimeError, match="A failed"):
+            await scheduler.run({}, make_runner({"A": 0.01, "B": 1.0, "C": 0.01}, log, fail="A"), merge)
+
+        assert "C" not in [agent_id for agent_id, _ in log]
+
+
+class TestAnalysisPassDeclarations:
+    """Test the built-in analysis agent declarations"""
+
+    def test_b1_to_b8_run_unblocked_and_b9_waits_for_all(self):
+        factory = AgentFactory()
+        agent_ids = [f"B{i}" for i in range(1, 10)]
+        configs = {agent_id: factory.get_agent_config(agent_id) for agent_id in agent_ids}
+
+        scheduler = DAGScheduler(
+            reads={agent_id: c.reads for agent_id, c in configs.items()},
+            writes={agent_id: c.writes for agent_id, c in configs.items()}
+        )
+
+        assert all(not scheduler.dependencies[f"B{i}"] for i in range(1, 9))
+        assert scheduler.dependencies["B9"] == {f"B{i}" for i in range(1, 9)}
@@ -0,0 +1,122 @@
+"""Tests for starting the consulting pass ahead of B9"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus, BaseAgent
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+
+def assessment(level):
+    return {"overall_confidence": level, "data_completeness": 1.0, "recommendation_confidence": 0.8}
+
+
+class StubAgent(BaseAgent):
+    """Agent sleeping for a fixed time and counting its runs"""
+
+    def __init__(self, agent_id, seconds=0.0, data=None, runs=None):
+        super().__init__(agent_id=agent_id, agent_name=agent_id)
+        self.seconds = seconds
+        self.data = data or {f"{agent_id}_out": True}
+        self.runs = runs if runs is not None else {}
+
+    def _validate_input(self, state):
+        return None
+
+    async def process(self, state):
+        self.runs[self.agent_id] = self.runs.get(self.agent_id, 0) + 1
+        await asyncio.sleep(self.seconds)
+        return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data=dict(self.data))
+
+
+class CoordinatorStub(StubAgent):
+    """B9 stand-in with a pre-estimate and a slow final synthesis"""
+
+    def __init__(self, estimated, final, runs):
+        super().__init__("B9", 0.2, {
+            "analysis_coordination": {"synthesis_summary": {"confidence_assessment": assessment(final)}}
+        }, runs)
+        self.estimated = estimated
+
+    def estimate_confidence_assessment(self, state):
+        return assessment(self.estimated)
+
+
+def make_orchestrator(estimated, final, runs):
+    orchestrator = WorkflowOrchestrator(workflow_id="wf-spec", enable_checkpointing=False, enable_caching=False)
+    agents = {"B9": CoordinatorStub(estimated, final, runs)}
+
+    def create_agent(agent_id, **kwargs):
+        seconds = 0.2 if agent_id in ("C1", "C2", "C3", "C4") else 0.0
+        return agents.get(agent_id) or StubAgent(agent_id, seconds, runs=runs)
+
+    orchestrator.factory.create_agent = create_agent
+    return orchestrator
+
+
+async def no_reports(state):
+    return state
+
+
+async def run(orchestrator, speculative):
+    with patch.object(orchestrator, "_generate_html_reports", no_reports), \
+            patch.object(orchestrator.settings, "enable_speculative_consulting", speculative):
+        started = time.perf_counter()
+        state = await orchestrator.execute([{"response_id": "1", "nps_score": 9}])
+        return state, time.perf_counter() - started
+
+
+class TestSpeculativeConsulting:
+    """Test speculation, validation and fallbacks"""
+
+    @pytest.mark.asyncio
+    async def test_b9_is_taken_off_the_critical_path(self):
+        runs = {}
+        baseline, baseline_seconds = await run(make_orchestrator("high", "high", {}), speculative=False)
+        state, seconds = await run(make_orchestrator("high", "high", runs), speculative=True)
+
+        report = state["speculation_report"]
+        assert report["reused"] == ["C1", "C2", "C3", "C4"]
+        assert report["rerun"] == []
+        assert all(runs[agent_id] == 1 for agent_id in ("C1", "C2", "C3", "C4"))
+        # B9 (0.2s) and C1-C4 (0.2s) overlap instead of running back to back
+        assert seconds < baseline_seconds - 0.1
+        assert "speculation_report" not in baseline
+        assert state["agent_sequence"][-6:] == baseline["agent_sequence"][-6:] == ["B9", "C1", "C2", "C3", "C4", "C5"]
+        assert state["confidence_assessment"] == baseline["confidence_assessment"]
+
+    @pytest.mark.asyncio
+    async def test_changed_confidence_reruns_advisors(self):
+        runs = {}
+        state, _ = await run(make_orchestrator("high", "low", runs), speculative=True)
+
+        report = state["speculation_report"]
+        assert report["reused"] == []
+        assert report["rerun"] == ["C1", "C2", "C3", "C4"]
+        assert runs["C1"] == 2
+        assert state["workflow_phase"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_speculation_is_cancelled_when_b9_fails(self):
+        runs = {}
+        orchestrator = make_orchestrator("high", "high", runs)
+        coordinator = orchestrator.factory.create_agent("B9")
+        coordinator.max_retries = 1
+
+        async def fail(state):
+            await asyncio.sleep(0.05)
+            raise RuntimeError("synthesis failed")
+
+        coordinator.process = fail
+
+        with pytest.raises(RuntimeError, match="B9"):
+            await run(orchestrator, speculative=True)
+
+        await asyncio.sleep(0.3)
+        # C1-C4 were started but cancelled before finishing
+        assert runs.get("C1") == 1
+        assert "C5" not in runs
+        assert not [task for task in asyncio.all_tasks() if "speculative" in repr(task.get_coro())]
@@ -0,0 +1,221 @@
+"""Tests for chunked survey reading and the spilled response store"""
+
+import csv
+import json
+import pickle
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from nps_report_v3.agents.base import AgentResult, AgentStatus, BaseAgent
+from nps_report_v3.agents.foundation.A0_ingestion_agent import DataIngestionAgent
+from nps_report_v3.agents.foundation.A1_quantitative_agent import QuantitativeAnalysisAgent
+from nps_report_v3.state import ColumnarResponseStore, NPSCube
+from nps_report_v3.utils.survey_reader import SurveySource
+from nps_report_v3.workflow.orchestrator import WorkflowOrchestrator
+
+
+def raw_rows(count):
+    return [
+        {
+            "response_id": f"r{i}",
+            "nps_score": 1 + i % 10,
+            "comment": f"第{i}条：牛奶很好喝，王先生推荐的" if i % 4 else "",
+            "product_line": ["安慕希", "金典", "舒化"][i % 3],
+            "channel": "线上" if i % 2 else None,
+            "timestamp": f"2024-01-{1 + i % 28:02d}T10:00:00"
+        }
+        for i in range(count)
+    ]
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
+
+
+def cleaned_rows(count):
+    return [
+        {
+            "response_id": f"r{i}",
+            "timestamp": datetime(2024, 1, 1 + i % 28, 10),
+            "nps_score": i % 11,
+            "comment": f"评论{i}" if i % 2 else None,
+            "product_line": ["安慕希", None][i % 2],
+            "customer_segment": None,
+            "channel": "线上",
+            "metadata": {"city": "北京"} if i == 3 else {}
+        }
+        for i in range(count)
+    ]
+
+
+class TestColumnarResponseStore:
+    """Test writing, reading and lifetime of spilled responses"""
+
+    def test_round_trip(self, tmp_path):
+        rows = cleaned_rows(7)
+        store = ColumnarResponseStore.create(str(tmp_path))
+        store.append(rows[:4])
+        store.append(rows[4:])
+        store.seal()
+
+        assert len(store) == 7
+        assert list(store) == rows
+        assert store[3] == rows[3] and store[-1] == rows[-1]
+        assert store[2:5] == rows[2:5]
+        assert store.column("nps_score").tolist() == [r["nps_score"] for r in rows]
+        assert store.column("product_line") == [r["product_line"] for r in rows]
+        codes, values = store.codes("product_line")
+        assert values == ["安慕希"] and codes.tolist() == [0, -1, 0, -1, 0, -1, 0]
+        assert [len(chunk) for chunk in store.iter_chunks(3)] == [3, 3, 1]
+
+    def test_digest_pickle_and_cleanup(self, tmp_path):
+        stores = []
+        for _ in range(2):
+            store = ColumnarResponseStore.create(str(tmp_path))
+            store.append(cleaned_rows(5))
+            stores.append(store.seal())
+
+        # Identical content gives identical agent cache keys
+        assert repr(stores[0]) == repr(stores[1])
+
+        copy = pickle.loads(pickle.dumps(stores[0]))
+        assert list(copy) == list(stores[0])
+
+        directory = stores[0].directory
+        stores[0].close()
+        assert not directory.exists()
+        assert stores[1].directory.exists()
+
+    def test_unsealed_store_cannot_be_read(self, tmp_path):
+        store = ColumnarResponseStore.create(str(tmp_path))
+        store.append(cleaned_rows(2))
+
+        with pytest.raises(RuntimeError):
+            store.column("nps_score")
+        with pytest.raises(TypeError):
+            pickle.dumps(store)
+
+        store.seal()
+        with pytest.raises(RuntimeError):
+            store.append(cleaned_rows(1))
+
+
+class TestSurveySource:
+    """Test chunked reading of survey exports"""
+
+    def test_jsonl_chunks_keep_bad_lines_as_empty_rows(self, tmp_path):
+        path = tmp_path / "survey.jsonl"
+        path.write_text('{"nps_score": 9}\n\nnot json\n{"nps_score": 3}\n', encoding="utf-8")
+
+        chunks = list(SurveySource(path, chunk_size=2).iter_chunks())
+
+        assert chunks == [[{"nps_score": 9}, {}], [{"nps_score": 3}]]
+
+    def test_csv_rows_drop_empty_cells(self, tmp_path):
+        path = tmp_path / "survey.csv"
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["response_id", "nps_score", "comment"])
+            writer.writerow(["a", "9", "很好"])
+            writer.writerow(["b", "4", ""])
+
+        chunks = list(SurveySource(path, chunk_size=10).iter_chunks())
+
+        assert chunks == [[
+            {"response_id": "a", "nps_score": "9", "comment": "很好"},
+            {"response_id": "b", "nps_score": "4"}
+        ]]
+
+    def test_excel_rows(self, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        path = tmp_path / "survey.xlsx"
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["response_id", "nps_score"])
+        workbook.active.append(["a", 10])
+        workbook.save(path)
+
+        assert list(SurveySource(path).iter_chunks()) == [[{"response_id": "a", "nps_score": 10}]]
+
+    def test_unknown_format_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="Unsupported"):
+            SurveySource(tmp_path / "survey.parquet")
+
+
+class TestStreamingIngestion:
+    """Test A0/A1 over a spilled store against the in-memory path"""
+
+    @pytest.mark.asyncio
+    async def test_streamed_result_matches_in_memory(self, tmp_path):
+        rows = raw_rows(50) + [{"response_id": "bad", "nps_score": "x"}]
+        path = write_jsonl(tmp_path / "survey.jsonl", rows)
+        agent = DataIngestionAgent(agent_id="A0", agent_name="Ingestion")
+
+        in_memory = await agent.process({"raw_data": rows})
+        streamed = await agent.process({"raw_data_source": SurveySource(path, chunk_size=8)})
+
+        store = streamed.data["cleaned_data"]["cleaned_responses"]
+        assert isinstance(store, ColumnarResponseStore)
+        assert list(store) == in_memory.data["cleaned_data"]["cleaned_responses"]
+        assert streamed.data["summary"] == in_memory.data["summary"]
+        assert streamed.metadata == {"uncacheable": True}
+
+        quantitative = QuantitativeAnalysisAgent(agent_id="A1", agent_name="Quantitative")
+        listed = in_memory.data["cleaned_data"]["cleaned_responses"]
+        columns = quantitative._response_columns(store)
+        listed_columns = quantitative._response_columns(listed)
+        assert np.array_equal(columns[0], listed_columns[0])
+        assert np.array_equal(columns[2], listed_columns[2])
+        assert quantitative._response_ids(store) == quantitative._response_ids(listed) == [r["response_id"] for r in listed]
+        cubes = [NPSCube.from_columns(*columns), NPSCube.from_columns(*listed_columns)]
+        assert await quantitative._analyze_segments(cubes[0], columns[0]) == \
+            await quantitative._analyze_segments(cubes[1], listed_columns[0])
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_spills_cleaned_responses(self, tmp_path):
+        class StubAgent(BaseAgent):
+            def _validate_input(self, state):
+                return None
+
+            async def process(self, state):
+                return AgentResult(agent_id=self.agent_id, status=AgentStatus.COMPLETED, data={})
+
+        async def no_reports(state):
+            return state
+
+        orchestrator = WorkflowOrchestrator(workflow_id="stream", enable_checkpointing=False, enable_caching=False)
+        orchestrator.factory.create_agent = lambda agent_id, **kwargs: (
+            DataIngestionAgent(agent_id="A0", agent_name="Ingestion") if agent_id == "A0"
+            else StubAgent(agent_id=agent_id, agent_name=agent_id)
+        )
+        orchestrator._generate_html_reports = no_reports
+
+        state = await orchestrator.execute_stream(write_jsonl(tmp_path / "survey.jsonl", raw_rows(20)))
+
+        assert state["workflow_phase"] == "completed"
+        assert state["raw_data"] == []
+        assert len(state["cleaned_data"]["cleaned_responses"]) == 20
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    async def test_ingestion_memory_is_flat_in_survey_size(self, tmp_path):
+        agent = DataIngestionAgent(agent_id="A0", agent_name="Ingestion")
+        peaks = []
+
+        for count in (1000, 10000):
+            source = SurveySource(write_jsonl(tmp_path / f"survey_{count}.jsonl", raw_rows(count)), chunk_size=500)
+            tracemalloc.start()
+            try:
+                result = await agent.process({"raw_data_source": source})
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            assert result.data["summary"]["valid_count"] == count
+
+        # Bounded by the chunk size, not by the number of responses
+        assert peaks[1] < peaks[0] * 1.5
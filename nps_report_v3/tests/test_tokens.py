@@ -0,0 +1,164 @@
+"""Unit tests for token estimation, budgets and prompt fitting"""
+
+import asyncio
+
+import pytest
+
+from nps_report_v3.llm.client import LLMConfig, LLMClientWithFailover
+from nps_report_v3.llm.tokens import (
+    TokenBudget, TokenBudgetExceeded,
+    estimate_tokens, truncate_to_tokens, fit_prompt, fit_evidence,
+    use_token_budget, agent_token_scope, get_current_agent
+)
+from nps_report_v3.cache.llm_response_cache import LLMResponseCache
+from nps_report_v3.tests.test_llm_client import MockLLMClient
+
+
+class TestEstimation:
+    """Test local token estimation and truncation"""
+
+    def test_estimate_grows_with_text(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("很好") < estimate_tokens("很好" * 10)
+        assert estimate_tokens("good taste " * 10) < estimate_tokens("口感很好" * 10)
+
+    def test_truncate_to_tokens(self):
+        text = "安慕希口感很好" * 50
+
+        truncated = truncate_to_tokens(text, 20)
+
+        assert estimate_tokens(truncated) <= 21
+        assert truncated.endswith("…")
+        assert truncate_to_tokens("短文本", 100) == "短文本"
+
+    def test_fit_prompt_keeps_head_and_tail(self):
+        prompt = "任务说明\n" + "证据" * 2000 + "\n以JSON格式返回"
+
+        fitted = fit_prompt(prompt, 200)
+
+        assert estimate_tokens(fitted) <= 200
+        assert fitted.startswith("任务说明")
+        assert fitted.endswith("以JSON格式返回")
+
+
+class TestFitEvidence:
+    """Test evidence list fitting"""
+
+    def test_returns_everything_that_fits(self):
+        items = ["好喝", "太贵", "包装好"]
+        assert fit_evidence(items, 100) == items
+
+    def test_sample_spreads_across_list(self):
+        items = [f"第{i}条评论内容" for i in range(100)]
+
+        selected = fit_evidence(items, 10000, max_items=4)
+
+        assert selected == [items[0], items[25], items[50], items[75]]
+
+    def test_truncate_keeps_leading_items(self):
+        items = ["很" * 30 for _ in range(10)]
+
+        selected = fit_evidence(items, 100, strategy="truncate")
+
+        assert len(selected) == 3
+        assert selected == items[:3]
+
+    def test_single_oversized_item_is_truncated(self):
+        selected = fit_evidence(["很" * 500], 50)
+
+        assert len(selected) == 1
+        assert estimate_tokens(selected[0]) <= 50
+
+
+class TestTokenBudget:
+    """Test workflow and agent budgets"""
+
+    def test_remaining_uses_tightest_limit(self):
+        budget = TokenBudget(workflow_budget=1000, agent_budgets={"C5": 300})
+
+        budget.record_estimate("C5", 100)
+        budget.record_actual("C5", {"prompt_tokens": 120, "total_tokens": 200})
+
+        assert budget.remaining("C5") == 100
+        assert budget.remaining("B1") == 800
+        assert TokenBudget().remaining("A2") is None
+
+    def test_report_compares_estimated_and_actual(self):
+        budget = TokenBudget()
+        budget.record_estimate("A2", 100)
+        budget.record_actual("A2", {"prompt_tokens": 110, "total_tokens": 150})
+        budget.record_estimate("A2", 100)
+        budget.record_actual("A2", {}, cached=True)
+
+        report = budget.report()
+
+        assert report["workflow"]["calls"] == 2
+        assert report["workflow"]["cached_calls"] == 1
+        assert report["workflow"]["estimate_accuracy"] == 0.55
+        assert report["agents"]["A2"]["actual_total_tokens"] == 150
+
+
+class TestClientBudgetIntegration:
+    """Test pre-flight estimation inside the LLM client"""
+
+    @pytest.mark.asyncio
+    async def test_calls_are_attributed_to_active_agent(self):
+        client = LLMClientWithFailover(
+            MockLLMClient(LLMConfig("budget", "key", "base")), None, response_cache=LLMResponseCache()
+        )
+        budget = TokenBudget()
+
+        with use_token_budget(budget), agent_token_scope("B4"):
+            assert get_current_agent() == "B4"
+            await client.generate("分析以下反馈")
+            await client.generate("分析以下反馈")
+
+        usage = budget.report()["agents"]["B4"]
+        assert usage["calls"] == 2
+        assert usage["cached_calls"] == 1
+        assert usage["actual_total_tokens"] == 30
+        assert usage["estimated_prompt_tokens"] == 2 * estimate_tokens("分析以下反馈")
+
+    @pytest.mark.asyncio
+    async def test_coalesced_calls_charge_only_the_leader(self):
+        primary = MockLLMClient(LLMConfig("budget", "key", "base"))
+        client = LLMClientWithFailover(primary, None, response_cache=LLMResponseCache())
+        budget = TokenBudget()
+
+        async def call(agent_id):
+            with agent_token_scope(agent_id):
+                return await client.generate("同一个提示")
+
+        with use_token_budget(budget):
+            await asyncio.gather(call("B2"), call("B3"), call("B5"))
+
+        report = budget.report()
+        assert primary.call_count == 1
+        assert report["agents"]["B2"]["actual_total_tokens"] == 30
+        assert report["agents"]["B3"]["cached_calls"] == report["agents"]["B5"]["cached_calls"] == 1
+        assert report["workflow"]["actual_total_tokens"] == 30
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_blocks_call(self):
+        primary = MockLLMClient(LLMConfig("budget", "key", "base"))
+        client = LLMClientWithFailover(primary, None, response_cache=LLMResponseCache())
+        budget = TokenBudget(agent_budgets={"C1": 10})
+        budget.record_actual("C1", {"prompt_tokens": 5, "total_tokens": 10})
+
+        with use_token_budget(budget), agent_token_scope("C1"):
+            with pytest.raises(TokenBudgetExceeded):
+                await client.generate("新的请求")
+
+        assert primary.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_oversized_prompt_is_fitted_to_remaining_budget(self):
+        primary = MockLLMClient(LLMConfig("budget", "key", "base"))
+        client = LLMClientWithFailover(primary, None, response_cache=LLMResponseCache())
+        budget = TokenBudget(agent_budgets={"B1": 100})
+
+        with use_token_budget(budget), agent_token_scope("B1"):
+            response = await client.generate("任务\n" + "证据" * 500 + "\n输出格式")
+
+        assert estimate_tokens(response.content) < 150
+        assert budget.report()["agents"]["B1"]["fitted_prompts"] == 1
@@ -0,0 +1,70 @@
+"""Unit tests for the shared HTTP transport"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from nps_report_v3.llm.client import LLMConfig, YiliGatewayClient
+from nps_report_v3.llm.transport import HTTPTransport
+
+
+class TestHTTPTransport:
+    """Test pooled client reuse and shutdown"""
+
+    @pytest.mark.asyncio
+    async def test_async_client_is_shared_within_loop(self):
+        transport = HTTPTransport(max_connections=10, max_keepalive_connections=5)
+
+        client = transport.get_async_client()
+
+        assert transport.get_async_client() is client
+        assert client._transport._pool._max_connections == 10
+        await transport.aclose()
+        assert client.is_closed
+
+    def test_each_event_loop_gets_its_own_client(self):
+        transport = HTTPTransport()
+
+        async def grab():
+            return transport.get_async_client()
+
+        first = asyncio.run(grab())
+        second = asyncio.run(grab())
+
+        assert first is not second
+
+    def test_sync_client_is_shared_and_reopened_after_close(self):
+        transport = HTTPTransport()
+
+        client = transport.get_sync_client()
+        assert transport.get_sync_client() is client
+
+        transport.close()
+        assert client.is_closed
+        assert transport.get_sync_client() is not client
+        assert transport.get_metrics()["sync_client_open"]
+
+
+class TestYiliUsesSharedTransport:
+    """Test that gateway clients no longer own a connection pool"""
+
+    @pytest.mark.asyncio
+    async def test_instances_share_pool_and_send_own_headers(self):
+        transport = HTTPTransport()
+        pooled = MagicMock()
+        response = MagicMock()
+        response.json.return_value = {'choices': [{'message': {'content': 'ok'}}]}
+        pooled.post = AsyncMock(return_value=response)
+
+        with patch.object(transport, "get_async_client", return_value=pooled), \
+                patch("nps_report_v3.llm.client.get_http_transport", return_value=transport):
+            first = YiliGatewayClient(LLMConfig("gpt-4", "key-a", "http://gateway.yili.com/v1/"))
+            second = YiliGatewayClient(LLMConfig("gpt-4", "key-b", "http://gateway.yili.com/v1/"))
+
+            assert first.client is second.client
+            await first.generate("你好")
+
+        args, kwargs = pooled.post.call_args
+        assert args[0] == "http://gateway.yili.com/v1/chat/completions"
+        assert kwargs["headers"]["Authorization"] == "Bearer key-a"
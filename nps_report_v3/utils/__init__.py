@@ -10,10 +10,32 @@ from .async_helpers import (
     RetryWithBackoff,
     AsyncCircuitBreaker,
     AsyncRateLimiter,
+    SingleFlight,
+    AdaptiveConcurrencyLimiter,
+    LLMConcurrencyGovernor,
+    CPUExecutor,
+    is_overload_error,
     async_timeout,
     run_in_thread_pool,
-    get_semaphore_manager
+    cpu_bound,
+    run_cpu_bound,
+    fair_share_scope,
+    get_current_tenant,
+    get_semaphore_manager,
+    get_single_flight,
+    get_llm_governor,
+    get_cpu_executor
 )
+from .deadline import (
+    Deadline,
+    DeadlineExceeded,
+    get_current_deadline,
+    use_deadline,
+    create_deadline
+)
+from .text_scrubber import TextScrubber, get_text_scrubber
+from .survey_reader import SurveySource
+from .keyword_matcher import KeywordHit, KeywordMatcher
 
 __all__ = [
     "SemaphoreConfig",
@@ -23,7 +45,29 @@ __all__ = [
     "RetryWithBackoff",
     "AsyncCircuitBreaker",
     "AsyncRateLimiter",
+    "SingleFlight",
+    "AdaptiveConcurrencyLimiter",
+    "LLMConcurrencyGovernor",
+    "CPUExecutor",
+    "is_overload_error",
     "async_timeout",
     "run_in_thread_pool",
-    "get_semaphore_manager"
+    "cpu_bound",
+    "run_cpu_bound",
+    "fair_share_scope",
+    "get_current_tenant",
+    "get_semaphore_manager",
+    "get_single_flight",
+    "get_llm_governor",
+    "get_cpu_executor",
+    "Deadline",
+    "DeadlineExceeded",
+    "get_current_deadline",
+    "use_deadline",
+    "create_deadline",
+    "TextScrubber",
+    "get_text_scrubber",
+    "SurveySource",
+    "KeywordHit",
+    "KeywordMatcher"
 ]
\ No newline at end of file
@@ -4,16 +4,22 @@ Provides concurrency control, batch processing, and parallel execution utilities
 """
 
 import asyncio
+import os
 import time
 import logging
-from collections import deque
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import (
     TypeVar, Generic, Callable, Awaitable,
-    List, Optional, Any, Dict, Tuple
+    List, Optional, Any, Dict, Tuple, Iterator
 )
 from dataclasses import dataclass, field
-from contextlib import asynccontextmanager
-from functools import wraps
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
 import random
 
 logger = logging.getLogger(__name__)
@@ -460,6 +466,351 @@ class AsyncRateLimiter:
         yield
 
 
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller (leader) starts the work; later callers with the same key
+    await the same task and are told they were not the leader, so side effects
+    such as usage accounting happen once. Exceptions propagate to every
+    waiter. Cancelling one waiter only detaches that waiter; the shared call
+    is cancelled once no waiter is left.
+    """
+
+    @dataclass
+    class _Flight:
+        task: asyncio.Task
+        waiters: int = 0
+
+    def __init__(self):
+        self._flights: Dict[str, "SingleFlight._Flight"] = {}
+        self._metrics: Dict[str, int] = {
+            "leaders": 0,
+            "coalesced": 0,
+            "abandoned": 0
+        }
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``func`` once per key among concurrent callers and share its result.
+
+        Returns:
+            The shared result and whether this caller was the leader that ran ``func``
+        """
+        flight = self._flights.get(key)
+        leader = False
+
+        # A flight left over from another event loop cannot be awaited here
+        if flight is not None and flight.task.get_loop() is not asyncio.get_running_loop():
+            flight = None
+
+        if flight is None:
+            flight = self._Flight(task=asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, k=key, f=flight: self._forget(k, f))
+            self._metrics["leaders"] += 1
+            leader = True
+        else:
+            self._metrics["coalesced"] += 1
+            logger.debug(f"Coalesced call onto in-flight key {key[:16]}")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), leader
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+                self._metrics["abandoned"] += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: "SingleFlight._Flight") -> None:
+        """Drop a finished flight unless a newer one already replaced it"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        return len(self._flights)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Get leader/coalesced counts"""
+        return dict(self._metrics, in_flight=self.in_flight())
+
+
+# HTTP statuses that mean the provider is shedding load
+OVERLOAD_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Classify an exception as provider overload (429/5xx/timeout).
+
+    Walks the ``__cause__``/``__context__`` chain because client code often
+    re-raises transport errors wrapped in generic exceptions.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            return True
+        if "timeout" in type(error).__name__.lower():
+            return True
+
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and (status in OVERLOAD_STATUS_CODES or status >= 500):
+            return True
+
+        error = error.__cause__ or error.__context__
+
+    return False
+
+
+_current_tenant: ContextVar[str] = ContextVar("fair_share_tenant", default="default")
+
+
+def get_current_tenant() -> str:
+    """Fair-share tenant (normally the workflow id) of the current context"""
+    return _current_tenant.get()
+
+
+@contextmanager
+def fair_share_scope(tenant: str) -> Iterator[str]:
+    """Queue shared-resource waits in this context under ``tenant``"""
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts with AIMD (additive increase, multiplicative decrease).
+
+    Every healthy completion (fast enough, no overload error) grows the limit by
+    ``increase_step / limit``, i.e. roughly ``increase_step`` per full window of
+    requests. An overload error cuts the limit by ``decrease_factor``; further
+    cuts are suppressed for ``cooldown_seconds`` so that one burst of failures
+    from the same window only counts once.
+
+    Queued callers are grouped by fair-share tenant and freed slots go
+    round-robin across tenants, so a workflow with hundreds of queued calls
+    cannot starve one that only needs a few.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_target_ms: float = 30000.0,
+        cooldown_seconds: float = 5.0
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target_ms = latency_target_ms
+        self.cooldown_seconds = cooldown_seconds
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: "OrderedDict[str, deque]" = OrderedDict()
+        self._last_decrease = float("-inf")
+        self._metrics: Dict[str, Any] = {
+            "acquired": 0,
+            "successes": 0,
+            "overloads": 0,
+            "failures": 0,
+            "increases": 0,
+            "decreases": 0,
+            "peak_limit": initial_limit
+        }
+
+    @property
+    def limit(self) -> int:
+        """Current integer concurrency limit"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot"""
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit"""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._metrics["acquired"] += 1
+            return
+
+        tenant = get_current_tenant()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(tenant, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just before cancellation; give it back
+                self._in_flight -= 1
+                self._wake_waiters()
+            raise
+        finally:
+            queue = self._waiters.get(tenant)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._waiters[tenant]
+
+        self._metrics["acquired"] += 1
+
+    def release(self, latency_ms: Optional[float] = None, error: Optional[BaseException] = None) -> None:
+        """Return a slot and feed the outcome into the AIMD controller"""
+        self._in_flight = max(self._in_flight - 1, 0)
+
+        if error is None:
+            self.record_success(latency_ms)
+        elif is_overload_error(error):
+            self.record_overload()
+        else:
+            # Bad requests, parse errors etc. say nothing about provider load
+            self._metrics["failures"] += 1
+
+        self._wake_waiters()
+
+    def record_success(self, latency_ms: Optional[float] = None) -> None:
+        """Additive increase when the call was healthy"""
+        self._metrics["successes"] += 1
+
+        if latency_ms is not None and latency_ms > self.latency_target_ms:
+            return
+
+        previous = self.limit
+        self._limit = min(float(self.max_limit), self._limit + self.increase_step / max(self._limit, 1.0))
+
+        if self.limit > previous:
+            self._metrics["increases"] += 1
+            self._metrics["peak_limit"] = max(self._metrics["peak_limit"], self.limit)
+            logger.debug(f"Concurrency '{self.name}' raised to {self.limit}")
+
+    def record_overload(self) -> None:
+        """Multiplicative decrease on 429/5xx/timeout"""
+        self._metrics["overloads"] += 1
+        now = time.monotonic()
+
+        if now - self._last_decrease < self.cooldown_seconds:
+            return
+
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._metrics["decreases"] += 1
+        logger.warning(f"Concurrency '{self.name}' cut to {self.limit} after overload")
+
+    def _wake_waiters(self) -> None:
+        """Hand free slots to queued callers, FIFO within a tenant and round-robin across tenants"""
+        while self._waiters and self._in_flight < self.limit:
+            tenant, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(tenant)
+            else:
+                del self._waiters[tenant]
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of one call and record its outcome"""
+        await self.acquire()
+        start_time = time.monotonic()
+        error: Optional[BaseException] = None
+
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if isinstance(error, asyncio.CancelledError):
+                self._in_flight = max(self._in_flight - 1, 0)
+                self._wake_waiters()
+            else:
+                self.release((time.monotonic() - start_time) * 1000, error)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get AIMD state and counters"""
+        return dict(
+            self._metrics,
+            limit=self.limit,
+            in_flight=self._in_flight,
+            waiting=sum(len(queue) for queue in self._waiters.values()),
+            waiting_tenants=len(self._waiters)
+        )
+
+
+class LLMConcurrencyGovernor:
+    """
+    Process-wide governor for LLM traffic with one adaptive limit per provider.
+
+    Each provider gets an :class:`AdaptiveConcurrencyLimiter` and, when a
+    request rate is configured, an :class:`AsyncRateLimiter` in front of it.
+    """
+
+    def __init__(
+        self,
+        limiter_config: Optional[Dict[str, Any]] = None,
+        requests_per_second: float = 0.0,
+        burst: int = 1
+    ):
+        self.limiter_config = limiter_config or {}
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._rate_limiters: Dict[str, AsyncRateLimiter] = {}
+
+    def get_limiter(self, provider: str) -> AdaptiveConcurrencyLimiter:
+        """Get (or lazily create) the limiter for a provider"""
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(name=provider, **self.limiter_config)
+            self._limiters[provider] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """Acquire a provider slot (and rate token) for one LLM call"""
+        if self.requests_per_second > 0:
+            rate_limiter = self._rate_limiters.get(provider)
+            if rate_limiter is None:
+                rate_limiter = AsyncRateLimiter(self.requests_per_second, self.burst)
+                self._rate_limiters[provider] = rate_limiter
+            await rate_limiter.acquire()
+
+        async with self.get_limiter(provider).slot():
+            yield
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-provider limiter metrics"""
+        return {name: limiter.get_metrics() for name, limiter in self._limiters.items()}
+
+
 def async_timeout(
     seconds: float,
     error_message: str = "Operation timed out"
@@ -488,10 +839,172 @@ async def run_in_thread_pool(
 ) -> T:
     """
     Run a synchronous function in a thread pool.
-    Useful for CPU-bound or blocking I/O operations.
+    Useful for blocking I/O; CPU-bound work should use :func:`run_cpu_bound`.
+    """
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        func = partial(func, **kwargs)
+    return await loop.run_in_executor(None, func, *args)
+
+
+def cpu_bound(func: Callable[..., T]) -> Callable[..., T]:
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, func, *args, **kwargs)
+    Mark a module-level pure function as a CPU-heavy step.
+
+    :meth:`CPUExecutor.run` sends marked functions to worker processes, so
+    they must be importable and take compact arguments (lists of strings or
+    numbers, numpy arrays) rather than whole state dicts.
+    """
+    func.__cpu_bound__ = True
+    return func
+
+
+def _worker_ready() -> int:
+    """No-op run by each worker at startup (imports the package once)"""
+    return os.getpid()
+
+
+class CPUExecutor:
+    """
+    Process pool for CPU-bound agent steps.
+
+    Work runs outside the interpreter serving the event loop, so statistics
+    and clustering no longer hold the GIL while API requests wait. Unmarked
+    functions, a disabled pool or a pool that cannot start fall back to the
+    thread pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        enabled: bool = True,
+        start_method: str = "spawn",
+        max_restarts: int = 3
+    ):
+        """
+        Initialize CPU executor.
+
+        Args:
+            max_workers: Worker processes (one per core if None)
+            enabled: Use worker processes at all
+            start_method: Multiprocessing start method for workers
+            max_restarts: Broken pools replaced before falling back to threads for good
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.enabled = enabled
+        self.start_method = start_method
+        self.max_restarts = max_restarts
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.process_tasks = 0
+        self.thread_tasks = 0
+        self.failures = 0
+        self.pool_restarts = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Start the worker pool lazily; None if processes are unavailable"""
+        with self._lock:
+            if self._pool is None and self.enabled:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+                except (OSError, ValueError, NotImplementedError) as e:
+                    logger.warning(f"CPU process pool unavailable, using threads: {e}")
+                    self.enabled = False
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next call starts fresh workers"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self.pool_restarts += 1
+                if self.pool_restarts >= self.max_restarts:
+                    # Workers that keep dying (e.g. cannot import) would only add latency
+                    logger.warning("CPU process pool keeps breaking, using threads from now on")
+                    self.enabled = False
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self) -> None:
+        """Spawn and warm worker processes ahead of the first CPU-bound step"""
+        pool = self._get_pool()
+        if pool is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(
+                loop.run_in_executor(pool, _worker_ready) for _ in range(self.max_workers)
+            ))
+        except BrokenProcessPool as e:
+            logger.warning(f"CPU worker pool failed to start: {e}")
+            self._discard_pool(pool)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run ``func(*args)`` off the event loop.
+
+        Functions marked with :func:`cpu_bound` run in a worker process,
+        anything else in the default thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool() if getattr(func, "__cpu_bound__", False) else None
+        started = time.perf_counter()
+        self.in_flight += 1
+
+        try:
+            if pool is not None:
+                try:
+                    result = await loop.run_in_executor(pool, func, *args)
+                    self.process_tasks += 1
+                    return result
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. OOM kill); retry this call on a thread
+                    logger.warning(f"CPU worker pool broke while running {func.__name__}: {e}")
+                    self._discard_pool(pool)
+
+            result = await loop.run_in_executor(None, func, *args)
+            self.thread_tasks += 1
+            return result
+
+        except Exception:
+            self.failures += 1
+            raise
+
+        finally:
+            self.in_flight -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop worker processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get offload counts and timings"""
+        completed = self.process_tasks + self.thread_tasks
+        return {
+            "enabled": self.enabled,
+            "max_workers": self.max_workers,
+            "start_method": self.start_method,
+            "process_tasks": self.process_tasks,
+            "thread_tasks": self.thread_tasks,
+            "failures": self.failures,
+            "pool_restarts": self.pool_restarts,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_ms / completed, 3) if completed else 0.0,
+            "max_ms": round(self.max_ms, 3)
+        }
 
 
 # Global semaphore manager instance
@@ -500,3 +1013,61 @@ _semaphore_manager = SemaphoreManager()
 def get_semaphore_manager() -> SemaphoreManager:
     """Get global semaphore manager instance"""
     return _semaphore_manager
+
+
+# Global single-flight group instance
+_single_flight = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    """Get global single-flight group instance"""
+    return _single_flight
+
+
+# Global LLM concurrency governor instance
+_llm_governor: Optional[LLMConcurrencyGovernor] = None
+
+def get_llm_governor() -> LLMConcurrencyGovernor:
+    """Get global LLM concurrency governor configured from settings"""
+    global _llm_governor
+
+    if _llm_governor is None:
+        from ..config import get_settings
+
+        settings = get_settings()
+        _llm_governor = LLMConcurrencyGovernor(
+            limiter_config={
+                "initial_limit": settings.llm_concurrency_initial,
+                "min_limit": settings.llm_concurrency_min,
+                "max_limit": settings.llm_concurrency_max,
+                "decrease_factor": settings.llm_concurrency_decrease_factor,
+                "latency_target_ms": settings.llm_latency_target_ms
+            },
+            requests_per_second=settings.llm_requests_per_second
+        )
+
+    return _llm_governor
+
+
+# Global CPU executor instance
+_cpu_executor: Optional[CPUExecutor] = None
+
+def get_cpu_executor() -> CPUExecutor:
+    """Get global CPU executor configured from settings"""
+    global _cpu_executor
+
+    if _cpu_executor is None:
+        from ..config import get_settings
+
+        settings = get_settings()
+        _cpu_executor = CPUExecutor(
+            max_workers=settings.cpu_pool_workers,
+            enabled=settings.enable_cpu_process_pool,
+            start_method=settings.cpu_pool_start_method
+        )
+
+    return _cpu_executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args) -> T:
+    """Run a CPU-heavy step on the global CPU executor"""
+    return await get_cpu_executor().run(func, *args)
@@ -0,0 +1,146 @@
+"""
+Request deadlines for NPS V3 workflows.
+
+A workflow run carries one :class:`Deadline`. Each pass (stage) gets a
+share of the time that is left when it starts, so time a fast stage does
+not use rolls over to later ones. Agents bound their attempts by the active
+deadline and fall back to rule-based output once it runs out; LLM calls
+never wait past it.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request deadline leaves no time for an operation"""
+    pass
+
+
+class Deadline:
+    """
+    Monotonic-clock deadline for one request, with per-stage budgets.
+
+    ``timeout_seconds=None`` means unbounded; every check then passes.
+    Stage deadlines share the root's report, so degraded agents and stage
+    timings are collected in one place.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: Optional[float] = None,
+        stage_shares: Optional[Dict[str, float]] = None,
+        name: str = "request",
+        expires_at: Optional[float] = None,
+        root: Optional["Deadline"] = None
+    ):
+        self.name = name
+        self.started_at = time.monotonic()
+        if expires_at is None and timeout_seconds is not None:
+            expires_at = self.started_at + timeout_seconds
+        elif expires_at is not None and timeout_seconds is None:
+            timeout_seconds = expires_at - self.started_at
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = expires_at
+        self.stage_shares = dict(stage_shares or {})
+        self.root = root or self
+
+        # Only used on the root
+        self._started_stages: Dict[str, Deadline] = {}
+        self.degraded_agents: Dict[str, str] = {}
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (None when unbounded, never negative)"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """True once no time is left"""
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def allows(self, seconds: float) -> bool:
+        """True if ``seconds`` more still fit before the deadline"""
+        remaining = self.remaining()
+        return remaining is None or remaining > seconds
+
+    def stage(self, name: str) -> "Deadline":
+        """
+        Deadline for a workflow stage.
+
+        The stage gets its share of the time left, relative to the shares of
+        the stages that have not started yet; the last stage gets the rest.
+        """
+        root = self.root
+        remaining = root.remaining()
+        expires_at = None
+
+        if remaining is not None:
+            pending = {
+                stage: share for stage, share in root.stage_shares.items()
+                if stage not in root._started_stages
+            }
+            share = pending.get(name)
+            total = sum(pending.values())
+            fraction = share / total if share and total > 0 else 1.0
+            expires_at = time.monotonic() + remaining * fraction
+
+        stage = Deadline(name=name, expires_at=expires_at, root=root)
+        root._started_stages[name] = stage
+        return stage
+
+    def exhausted(self) -> "Deadline":
+        """An already-expired deadline (makes LLM calls fail fast during fallbacks)"""
+        return Deadline(name=self.name, expires_at=time.monotonic(), root=self.root)
+
+    def record_degraded(self, agent_id: str, reason: str) -> None:
+        """Note that ``agent_id`` returned a degraded result"""
+        self.root.degraded_agents[agent_id] = reason
+
+    def report(self) -> Dict[str, Any]:
+        """Budget, elapsed time per stage and degraded agents"""
+        root = self.root
+        now = time.monotonic()
+        return {
+            "timeout_seconds": root.timeout_seconds,
+            "elapsed_seconds": round(now - root.started_at, 3),
+            "exceeded": root.expired(),
+            "stages": {
+                name: {
+                    "budget_seconds": None if stage.timeout_seconds is None else round(stage.timeout_seconds, 3),
+                    "started_at_seconds": round(stage.started_at - root.started_at, 3)
+                }
+                for name, stage in root._started_stages.items()
+            },
+            "degraded_agents": dict(root.degraded_agents)
+        }
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def get_current_deadline() -> Optional[Deadline]:
+    """Deadline of the request running in the current context, if any"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make ``deadline`` the active deadline in this context"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def create_deadline(timeout_seconds: Optional[float] = None) -> Deadline:
+    """Build a request deadline from settings (``timeout_seconds`` overrides)"""
+    from ..config import get_settings
+
+    settings = get_settings()
+    if timeout_seconds is None:
+        timeout_seconds = settings.workflow_deadline_seconds
+    return Deadline(timeout_seconds, stage_shares=settings.workflow_stage_shares)
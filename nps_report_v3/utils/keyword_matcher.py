@@ -0,0 +1,145 @@
+"""
+Aho-Corasick keyword matching for NPS V3 text analysis.
+
+:class:`KeywordMatcher` compiles labelled keyword lexicons (tags, emotion
+words, negations, products, competitors) into one automaton, so a comment
+is scanned once, character by character, for every keyword of every
+lexicon instead of once per keyword.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Set, Tuple
+
+# Lexicon name -> label -> keywords, e.g. {"tag": {"口感": ["口感", "味道"]}}
+Lexicons = Mapping[str, Mapping[str, Iterable[str]]]
+
+
+class KeywordHit(NamedTuple):
+    """One keyword occurrence: text[start:end] == keyword"""
+    start: int
+    end: int
+    keyword: str
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over labelled keyword lexicons.
+
+    A keyword may appear under several lexicons and labels ("失望" is a
+    negative sentiment word and a sadness emotion word); one occurrence
+    counts for all of them. Overlapping keywords are all found ("不满"
+    also contains the negation "不").
+    """
+
+    def __init__(self, lexicons: Lexicons):
+        self._keywords: List[str] = []
+        self._labels: List[List[Tuple[str, str]]] = []
+        index: Dict[str, int] = {}
+
+        for lexicon, labels in lexicons.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    if not keyword:
+                        continue
+                    if keyword not in index:
+                        index[keyword] = len(self._keywords)
+                        self._keywords.append(keyword)
+                        self._labels.append([])
+                    if (lexicon, label) not in self._labels[index[keyword]]:
+                        self._labels[index[keyword]].append((lexicon, label))
+
+        self._transitions, self._outputs = self._compile(self._keywords)
+
+        # Bound lookups save an attribute access per scanned character
+        self._steps = [edges.get for edges in self._transitions]
+
+    @staticmethod
+    def _compile(keywords: List[str]) -> Tuple[List[Dict[str, int]], List[Tuple[int, ...]]]:
+        """
+        Build the trie, its failure links and the output sets, then fold
+        the failure links into the transitions (a DFA), so scanning takes
+        exactly one dict lookup per character.
+        """
+        trie: List[Dict[str, int]] = [{}]
+        outputs: List[Set[int]] = [set()]
+
+        for keyword_id, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                next_state = trie[state].get(char)
+                if next_state is None:
+                    next_state = trie[state][char] = len(trie)
+                    trie.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(keyword_id)
+
+        # Breadth-first, so a state's failure state is always complete first
+        failure = [0] * len(trie)
+        transitions = [dict(edges) for edges in trie]
+        queue = deque(trie[0].values())
+
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[failure[state]]
+
+            for char, target in transitions[failure[state]].items():
+                transitions[state].setdefault(char, target)
+
+            for char, child in trie[state].items():
+                failure[child] = transitions[failure[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        return transitions, [tuple(sorted(output)) for output in outputs]
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """Every keyword occurrence in ``text``, ordered by end position"""
+        steps = self._steps
+        outputs = self._outputs
+        hits = []
+        state = 0
+
+        for end, char in enumerate(text, 1):
+            state = steps[state](char, 0)
+            for keyword_id in outputs[state]:
+                keyword = self._keywords[keyword_id]
+                hits.append(KeywordHit(end - len(keyword), end, keyword))
+
+        return hits
+
+    def keywords(self, text: str) -> List[str]:
+        """Distinct keywords occurring in ``text``, in lexicon order"""
+        return [self._keywords[keyword_id] for keyword_id in self._scan(text)]
+
+    def match(self, text: str) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Distinct keywords found in ``text``, grouped by lexicon and label.
+
+        Returns:
+            Lexicon -> label -> keywords; lexicons and labels without hits are absent
+        """
+        matches: Dict[str, Dict[str, List[str]]] = {}
+
+        for keyword_id in self._scan(text):
+            keyword = self._keywords[keyword_id]
+            for lexicon, label in self._labels[keyword_id]:
+                matches.setdefault(lexicon, {}).setdefault(label, []).append(keyword)
+
+        return matches
+
+    def _scan(self, text: str) -> List[int]:
+        steps = self._steps
+        outputs = self._outputs
+        found: List[int] = []
+        state = 0
+
+        for char in text:
+            state = steps[state](char, 0)
+            output = outputs[state]
+            if output:
+                found += output
+
+        return sorted(set(found)) if found else found
@@ -0,0 +1,104 @@
+"""
+Chunked survey file readers for streaming ingestion.
+
+:class:`SurveySource` reads JSONL, CSV or Excel survey exports a chunk of
+response dicts at a time, so a file never has to be materialized as one
+``raw_data`` list.
+"""
+
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".xlsx": "excel",
+    ".xlsm": "excel"
+}
+
+
+class SurveySource:
+    """
+    A survey file read in chunks of response dicts.
+
+    Rows that cannot be parsed are yielded as empty dicts so row indexes
+    stay aligned with the file; ingestion counts them as invalid.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: Optional[int] = None,
+        file_format: Optional[str] = None
+    ):
+        self.path = Path(path)
+        if chunk_size is None:
+            from ..config import get_settings
+            chunk_size = get_settings().ingestion_chunk_size
+        self.chunk_size = chunk_size
+        self.file_format = file_format or FORMATS.get(self.path.suffix.lower())
+
+        if self.file_format not in set(FORMATS.values()):
+            raise ValueError(f"Unsupported survey file format: {self.path.suffix or file_format}")
+
+    def __repr__(self) -> str:
+        # Size and mtime make the agent result cache key change with the file
+        stat = os.stat(self.path)
+        return f"SurveySource({str(self.path)!r}, size={stat.st_size}, mtime_ns={stat.st_mtime_ns})"
+
+    def iter_chunks(self) -> Iterator[List[Dict[str, Any]]]:
+        """Response dicts in chunks of ``chunk_size`` rows"""
+        rows = getattr(self, f"_iter_{self.file_format}")()
+        chunk = []
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def _iter_jsonl(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, encoding="utf-8-sig") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"{self.path.name}:{line_number}: invalid JSON ({e})")
+                    row = {}
+                yield row if isinstance(row, dict) else {}
+
+    def _iter_csv(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if key and value != ""}
+
+    def _iter_excel(self) -> Iterator[Dict[str, Any]]:
+        try:
+            from openpyxl import load_workbook
+        except ImportError as e:
+            raise ImportError("Reading Excel surveys requires openpyxl (pip install openpyxl)") from e
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+            for values in rows:
+                yield {
+                    key: value
+                    for key, value in zip(header, values)
+                    if key and value is not None and value != ""
+                }
+        finally:
+            workbook.close()
@@ -0,0 +1,162 @@
+"""
+Single-pass PII scrubbing and text cleanup for NPS V3 ingestion.
+
+All PII rules and cleanup rules are compiled into one alternation with
+named groups, so a comment is scanned once and each match is rewritten by
+a typed replacement. :meth:`TextScrubber.scrub_many` scrubs a whole batch
+with a single regex pass over the joined texts.
+"""
+
+import re
+from typing import Callable, Dict, List, Match, Optional, Sequence, Tuple
+
+# Common Chinese surnames
+SURNAMES = (
+    "张王李赵刘陈杨黄周吴徐孙马胡郭何高林郑谢罗梁宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁"
+    "任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯陶贺顾毛郝龚邵万钱严覃武戴莫孔向汤"
+)
+
+# Phrases introducing a name ("我叫张伟", "联系人：李娜")
+NAME_CUES = ("我叫", "名叫", "叫做", "姓名", "联系人", "收货人")
+
+# Roles that only introduce a name when followed by a colon or 叫
+# ("客服：张伟", "店员叫王芳"); bare, they start ordinary feedback ("客服方面很好")
+NAME_ROLES = ("客服", "店员", "导购", "业务员")
+
+# Forms of address following a name ("王先生", "李娜女士")
+NAME_TITLES = ("先生", "女士", "小姐", "老师", "师傅", "经理", "阿姨", "叔叔", "大姐", "主任")
+
+# PII rules in match priority order: (group, pattern, replacement).
+# Digit rules only match whole digit runs, so an ID card is never
+# partially rewritten as a phone number.
+PII_RULES: Tuple[Tuple[str, str, str], ...] = (
+    ("email", r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", "[邮箱]"),
+    ("id_card", r"(?<!\d)(?:\d{17}[\dXx]|\d{15})(?![\dXx])", "[身份证]"),
+    ("bank_card", r"(?<!\d)\d{16,19}(?!\d)", "[银行卡]"),
+    ("phone", r"(?<!\d)(?:\+?86[- ]?)?1[3-9]\d(?:[- ]?\d{4}){2}(?!\d)", "[电话]"),
+    (
+        "name",
+        r"(?P<name_cue>(?:(?:%s)[:\uff1a]?|(?:%s)(?:[:\uff1a]|叫)) ?)[%s](?:(?!%s)[\u4e00-\u9fff]){1,2}" % (
+            "|".join(NAME_CUES), "|".join(NAME_ROLES), SURNAMES, "|".join(NAME_TITLES)
+        ),
+        "[姓名]"
+    ),
+    ("titled_name", r"[%s][\u4e00-\u9fff]{0,2}?(?=%s)" % (SURNAMES, "|".join(NAME_TITLES)), "[姓名]"),
+)
+
+# Placeholder between texts of a batch; no rule matches it or spans it
+_BATCH_SEPARATOR = "\ue000"
+
+QUOTES = {"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"}
+
+# Cleanup rules: (group, pattern). Single spaces are left alone so the
+# common case costs no replacement call.
+CLEANUP_RULES: Tuple[Tuple[str, str], ...] = (
+    ("html", r"<[^>%s]+>" % _BATCH_SEPARATOR),
+    ("whitespace", r"\s{2,}|[^\S ]"),
+    ("control", r"[\x00-\x08\x0e-\x1b]"),
+    ("quote", "[%s]" % "".join(QUOTES)),
+    ("punctuation", r"[!?。！？]{3,}"),
+)
+
+
+# Every character a rule can start with. Python's regex engine tries each
+# alternative at every position; this class rejects most CJK text at once.
+_MATCH_START = r"[<\s\x00-\x1b%s!?。！？A-Za-z0-9._%%+\-%s%s]" % (
+    "".join(QUOTES), SURNAMES, "".join(sorted({cue[0] for cue in NAME_CUES + NAME_ROLES}))
+)
+
+
+def _compile(rules: Sequence[Tuple[str, str]]) -> "re.Pattern[str]":
+    alternation = "|".join(f"(?P<{group}>{pattern})" for group, pattern in rules)
+    return re.compile(f"(?={_MATCH_START})(?:{alternation})")
+
+
+class TextScrubber:
+    """
+    Compiled PII scrubber and text normalizer.
+
+    Matches are rewritten by type: PII becomes a placeholder such as
+    ``[电话]``, whitespace runs collapse to one space, control characters
+    and HTML tags are dropped, curly quotes are straightened and runs of
+    three or more ``!?。！？`` are cut to two.
+    """
+
+    def __init__(self):
+        pii = tuple((group, pattern) for group, pattern, _ in PII_RULES)
+        self._pii_pattern = _compile(pii)
+        self._cleanup_pattern = _compile(CLEANUP_RULES)
+        self._pattern = _compile(pii + CLEANUP_RULES)
+
+        replacements = {group: replacement for group, _, replacement in PII_RULES}
+        self._handlers: Dict[str, Callable[[Match], str]] = {
+            group: (lambda match, value=replacement: value)
+            for group, replacement in replacements.items()
+        }
+        self._handlers.update({
+            "name": lambda match: match.group("name_cue") + replacements["name"],
+            "html": lambda match: "",
+            "whitespace": lambda match: " ",
+            "control": lambda match: "",
+            "quote": lambda match: QUOTES[match.group()],
+            "punctuation": lambda match: match.group()[-1] * 2
+        })
+
+    def _replace(self, match: Match) -> str:
+        return self._handlers[match.lastgroup](match)
+
+    def remove_pii(self, text: str) -> str:
+        """Replace PII in ``text`` with typed placeholders"""
+        if not text:
+            return text
+        return self._pii_pattern.sub(self._replace, text)
+
+    def clean(self, text: str) -> str:
+        """Normalize whitespace, punctuation and markup in ``text``"""
+        if not text:
+            return text
+        return self._cleanup_pattern.sub(self._replace, text).strip()
+
+    def scrub(self, text: str) -> str:
+        """Remove PII and clean ``text`` in one pass"""
+        if not text:
+            return text
+        return self._pattern.sub(self._replace, text).strip()
+
+    def scrub_many(self, texts: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """
+        Scrub a batch of texts with one pass over their concatenation.
+
+        Empty values are returned unchanged, so the result lines up with
+        ``texts`` index by index.
+        """
+        indexes = [i for i, text in enumerate(texts) if text]
+        results = list(texts)
+        if not indexes:
+            return results
+
+        joined = _BATCH_SEPARATOR.join(texts[i] for i in indexes)
+        if joined.count(_BATCH_SEPARATOR) != len(indexes) - 1:
+            # A text contains the separator itself; scrub one by one
+            for i in indexes:
+                results[i] = self.scrub(texts[i])
+            return results
+
+        scrubbed = self._pattern.sub(self._replace, joined).split(_BATCH_SEPARATOR)
+        for i, text in zip(indexes, scrubbed):
+            results[i] = text.strip()
+        return results
+
+
+# Global scrubber instance
+_text_scrubber: Optional[TextScrubber] = None
+
+
+def get_text_scrubber() -> TextScrubber:
+    """Get the process-wide text scrubber"""
+    global _text_scrubber
+
+    if _text_scrubber is None:
+        _text_scrubber = TextScrubber()
+
+    return _text_scrubber
@@ -7,18 +7,61 @@ with checkpointing, memory management, and error recovery.
 
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 import uuid
+from contextvars import ContextVar
 from pathlib import Path
 
-from nps_report_v3.config import get_settings
-from nps_report_v3.state import NPSAnalysisState, create_initial_state
+from nps_report_v3.config import get_settings, ANALYSIS_AGENTS
+from nps_report_v3.state import (
+    LayeredState, NPSAnalysisState, StateView, WorkflowPhase, create_initial_state
+)
+from nps_report_v3.agents.base import ConfidenceConstrainedAgent
 from nps_report_v3.agents.factory import AgentFactory
+from nps_report_v3.cache import make_agent_cache_key
+from nps_report_v3.llm.tokens import create_token_budget, use_token_budget
+from nps_report_v3.utils.async_helpers import fair_share_scope
+from nps_report_v3.utils.deadline import create_deadline, get_current_deadline, use_deadline
+from nps_report_v3.utils.survey_reader import SurveySource
+from nps_report_v3.workflow.scheduler import DAGScheduler
 
 
 logger = logging.getLogger(__name__)
 
+# Workflow fields agents may not overwrite when their output is committed
+PRESERVED_FIELDS = [
+    "input_data", "workflow_id", "workflow_phase", "raw_data", "raw_data_source", "language",
+    "completion_time", "error_details", "agent_sequence", "last_checkpoint"
+]
+
+# Workflow bookkeeping left out of the pass snapshots
+FOUNDATION_SNAPSHOT_EXCLUDED = [
+    "input_data", "workflow_id", "workflow_phase", "raw_data", "raw_data_source", "language",
+    "agent_sequence", "last_checkpoint"
+]
+ANALYSIS_SNAPSHOT_EXCLUDED = FOUNDATION_SNAPSHOT_EXCLUDED + [
+    "pass1_foundation", "schedule_timings", "agent_cache_report", "agent_construction",
+    "agent_retry_report"
+]
+
+STRATEGIC_AGENTS = ["C1", "C2", "C3", "C4"]
+
+# Speculative C1-C4 run of the workflow executing in this context, if any
+_consulting_speculation: ContextVar[Optional[Dict[str, Any]]] = ContextVar("consulting_speculation", default=None)
+
+# Per-agent bookkeeping of the workflow run executing in this context, by report name
+_run_reports: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("run_reports", default=None)
+
+
+def _run_report(name: str) -> Dict[str, Any]:
+    """Report ``name`` of the current run (a throwaway dict outside a run)."""
+    reports = _run_reports.get()
+    if reports is None:
+        return {}
+    return reports.setdefault(name, {})
+
 
 class WorkflowOrchestrator:
     """
@@ -43,13 +86,30 @@ class WorkflowOrchestrator:
 
         self.settings = get_settings()
         self.factory = AgentFactory()
+        self.checkpoint_manager = None
+        self.agent_result_cache = None
+        self.nps_cube_store = None
+
+        if enable_checkpointing:
+            from nps_report_v3.checkpoint import get_checkpoint_manager
+            self.checkpoint_manager = get_checkpoint_manager()
+
+        if enable_caching and self.settings.enable_cache and self.settings.enable_agent_result_cache:
+            from nps_report_v3.cache import get_agent_result_cache
+            self.agent_result_cache = get_agent_result_cache()
+
+        if self.settings.enable_nps_cube:
+            from nps_report_v3.cache import get_nps_cube_store
+            self.nps_cube_store = get_nps_cube_store()
 
         logger.info(f"Initialized WorkflowOrchestrator {self.workflow_id}")
 
     async def execute(
         self,
         raw_data: List[Dict[str, Any]],
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        deadline_seconds: Optional[float] = None,
+        run_id: Optional[str] = None
     ) -> NPSAnalysisState:
         """
         Execute the complete three-pass workflow.
@@ -57,6 +117,9 @@ class WorkflowOrchestrator:
         Args:
             raw_data: Raw survey response data
             config: Optional configuration overrides
+            deadline_seconds: Request time budget (settings default if None)
+            run_id: Id of this run (a new one if None); becomes the state's
+                ``workflow_id`` and keys its checkpoints and fair-share tenant
 
         Returns:
             Final analysis state with all agent outputs
@@ -65,42 +128,321 @@ class WorkflowOrchestrator:
 
         # Create initial state
         state = create_initial_state(
-            workflow_id=self.workflow_id,
+            workflow_id=run_id or self.new_run_id(),
             raw_data=raw_data,
             **config or {}
         )
 
-        # Add input_data structure expected by agent validation
+        # Add input_data structure expected by agent validation (both keys alias raw_data)
         state["input_data"] = {
             "survey_responses": raw_data,
             "responses": raw_data  # Alternative format for compatibility
         }
 
+        return await self._run(state, deadline_seconds)
+
+    async def execute_stream(
+        self,
+        source: Union[str, Path, SurveySource],
+        config: Optional[Dict[str, Any]] = None,
+        deadline_seconds: Optional[float] = None,
+        run_id: Optional[str] = None
+    ) -> NPSAnalysisState:
+        """
+        Execute the workflow over a survey file without loading it into memory.
+
+        A0 reads the file in chunks and spills cleaned responses to a
+        :class:`ColumnarResponseStore`, which becomes
+        ``cleaned_data["cleaned_responses"]``; close it once the result has
+        been consumed to free its disk space early.
+
+        Args:
+            source: JSONL/CSV/Excel file path or a configured SurveySource
+            config: Optional configuration overrides
+            deadline_seconds: Request time budget (settings default if None)
+            run_id: Id of this run (a new one if None)
+
+        Returns:
+            Final analysis state with all agent outputs
+        """
+        if not isinstance(source, SurveySource):
+            source = SurveySource(source)
+
+        logger.info(f"Starting streaming workflow execution for {source.path}")
+
+        state = create_initial_state(
+            workflow_id=run_id or self.new_run_id(),
+            raw_data=[],
+            **config or {}
+        )
+        state["raw_data_source"] = source
+        state["input_data"] = {
+            "survey_responses": source,
+            "responses": source
+        }
+
+        return await self._run(state, deadline_seconds)
+
+    async def execute_many(
+        self,
+        surveys: Iterable[Dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+        deadline_seconds: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute several surveys concurrently, yielding each result as it finishes.
+
+        Every survey runs in its own child orchestrator as a run with id
+        ``<batch run id>_<index>_<survey_id>`` (unique per call), sharing this
+        orchestrator's agent factory and the process-wide LLM, cache and CPU
+        pools. LLM slots are handed out round-robin per run, so a large
+        survey cannot starve small ones; a failing survey does not stop the
+        others.
+
+        Args:
+            surveys: Dicts with ``raw_data`` and optional ``survey_id``,
+                ``config`` and ``deadline_seconds``
+            max_concurrency: Surveys running at once (settings default if None)
+            deadline_seconds: Default time budget per survey
+
+        Yields:
+            Dicts with ``survey_id``, ``index``, ``status`` ("completed" or
+            "failed"), ``duration_seconds`` and either ``state`` or ``error``
+        """
+        surveys = list(surveys)
+        batch_id = self.new_run_id()
+        semaphore = asyncio.Semaphore(max_concurrency or self.settings.batch_max_concurrency)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def run_survey(index: int, survey: Dict[str, Any]) -> None:
+            survey_id = str(survey.get("survey_id") or f"survey_{index + 1}")
+            async with semaphore:
+                started = time.perf_counter()
+                outcome: Dict[str, Any] = {"survey_id": survey_id, "index": index}
+                try:
+                    child = WorkflowOrchestrator(
+                        workflow_id=self.workflow_id,
+                        enable_checkpointing=self.enable_checkpointing,
+                        enable_caching=self.enable_caching,
+                        enable_profiling=self.enable_profiling
+                    )
+                    child.factory = self.factory
+                    outcome["state"] = await child.execute(
+                        survey["raw_data"],
+                        survey.get("config"),
+                        deadline_seconds=survey.get("deadline_seconds", deadline_seconds),
+                        run_id=f"{batch_id}_{index + 1}_{survey_id}"
+                    )
+                    outcome["status"] = "completed"
+                except Exception as e:
+                    logger.error(f"Survey {survey_id} in batch {batch_id} failed: {e}")
+                    outcome["status"] = "failed"
+                    outcome["error"] = str(e)
+                outcome["duration_seconds"] = round(time.perf_counter() - started, 3)
+            await finished.put(outcome)
+
+        logger.info(f"Starting batch {batch_id} with {len(surveys)} surveys")
+        tasks = [asyncio.create_task(run_survey(index, survey)) for index, survey in enumerate(surveys)]
         try:
-            # Foundation Pass (A0-A3)
-            state = await self._execute_foundation_pass(state)
+            for _ in range(len(tasks)):
+                yield await finished.get()
+        finally:
+            # The consumer stopped early (client disconnected); do not leave surveys running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def new_run_id(self) -> str:
+        """Fresh id for one run of this orchestrator, unique across concurrent runs"""
+        return f"{self.workflow_id}_{uuid.uuid4().hex[:12]}"
+
+    async def _run(self, state: NPSAnalysisState, deadline_seconds: Optional[float] = None) -> NPSAnalysisState:
+        """Run all passes; agents already recorded in ``agent_sequence`` are skipped."""
+        run_id = state["workflow_id"]
 
-            # Analysis Pass (B1-B9)
-            state = await self._execute_analysis_pass(state)
+        # Agent outputs are committed as namespaces instead of re-merging the whole state
+        state = LayeredState(state, protected=PRESERVED_FIELDS)
 
-            # Consulting Pass (C1-C5)
-            state = await self._execute_consulting_pass(state)
+        # Token budget shared by every LLM call made while this workflow runs
+        token_budget = create_token_budget()
 
-            # Generate HTML reports after all analysis is complete
-            state = await self._generate_html_reports(state)
+        # Request deadline; each pass gets a share of the time left when it starts
+        deadline = create_deadline(deadline_seconds)
+
+        # Filled by the analysis pass when C1-C4 are started ahead of B9
+        speculation: Dict[str, Any] = {}
+        speculation_token = _consulting_speculation.set(speculation)
+
+        # Reports are kept per run; the orchestrator is shared by concurrent requests
+        reports_token = _run_reports.set({})
+
+        try:
+            # LLM slots are shared round-robin with concurrently running workflows
+            with use_token_budget(token_budget), fair_share_scope(run_id):
+                # Foundation Pass (A0-A3)
+                with use_deadline(deadline.stage("foundation")):
+                    state = await self._execute_foundation_pass(state)
+
+                # Analysis Pass (B1-B9)
+                with use_deadline(deadline.stage("analysis")):
+                    state = await self._execute_analysis_pass(state)
+
+                # Consulting Pass (C1-C5)
+                with use_deadline(deadline.stage("consulting")):
+                    state = await self._execute_consulting_pass(state)
+
+                # Generate HTML reports after all analysis is complete
+                with use_deadline(deadline.stage("reports")):
+                    state = await self._generate_html_reports(state)
 
             state["workflow_phase"] = "completed"
             state["completion_time"] = datetime.utcnow().isoformat()
+            state["deadline_report"] = deadline.report()
+            self._attach_token_usage(state, token_budget)
+            self._attach_agent_cache_report(state)
+            state["agent_construction"] = self._agent_construction_report()
+            state["agent_retry_report"] = dict(_run_report("agent_retry"))
 
-            logger.info(f"Workflow {self.workflow_id} completed successfully")
-            return state
+            logger.info(f"Workflow {run_id} completed successfully")
+            return state.to_dict()
 
         except Exception as e:
-            logger.error(f"Workflow {self.workflow_id} failed: {e}")
+            logger.error(f"Workflow {run_id} failed: {e}")
             state["workflow_phase"] = "failed"
             state["error_details"] = str(e)
+            state["deadline_report"] = deadline.report()
+            self._attach_token_usage(state, token_budget)
+            self._attach_agent_cache_report(state)
+            state["agent_construction"] = self._agent_construction_report()
+            state["agent_retry_report"] = dict(_run_report("agent_retry"))
             raise
 
+        finally:
+            _run_reports.reset(reports_token)
+            _consulting_speculation.reset(speculation_token)
+            await self._discard_speculation(speculation)
+
+    def _pending_agents(self, state: NPSAnalysisState, agent_ids: List[str]) -> List[str]:
+        """Agents of ``agent_ids`` that have not completed in this workflow yet."""
+        completed = set(state.get("agent_sequence") or [])
+        return [agent_id for agent_id in agent_ids if agent_id not in completed]
+
+    async def _save_checkpoint(self, state: NPSAnalysisState, phase: WorkflowPhase) -> None:
+        """Persist the state after an agent or group completes (never fails the workflow)."""
+        if not self.checkpoint_manager:
+            return
+
+        # Checkpoints are keyed by run, so concurrent runs never resume each other
+        run_id = state["workflow_id"]
+        try:
+            checkpoint_id = await self.checkpoint_manager.save_checkpoint(run_id, state.to_dict(), phase)
+            state["last_checkpoint"] = checkpoint_id
+        except Exception as e:
+            logger.warning(f"Checkpoint save failed for workflow {run_id}: {e}")
+
+    async def _execute_agent(self, agent_id: str, state: NPSAnalysisState) -> Any:
+        """
+        Execute one agent, reusing its memoized result when its inputs are unchanged.
+
+        The cache key covers the state keys the agent declares as reads plus
+        its code/prompt version; only completed, non-degraded results are stored.
+        """
+        # Running agents see the layers committed so far, not later commits
+        if isinstance(state, LayeredState):
+            state = state.view()
+
+        cache_key = None
+        if self.agent_result_cache:
+            config = self.factory.get_agent_config(agent_id)
+            try:
+                cache_key = make_agent_cache_key(
+                    agent_id,
+                    self.factory.get_agent_version(agent_id),
+                    state,
+                    [*(config.reads if config else []), "language"]
+                )
+            except TypeError as e:
+                logger.warning(f"Agent {agent_id} inputs cannot be hashed, running without memoization: {e}")
+            # SQLite reads and writes stay off the event loop
+            cached = await asyncio.to_thread(self.agent_result_cache.get, cache_key) if cache_key else None
+            if cached is not None:
+                saved_ms = cached.execution_time_ms or 0
+                _run_report("agent_cache")[agent_id] = {"cache": "hit", "duration_ms": 0, "saved_ms": saved_ms}
+                logger.info(f"Agent {agent_id} inputs unchanged, reusing cached result (saved {saved_ms}ms)")
+                return cached
+
+        start = time.perf_counter()
+        agent = self.factory.create_agent(agent_id)
+        _run_report("agent_construction")[agent_id] = round((time.perf_counter() - start) * 1000, 3)
+        result = await agent.execute(state)
+        duration_ms = int((time.perf_counter() - start) * 1000)
+
+        retries = (result.metadata or {}).get("retries")
+        if retries:
+            _run_report("agent_retry")[agent_id] = retries
+
+        if cache_key:
+            _run_report("agent_cache")[agent_id] = {"cache": "miss", "duration_ms": duration_ms, "saved_ms": 0}
+            degraded = bool((result.metadata or {}).get("degraded"))
+            uncacheable = bool((result.metadata or {}).get("uncacheable"))
+            if result.status.value == "completed" and not degraded and not uncacheable:
+                if result.execution_time_ms is None:
+                    result.execution_time_ms = duration_ms
+                await asyncio.to_thread(self.agent_result_cache.set, cache_key, agent_id, result)
+
+        return result
+
+    async def _fold_nps_cube(self, state: NPSAnalysisState, result: Any) -> None:
+        """
+        Add the survey's not yet folded responses from A1 to the persistent cube (never fails the workflow).
+
+        Response ids are deduplicated within the caller's ``input_metadata["survey_id"]``,
+        which must be globally unique and lets a resubmission with appended
+        responses add just the new ones. Surveys without an id are not folded,
+        since nothing tells a resubmission apart from a new survey.
+        """
+        metadata = result.metadata or {}
+        if not self.nps_cube_store or metadata.get("nps_cube_responses") is None:
+            return
+
+        survey_id = (state.get("input_metadata") or {}).get("survey_id")
+        if not survey_id:
+            logger.warning(f"Workflow {state.get('workflow_id')} has no survey_id, not folding it into the NPS cube")
+            return
+
+        try:
+            await asyncio.to_thread(self.nps_cube_store.fold, f"survey:{survey_id}", *metadata["nps_cube_responses"])
+        except Exception as e:
+            logger.warning(f"NPS cube fold failed for workflow {state.get('workflow_id')}: {e}")
+
+    def _agent_construction_report(self) -> Dict[str, Any]:
+        """Time this run spent obtaining agent instances (near zero when the pool is warm)."""
+        construction_ms = dict(_run_report("agent_construction"))
+        return {
+            "total_ms": round(sum(construction_ms.values()), 3),
+            "agents": construction_ms
+        }
+
+    def _attach_agent_cache_report(self, state: NPSAnalysisState) -> None:
+        """Report per-agent memoization hits/misses and the time they saved."""
+        if not self.agent_result_cache:
+            return
+
+        agents = dict(_run_report("agent_cache"))
+        state["agent_cache_report"] = {
+            "hits": sum(1 for entry in agents.values() if entry["cache"] == "hit"),
+            "misses": sum(1 for entry in agents.values() if entry["cache"] == "miss"),
+            "saved_ms": sum(entry["saved_ms"] for entry in agents.values()),
+            "agents": agents
+        }
+
+    def _attach_token_usage(self, state: NPSAnalysisState, token_budget) -> None:
+        """Report estimated vs. actual LLM token usage in the workflow result."""
+        report = token_budget.report()
+        state["token_usage"] = report
+        state["total_tokens_used"] = report["workflow"]["actual_total_tokens"]
+        state["total_llm_calls"] = report["workflow"]["calls"]
+
     async def _execute_foundation_pass(self, state: NPSAnalysisState) -> NPSAnalysisState:
         """Execute Foundation Pass agents (A0-A3)."""
         logger.info("Executing Foundation Pass (A0-A3)")
@@ -108,22 +450,22 @@ class WorkflowOrchestrator:
         state["workflow_phase"] = "foundation"
 
         # Sequential execution of Foundation agents
-        foundation_agents = ["A0", "A1", "A2", "A3"]
+        foundation_agents = self._pending_agents(state, ["A0", "A1", "A2", "A3"])
+        if not foundation_agents and "pass1_foundation" in state:
+            logger.info("Foundation Pass already completed, skipping")
+            return state
 
         for agent_id in foundation_agents:
             try:
                 logger.info(f"Executing agent {agent_id}")
-                agent = self.factory.create_agent(agent_id)
-                result = await agent.execute(state)
+                result = await self._execute_agent(agent_id, state)
 
                 if result.status.value == "completed":
                     # Update state with agent output while preserving core structure
-                    if result.data:
-                        # Preserve essential state fields during merge
-                        preserved_fields = ["input_data", "workflow_id", "workflow_phase", "raw_data", "language"]
-                        preserved_state = {k: v for k, v in state.items() if k in preserved_fields}
-                        state = {**state, **result.data, **preserved_state}
+                    state = self._merge_single_agent_result(state, result)
+                    await self._fold_nps_cube(state, result)
                     logger.info(f"Agent {agent_id} completed successfully")
+                    await self._save_checkpoint(state, WorkflowPhase.FOUNDATION_PASS)
                 else:
                     error_msg = f"Agent {agent_id} failed: {result.errors or ['Unknown error']}"
                     logger.error(error_msg)
@@ -134,70 +476,34 @@ class WorkflowOrchestrator:
                 raise
 
         # Store Foundation Pass results under pass1_foundation for Analysis Pass agents
-        foundation_data = {}
-        for key, value in state.items():
-            if key not in ["input_data", "workflow_id", "workflow_phase", "raw_data", "language"]:
-                foundation_data[key] = value
-
-        state["pass1_foundation"] = foundation_data
+        state["pass1_foundation"] = state.view(exclude=FOUNDATION_SNAPSHOT_EXCLUDED)
+        await self._save_checkpoint(state, WorkflowPhase.FOUNDATION_PASS)
 
         logger.info("Foundation Pass completed")
         return state
 
     async def _execute_analysis_pass(self, state: NPSAnalysisState) -> NPSAnalysisState:
-        """Execute Analysis Pass agents (B1-B9) with parallel execution."""
+        """Execute Analysis Pass agents (B1-B9) with dependency-driven scheduling."""
         logger.info("Executing Analysis Pass (B1-B9)")
 
         state["workflow_phase"] = "analysis"
 
         try:
-            # Group 1: Segment Analysis (B1-B3) - run in parallel
-            segment_results = await self._run_segment_analysis_parallel(state)
-            state = self._merge_agent_results(state, segment_results)
-
-            # Group 2: Advanced Analytics (B4-B5) - run in parallel
-            analytics_results = await self._run_advanced_analytics_parallel(state)
-            state = self._merge_agent_results(state, analytics_results)
-
-            # Group 3: Dimensional Analysis (B6-B8) - run in parallel
-            dimension_results = await self._run_dimension_analysis_parallel(state)
-            state = self._merge_agent_results(state, dimension_results)
-
-            # Group 4: Analysis Coordinator (B9) - runs last to synthesize
-            logger.info("Executing Analysis Coordinator (B9)")
-            coordinator_agent = self.factory.create_agent("B9")
-            coordinator_result = await coordinator_agent.execute(state)
-
-            if coordinator_result.status.value == "completed":
-                if coordinator_result.data:
-                    state = self._merge_single_agent_result(state, coordinator_result)
-                logger.info("Analysis Coordinator (B9) completed successfully")
-            else:
-                error_msg = f"Analysis Coordinator (B9) failed: {coordinator_result.errors or ['Unknown error']}"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
+            # B1-B9 start as soon as the agents writing their inputs have
+            # finished; B9 depends on every other analysis agent
+            pending_agents = self._pending_agents(state, list(ANALYSIS_AGENTS.keys()))
+            if pending_agents:
+                state = await self._run_agents_scheduled(state, pending_agents, "analysis")
 
             # Store Analysis Pass results under pass2_analysis for Consulting Pass agents
-            analysis_data = {}
-            for key, value in state.items():
-                if key not in ["input_data", "workflow_id", "workflow_phase", "raw_data", "language", "pass1_foundation"]:
-                    analysis_data[key] = value
-
-            state["pass2_analysis"] = analysis_data
+            state["pass2_analysis"] = state.view(exclude=ANALYSIS_SNAPSHOT_EXCLUDED)
 
             # Propagate confidence assessment from analysis synthesis to foundation snapshot
             confidence_summary = state.get("analysis_coordination", {}).get("synthesis_summary", {})
-            confidence_assessment = confidence_summary.get("confidence_assessment")
-            if confidence_assessment:
-                normalized_confidence = self._normalize_confidence_assessment(confidence_assessment)
-                pass1_foundation = state.get("pass1_foundation", {})
-                pass1_foundation["confidence_assessment"] = normalized_confidence
-                state["pass1_foundation"] = pass1_foundation
-                state["confidence_assessment"] = normalized_confidence
-                recommendation_confidence = normalized_confidence.get("overall_confidence_score")
-                if recommendation_confidence is not None:
-                    state["confidence"] = recommendation_confidence
+            for key, value in self._confidence_updates(state, confidence_summary.get("confidence_assessment")).items():
+                state[key] = value
 
+            await self._save_checkpoint(state, WorkflowPhase.ANALYSIS_PASS)
             logger.info("Analysis Pass completed")
             return state
 
@@ -205,113 +511,198 @@ class WorkflowOrchestrator:
             logger.error(f"Analysis Pass failed: {e}")
             raise
 
-    async def _run_segment_analysis_parallel(self, state: NPSAnalysisState) -> List[Any]:
-        """Run segment analysis agents (B1-B3) in parallel."""
-        logger.info("Running segment analysis agents (B1-B3) in parallel")
+    def _confidence_updates(self, state: NPSAnalysisState, confidence_assessment: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """State keys carrying a synthesis confidence assessment to the consulting pass."""
+        if not confidence_assessment:
+            return {}
 
-        segment_agents = ["B1", "B2", "B3"]
-        tasks = []
-
-        for agent_id in segment_agents:
-            agent = self.factory.create_agent(agent_id)
-            tasks.append(agent.execute(state))
+        normalized_confidence = self._normalize_confidence_assessment(confidence_assessment)
+        pass1_foundation = state.get("pass1_foundation") or {}
+        if isinstance(pass1_foundation, StateView):
+            pass1_foundation = pass1_foundation.extend(confidence_assessment=normalized_confidence)
+        else:
+            pass1_foundation = {**pass1_foundation, "confidence_assessment": normalized_confidence}
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        updates = {"pass1_foundation": pass1_foundation, "confidence_assessment": normalized_confidence}
+        recommendation_confidence = normalized_confidence.get("overall_confidence_score")
+        if recommendation_confidence is not None:
+            updates["confidence"] = recommendation_confidence
+        return updates
 
-        # Check for failures and log results
-        processed_results = []
-        for i, result in enumerate(results):
-            agent_id = segment_agents[i]
-            if isinstance(result, Exception):
-                logger.error(f"Segment agent {agent_id} failed with exception: {result}")
-                raise result
-            elif result.status.value != "completed":
-                error_msg = f"Segment agent {agent_id} failed: {result.errors or ['Unknown error']}"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
-            else:
-                logger.info(f"Segment agent {agent_id} completed successfully")
-                processed_results.append(result)
+    def _maybe_start_speculative_consulting(self, state: NPSAnalysisState) -> None:
+        """
+        Start C1-C4 as soon as B1-B8 are done, while B9 is still synthesizing.
 
-        return processed_results
+        C1-C4 read only B-agent outputs; from B9 they only take the confidence
+        assessment, which is pre-estimated here without LLM calls. The
+        consulting pass validates the speculation against B9's final
+        assessment and reruns the agents whose confidence constraints changed.
+        """
+        speculation = _consulting_speculation.get()
+        if speculation is None or speculation or not self.settings.enable_speculative_consulting:
+            return
+        if not isinstance(state, LayeredState):
+            return
+
+        feeding_agents = [agent_id for agent_id in ANALYSIS_AGENTS if agent_id != "B9"]
+        if self._pending_agents(state, feeding_agents) or not self._pending_agents(state, ["B9"]):
+            return
+        agent_ids = self._pending_agents(state, STRATEGIC_AGENTS)
+        if not agent_ids:
+            return
+
+        estimated = None
+        estimator = getattr(self.factory.create_agent("B9"), "estimate_confidence_assessment", None)
+        if estimator is not None:
+            try:
+                estimated = estimator(state)
+            except Exception as e:
+                logger.warning(f"Confidence pre-estimate failed, speculating without one: {e}")
 
-    async def _run_advanced_analytics_parallel(self, state: NPSAnalysisState) -> List[Any]:
-        """Run advanced analytics agents (B4-B5) in parallel."""
-        logger.info("Running advanced analytics agents (B4-B5) in parallel")
+        view = state.view().extend(
+            pass2_analysis=state.view(exclude=ANALYSIS_SNAPSHOT_EXCLUDED),
+            **self._confidence_updates(state, estimated)
+        )
 
-        analytics_agents = ["B4", "B5"]
-        tasks = []
+        # Run under the request deadline, not the analysis stage's share
+        deadline = get_current_deadline()
+        speculation.update(
+            agent_ids=agent_ids,
+            state=view,
+            estimated_confidence=view.get("confidence"),
+            started_at=time.perf_counter(),
+            task=asyncio.create_task(self._run_speculative_consulting(
+                agent_ids, view, deadline.root if deadline is not None else None
+            ))
+        )
+        logger.info(f"Speculatively started {', '.join(agent_ids)} while B9 is running")
+
+    async def _run_speculative_consulting(self, agent_ids: List[str], view: StateView, deadline) -> Dict[str, Any]:
+        """Execute strategic advisors on the speculative state."""
+        with use_deadline(deadline):
+            results = await asyncio.gather(
+                *(self._execute_agent(agent_id, view) for agent_id in agent_ids),
+                return_exceptions=True
+            )
+        return dict(zip(agent_ids, results))
+
+    def _confidence_constraints(self, agent_id: str, state: NPSAnalysisState) -> Tuple[bool, str]:
+        """Confidence inputs that shape a strategic advisor's result."""
+        meets_requirements = self._agent_meets_confidence_requirements(
+            agent_id, self._assess_consulting_confidence(state), state
+        )
+        return meets_requirements, ConfidenceConstrainedAgent.confidence_label(state)
 
-        for agent_id in analytics_agents:
-            agent = self.factory.create_agent(agent_id)
-            tasks.append(agent.execute(state))
+    async def _collect_speculative_consulting(
+        self,
+        state: NPSAnalysisState,
+        strategic_agents: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Validated speculative results by agent id.
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        A result is kept when it completed and the agent's confidence
+        constraints are the same under B9's final assessment; the other
+        agents are left to run normally.
+        """
+        speculation = _consulting_speculation.get()
+        if not speculation:
+            return {}
 
-        # Check for failures and log results
-        processed_results = []
-        for i, result in enumerate(results):
-            agent_id = analytics_agents[i]
-            if isinstance(result, Exception):
-                logger.error(f"Analytics agent {agent_id} failed with exception: {result}")
-                raise result
-            elif result.status.value != "completed":
-                error_msg = f"Analytics agent {agent_id} failed: {result.errors or ['Unknown error']}"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
-            else:
-                logger.info(f"Analytics agent {agent_id} completed successfully")
-                processed_results.append(result)
+        try:
+            results = await speculation["task"]
+        except Exception as e:
+            logger.warning(f"Speculative consulting run failed, running C1-C4 normally: {e}")
+            results = {}
 
-        return processed_results
+        reused: Dict[str, Any] = {}
+        for agent_id in strategic_agents:
+            result = results.get(agent_id)
+            if isinstance(result, BaseException) or result is None or result.status.value != "completed":
+                continue
+            if self._confidence_constraints(agent_id, speculation["state"]) != self._confidence_constraints(agent_id, state):
+                continue
+            reused[agent_id] = result
+
+        state["speculation_report"] = {
+            "agents": list(speculation["agent_ids"]),
+            "reused": sorted(reused),
+            "rerun": [agent_id for agent_id in strategic_agents if agent_id not in reused],
+            "estimated_confidence": speculation["estimated_confidence"],
+            "final_confidence": state.get("confidence"),
+            "head_start_ms": round((time.perf_counter() - speculation["started_at"]) * 1000, 1)
+        }
+        speculation.clear()
 
-    async def _run_dimension_analysis_parallel(self, state: NPSAnalysisState) -> List[Any]:
-        """Run dimensional analysis agents (B6-B8) in parallel."""
-        logger.info("Running dimensional analysis agents (B6-B8) in parallel")
+        logger.info(f"Speculative consulting: reused {sorted(reused) or 'none'}")
+        return reused
 
-        dimension_agents = ["B6", "B7", "B8"]
-        tasks = []
+    async def _discard_speculation(self, speculation: Dict[str, Any]) -> None:
+        """Cancel a speculative run the consulting pass never consumed (e.g. B9 failed)."""
+        task = speculation.pop("task", None)
+        if task is not None and not task.done():
+            task.cancel()
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+        speculation.clear()
 
-        for agent_id in dimension_agents:
-            agent = self.factory.create_agent(agent_id)
-            tasks.append(agent.execute(state))
+    async def _run_agents_scheduled(
+        self,
+        state: NPSAnalysisState,
+        agent_ids: List[str],
+        pass_name: str
+    ) -> NPSAnalysisState:
+        """Run agents in dependency order and record the pass timings."""
+        configs = {agent_id: self.factory.get_agent_config(agent_id) for agent_id in agent_ids}
+        scheduler = DAGScheduler(
+            reads={agent_id: config.reads for agent_id, config in configs.items()},
+            writes={agent_id: config.writes for agent_id, config in configs.items()},
+            max_concurrency=self.settings.agent_max_concurrency
+        )
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def run_agent(agent_id: str, agent_state: NPSAnalysisState) -> Any:
+            logger.info(f"Executing agent {agent_id}")
+            result = await self._execute_agent(agent_id, agent_state)
 
-        # Check for failures and log results
-        processed_results = []
-        for i, result in enumerate(results):
-            agent_id = dimension_agents[i]
-            if isinstance(result, Exception):
-                logger.error(f"Dimension agent {agent_id} failed with exception: {result}")
-                raise result
-            elif result.status.value != "completed":
-                error_msg = f"Dimension agent {agent_id} failed: {result.errors or ['Unknown error']}"
+            if result.status.value != "completed":
+                error_msg = f"Agent {agent_id} failed: {result.errors or ['Unknown error']}"
                 logger.error(error_msg)
                 raise RuntimeError(error_msg)
-            else:
-                logger.info(f"Dimension agent {agent_id} completed successfully")
-                processed_results.append(result)
 
-        return processed_results
+            logger.info(f"Agent {agent_id} completed successfully")
+            return result
+
+        async def on_complete(agent_id: str, agent_state: NPSAnalysisState) -> None:
+            await self._save_checkpoint(agent_state, WorkflowPhase.ANALYSIS_PASS)
+            if pass_name == "analysis":
+                self._maybe_start_speculative_consulting(agent_state)
+
+        state, timings = await scheduler.run(state, run_agent, self._merge_single_agent_result, on_complete)
+
+        schedule_timings = dict(state.get("schedule_timings") or {})
+        schedule_timings[pass_name] = timings
+        state["schedule_timings"] = schedule_timings
+
+        logger.info(
+            f"{pass_name.capitalize()} pass wall time {timings['wall_time_ms']}ms, "
+            f"critical path {' -> '.join(timings['critical_path'])} ({timings['critical_path_ms']}ms)"
+        )
+        return state
 
     def _merge_agent_results(self, state: NPSAnalysisState, results: List[Any]) -> NPSAnalysisState:
         """Merge multiple agent results into the state."""
         for result in results:
-            if result.data:
-                state = self._merge_single_agent_result(state, result)
+            state = self._merge_single_agent_result(state, result)
         return state
 
     def _merge_single_agent_result(self, state: NPSAnalysisState, result: Any) -> NPSAnalysisState:
         """Merge a single agent result into the state, preserving essential fields."""
         if result.data:
-            # Preserve essential state fields during merge
-            preserved_fields = [
-                "input_data", "workflow_id", "workflow_phase", "raw_data", "language",
-                "completion_time", "error_details"
-            ]
-            preserved_state = {k: v for k, v in state.items() if k in preserved_fields}
-            state = {**state, **result.data, **preserved_state}
+            # Adopted as the agent's namespace; PRESERVED_FIELDS are never overwritten
+            state.commit(result.agent_id, result.data)
+
+        # Completed agents are skipped when the workflow resumes from a checkpoint
+        state["agent_sequence"] = [*(state.get("agent_sequence") or []), result.agent_id]
         return state
 
     def _normalize_confidence_assessment(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -366,17 +757,26 @@ class WorkflowOrchestrator:
 
         try:
             # Strategic advisors (C1-C4) - run in parallel with confidence constraints
-            strategic_results = await self._run_strategic_advisors_parallel(state)
-            state = self._merge_agent_results(state, strategic_results)
+            strategic_agents = self._pending_agents(state, STRATEGIC_AGENTS)
+            if strategic_agents:
+                speculative_results = await self._collect_speculative_consulting(state, strategic_agents)
+                strategic_results = await self._run_strategic_advisors_parallel(
+                    state, strategic_agents, speculative_results
+                )
+                state = self._merge_agent_results(state, strategic_results)
+                await self._save_checkpoint(state, WorkflowPhase.CONSULTING_PASS)
+
+            if not self._pending_agents(state, ["C5"]):
+                logger.info("Executive Synthesizer (C5) already completed, skipping")
+                return state
 
             # Executive Synthesizer (C5) - runs last to synthesize all consulting outputs
             logger.info("Executing Executive Synthesizer (C5)")
-            synthesizer_agent = self.factory.create_agent("C5")
-            synthesizer_result = await synthesizer_agent.execute(state)
+            synthesizer_result = await self._execute_agent("C5", state)
 
             if synthesizer_result.status.value == "completed":
-                if synthesizer_result.data:
-                    state = self._merge_single_agent_result(state, synthesizer_result)
+                state = self._merge_single_agent_result(state, synthesizer_result)
+                await self._save_checkpoint(state, WorkflowPhase.CONSULTING_PASS)
                 logger.info("Executive Synthesizer (C5) completed successfully")
             else:
                 error_msg = f"Executive Synthesizer (C5) failed: {synthesizer_result.errors or ['Unknown error']}"
@@ -390,11 +790,22 @@ class WorkflowOrchestrator:
             logger.error(f"Consulting Pass failed: {e}")
             raise
 
-    async def _run_strategic_advisors_parallel(self, state: NPSAnalysisState) -> List[Any]:
-        """Run strategic advisor agents (C1-C4) in parallel with confidence-based constraints."""
+    async def _run_strategic_advisors_parallel(
+        self,
+        state: NPSAnalysisState,
+        strategic_agents: Optional[List[str]] = None,
+        speculative_results: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Run strategic advisor agents (C1-C4) in parallel with confidence-based constraints.
+
+        Agents in ``speculative_results`` (validated results from a run started
+        ahead of B9) are not executed again.
+        """
         logger.info("Running strategic advisor agents (C1-C4) in parallel")
 
-        strategic_agents = ["C1", "C2", "C3", "C4"]
+        strategic_agents = strategic_agents or list(STRATEGIC_AGENTS)
+        speculative_results = speculative_results or {}
         tasks = []
 
         # Check overall confidence for consulting recommendations
@@ -413,9 +824,14 @@ class WorkflowOrchestrator:
                 )
                 low_confidence_agents.add(agent_id)
 
+        async def reuse(result: Any) -> Any:
+            return result
+
         for agent_id in strategic_agents:
-            agent = self.factory.create_agent(agent_id)
-            tasks.append(agent.execute(state))
+            if agent_id in speculative_results:
+                tasks.append(reuse(speculative_results[agent_id]))
+            else:
+                tasks.append(self._execute_agent(agent_id, state))
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -608,7 +1024,7 @@ class WorkflowOrchestrator:
         raw_data = state.get("raw_data", [])
 
         nps_score = nps_metrics.get("nps_score", 0)
-        sample_size = len(raw_data)
+        sample_size = len(raw_data) or (state.get("cleaned_data") or {}).get("total_responses", 0)
 
         # Generate simple HTML report
         html_content = f"""
@@ -849,8 +1265,38 @@ class WorkflowOrchestrator:
             </div>
         '''
 
-    async def recover_from_checkpoint(self, checkpoint_id: str) -> NPSAnalysisState:
-        """Recover workflow from a checkpoint."""
-        # TODO: Implement checkpoint recovery
-        logger.warning("Checkpoint recovery not yet implemented")
-        raise NotImplementedError("Checkpoint recovery not yet implemented")
+    async def recover_from_checkpoint(
+        self,
+        checkpoint_id: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> NPSAnalysisState:
+        """
+        Resume a run from a checkpoint.
+
+        Only agents that had not completed when the checkpoint was taken are
+        executed; reports are regenerated from the restored state.
+
+        Args:
+            checkpoint_id: Checkpoint to resume from (latest if None)
+            run_id: Run to resume, i.e. the ``workflow_id`` of its state
+                (this orchestrator's workflow id if None)
+
+        Returns:
+            Final analysis state
+        """
+        from nps_report_v3.checkpoint import get_checkpoint_manager
+
+        run_id = run_id or self.workflow_id
+        checkpoint_manager = self.checkpoint_manager or get_checkpoint_manager()
+        state = await checkpoint_manager.restore_from_checkpoint(run_id, checkpoint_id)
+
+        completed = state.get("agent_sequence") or []
+        logger.info(
+            f"Resuming workflow {run_id} from checkpoint "
+            f"{checkpoint_id or state.get('last_checkpoint') or 'latest'} "
+            f"with {len(completed)} completed agents: {completed}"
+        )
+
+        state["recovery_point"] = checkpoint_id or state.get("last_checkpoint")
+        state.pop("error_details", None)
+        return await self._run(state)
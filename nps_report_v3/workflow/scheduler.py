@@ -0,0 +1,177 @@
+"""
+Dependency-driven agent scheduler for NPS V3 workflow passes.
+
+Agents declare the state keys they read and write; an agent starts as soon
+as every agent writing one of its inputs has finished, instead of waiting
+at fixed group barriers. Per-run timings and the critical path are reported.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DAGScheduler:
+    """
+    Runs agents in dependency order with a global concurrency cap.
+
+    Agent ``X`` depends on agent ``Y`` when ``X`` reads a key that ``Y``
+    writes. Keys that no scheduled agent writes are expected to be present
+    in the incoming state already (e.g. foundation outputs).
+    """
+
+    def __init__(
+        self,
+        reads: Dict[str, Iterable[str]],
+        writes: Dict[str, Iterable[str]],
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            reads: State keys read by each agent id
+            writes: State keys written by each agent id
+            max_concurrency: Maximum agents running at once (None for unlimited)
+
+        Raises:
+            ValueError: If the declarations contain a dependency cycle
+        """
+        self.agent_ids = sorted(reads.keys() | writes.keys())
+        self.max_concurrency = max_concurrency
+
+        writers: Dict[str, Set[str]] = {}
+        for agent_id, keys in writes.items():
+            for key in keys:
+                writers.setdefault(key, set()).add(agent_id)
+
+        self.dependencies: Dict[str, Set[str]] = {
+            agent_id: {
+                writer
+                for key in reads.get(agent_id, [])
+                for writer in writers.get(key, set())
+                if writer != agent_id
+            }
+            for agent_id in self.agent_ids
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Stable topological order (agent id order among ready agents)"""
+        remaining = {agent_id: set(deps) for agent_id, deps in self.dependencies.items()}
+        order: List[str] = []
+
+        while remaining:
+            ready = sorted(agent_id for agent_id, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Dependency cycle between agents: {sorted(remaining)}")
+            for agent_id in ready:
+                order.append(agent_id)
+                del remaining[agent_id]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+        return order
+
+    async def run(
+        self,
+        state: Dict[str, Any],
+        run_agent: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+        merge: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+        on_complete: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Execute all agents.
+
+        Args:
+            state: Workflow state; each agent sees the state merged so far
+            run_agent: Coroutine running one agent on a state and returning its result
+            merge: Merges one agent result into the state
+            on_complete: Optional coroutine called with the merged state after each agent
+
+        Returns:
+            Final merged state and the timing report
+
+        Raises:
+            Exception: The first agent failure; agents still running are cancelled
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        started_at = time.perf_counter()
+        timings: Dict[str, Dict[str, float]] = {}
+        pending = {agent_id: set(deps) for agent_id, deps in self.dependencies.items()}
+        running: Dict[asyncio.Task, str] = {}
+
+        async def execute(agent_id: str, snapshot: Dict[str, Any]) -> Any:
+            ready_ms = (time.perf_counter() - started_at) * 1000
+            if semaphore:
+                await semaphore.acquire()
+            try:
+                start_ms = (time.perf_counter() - started_at) * 1000
+                result = await run_agent(agent_id, snapshot)
+                end_ms = (time.perf_counter() - started_at) * 1000
+                timings[agent_id] = {
+                    "ready_ms": round(ready_ms, 1),
+                    "start_ms": round(start_ms, 1),
+                    "end_ms": round(end_ms, 1),
+                    "duration_ms": round(end_ms - start_ms, 1)
+                }
+                return result
+            finally:
+                if semaphore:
+                    semaphore.release()
+
+        def launch_ready() -> None:
+            for agent_id in [a for a in self.order if a in pending and not pending[a]]:
+                del pending[agent_id]
+                task = asyncio.create_task(execute(agent_id, state))
+                running[task] = agent_id
+
+        launch_ready()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    agent_id = running.pop(task)
+                    state = merge(state, task.result())
+                    for deps in pending.values():
+                        deps.discard(agent_id)
+                    if on_complete:
+                        await on_complete(agent_id, state)
+                launch_ready()
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running.keys(), return_exceptions=True)
+            raise
+
+        return state, self._timing_report(timings, (time.perf_counter() - started_at) * 1000)
+
+    def _timing_report(self, timings: Dict[str, Dict[str, float]], wall_time_ms: float) -> Dict[str, Any]:
+        """Per-agent timings plus the longest dependency chain by duration"""
+        chain_ms: Dict[str, float] = {}
+        chain_prev: Dict[str, Optional[str]] = {}
+        for agent_id in self.order:
+            previous = max(self.dependencies[agent_id], key=lambda dep: chain_ms[dep], default=None)
+            chain_ms[agent_id] = timings[agent_id]["duration_ms"] + (chain_ms[previous] if previous else 0.0)
+            chain_prev[agent_id] = previous
+
+        critical_path: List[str] = []
+        node = max(chain_ms, key=chain_ms.get, default=None)
+        while node:
+            critical_path.insert(0, node)
+            node = chain_prev[node]
+
+        return {
+            "wall_time_ms": round(wall_time_ms, 1),
+            "critical_path": critical_path,
+            "critical_path_ms": round(chain_ms[critical_path[-1]], 1) if critical_path else 0.0,
+            "serial_time_ms": round(sum(t["duration_ms"] for t in timings.values()), 1),
+            "max_concurrency": self.max_concurrency,
+            "agents": {
+                agent_id: {**timings[agent_id], "depends_on": sorted(self.dependencies[agent_id])}
+                for agent_id in self.order
+            }
+        }
@@ -4,9 +4,8 @@ import pandas as pd
 import numpy as np
 import time
 import re
-import requests
 
-from llm import AzureEmbedding, AzureChat, AzureChatApp
+from llm import AzureEmbedding, AzureChat, AzureChatApp, HTTP_ERRORS
 from prompts import prompt_create, create_prompt_title
 from cluster import text_cluster
 
@@ -14,6 +13,23 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
+# 大模型并发交给V3的自适应并发控制器（按供应商AIMD调整），不可用时退回固定并发4
+try:
+    from nps_report_v3.utils.async_helpers import get_llm_governor
+except Exception:
+    get_llm_governor = None
+
+_fallback_semaphore = None
+
+def llm_slot(model):
+    """获取一次大模型调用的并发名额"""
+    global _fallback_semaphore
+    if get_llm_governor is not None:
+        return get_llm_governor().slot(getattr(model, 'provider', 'azure'))
+    if _fallback_semaphore is None:
+        _fallback_semaphore = asyncio.Semaphore(4)
+    return _fallback_semaphore
+
 
 class ModelCallError(Exception):
     """Raised when there's an error calling the large language model"""
@@ -108,7 +124,8 @@ async def process_batch_with_retry(model, df, question, theme, emotion, start_nu
     """处理单个批次，带重试机制"""
     for attempt in range(max_retries):
         try:
-            result = await result_process(model, df, question, theme, emotion, start_num, step)
+            async with llm_slot(model):
+                result = await result_process(model, df, question, theme, emotion, start_num, step)
             print(f"成功处理{start_num}~{start_num+step}")
             return result
         except Exception as e:
@@ -132,32 +149,29 @@ async def sentiment_triplet_extraction(model, df, question, theme, emotion):
     batch_size = 20
     total_batches = (len(df) + batch_size - 1) // batch_size
     
-    # 创建信号量来限制并发数
-    semaphore = asyncio.Semaphore(4)  # 最大并发数为5
-    
-    async def process_with_semaphore(batch_start):
-        async with semaphore:
-            # 获取当前批次的数据
-            batch_end = min(batch_start + batch_size, len(df))
-            batch_df = df.iloc[batch_start:batch_end].copy()
-            
-            # 处理当前批次
-            result = await process_batch_with_retry(
-                model, df, question, theme, emotion, 
-                batch_start, batch_size
-            )
-            
-            # 直接与原始数据合并
-            if not result.empty:
-                batch_df = batch_df.merge(result, on='mark', how='left')
-            else:
-                batch_df['aspect'] = '未知'
-                batch_df['opinion'] = '未知'
-            
-            return batch_df
+    # 并发数由llm_slot按供应商自适应控制
+    async def process_one_batch(batch_start):
+        # 获取当前批次的数据
+        batch_end = min(batch_start + batch_size, len(df))
+        batch_df = df.iloc[batch_start:batch_end].copy()
+        
+        # 处理当前批次
+        result = await process_batch_with_retry(
+            model, df, question, theme, emotion, 
+            batch_start, batch_size
+        )
+        
+        # 直接与原始数据合并
+        if not result.empty:
+            batch_df = batch_df.merge(result, on='mark', how='left')
+        else:
+            batch_df['aspect'] = '未知'
+            batch_df['opinion'] = '未知'
+        
+        return batch_df
     
     # 创建所有任务
-    tasks = [process_with_semaphore(i * batch_size) for i in range(total_batches)]
+    tasks = [process_one_batch(i * batch_size) for i in range(total_batches)]
     
     # 并发执行所有任务
     results = await asyncio.gather(*tasks)
@@ -175,7 +189,7 @@ async def text_labelling(model, df, question, theme, emotion):
     try:
         # 直接返回处理后的结果，因为合并操作已经在 sentiment_triplet_extraction 中完成
         return await sentiment_triplet_extraction(model, df, question, theme, emotion)
-    except requests.RequestException as e:
+    except HTTP_ERRORS as e:
         raise ModelCallError(f"调用语言模型时出错: {str(e)}", "labeling")
     except Exception as e:
         raise LabelingError(f"标注过程中出错: {str(e)}")
@@ -190,7 +204,8 @@ async def generate_title_with_retry(model, theme, emotion, answer_list, max_retr
         try:
             # 使用 run_in_executor 将同步的 model.chat 转换为异步操作
             prompt = create_prompt_title(theme, emotion, answer_list)
-            title = await loop.run_in_executor(None, model.chat, prompt)
+            async with llm_slot(model):
+                title = await loop.run_in_executor(None, model.chat, prompt)
             break
         except Exception as e:
             if retry_count == max_retries - 1:
@@ -202,9 +217,8 @@ async def generate_title_with_retry(model, theme, emotion, answer_list, max_retr
 
 async def generate_titles(model, theme, emotion, category, best_n_clusters):
     """批量并发生成所有标题"""
-    # 使用较小的并发数以避免API限制
+    # 并发数由llm_slot按供应商自适应控制，避免触发API限流
     num=best_n_clusters
-    semaphore = asyncio.Semaphore(4)
     
     # 预处理所有prompt
     prompts = []
@@ -212,15 +226,14 @@ async def generate_titles(model, theme, emotion, category, best_n_clusters):
         answer_list = category[cluster_id]
         prompts.append((cluster_id, answer_list))
         
-    async def generate_with_semaphore(cluster_id, answer_list):
-        async with semaphore:
-            # 现在使用异步的generate_title_with_retry
-            title = await generate_title_with_retry(model, theme, emotion, answer_list)
-            print(title)
-            return cluster_id, title
+    async def generate_one_title(cluster_id, answer_list):
+        # 现在使用异步的generate_title_with_retry
+        title = await generate_title_with_retry(model, theme, emotion, answer_list)
+        print(title)
+        return cluster_id, title
             
     # 创建所有任务
-    tasks = [generate_with_semaphore(cluster_id, answer_list) 
+    tasks = [generate_one_title(cluster_id, answer_list) 
              for cluster_id, answer_list in prompts]
     
     # gather并发执行